@@ -0,0 +1,5 @@
+"""Public API for commands, each module with a command is a command named as the module."""
+
+## Initialization code #################################################################################################
+
+## Public API ##########################################################################################################
@@ -0,0 +1,167 @@
+"""Common definitions for commands, for details refer to:
+
+    - https://docs.scrapy.org/en/latest/topics/commands.html"""
+
+import ast
+import gzip
+import itertools
+import os
+import pathlib
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+import scrapy
+import scrapy.http
+import scrapy.item
+from w3lib.http import headers_raw_to_dict
+
+from ..items import CompactItemBase, QuotesParser
+
+
+@dataclass
+class CorpusDocument:
+    """A stored HTML document with the URL it was fetched from, to parse it again."""
+
+    #: The URL the document was fetched from.
+    url: str
+    #: The body of the document.
+    body: bytes
+    #: The status code of the HTTP response.
+    status: int = 200
+    #: The headers of the HTTP response, to determine the encoding of the body.
+    headers: dict[bytes, list[bytes]] = field(default_factory=dict)
+
+
+@dataclass
+class ReparseResult:
+    """The result of parsing a :class:`CorpusDocument` again."""
+
+    #: The URL of the document.
+    url: str
+    #: The type of page identified while parsing, ``None`` if it failed.
+    page_type: str | None
+    #: The items parsed.
+    items: list[scrapy.item.Item | CompactItemBase] = field(default_factory=list)
+    #: The representation of the error if the parsing failed, ``None`` otherwise.
+    error: str | None = None
+
+
+def _open(path: str) -> BinaryIO:
+    """Opens a file of a corpus for reading, decompressing it if it is compressed with gzip.
+
+    :param path: Path to the file.
+    :return: The stream of the file."""
+    with open(path, "rb") as stream:
+        is_gzip = stream.read(2) == b"\x1f\x8b"
+
+    return gzip.open(path, "rb") if is_gzip else open(path, "rb")  # pylint: disable=consider-using-with
+
+
+def iter_http_cache_entry(path: str) -> Iterator[CorpusDocument]:
+    """Reads the document of an entry of the filesystem storage of the HTTP cache of Scrapy.
+
+    :param path: Path to the folder of the entry.
+    :return: An iterator with the document of the entry."""
+    with _open(os.path.join(path, "meta")) as stream:
+        # The metadata is also pickled, but its representation is read instead to not unpickle files.
+        meta = ast.literal_eval(stream.read().decode("utf8"))
+    with _open(os.path.join(path, "response_headers")) as stream:
+        headers = headers_raw_to_dict(stream.read())
+    with _open(os.path.join(path, "response_body")) as stream:
+        body = stream.read()
+
+    yield CorpusDocument(url=meta.get("response_url", meta["url"]), body=body, status=meta["status"], headers=headers)
+
+
+def iter_warc(path: str) -> Iterator[CorpusDocument]:
+    """Reads the documents of the response records of a WARC file, which can be compressed with gzip.
+
+    :param path: Path to the file.
+    :raises RuntimeError: The file is not a valid WARC file.
+    :return: An iterator with the documents."""
+    with _open(path) as stream:
+        for line in iter(stream.readline, b""):
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise RuntimeError(f"Invalid WARC record at '{path}'.")
+            # The headers of the record end with an empty line.
+            record = headers_raw_to_dict(
+                b"".join(itertools.takewhile(lambda header: header != b"\r\n", iter(stream.readline, b"")))
+            )
+            block = stream.read(int(record[b"Content-Length"][0]))
+            if record.get(b"WARC-Type", [b""])[0] != b"response" or not block.startswith(b"HTTP/"):
+                continue
+
+            # The block of a response record is the HTTP response, with the status line, the headers and the body.
+            head, _, body = block.partition(b"\r\n\r\n")
+            status_line, _, raw_headers = head.partition(b"\r\n")
+            yield CorpusDocument(
+                url=record[b"WARC-Target-URI"][0].decode("utf8"),
+                body=body,
+                status=int(status_line.split()[1]),
+                headers=headers_raw_to_dict(raw_headers),
+            )
+
+
+def iter_corpus(path: str) -> Iterator[CorpusDocument]:
+    """Reads the documents of a corpus of stored HTML, that can be a WARC file or a folder with any of the below:
+
+    - Entries of the filesystem storage of the HTTP cache of Scrapy.
+    - WARC files, with the extension ``.warc`` or ``.warc.gz``.
+    - HTML files, as stored by :class:`~scrapy_tor_playwright_demo.pipelines.pipelines.FileSystemPipeline`, for
+      which the URL is not known and thus the ``file://`` URL of the file is used.
+
+    :param path: Path to the corpus.
+    :return: An iterator with the documents."""
+    if os.path.isfile(path):
+        yield from iter_warc(path)
+        return
+
+    for folder, folders, files in os.walk(path):
+        folders.sort()
+        if "meta" in files and "response_body" in files:
+            yield from iter_http_cache_entry(folder)
+            continue
+        for name in sorted(files):
+            if name.endswith((".warc", ".warc.gz")):
+                yield from iter_warc(os.path.join(folder, name))
+            elif name.endswith(".html"):
+                with open(file_path := os.path.join(folder, name), "rb") as stream:
+                    yield CorpusDocument(url=pathlib.Path(file_path).resolve().as_uri(), body=stream.read())
+
+
+def reparse_document(document: CorpusDocument, compact_items: bool = False) -> ReparseResult:
+    """Parses a document again, rebuilding its HTTP response.
+
+    :param document: The document.
+    :param compact_items: Whether to parse compact items instead of Scrapy items.
+    :return: The result of the document."""
+    response = scrapy.http.HtmlResponse(
+        request=scrapy.http.Request(document.url),
+        url=document.url,
+        body=document.body,
+        status=document.status,
+        headers=document.headers,
+    )
+    parser = QuotesParser.for_response(response, compact_items=compact_items).parse()
+
+    return ReparseResult(url=document.url, page_type=parser.page_type, items=parser.items)
+
+
+def reparse_documents(documents: list[CorpusDocument], compact_items: bool = False) -> list[ReparseResult]:
+    """Parses documents again, suitable to run in a worker process, a document that fails does not stop the others.
+
+    :param documents: The documents.
+    :param compact_items: Whether to parse compact items instead of Scrapy items.
+    :return: The result of each document, in the same order."""
+    results = []
+    for document in documents:
+        try:
+            result = reparse_document(document, compact_items=compact_items)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            result = ReparseResult(url=document.url, page_type=None, error=repr(ex))
+        results.append(result)
+
+    return results
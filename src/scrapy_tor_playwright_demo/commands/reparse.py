@@ -0,0 +1,75 @@
+"""Command that parses a corpus of stored HTML again, for details refer to:
+
+    - https://docs.scrapy.org/en/latest/topics/commands.html#custom-project-commands"""
+
+import argparse
+
+import scrapy.commands
+import scrapy.exceptions
+
+from ..spiders import ReparseSpider
+
+
+class Command(scrapy.commands.ScrapyCommand):
+    """Command that parses a corpus of stored HTML again with :class:`~scrapy_tor_playwright_demo.spiders.ReparseSpider`
+    and reports the throughput in documents per second. It can be executed as below:
+
+    .. code-block:: powershell
+
+        ./manage.ps1 scrapy reparse '.scrapy/httpcache/quotes' --processes 8
+    """
+
+    #: The command can only run from the project.
+    requires_project = True
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def syntax(self) -> str:
+        """The syntax of the command.
+
+        :return: The syntax."""
+        return "[options] <corpus>"
+
+    def short_desc(self) -> str:
+        """The short description of the command.
+
+        :return: The description."""
+        return "Parse stored HTML again into the item pipelines, from the HTTP cache, WARC files or stored items"
+
+    def add_options(self, parser: argparse.ArgumentParser) -> None:
+        """Adds the options of the command.
+
+        :param parser: The parser of the arguments."""
+        super().add_options(parser)
+        parser.add_argument(
+            "--processes", type=int, default=None, help="number of worker processes (default: number of processors)"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=64, help="number of documents sent to a worker at once (default: 64)"
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        """Runs the command.
+
+        :param args: The positional arguments.
+        :param opts: The options.
+        :raises scrapy.exceptions.UsageError: The corpus was not given."""
+        if len(args) != 1:
+            raise scrapy.exceptions.UsageError()
+
+        crawler = self.crawler_process.create_crawler(ReparseSpider)
+        self.crawler_process.crawl(crawler, source=args[0], processes=opts.processes, batch_size=opts.batch_size)
+        self.crawler_process.start()
+
+        if self.crawler_process.bootstrap_failed or crawler.stats is None:
+            self.exitcode = 1
+            return
+        stats = crawler.stats
+        print(
+            f"Parsed {stats.get_value('reparse/documents', 0)} documents into {stats.get_value('reparse/items', 0)} "
+            f"items with {stats.get_value('reparse/errors', 0)} errors, "
+            f"{stats.get_value('reparse/docs_per_second', 0.0):.1f} documents per second."
+        )
@@ -0,0 +1,142 @@
+"""Command that runs a sharded crawl in several worker processes, for details refer to:
+
+    - https://docs.scrapy.org/en/latest/topics/commands.html#custom-project-commands"""
+
+import argparse
+import json
+import os
+import pprint
+import shutil
+import subprocess
+import sys
+
+import scrapy.commands
+import scrapy.exceptions
+import scrapy.utils.conf
+import scrapy.utils.project
+
+from ..frontier.frontier import merge_stats
+from ..pipelines.pipelines import FS_DEFAULT_FOLDER
+
+
+class Command(scrapy.commands.ScrapyCommand):
+    """Command that runs a crawl in several worker processes, each running ``scrapy crawl`` for a shard of the
+    requests with :class:`~scrapy_tor_playwright_demo.frontier.frontier.FrontierScheduler`, and merges their stats
+    once all finish. It can be executed as below:
+
+    .. code-block:: powershell
+
+        ./manage.ps1 scrapy shard quotes --workers 4 `-a mode='nojs'
+
+    Each worker uses a share of the proxies of ``ROTATING_PROXY_LIST``, its own browser, and stores the items of the
+    filesystem pipeline in its own folder. The frontier, the stats and the logs of the workers are in the run folder,
+    which is created anew on every run.
+    """
+
+    #: The command can only run from the project.
+    requires_project = True
+
+    ## Private API #####################################################################################################
+    def __get_worker_args(self, spider: str, opts: argparse.Namespace, index: int, run_dir: str) -> list[str]:
+        """Returns the arguments of the ``scrapy crawl`` command of a worker.
+
+        :param spider: The name of the spider.
+        :param opts: The options of this command.
+        :param index: The index of the worker, which is its shard.
+        :param run_dir: Path to the run folder.
+        :return: The arguments."""
+        proxies = self.settings.getlist("ROTATING_PROXY_LIST")
+        # Split the proxies between the workers, sharing them if there are fewer proxies than workers.
+        share = proxies[index :: opts.workers] or ([proxies[index % len(proxies)]] if proxies else [])
+        fs_folder = self.settings.get("FS_PIPELINE_FOLDER", None) or FS_DEFAULT_FOLDER
+        worker_settings = {
+            "SCHEDULER": "scrapy_tor_playwright_demo.frontier.frontier.FrontierScheduler",
+            "STATS_CLASS": "scrapy_tor_playwright_demo.frontier.frontier.ShardStatsCollector",
+            "FRONTIER_PATH": os.path.join(run_dir, "frontier.sqlite3"),
+            "SHARD_INDEX": index,
+            "SHARD_COUNT": opts.workers,
+            "SHARD_STATS_PATH": os.path.join(run_dir, f"worker-{index}.json"),
+            "LOG_FILE": os.path.join(run_dir, f"worker-{index}.log"),
+            "FS_PIPELINE_FOLDER": os.path.join(fs_folder, f"shard-{index}"),
+        }
+        if share:
+            worker_settings["ROTATING_PROXY_LIST"] = ",".join(share)
+
+        args = [sys.executable, "-m", "scrapy", "crawl", spider]
+        for name, value in scrapy.utils.conf.arglist_to_dict(opts.spargs).items():
+            args.extend(["-a", f"{name}={value}"])
+        # The settings given to this command are forwarded first, so that the settings of the worker prevail.
+        for setting in opts.set:
+            args.extend(["-s", setting])
+        for name, value in worker_settings.items():
+            args.extend(["-s", f"{name}={value}"])
+
+        return args
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def syntax(self) -> str:
+        """The syntax of the command.
+
+        :return: The syntax."""
+        return "[options] <spider>"
+
+    def short_desc(self) -> str:
+        """The short description of the command.
+
+        :return: The description."""
+        return "Run a spider in several worker processes, each crawling a shard of the requests"
+
+    def add_options(self, parser: argparse.ArgumentParser) -> None:
+        """Adds the options of the command.
+
+        :param parser: The parser of the arguments."""
+        super().add_options(parser)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of worker processes (default is the number of processors)",
+        )
+        parser.add_argument(
+            "--run-dir", default=None, help="folder of the frontier, stats and logs (default is .scrapy/shard/<spider>)"
+        )
+        parser.add_argument(
+            "-a", dest="spargs", action="append", default=[], metavar="NAME=VALUE", help="set spider argument"
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        """Runs the command.
+
+        :param args: The positional arguments.
+        :param opts: The options.
+        :raises scrapy.exceptions.UsageError: The spider was not given, or the number of workers is invalid."""
+        if len(args) != 1 or opts.workers < 1:
+            raise scrapy.exceptions.UsageError()
+        spider = args[0]
+
+        run_dir = os.path.abspath(
+            opts.run_dir or scrapy.utils.project.data_path(os.path.join("shard", spider), createdir=False)
+        )
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir)
+
+        workers = [
+            # pylint: disable-next=consider-using-with
+            subprocess.Popen(self.__get_worker_args(spider, opts, index, run_dir))
+            for index in range(opts.workers)
+        ]
+        codes = [worker.wait() for worker in workers]
+        self.exitcode = 1 if any(codes) else 0
+
+        stats = []
+        for index in range(opts.workers):
+            if os.path.exists(path := os.path.join(run_dir, f"worker-{index}.json")):
+                with open(path, "r", encoding="utf8") as stream:
+                    stats.append(json.load(stream))
+        merged = merge_stats(stats)
+        with open(os.path.join(run_dir, "stats.json"), "w", encoding="utf8") as stream:
+            json.dump(merged, stream, indent=2)
+        print(f"Merged stats of {len(stats)} of {opts.workers} workers, see '{run_dir}':")
+        pprint.pprint(merged)
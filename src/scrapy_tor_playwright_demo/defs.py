@@ -1,37 +1,178 @@
 """Common definitions for the project."""
 
+import dataclasses
+import functools
+import hashlib
 import logging
+import time
+import unicodedata
 import uuid
+import weakref
 from typing import Any
 
-import playwright_stealth
 import scrapy
+import scrapy.crawler
 import scrapy.http
 import twisted.python.failure
 
+from .stores.contexts import ContextPool, ContextRegistry
+from .stores.sessions import SessionManager
+from .stores.subresources import SubresourceCache
 
-class PlaywrightMixin:
+
+class InstrumentationMixin:
+    """A mixin that provides utils to instrument the stages a request goes through.
+
+    Marks are timestamps stored in the request metadata when a stage starts or ends, and stage durations are derived
+    from them, so that they can be collected by an extension once the request has gone through all the stages."""
+
+    # pylint: disable=too-few-public-methods
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _mark(request: scrapy.http.Request, name: str) -> None:
+        """Stores the current time as a mark in the request.
+
+        :param request: The request to mark.
+        :param name: The name of the mark."""
+        request.meta.setdefault("instrumentation", {})[name] = time.perf_counter()
+
+    @staticmethod
+    def _get_mark(request: scrapy.http.Request, name: str) -> float | None:
+        """Returns a mark stored in the request.
+
+        :param request: The request.
+        :param name: The name of the mark.
+        :return: The time of the mark, or ``None`` if the request was not marked."""
+        return request.meta.get("instrumentation", {}).get(name, None)
+
+    @staticmethod
+    def _get_stage_durations(request: scrapy.http.Request) -> dict[str, float]:
+        """Returns the durations of the stages of the request derived from its marks, stages that were not reached
+        or not marked are skipped.
+
+        :param request: The request.
+        :return: The durations in seconds, keyed by stage."""
+        marks = request.meta.get("instrumentation", {})
+        # Each stage goes from the first mark to the second mark, in the order they happen.
+        stages = {
+            "proxy": ("proxy_start", "proxy_end"),
+            "context": ("proxy_end", "page_created"),
+            "stealth": ("page_created", "stealth_end"),
+            "navigation": ("stealth_end", "page_loaded"),
+            "content": ("page_loaded", "response"),
+            "download": ("proxy_end", "response"),
+            "close": ("close_start", "close_end"),
+            "parse": ("parse_start", "parse_end"),
+        }
+        durations = {}
+        for stage, (start, end) in stages.items():
+            if start in marks and end in marks:
+                durations[stage] = marks[end] - marks[start]
+
+        return durations
+
+    ## Public API ######################################################################################################
+
+
+@dataclasses.dataclass(frozen=True)
+class SpooledBody:
+    """The body of a response spooled to a file, set in the ``spool`` metadata of its request in place of the body."""
+
+    #: The path to the file with the body.
+    path: str
+    #: The size of the body in bytes.
+    size: int
+    #: The encoding of the body, ``None`` if it is not text.
+    encoding: str | None
+    #: The SHA-256 digest of the body, computed while spooling it so that it is never read again to hash it.
+    digest: bytes
+
+
+@dataclasses.dataclass(frozen=True)
+class PlaywrightStores:
+    """The stores of a crawler shared by the components that handle its Playwright requests, see :mod:`.stores`."""
+
+    #: The registry of the contexts opened by the Playwright requests.
+    contexts: ContextRegistry
+    #: The pool of the contexts created ahead of the requests.
+    pool: ContextPool
+    #: The sessions of related requests pinned to a proxy and a context.
+    sessions: SessionManager
+    #: The cache of the static subresources of the pages, used once opened by an extension.
+    subresources: SubresourceCache
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler | None) -> "PlaywrightStores":
+        """Returns the stores of a crawler.
+
+        :param crawler: The crawler, or ``None`` for new stores not shared with any other component.
+        :return: The stores."""
+        if crawler is None:
+            return cls(ContextRegistry(), ContextPool(), SessionManager(), SubresourceCache())
+
+        return cls(
+            ContextRegistry.from_crawler(crawler),
+            ContextPool.from_crawler(crawler),
+            SessionManager.from_crawler(crawler),
+            SubresourceCache.from_crawler(crawler),
+        )
+
+
+class PlaywrightMixin(InstrumentationMixin):
     """A mixin that provides Playwight utils and functionality."""
 
     # pylint: disable=too-few-public-methods
 
     ## Private API #####################################################################################################
     @staticmethod
-    async def __playwright_stealth_init_page_callback(page: Any, request: scrapy.http.Request) -> None:
-        """Callback suitable for ``playwright_page_init_callback`` that adds stealth to playwright requests.
+    async def __playwright_stealth_init_page_callback(
+        stores: PlaywrightStores, page: Any, request: scrapy.http.Request
+    ) -> None:
+        """Callback suitable for ``playwright_page_init_callback`` once bound to the stores of a crawler, that adds
+        stealth to playwright requests.
 
+        :param stores: The Playwright stores of the crawler.
         :param page: The ``page`` parameter of the callback.
         :param request: The ``request`` parameter of the callback."""
-        # pylint: disable=unused-argument
+        # The page and its context exist at this point, and the navigation starts after the callback.
+        PlaywrightMixin._mark(request, "page_created")
+        stores.contexts.register(request, page)
+        # Keep the listener from holding the request, otherwise the registry would never see it orphaned.
+        request_ref = weakref.ref(request)
+        page.once("load", lambda _: PlaywrightMixin.__mark_page_loaded(request_ref))
+        if stores.subresources.is_open:
+            await stores.subresources.install(page)
+
+        # Contexts created ahead of the request already have stealth applied to all their pages.
+        if not request.meta.pop("playwright_prewarmed", False):
+            # Imported on first use, as it loads the whole Playwright API.
+            # pylint: disable-next=import-outside-toplevel
+            import playwright_stealth
+
+            await playwright_stealth.stealth_async(page)
+
+        PlaywrightMixin._mark(request, "stealth_end")
 
-        await playwright_stealth.stealth_async(page)
+    @staticmethod
+    def __mark_page_loaded(request_ref: weakref.ReferenceType) -> None:
+        """Marks the request as loaded, if it still exists.
+
+        :param request_ref: A weak reference to the request."""
+        if (request := request_ref()) is not None:
+            PlaywrightMixin._mark(request, "page_loaded")
 
     @staticmethod
-    async def __playwright_request_errback(failure: twisted.python.failure.Failure) -> None:
-        """Callback for requests that result in error, where it closes the Playwright context.
+    async def __playwright_request_errback(stores: PlaywrightStores, failure: twisted.python.failure.Failure) -> None:
+        """Callback for requests that result in error once bound to the stores of a crawler, where it closes the
+        Playwright context.
 
+        :param stores: The Playwright stores of the crawler.
         :param failure: The failure as raised by Scrapy."""
-        await PlaywrightMixin._close_playwright_context(getattr(failure, "request"))
+        await PlaywrightMixin._close_playwright_context(getattr(failure, "request"), stores)
 
     ## Protected API ###################################################################################################
     @staticmethod
@@ -58,23 +199,44 @@ class PlaywrightMixin:
             request.meta["playwright_context_kwargs"] = {}
             # Include page, so that it is possible to close the context gracefully later.
             request.meta["playwright_include_page"] = True
-            # Set callbacks.
+
+        return request
+
+    @staticmethod
+    def _bind_playwright_request(request: scrapy.http.Request, stores: PlaywrightStores) -> scrapy.http.Request:
+        """Sets the callbacks of a Playwright request, bound to the stores of the crawler that downloads it, as the
+        request may have been created where there is no crawler, e.g. in a parser.
+
+        :param request: The Playwright request.
+        :param stores: The Playwright stores of the crawler.
+        :return: The Playwright request."""
+        if PlaywrightMixin._is_playwright_request(request):
             if request.errback is None:
-                request.errback = PlaywrightMixin.__playwright_request_errback
-            request.meta["playwright_page_init_callback"] = PlaywrightMixin.__playwright_stealth_init_page_callback
+                request.errback = functools.partial(PlaywrightMixin.__playwright_request_errback, stores)
+            request.meta["playwright_page_init_callback"] = functools.partial(
+                PlaywrightMixin.__playwright_stealth_init_page_callback, stores
+            )
 
         return request
 
     @staticmethod
-    def _add_playwright_proxy(request: scrapy.http.Request) -> scrapy.http.Request:
-        """Adds a proxy added to the request by ``scrapy-rotating-proxies`` in Playwright format.
+    def _add_playwright_proxy(request: scrapy.http.Request, stores: PlaywrightStores) -> scrapy.http.Request:
+        """Adds a proxy added to the request by ``scrapy-rotating-proxies`` in Playwright format, and gives the
+        request a context created ahead through the same proxy, if there is one left in the pool.
 
         :param request: The request to add a proxy in Playwright format to.
+        :param stores: The Playwright stores of the crawler.
         :return: The Playwright request."""
         if PlaywrightMixin._is_playwright_request(request):
             # Get proxy data from rotating proxies metadata.
             if request.meta.get("_rotating_proxy", False):
                 request.meta["playwright_context_kwargs"]["proxy"] = {"server": request.meta["proxy"]}
+            # A request of a session is sent in the context of the session instead.
+            if stores.sessions.owns(request.meta["playwright_context"]):
+                return request
+            if (name := stores.pool.take(PlaywrightMixin._get_playwright_proxy(request))) is not None:
+                request.meta["playwright_context"] = name
+                request.meta["playwright_prewarmed"] = True
 
         return request
 
@@ -83,9 +245,9 @@ class PlaywrightMixin:
         """Returns the proxy of the request added by ``scrapy-rotating-proxies``.
 
         :param request: The Playwright request.
-        :return: The proxy of the request, or ``None`` if not a Playwright request."""
+        :return: The proxy of the request, or ``None`` if not a Playwright request or it has no proxy."""
         if PlaywrightMixin._is_playwright_request(request):
-            return request.meta["playwright_context_kwargs"]["proxy"].get("server", None)
+            return request.meta["playwright_context_kwargs"].get("proxy", {}).get("server", None)
 
         return None
 
@@ -101,16 +263,67 @@ class PlaywrightMixin:
         return None
 
     @staticmethod
-    async def _close_playwright_context(request: scrapy.http.Request) -> None:
+    async def _close_playwright_context(request: scrapy.http.Request, stores: PlaywrightStores) -> None:
         """Given a request, closes the associated Playwright page and context.
 
-        :param request: Playwright request."""
+        :param request: Playwright request.
+        :param stores: The Playwright stores of the crawler that downloaded the request."""
         if PlaywrightMixin._is_playwright_request(request):
-            # Get page and close it.
-            page = request.meta["playwright_page"]
+            PlaywrightMixin._mark(request, "close_start")
+            # The page is missing from the metadata if the download failed after it was created, so fall back to the
+            # registry, and if it is not there either, then the page was never created or it is already closed.
+            page = request.meta.get("playwright_page", None)
+            if page is None and (context := stores.contexts.get(request.meta["playwright_context"])):
+                page = context.page
+            if page is not None:
+                # The context of a session is kept open for its next requests.
+                close_context = not stores.sessions.owns(request.meta["playwright_context"])
+                await PlaywrightMixin._close_playwright_page(page, close_context=close_context)
+            PlaywrightMixin._mark(request, "close_end")
+
+    @staticmethod
+    async def _close_playwright_page(page: Any, close_context: bool = True) -> None:
+        """Closes a Playwright page and its context, ignoring them if they are already closed or the browser is gone.
+
+        :param page: The page.
+        :param close_context: Whether to also close the context of the page."""
+        # pylint: disable-next=import-outside-toplevel
+        import playwright.async_api
+
+        try:
             await page.close()
-            # Afterwards, close the context.
-            await page.context.close()
+        except playwright.async_api.Error:
+            return
+        # Afterwards, close the context.
+        if close_context:
+            try:
+                await page.context.close()
+            except playwright.async_api.Error:
+                pass
+
+    ## Public API ######################################################################################################
+
+
+class RecrawlMixin:
+    """A mixin that provides utils to tell whether the pages visited in previous crawls changed, see
+    :class:`.stores.recrawl.RecrawlStore`."""
+
+    # pylint: disable=too-few-public-methods
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _get_digest(response: scrapy.http.Response) -> bytes:
+        """Hashes the content of a response, normalized for text responses so that changes in whitespace alone are
+        not seen as changes.
+
+        :param response: The response.
+        :return: The SHA-256 digest."""
+        if isinstance(response, scrapy.http.TextResponse):
+            return hashlib.sha256(" ".join(unicodedata.normalize("NFC", response.text).split()).encode("utf8")).digest()
+
+        return hashlib.sha256(response.body).digest()
 
     ## Public API ######################################################################################################
 
@@ -0,0 +1,5 @@
+"""Public API for extensions."""
+
+## Initialization code #################################################################################################
+
+## Public API ##########################################################################################################
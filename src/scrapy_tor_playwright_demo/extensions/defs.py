@@ -0,0 +1,314 @@
+"""Common definitions for extensions, for details refer to:
+
+    - https://docs.scrapy.org/en/latest/topics/extensions.html
+    - https://docs.scrapy.org/en/latest/topics/signals.html"""
+
+import bisect
+import logging
+import os
+import pathlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import scrapy.settings
+
+from ..defs import LoggerMixin
+
+#: Signal sent when the duration of a stage of a request or an item has been measured, with the arguments ``stage``,
+#: ``duration`` in seconds, ``proxy`` and ``page_type``, the latter two can be ``None`` when unknown. For stages of
+#: items, ``page_type`` is the name of the type of item.
+STAGE_MEASURED = object()
+#: Signal sent instead of parsing a page that did not change since the previous crawl, with the arguments ``url`` and
+#: ``reason``, which is ``not_modified`` if the origin replied so to a conditional request, ``unchanged`` if the digest
+#: of its content is the same or ``not_due`` if it was not downloaded as it rarely changes.
+PAGE_NOT_MODIFIED = object()
+#: Signal sent when the items parsed from a response are about to enter the item pipelines, with the arguments
+#: ``request``, marked with ``parse_end``, and ``count``, the number of items.
+ITEMS_PARSED = object()
+#: The upper bounds of the buckets of the histograms in seconds, from a millisecond up to the download timeout.
+HISTOGRAM_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    180.0,
+)
+
+
+class Histogram:
+    """A histogram of durations with cumulative buckets, in the same fashion as Prometheus histograms."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The number of observations in each bucket, not cumulative, the last one is for values over all bounds.
+        self.__counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        #: The sum of all the observations.
+        self.__sum = 0.0
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def observe(self, value: float) -> None:
+        """Adds an observation to the histogram.
+
+        :param value: The observed duration in seconds."""
+        self.__counts[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.__sum += value
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Adds the observations of another histogram to this histogram.
+
+        :param other: The other histogram.
+        :return: The same instance of the class on which this method was called."""
+        for i, count in enumerate(other.__counts):  # pylint: disable=protected-access
+            self.__counts[i] += count
+        self.__sum += other.__sum  # pylint: disable=protected-access
+
+        return self
+
+    def quantile(self, quantile: float) -> float | None:
+        """Estimates a quantile from the buckets, as the upper bound of the bucket that contains it.
+
+        :param quantile: The quantile, between 0 and 1.
+        :return: The quantile in seconds, ``None`` if there are no observations and infinity if it is over all
+            bounds."""
+        if not (count := self.count):
+            return None
+        rank, cumulative = quantile * count, 0
+        for bound, bucket_count in zip(HISTOGRAM_BUCKETS, self.__counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+
+        return float("inf")
+
+    def cumulative_buckets(self) -> list[tuple[float, int]]:
+        """Returns the cumulative count for each upper bound, including the infinity bound.
+
+        :return: The pairs of upper bound and cumulative count."""
+        buckets, cumulative = [], 0
+        for bound, bucket_count in zip((*HISTOGRAM_BUCKETS, float("inf")), self.__counts):
+            cumulative += bucket_count
+            buckets.append((bound, cumulative))
+
+        return buckets
+
+    @property
+    def count(self) -> int:
+        """The number of observations.
+
+        :return: The number of observations."""
+        return sum(self.__counts)
+
+    @property
+    def sum(self) -> float:
+        """The sum of the observations.
+
+        :return: The sum in seconds."""
+        return self.__sum
+
+
+@dataclass(frozen=True)
+class MemoryProfilerSettings:
+    """The settings of the memory profiler, refer to :class:`MemoryProfilerExtension` for details."""
+
+    #: The seconds between samples.
+    interval: float = 60.0
+    #: Whether to trace the Python heap.
+    tracemalloc: bool = True
+    #: The number of packages to keep in the samples of the Python heap.
+    top_modules: int = 10
+    #: The path to the timeline, ``None`` if disabled.
+    timeline_path: str | None = None
+    #: The soft limit in bytes, 0 if disabled.
+    soft_limit: int = 0
+    #: The fraction of the soft limit under which the engine is resumed.
+    resume_ratio: float = 0.9
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "MemoryProfilerSettings":
+        """Reads the settings of the memory profiler.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the memory profiler."""
+        return cls(
+            interval=settings.getfloat("MEMPROFILER_INTERVAL", 60.0),
+            tracemalloc=settings.getbool("MEMPROFILER_TRACEMALLOC", True),
+            top_modules=settings.getint("MEMPROFILER_TOP_MODULES", 10),
+            timeline_path=settings.get("MEMPROFILER_TIMELINE", None),
+            soft_limit=settings.getint("MEMPROFILER_SOFT_LIMIT_MB", 0) * 1024 * 1024,
+            resume_ratio=settings.getfloat("MEMPROFILER_RESUME_RATIO", 0.9),
+        )
+
+
+@dataclass(frozen=True)
+class BackpressureSettings:
+    """The settings of the backpressure, refer to :class:`BackpressureExtension` for details."""
+
+    #: The seconds between checks.
+    interval: float = 1.0
+    #: The items in flight over which items are throttled, and under which the crawl is resumed.
+    low_items: int = 200
+    #: The items in flight over which the engine is paused.
+    high_items: int = 1000
+    #: The seconds items wait over which items are throttled, and under which the crawl is resumed.
+    low_latency: float = 5.0
+    #: The seconds items wait over which the engine is paused.
+    high_latency: float = 30.0
+    #: The items processed concurrently per response when not throttled.
+    max_concurrent_items: int = 100
+    #: The minimum items processed concurrently per response while throttled.
+    min_concurrent_items: int = 10
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "BackpressureSettings":
+        """Reads the settings of the backpressure.
+
+        :param settings: The settings of the crawler.
+        :raises ValueError: A low watermark is over its high watermark.
+        :return: The settings of the backpressure."""
+        max_concurrent_items = settings.getint("CONCURRENT_ITEMS", 100)
+        backpressure = cls(
+            interval=settings.getfloat("BACKPRESSURE_INTERVAL", 1.0),
+            low_items=settings.getint("BACKPRESSURE_LOW_ITEMS", 200),
+            high_items=settings.getint("BACKPRESSURE_HIGH_ITEMS", 1000),
+            low_latency=settings.getfloat("BACKPRESSURE_LOW_LATENCY", 5.0),
+            high_latency=settings.getfloat("BACKPRESSURE_HIGH_LATENCY", 30.0),
+            max_concurrent_items=max_concurrent_items,
+            min_concurrent_items=min(
+                max_concurrent_items, max(1, settings.getint("BACKPRESSURE_MIN_CONCURRENT_ITEMS", 10))
+            ),
+        )
+        if backpressure.low_items > backpressure.high_items or backpressure.low_latency > backpressure.high_latency:
+            raise ValueError("The low watermarks of the backpressure must not be over the high watermarks.")
+
+        return backpressure
+
+
+@dataclass
+class PythonHeapSample:
+    """A sample of the Python heap traced by :mod:`tracemalloc`."""
+
+    #: The size of the traced Python heap in bytes.
+    traced: int
+    #: The peak size of the traced Python heap in bytes.
+    peak: int
+    #: The traced size of the Python heap in bytes, keyed by the top level package that allocated it.
+    modules: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class MemorySample:
+    """A sample of the memory used by the crawl, attributed to the Python heap, the browsers, the parsers and the
+    queues of the engine."""
+
+    #: The UNIX time when the sample was taken.
+    timestamp: float
+    #: The memory of the Scrapy process in bytes, ``None`` if not available in the platform.
+    rss: int | None
+    #: The memory of all the child processes, that is the Playwright driver and the browsers, in bytes.
+    browser_rss: int | None
+    #: The number of child processes.
+    browser_processes: int
+    #: The sample of the Python heap, ``None`` if not tracing.
+    python: PythonHeapSample | None = None
+    #: The number of live parsers, keyed by the name of their class.
+    parsers: dict[str, int] = field(default_factory=dict)
+    #: The number of requests or bytes in the queues of the engine, keyed by queue.
+    queues: dict[str, int] = field(default_factory=dict)
+
+    ## Public API ######################################################################################################
+    @property
+    def total_rss(self) -> int:
+        """The memory of the Scrapy process and of its child processes.
+
+        :return: The memory in bytes, zero if not available in the platform."""
+        return (self.rss or 0) + (self.browser_rss or 0)
+
+
+def read_proc_file(path: str) -> str | None:
+    """Returns the contents of a file under ``/proc``, which can vanish at any time along with its process.
+
+    :param path: The path of the file.
+    :return: The contents of the file, ``None`` if not available."""
+    try:
+        return pathlib.Path(path).read_text(encoding="utf8")
+    except OSError:
+        return None
+
+
+def get_process_memory(pid: int) -> int | None:
+    """Returns the memory used by a process, from ``/proc`` so only Linux is supported.
+
+    The proportional set size is preferred over the resident set size, so that the memory shared between the browser
+    processes is not counted once per process.
+
+    :param pid: The process identifier.
+    :return: The memory in bytes, ``None`` if not available."""
+    for path, key in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        for line in (read_proc_file(path) or "").splitlines():
+            if line.startswith(key) and len(fields := line.split()) > 1 and fields[1].isdigit():
+                return int(fields[1]) * 1024
+
+    return None
+
+
+def get_descendant_pids(pid: int) -> list[int]:
+    """Returns the identifiers of the descendant processes of a process, from ``/proc`` so only Linux is supported.
+
+    :param pid: The process identifier.
+    :return: The identifiers of the descendants, empty if not available."""
+    children: defaultdict[int, list[int]] = defaultdict(list)
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit() or (stat := read_proc_file(f"/proc/{entry}/stat")) is None:
+            continue
+        # The name of the command can contain spaces, the parent identifier is the second field after it.
+        children[int(stat.rsplit(")", 1)[1].split()[1])].append(int(entry))
+
+    def walk(parent: int) -> list[int]:
+        """Walks the tree of processes depth first.
+
+        :param parent: The identifier of the parent process.
+        :return: The identifiers of the descendants of the parent."""
+        return [descendant for child in children.get(parent, []) for descendant in (child, *walk(child))]
+
+    return walk(pid)
+
+
+class ExtensionBase(LoggerMixin):
+    """Base class for extensions, defines common functionality for all."""
+
+    # pylint: disable=too-few-public-methods
+
+    ## Private API #####################################################################################################
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        """Class constructor.
+
+        :param logger: The logger for the extension."""
+        #: The logger to use internally in the extension.
+        self.__logger = logger if logger is not None else logging.getLogger("dummy")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @property
+    def logger(self) -> logging.Logger:
+        """Returns the logger.
+
+        :return: The logger."""
+        return self.__logger
@@ -0,0 +1,1069 @@
+"""Extensions."""
+
+import asyncio
+import dataclasses
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import IO, Any
+
+import scrapy
+import scrapy.crawler
+import scrapy.exceptions
+import scrapy.http
+import scrapy.signals
+import scrapy.utils.defer
+import scrapy.utils.project
+import scrapy.utils.reactor
+import scrapy.utils.trackref
+import twisted.internet.defer
+import twisted.internet.task
+import twisted.web.resource
+import twisted.web.server
+
+from ..defs import InstrumentationMixin, PlaywrightMixin, PlaywrightStores
+from ..items.defs import ParseCacheMixin, ParserBase
+from ..stores.contexts import ContextPool
+from ..stores.subresources import SubresourceCache
+from .defs import (
+    ITEMS_PARSED,
+    STAGE_MEASURED,
+    BackpressureSettings,
+    ExtensionBase,
+    Histogram,
+    MemoryProfilerSettings,
+    MemorySample,
+    PythonHeapSample,
+    get_descendant_pids,
+    get_process_memory,
+)
+
+#: The attributes of the Scrapy Playwright download handler the browser restart relies on, as it has no API for it.
+BROWSER_RESTART_ATTRIBUTES = ("browser_launch_lock", "_maybe_launch_browser")
+#: The methods of the Scrapy Playwright download handler the browser prewarm relies on, as it has no API for it.
+PREWARM_METHODS = (
+    "_create_browser_context",
+    "_engine_started",
+    "_launch",
+    "_maybe_connect_devtools",
+    "_maybe_launch_browser",
+)
+#: The attributes set by the Scrapy Playwright download handler when created the browser prewarm relies on.
+PREWARM_ATTRIBUTES = ("browser_launch_lock", "config", "context_wrappers")
+
+
+class InstrumentationExtension(ExtensionBase):
+    """Extension that keeps histograms with the durations of the stages a request goes through, labelled per proxy and
+    per page type, for example the proxy assignment, the Playwright context creation, the navigation, the parsing or
+    the pipeline write.
+
+    The durations are received through the :data:`STAGE_MEASURED` signal, the histograms are stored in the stats
+    under ``instrumentation/`` when the spider closes, and optionally exposed in Prometheus format on a local HTTP
+    endpoint while crawling. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        INSTRUMENTATION_ENABLED = False
+        # Range of ports to try for the Prometheus endpoint, or None to disable it.
+        INSTRUMENTATION_METRICS_PORT = [9410, 9420]
+        # Interface where the Prometheus endpoint listens.
+        INSTRUMENTATION_METRICS_HOST = "127.0.0.1\""""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The histograms, keyed by stage, proxy and page type.
+        self.__histograms: defaultdict[tuple[str, str, str], Histogram] = defaultdict(Histogram)
+        #: The range of ports for the Prometheus endpoint, ``None`` if disabled.
+        self.__port_range = crawler.settings.getlist("INSTRUMENTATION_METRICS_PORT") or None
+        #: The interface for the Prometheus endpoint.
+        self.__host = crawler.settings.get("INSTRUMENTATION_METRICS_HOST", "127.0.0.1")
+        #: The listening port of the Prometheus endpoint, once started.
+        self.__port = None
+
+        crawler.signals.connect(self.__stage_measured, signal=STAGE_MEASURED)
+        crawler.signals.connect(self.__engine_started, signal=scrapy.signals.engine_started)
+        crawler.signals.connect(self.__engine_stopped, signal=scrapy.signals.engine_stopped)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __stage_measured(self, stage: str, duration: float, proxy: str | None, page_type: str | None) -> None:
+        """Adds a measured duration to the histograms.
+
+        :param stage: The stage.
+        :param duration: The duration in seconds.
+        :param proxy: The proxy of the request, or ``None`` if there is none or it is unknown.
+        :param page_type: The page type of the response, or ``None`` if it is unknown."""
+        self.__histograms[(stage, proxy or "none", page_type or "unknown")].observe(duration)
+
+    def __engine_started(self) -> None:
+        """Starts listening on the Prometheus endpoint, if enabled."""
+        if self.__port_range is not None:
+            resource = _MetricsResource(self)
+            ports = [int(port) for port in self.__port_range]
+            self.__port = scrapy.utils.reactor.listen_tcp(ports, self.__host, twisted.web.server.Site(resource))
+            host = self.__port.getHost()
+            self._log_info(f"Instrumentation metrics listening on http://{host.host}:{host.port}/metrics.")
+
+    def __engine_stopped(self) -> None:
+        """Stops listening on the Prometheus endpoint, if enabled."""
+        if self.__port is not None:
+            self.__port.stopListening()
+
+    def __spider_closed(self) -> None:
+        """Stores the histograms in the stats, aggregated per stage, per stage and proxy and per stage and page type."""
+        if (stats := self.__crawler.stats) is None:
+            return
+
+        for prefix, histogram in self.aggregate().items():
+            stats.set_value(f"{prefix}/count", histogram.count)
+            stats.set_value(f"{prefix}/mean", histogram.sum / histogram.count if histogram.count else 0.0)
+            stats.set_value(f"{prefix}/p50", histogram.quantile(0.5))
+            stats.set_value(f"{prefix}/p99", histogram.quantile(0.99))
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "InstrumentationExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("INSTRUMENTATION_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def aggregate(self) -> dict[str, Histogram]:
+        """Aggregates the histograms per stage, per stage and proxy and per stage and page type.
+
+        :return: The aggregated histograms, keyed by their prefix in the stats."""
+        aggregated: defaultdict[str, Histogram] = defaultdict(Histogram)
+        for (stage, proxy, page_type), histogram in self.__histograms.items():
+            aggregated[f"instrumentation/{stage}"].merge(histogram)
+            aggregated[f"instrumentation/{stage}/proxy/{proxy}"].merge(histogram)
+            aggregated[f"instrumentation/{stage}/page_type/{page_type}"].merge(histogram)
+
+        return dict(aggregated)
+
+    def to_prometheus(self) -> str:
+        """Renders the histograms in Prometheus text format.
+
+        :return: The histograms in Prometheus text format."""
+        name = "scrapy_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of the stages of requests and items.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, proxy, page_type), histogram in sorted(self.__histograms.items()):
+            labels = f'stage="{stage}",proxy="{proxy}",page_type="{page_type}"'
+            for bound, count in histogram.cumulative_buckets():
+                lines.append(f'{name}_bucket{{{labels},le="{"+Inf" if bound == float("inf") else bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class ContextWatchdogExtension(PlaywrightMixin, ExtensionBase):
+    """Extension that periodically reclaims the Playwright contexts that leaked, that is contexts whose request no
+    longer exists, for example responses dropped by a middleware before reaching the spider, or contexts that are
+    older than a maximum age, for example a navigation stuck after its request timed out.
+
+    The number of open contexts and of reclaimed contexts are stored in the stats under ``playwright/watchdog/``, and
+    optionally the browser is restarted after a number of leaks, to release any memory held by it. It can be
+    configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        CONTEXT_WATCHDOG_ENABLED = True
+        # Seconds between checks of the open contexts.
+        CONTEXT_WATCHDOG_INTERVAL = 30
+        # Seconds after which a context is reclaimed even if its request exists, defaults to twice the download timeout.
+        CONTEXT_WATCHDOG_MAX_AGE = 360
+        # Number of reclaimed contexts after which the browser is restarted, or 0 to never restart it.
+        CONTEXT_WATCHDOG_RESTART_THRESHOLD = 0"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The Playwright stores of the crawler.
+        self.__stores = PlaywrightStores.from_crawler(crawler)
+        #: The seconds between checks.
+        self.__interval = crawler.settings.getfloat("CONTEXT_WATCHDOG_INTERVAL", 30.0)
+        #: The maximum age of a context in seconds.
+        self.__max_age = crawler.settings.getfloat(
+            "CONTEXT_WATCHDOG_MAX_AGE", crawler.settings.getfloat("DOWNLOAD_TIMEOUT", 180.0) * 2
+        )
+        #: The number of reclaimed contexts after which the browser is restarted, 0 if disabled.
+        self.__restart_threshold = crawler.settings.getint("CONTEXT_WATCHDOG_RESTART_THRESHOLD", 0)
+        #: The number of reclaimed contexts since the browser was last restarted.
+        self.__leaks = 0
+        #: The periodic task, once started.
+        self.__task: twisted.internet.task.LoopingCall | None = None
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Starts checking the open contexts periodically."""
+        self.__task = twisted.internet.task.LoopingCall(self.check)
+        self.__task.start(self.__interval, now=False)
+
+    def __spider_closed(self) -> None:
+        """Stops checking the open contexts."""
+        if self.__task is not None and self.__task.running:
+            self.__task.stop()
+
+    def __inc_stat(self, key: str, count: int = 1) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``playwright/watchdog/``.
+        :param count: The increment."""
+        if (stats := self.__crawler.stats) is not None:
+            stats.inc_value(f"playwright/watchdog/{key}", count)
+
+    async def __reclaim(self) -> None:
+        """Closes the orphaned and expired contexts, and restarts the browser if there were too many."""
+        for context in self.__stores.contexts.contexts:
+            # The context of a session outlives its requests, and it is closed once the session ends.
+            if context.orphaned and not self.__stores.sessions.owns(context.name):
+                reason = "orphaned"
+            elif context.age > self.__max_age:
+                reason = "expired"
+            else:
+                continue
+            self._log_info(f"Reclaiming {reason} context {context.name} of '{context.url}' after {context.age:.0f}s.")
+            await self._close_playwright_page(context.page)
+            self.__stores.contexts.unregister(context.name)
+            self.__inc_stat(reason)
+            self.__leaks += 1
+
+        if (stats := self.__crawler.stats) is not None:
+            stats.set_value("playwright/watchdog/open", len(self.__stores.contexts))
+            stats.max_value("playwright/watchdog/open_max", len(self.__stores.contexts))
+
+        if 0 < self.__restart_threshold <= self.__leaks:
+            await self.__restart_browser()
+            self.__leaks = 0
+
+    async def __restart_browser(self) -> None:
+        """Closes the browser of the Scrapy Playwright download handler, which launches a new one on the next request.
+
+        Scrapy Playwright has no API to restart the browser, its handler launches one on the next request if it has no
+        ``browser`` attribute, so the restart is skipped with a warning if the handler does not work that way.
+        Every context is closed along with the browser, so the requests in progress fail and are retried."""
+        # pylint: disable=protected-access
+        engine = self.__crawler.engine
+        if (handler := engine.downloader.handlers._get_handler("https") if engine is not None else None) is None:
+            return
+        if not all(hasattr(handler, name) for name in BROWSER_RESTART_ATTRIBUTES):
+            self._log_error(f"Can not restart the browser of {type(handler).__qualname__}, it is not supported.")
+            return
+
+        async with handler.browser_launch_lock:
+            if "browser" not in vars(handler):
+                return
+            self._log_info(f"Restarting the browser after {self.__leaks} leaked contexts.")
+            browser = vars(handler).pop("browser")
+            await browser.close()
+            self.__inc_stat("browser_restarts")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "ContextWatchdogExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("CONTEXT_WATCHDOG_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def check(self) -> twisted.internet.defer.Deferred:
+        """Checks the open contexts once, reclaiming the leaked ones.
+
+        :return: A deferred that fires once the check is done."""
+        return scrapy.utils.defer.deferred_from_coro(self.__reclaim())
+
+
+class BrowserPrewarmExtension(ExtensionBase):
+    """Extension that launches the browser of the Scrapy Playwright download handler when the spider is opened, and
+    creates contexts ahead of the requests for each proxy, with stealth already applied, so that the first requests do
+    not pay for them serially. The start requests are only consumed once this is done, and each context is then taken
+    by a single request through the same proxy, see ``PlaywrightMixin._add_playwright_proxy``.
+
+    The contexts created hold slots of ``PLAYWRIGHT_MAX_CONTEXTS``, so as many as slots are created at most, and those
+    not taken after a while are closed. The number of contexts created and of contexts closed unused, the seconds taken
+    to create them, and the seconds from the spider being opened to the first item scraped are stored in the stats
+    under ``prewarm/``. It relies on private methods of the Scrapy Playwright download handler, so it is opt-in and it
+    is not configured if the installed version of Scrapy Playwright does not have them. It can be configured with the
+    settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        PREWARM_ENABLED = False
+        # Number of contexts created for each proxy of 'ROTATING_PROXY_LIST', or in total if there are no proxies.
+        PREWARM_CONTEXTS_PER_PROXY = 1
+        # Seconds after which the contexts not taken by any request are closed.
+        PREWARM_MAX_AGE = 60"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The pool of the contexts created ahead of the requests of the crawler, owned by this extension.
+        self.__pool = ContextPool.from_crawler(crawler)
+        #: The number of contexts created for each proxy.
+        self.__per_proxy = max(0, crawler.settings.getint("PREWARM_CONTEXTS_PER_PROXY", 1))
+        #: The seconds after which the contexts not taken are closed.
+        self.__max_age = crawler.settings.getfloat("PREWARM_MAX_AGE", 60.0)
+        #: The monotonic time when the spider was opened, ``None`` until then.
+        self.__opened: float | None = None
+        #: The pending call that closes the contexts not taken, once created.
+        self.__expiry: Any = None
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__item_scraped, signal=scrapy.signals.item_scraped)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self, spider: scrapy.Spider) -> twisted.internet.defer.Deferred:
+        """Prewarms the browser, the engine waits for it before consuming the start requests, and schedules closing the
+        contexts not taken. Failures are logged, the requests then launch the browser and create contexts as usual.
+
+        :param spider: The spider.
+        :return: A deferred that fires once the browser is prewarmed."""
+        self.__opened = time.monotonic()
+
+        def schedule_close(contexts: int) -> None:
+            # Imported here so that the reactor configured in the settings is installed first, the module is replaced
+            # by the installed reactor, thus its members are unknown until then.
+            from twisted.internet import reactor  # pylint: disable=import-outside-toplevel
+
+            if contexts > 0:
+                # pylint: disable-next=no-member
+                self.__expiry = reactor.callLater(
+                    self.__max_age, lambda: scrapy.utils.defer.deferred_from_coro(self.close_unused())
+                )
+
+        deferred = scrapy.utils.defer.deferred_from_coro(self.prewarm(spider))
+        deferred.addCallbacks(schedule_close, lambda failure: self._log_error(f"Failed prewarming: {failure}"))
+
+        return deferred
+
+    def __item_scraped(self) -> None:
+        """Stores the time to the first item scraped."""
+        if self.__opened is not None and (stats := self.__crawler.stats) is not None:
+            if stats.get_value("prewarm/time_to_first_item") is None:
+                stats.set_value("prewarm/time_to_first_item", time.monotonic() - self.__opened)
+
+    def __spider_closed(self) -> None:
+        """Stops waiting to close the contexts not taken, they are closed along with the browser."""
+        if self.__expiry is not None and self.__expiry.active():
+            self.__expiry.cancel()
+        self.__expiry = None
+        if (unused := len(self.__pool.clear())) > 0:
+            self.__set_stat("unused", unused)
+
+    def __set_stat(self, key: str, value: Any) -> None:
+        """Sets a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``prewarm/``.
+        :param value: The value."""
+        if (stats := self.__crawler.stats) is not None:
+            stats.set_value(f"prewarm/{key}", value)
+
+    def __get_handler(self) -> Any:
+        """Returns the Scrapy Playwright download handler, loading it if it was not loaded yet.
+
+        :return: The handler, ``None`` if HTTPS requests are not downloaded with Scrapy Playwright."""
+        # pylint: disable=protected-access
+        engine = self.__crawler.engine
+        handler = engine.downloader.handlers._get_handler("https") if engine is not None else None
+
+        return handler if all(hasattr(handler, name) for name in PREWARM_ATTRIBUTES) else None
+
+    def __get_proxies(self) -> list[str | None]:
+        """Returns the proxies of the requests, as in the contexts of Playwright requests.
+
+        :return: The proxies, or a single ``None`` if the requests are not sent through proxies."""
+        middlewares = self.__crawler.settings.getwithbase("DOWNLOADER_MIDDLEWARES")
+        if middlewares.get("rotating_proxies.middlewares.RotatingProxyMiddleware", None) is None:
+            return [None]
+
+        return list(self.__crawler.settings.getlist("ROTATING_PROXY_LIST")) or [None]
+
+    async def __create_context(self, handler: Any, spider: scrapy.Spider, proxy: str | None, name: str) -> None:
+        """Creates a context with stealth applied to all its pages, and adds it to the pool.
+
+        :param handler: The Scrapy Playwright download handler.
+        :param spider: The spider.
+        :param proxy: The proxy of the context, ``None`` if without proxy.
+        :param name: The identifier of the context."""
+        # pylint: disable-next=import-outside-toplevel
+        import playwright_stealth
+
+        # pylint: disable=protected-access
+        wrapper = await handler._create_browser_context(
+            name=name, context_kwargs={"proxy": {"server": proxy}} if proxy is not None else {}, spider=spider
+        )
+        for script in playwright_stealth.StealthConfig().enabled_scripts:
+            await wrapper.context.add_init_script(script)
+        self.__pool.put(proxy, name)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "BrowserPrewarmExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled, or the installed version of Scrapy
+            Playwright does not have the methods it relies on.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("PREWARM_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+        # Imported here so that crawls without prewarming do not import Playwright at startup.
+        # pylint: disable-next=import-outside-toplevel
+        import scrapy_playwright.handler
+
+        handler = scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler
+        if not all(hasattr(handler, name) for name in PREWARM_METHODS):
+            raise scrapy.exceptions.NotConfigured(f"{handler.__qualname__} does not support prewarming the browser.")
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    async def prewarm(self, spider: scrapy.Spider) -> int:
+        """Launches Playwright, the startup contexts and the browser, and creates the contexts of the pool, unless
+        HTTPS requests are not downloaded with Scrapy Playwright.
+
+        :param spider: The spider.
+        :return: The number of contexts created."""
+        # pylint: disable=protected-access
+        if (handler := self.__get_handler()) is None:
+            self._log_debug("Not prewarming, HTTPS requests are not downloaded with Scrapy Playwright.")
+            return 0
+
+        start = time.monotonic()
+        # The handler launches Playwright when the engine is started, which is after the start requests are consumed.
+        if getattr(handler, "playwright", None) is None:
+            self.__crawler.signals.disconnect(handler._engine_started, signal=scrapy.signals.engine_started)
+            await handler._launch()
+        if handler.config.cdp_url:
+            await handler._maybe_connect_devtools()
+        else:
+            await handler._maybe_launch_browser()
+
+        # Round robin the proxies, so that all of them get contexts if there are fewer slots than contexts.
+        proxies = self.__get_proxies()
+        contexts = [(proxy, f"prewarm-{uuid.uuid4()}") for _ in range(self.__per_proxy) for proxy in proxies]
+        if handler.config.max_contexts:
+            contexts = contexts[: max(0, handler.config.max_contexts - len(handler.context_wrappers))]
+        await asyncio.gather(*(self.__create_context(handler, spider, proxy, name) for proxy, name in contexts))
+
+        elapsed = time.monotonic() - start
+        self.__set_stat("contexts", len(contexts))
+        self.__set_stat("elapsed", elapsed)
+        self._log_info(f"Prewarmed the browser with {len(contexts)} contexts in {elapsed:.2f}s.")
+
+        return len(contexts)
+
+    async def close_unused(self) -> int:
+        """Closes the contexts of the pool not taken by any request yet, releasing their slots.
+
+        :return: The number of contexts closed."""
+        self.__expiry = None
+        names = self.__pool.clear()
+        if (handler := self.__get_handler()) is not None:
+            for name in names:
+                if (wrapper := handler.context_wrappers.get(name, None)) is not None:
+                    await wrapper.context.close()
+        if names:
+            self._log_info(f"Closed {len(names)} prewarmed contexts not taken by any request.")
+            self.__set_stat("unused", len(names))
+
+        return len(names)
+
+
+class SubresourceCacheExtension(ExtensionBase):
+    """Extension that opens the cache of static subresources, such as ``jquery.js``, stylesheets and fonts, shared by
+    the pages of all the Playwright contexts, so that they are not downloaded through Tor again for every page. Unlike
+    aborting those requests, the pages still render as they would without the cache, see ``SubresourceCache``.
+
+    The cache is kept on disk between crawls, and the hits, misses, hit ratio, bytes not downloaded, subresources stored
+    and evicted, and the size of the cache are stored in the stats under ``subresource_cache/`` when the spider is
+    closed. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        SUBRESOURCE_CACHE_ENABLED = True
+        # Folder of the cache, relative to the '.scrapy' folder of the project unless absolute.
+        SUBRESOURCE_CACHE_DIR = "subresources"
+        # Maximum size of the cache in bytes, the least recently used subresources are evicted past it.
+        SUBRESOURCE_CACHE_MAX_SIZE = 256 * 1024 * 1024"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The subresource cache of the crawler, owned by this extension.
+        self.__cache = SubresourceCache.from_crawler(crawler)
+        #: The folder of the cache.
+        self.__folder = scrapy.utils.project.data_path(crawler.settings.get("SUBRESOURCE_CACHE_DIR", "subresources"))
+        #: The maximum size of the cache in bytes.
+        self.__max_size = crawler.settings.getint("SUBRESOURCE_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Opens the cache, with the subresources stored by previous crawls."""
+        self.__cache.open(self.__folder, self.__max_size)
+        self._log_info(f"Opened the subresource cache in '{self.__folder}' with {len(self.__cache)} items.")
+
+    def __spider_closed(self) -> None:
+        """Stores the stats of the cache and closes it."""
+        if (stats := self.__crawler.stats) is not None:
+            for key, value in self.__cache.stats.items():
+                stats.set_value(f"subresource_cache/{key}", value)
+        self.__cache.close()
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "SubresourceCacheExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("SUBRESOURCE_CACHE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+
+class ParseCacheExtension(ParseCacheMixin, ExtensionBase):
+    """Extension that opens the cache of the results of parsing, so that the responses with the same body as one
+    already parsed, such as retries, hedged duplicates or pages served again unchanged, are not parsed again, see
+    ``ParseCache``.
+
+    The hits, misses, hit ratio, results stored and evicted, and the size of the cache are stored in the stats under
+    ``parse_cache/`` when the spider is closed. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        PARSE_CACHE_ENABLED = True
+        # Maximum size of the results in memory in bytes, the least recently used are evicted past it.
+        PARSE_CACHE_MAX_SIZE = 64 * 1024 * 1024
+        # Folder of the results on disk, relative to the '.scrapy' folder of the project unless absolute, or None to
+        # only keep them in memory.
+        PARSE_CACHE_DIR = None
+        # Maximum size of the results on disk in bytes, the least recently used are removed past it.
+        PARSE_CACHE_DIR_MAX_SIZE = 1024 * 1024 * 1024"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The maximum size of the results in memory in bytes.
+        self.__max_size = crawler.settings.getint("PARSE_CACHE_MAX_SIZE", 64 * 1024 * 1024)
+        #: The folder of the results on disk, ``None`` to only keep them in memory.
+        self.__folder = (
+            scrapy.utils.project.data_path(folder)
+            if (folder := crawler.settings.get("PARSE_CACHE_DIR", None))
+            else None
+        )
+        #: The maximum size of the results on disk in bytes.
+        self.__max_disk_size = crawler.settings.getint("PARSE_CACHE_DIR_MAX_SIZE", 1024 * 1024 * 1024)
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Opens the cache, with the results stored by previous crawls if kept on disk."""
+        self._parse_cache.open(self.__max_size, self.__folder, self.__max_disk_size)
+        if self.__folder is not None:
+            entries = self._parse_cache.stats["disk_entries"]
+            self._log_info(f"Opened the parse cache in '{self.__folder}' with {entries} results on disk.")
+
+    def __spider_closed(self) -> None:
+        """Stores the stats of the cache and closes it."""
+        if (stats := self.__crawler.stats) is not None:
+            for key, value in self._parse_cache.stats.items():
+                stats.set_value(f"parse_cache/{key}", value)
+        self._parse_cache.close()
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "ParseCacheExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("PARSE_CACHE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+
+class MemoryProfilerExtension(ExtensionBase):
+    """Extension that periodically samples the memory of the crawl and attributes it to the Python heap per package,
+    to the child processes of the browsers, to the live parsers and to the queues of the engine, which complements
+    ``MEMUSAGE_ENABLED`` that only tracks the memory of the Scrapy process.
+
+    The last sample is stored in the stats under ``memprofiler/`` and every sample is appended to a JSONL timeline.
+    Optionally, the engine is paused while the memory of the crawl is over a soft limit, so that the requests in
+    progress drain without new ones being scheduled. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        MEMPROFILER_ENABLED = False
+        # Seconds between samples.
+        MEMPROFILER_INTERVAL = 60
+        # Traces the Python heap with tracemalloc, which slows down the crawl.
+        MEMPROFILER_TRACEMALLOC = True
+        # Number of packages with most memory in the Python heap to keep, the rest are grouped in 'other'.
+        MEMPROFILER_TOP_MODULES = 10
+        # Path to the JSONL timeline, or None to disable it.
+        MEMPROFILER_TIMELINE = "memprofiler.jsonl"
+        # Memory of the Scrapy process and the browsers over which the engine is paused, or 0 to disable it.
+        MEMPROFILER_SOFT_LIMIT_MB = 0
+        # Fraction of the soft limit under which the engine is resumed.
+        MEMPROFILER_RESUME_RATIO = 0.9"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The settings of the profiler.
+        self.__settings = MemoryProfilerSettings.from_settings(crawler.settings)
+        #: The stream of the timeline, once opened.
+        self.__timeline: IO[str] | None = None
+        #: Whether tracing was started by the extension, so that it is only stopped in that case.
+        self.__started_tracing = False
+        #: Whether the engine was paused by the extension, so that it is only resumed in that case.
+        self.__paused = False
+        #: The periodic task, once started.
+        self.__task: twisted.internet.task.LoopingCall | None = None
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Starts tracing and sampling periodically."""
+        if self.__settings.tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        self.__task = twisted.internet.task.LoopingCall(self.sample)
+        self.__task.start(self.__settings.interval, now=False)
+
+    def __spider_closed(self) -> None:
+        """Takes a last sample and stops sampling and tracing."""
+        if self.__task is not None and self.__task.running:
+            self.__task.stop()
+        self.sample()
+        if self.__timeline is not None:
+            self.__timeline.close()
+            self.__timeline = None
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def __sample_modules(self) -> dict[str, int]:
+        """Groups the traced Python heap by the top level package that allocated it.
+
+        :return: The sizes in bytes of the packages with most memory, and the rest grouped in ``other``."""
+        packages = {}
+        for name, module in list(sys.modules.items()):
+            if (path := getattr(module, "__file__", None)) is not None:
+                packages[os.path.abspath(path)] = name.split(".", 1)[0]
+
+        sizes: defaultdict[str, int] = defaultdict(int)
+        for statistic in tracemalloc.take_snapshot().statistics("filename"):
+            filename = statistic.traceback[0].filename
+            sizes[packages.get(os.path.abspath(filename), "other")] += statistic.size
+
+        ranked = sorted(sizes.items(), key=lambda pair: pair[1], reverse=True)
+        modules = dict(pair for pair in ranked[: self.__settings.top_modules] if pair[0] != "other")
+        modules["other"] = sum(sizes.values()) - sum(modules.values())
+
+        return modules
+
+    def __sample_queues(self) -> dict[str, int]:
+        """Samples the sizes of the queues of the engine, that is the scheduler, the downloader and the scraper.
+
+        :return: The sizes of the queues, empty if the engine is not running."""
+        engine = self.__crawler.engine
+        if engine is None or engine.slot is None:
+            return {}
+
+        scheduler = engine.slot.scheduler
+        queues = {"scheduler": len(scheduler), "in_progress": len(engine.slot.inprogress)}
+        for name in ("mqs", "dqs"):
+            if (queue := getattr(scheduler, name, None)) is not None:
+                queues[f"scheduler_{name}"] = len(queue)
+        queues["downloader"] = len(engine.downloader.active)
+        if (slot := engine.scraper.slot) is not None:
+            queues["scraper"] = len(slot.active)
+            queues["scraper_bytes"] = slot.active_size
+
+        return queues
+
+    def __store(self, sample: MemorySample) -> None:
+        """Stores a sample in the stats and appends it to the timeline.
+
+        :param sample: The sample."""
+        if (stats := self.__crawler.stats) is not None:
+            values = {
+                "rss": sample.rss,
+                "browser/rss": sample.browser_rss,
+                "browser/processes": sample.browser_processes,
+                **{f"parsers/{name}": count for name, count in sample.parsers.items()},
+                **{f"queue/{name}": size for name, size in sample.queues.items()},
+            }
+            if (python := sample.python) is not None:
+                values.update({"python/traced": python.traced, "python/peak": python.peak})
+                values.update({f"python/module/{name}": size for name, size in python.modules.items()})
+            for key, value in values.items():
+                if value is not None:
+                    stats.set_value(f"memprofiler/{key}", value)
+            stats.max_value("memprofiler/rss_max", sample.rss or 0)
+            stats.max_value("memprofiler/browser/rss_max", sample.browser_rss or 0)
+
+        if self.__settings.timeline_path is not None:
+            if self.__timeline is None:
+                # pylint: disable-next=consider-using-with
+                self.__timeline = open(self.__settings.timeline_path, "a", encoding="utf8")
+            self.__timeline.write(json.dumps(dataclasses.asdict(sample)) + "\n")
+            self.__timeline.flush()
+
+    def __inc_stat(self, key: str, count: int = 1) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``memprofiler/``.
+        :param count: The increment."""
+        if (stats := self.__crawler.stats) is not None:
+            stats.inc_value(f"memprofiler/{key}", count)
+
+    def __enforce_soft_limit(self, sample: MemorySample) -> None:
+        """Pauses the engine when the memory is over the soft limit, and resumes it when it is back under it.
+
+        :param sample: The sample."""
+        if (soft_limit := self.__settings.soft_limit) <= 0 or (engine := self.__crawler.engine) is None:
+            return
+
+        if not self.__paused and not engine.paused and sample.total_rss > soft_limit:
+            self._log_info(f"Pausing the engine, memory at {sample.total_rss // 1048576}MB is over the soft limit.")
+            engine.pause()
+            self.__paused = True
+            self.__inc_stat("pauses")
+        elif self.__paused and sample.total_rss < soft_limit * self.__settings.resume_ratio:
+            self._log_info(f"Resuming the engine, memory at {sample.total_rss // 1048576}MB is under the soft limit.")
+            engine.unpause()
+            self.__paused = False
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "MemoryProfilerExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("MEMPROFILER_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def sample(self) -> MemorySample:
+        """Takes a sample of the memory, stores it and enforces the soft limit.
+
+        :return: The sample."""
+        children = get_descendant_pids(os.getpid())
+        browser_rss = [rss for pid in children if (rss := get_process_memory(pid)) is not None]
+        sample = MemorySample(
+            timestamp=time.time(),
+            rss=get_process_memory(os.getpid()),
+            browser_rss=sum(browser_rss) if browser_rss or not children else None,
+            browser_processes=len(children),
+            parsers={
+                cls.__name__: len(instances)
+                for cls, instances in scrapy.utils.trackref.live_refs.items()
+                if issubclass(cls, ParserBase) and len(instances) > 0
+            },
+            queues=self.__sample_queues(),
+        )
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            sample.python = PythonHeapSample(traced=traced, peak=peak, modules=self.__sample_modules())
+
+        self.__store(sample)
+        self.__enforce_soft_limit(sample)
+
+        return sample
+
+
+class BackpressureExtension(InstrumentationMixin, ExtensionBase):
+    """Extension that slows the crawl down when the item pipelines fall behind, so that items do not pile up in memory
+    while pages keep being downloaded and parsed.
+
+    It periodically measures the items in flight in the pipelines and how long items wait from the end of the parsing
+    of their page until they leave the pipelines, the latter as the longest wait of the items finished since the last
+    check, or of the items still in the pipelines if longer, as announced by the spiders with :data:`ITEMS_PARSED`.
+    Once either is over its
+    low watermark, the items processed concurrently per response are halved at every check, down to a minimum, and
+    once over its high watermark the engine is also paused, so that no new downloads are scheduled. Once both are back
+    under their low watermarks, the engine is resumed and the concurrency doubled at every check until restored.
+
+    The state, which is ``normal``, ``throttled`` or ``paused``, the measurements, the concurrency of items and the
+    number and duration of the pauses are stored in the stats under ``backpressure/``. It can be configured with the
+    settings below:
+
+    .. code-block:: python
+
+        # Enables the extension.
+        BACKPRESSURE_ENABLED = True
+        # Seconds between checks.
+        BACKPRESSURE_INTERVAL = 1.0
+        # Items in flight in the pipelines over which items are throttled, and under which the crawl is resumed.
+        BACKPRESSURE_LOW_ITEMS = 200
+        # Items in flight in the pipelines over which the engine is paused.
+        BACKPRESSURE_HIGH_ITEMS = 1000
+        # Seconds items wait over which items are throttled, and under which the crawl is resumed.
+        BACKPRESSURE_LOW_LATENCY = 5.0
+        # Seconds items wait over which the engine is paused.
+        BACKPRESSURE_HIGH_LATENCY = 30.0
+        # Minimum items processed concurrently per response while throttled.
+        BACKPRESSURE_MIN_CONCURRENT_ITEMS = 10"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, *args, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this extension.
+        :raises ValueError: A low watermark is over its high watermark."""
+        super().__init__(*args, **kwargs)
+        #: The crawler that uses this extension.
+        self.__crawler = crawler
+        #: The settings of the backpressure.
+        self.__settings = BackpressureSettings.from_settings(crawler.settings)
+        #: The longest wait of the items finished since the last check, in seconds.
+        self.__latency = 0.0
+        #: The number of items of each response still in the pipelines, from the oldest to the newest response.
+        self.__waiting: dict[scrapy.http.Request, int] = {}
+        #: The time the engine was paused by the extension, ``None`` if not paused by it.
+        self.__paused_at: float | None = None
+        #: The state of the crawl.
+        self.__state = "normal"
+        #: The periodic task, once started.
+        self.__task: twisted.internet.task.LoopingCall | None = None
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+        crawler.signals.connect(self.__items_parsed, signal=ITEMS_PARSED)
+        for signal in (scrapy.signals.item_scraped, scrapy.signals.item_dropped, scrapy.signals.item_error):
+            crawler.signals.connect(self.__item_finished, signal=signal)
+
+    def __spider_opened(self) -> None:
+        """Starts checking the pipelines periodically."""
+        self.__task = twisted.internet.task.LoopingCall(self.check)
+        self.__task.start(self.__settings.interval, now=False)
+
+    def __spider_closed(self) -> None:
+        """Stops checking the pipelines, and resumes the engine if paused by the extension."""
+        if self.__task is not None and self.__task.running:
+            self.__task.stop()
+        self.__resume()
+
+    def __items_parsed(self, request: scrapy.http.Request, count: int) -> None:
+        """Tracks the items of a response that are about to enter the pipelines.
+
+        :param request: The request of the response the items were parsed from.
+        :param count: The number of items."""
+        if count > 0:
+            self.__waiting[request] = self.__waiting.get(request, 0) + count
+
+    def __item_finished(self, response: scrapy.http.Response | None) -> None:
+        """Measures the wait of an item that left the pipelines, from the end of the parsing of its page.
+
+        :param response: The response the item was parsed from."""
+        if (request := getattr(response, "request", None)) is None:
+            return
+        if (parse_end := self._get_mark(request, "parse_end")) is not None:
+            self.__latency = max(self.__latency, time.perf_counter() - parse_end)
+        if (waiting := self.__waiting.pop(request, 0)) > 1:
+            self.__waiting[request] = waiting - 1
+
+    def __get_oldest_wait(self) -> float:
+        """Returns how long the oldest item still in the pipelines has been waiting, from the end of the parsing of
+        its page.
+
+        :return: The wait in seconds, 0 if no item is waiting."""
+        for request in self.__waiting:
+            if (parse_end := self._get_mark(request, "parse_end")) is not None:
+                return time.perf_counter() - parse_end
+
+        return 0.0
+
+    def __set_stat(self, key: str, value: Any) -> None:
+        """Sets a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``backpressure/``.
+        :param value: The value."""
+        if self.__crawler.stats is not None:
+            self.__crawler.stats.set_value(f"backpressure/{key}", value)
+
+    def __pause(self, engine: Any) -> None:
+        """Pauses the engine, unless it is already paused.
+
+        :param engine: The engine."""
+        if engine.paused:
+            return
+        self._log_info("Pausing the engine, the item pipelines are falling behind.")
+        engine.pause()
+        self.__paused_at = time.perf_counter()
+        if (stats := self.__crawler.stats) is not None:
+            stats.inc_value("backpressure/pauses")
+
+    def __resume(self) -> None:
+        """Resumes the engine, if paused by the extension."""
+        if self.__paused_at is None:
+            return
+        if (engine := self.__crawler.engine) is not None:
+            self._log_info("Resuming the engine, the item pipelines caught up.")
+            engine.unpause()
+        if (stats := self.__crawler.stats) is not None:
+            stats.inc_value("backpressure/paused_time", time.perf_counter() - self.__paused_at)
+        self.__paused_at = None
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "BackpressureExtension":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :raises scrapy.exceptions.NotConfigured: The extension is not enabled.
+        :return: The instance of the extension."""
+        if not crawler.settings.getbool("BACKPRESSURE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    @property
+    def state(self) -> str:
+        """The state of the crawl, ``normal``, ``throttled`` while items are throttled or ``paused`` while the engine
+        is also paused.
+
+        :return: The state."""
+        return self.__state
+
+    def check(self) -> str:
+        """Measures the pipelines, and throttles or pauses the crawl if they are falling behind.
+
+        :return: The state of the crawl."""
+        engine = self.__crawler.engine
+        if engine is None or (slot := engine.scraper.slot) is None:
+            return self.__state
+
+        in_flight, latency, self.__latency = slot.itemproc_size, self.__latency, 0.0
+        if in_flight > 0:
+            latency = max(latency, self.__get_oldest_wait())
+
+        scraper, settings = engine.scraper, self.__settings
+        if in_flight > settings.low_items or latency > settings.low_latency:
+            scraper.concurrent_items = max(settings.min_concurrent_items, scraper.concurrent_items // 2)
+            if in_flight > settings.high_items or latency > settings.high_latency:
+                self.__pause(engine)
+        else:
+            self.__resume()
+            scraper.concurrent_items = min(settings.max_concurrent_items, scraper.concurrent_items * 2)
+
+        if self.__paused_at is not None:
+            self.__state = "paused"
+        elif scraper.concurrent_items < settings.max_concurrent_items:
+            self.__state = "throttled"
+        else:
+            self.__state = "normal"
+
+        self.__set_stat("state", self.__state)
+        self.__set_stat("items_in_flight", in_flight)
+        self.__set_stat("item_latency", latency)
+        self.__set_stat("concurrent_items", scraper.concurrent_items)
+        if (stats := self.__crawler.stats) is not None:
+            stats.max_value("backpressure/items_in_flight_max", in_flight)
+            stats.max_value("backpressure/item_latency_max", latency)
+
+        return self.__state
+
+
+class _MetricsResource(twisted.web.resource.Resource):
+    """Twisted resource that serves the histograms of an :class:`InstrumentationExtension` in Prometheus format."""
+
+    isLeaf = True
+
+    def __init__(self, extension: InstrumentationExtension) -> None:
+        """Class constructor.
+
+        :param extension: The extension with the histograms."""
+        super().__init__()
+        #: The extension with the histograms.
+        self.__extension = extension
+
+    def render_GET(self, request: twisted.web.server.Request) -> bytes:  # pylint: disable=invalid-name
+        """Renders the histograms.
+
+        :param request: The HTTP request.
+        :return: The body of the response."""
+        request.setHeader(b"Content-Type", b"text/plain; version=0.0.4; charset=utf-8")
+        return self.__extension.to_prometheus().encode("utf8")
@@ -0,0 +1,5 @@
+"""Public API for frontiers."""
+
+## Initialization code #################################################################################################
+
+## Public API ##########################################################################################################
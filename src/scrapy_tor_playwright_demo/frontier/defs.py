@@ -0,0 +1,240 @@
+"""Common definitions for frontiers, the queues of requests shared by the worker processes of a sharded crawl, for
+details refer to:
+
+    - https://docs.scrapy.org/en/latest/topics/scheduler.html"""
+
+import base64
+import dataclasses
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+
+import scrapy
+import scrapy.http
+import scrapy.settings
+
+from ..defs import LoggerMixin, PlaywrightMixin
+
+#: The keys of the metadata of requests that are not stored in a frontier, because they belong to the worker process
+#: that downloaded the request, e.g. its proxy, or they are added again when the request is downloaded.
+_WORKER_META_KEYS = frozenset(
+    {
+        "proxy",
+        "_rotating_proxy",
+        "_ban",
+        "download_slot",
+        "download_latency",
+        "download_timeout",
+        "adaptive_timeout",
+        "instrumentation",
+    }
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class ShardSettings:
+    """The settings of the shard of a worker process, refer to :class:`FrontierScheduler` for details."""
+
+    #: The shard of the worker.
+    shard: int = 0
+    #: The number of shards.
+    shards: int = 1
+    #: Maximum number of requests claimed at once.
+    batch_size: int = 16
+    #: Seconds between downloads from each domain among all the workers, zero to not share it.
+    domain_delay: float = 0.0
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "ShardSettings":
+        """Reads the settings of the shard of a worker process.
+
+        :param settings: The settings of the crawler.
+        :raises ValueError: The shard is not one of the shards.
+        :return: The settings of the shard."""
+        shard_settings = cls(
+            shard=settings.getint("SHARD_INDEX", 0),
+            shards=max(1, settings.getint("SHARD_COUNT", 1)),
+            batch_size=max(1, settings.getint("FRONTIER_BATCH_SIZE", 16)),
+            domain_delay=settings.getfloat("FRONTIER_DOMAIN_DELAY", 0.0),
+        )
+        if not 0 <= shard_settings.shard < shard_settings.shards:
+            raise ValueError(f"Invalid shard {shard_settings.shard} for {shard_settings.shards} shards.")
+
+        return shard_settings
+
+
+@dataclasses.dataclass(frozen=True)
+class RedisFrontierSettings:
+    """The settings of a worker of a frontier in a Redis server, refer to :class:`RedisFrontier` for details."""
+
+    #: The prefix of the keys of the crawl.
+    prefix: str
+    #: Seconds for the lease of the worker, renewed every third of it.
+    lease_time: float = 60.0
+    #: The identifier of the worker, unique among all the workers.
+    worker: str = dataclasses.field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def get_shard(fingerprint: bytes, shards: int) -> int:
+    """Returns the shard that owns a request, partitioning the space of fingerprints of requests.
+
+    :param fingerprint: The fingerprint of the request.
+    :param shards: The number of shards.
+    :return: The index of the shard, from zero."""
+    return int.from_bytes(fingerprint[:8], "big") % shards
+
+
+def request_to_record(request: scrapy.http.Request) -> bytes:
+    """Serializes a request to be stored in a frontier.
+
+    Playwright requests are stored without the Playwright metadata, which holds callbacks and a context unique to the
+    request, and are converted again when loaded. The callback must be a method of the spider, the errback is kept
+    only if it is a method of the spider, and only the metadata that can be serialized to JSON is kept.
+
+    :param request: The request.
+    :raises ValueError: The callback is not a method of the spider.
+    :return: The record."""
+    if request.callback is not None and getattr(request.callback, "__self__", None) is None:
+        raise ValueError(f"The callback '{request.callback}' of '{request.url}' is not a method of the spider.")
+
+    meta = {}
+    for key, value in request.meta.items():
+        if key.startswith("playwright") or key in _WORKER_META_KEYS:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        meta[key] = value
+
+    record = {
+        "url": request.url,
+        "method": request.method,
+        "headers": {
+            key.decode("latin1"): [value.decode("latin1") for value in values]
+            for key, values in request.headers.items()
+        },
+        "body": base64.b64encode(request.body).decode("ascii"),
+        "cookies": request.cookies,
+        "callback": getattr(request.callback, "__name__", None),
+        "errback": request.errback.__name__ if getattr(request.errback, "__self__", None) is not None else None,
+        "priority": request.priority,
+        "dont_filter": request.dont_filter,
+        "playwright": request.meta.get("playwright", False),
+        "meta": meta,
+    }
+
+    return json.dumps(record, separators=(",", ":")).encode("utf8")
+
+
+def request_from_record(record: bytes, spider: scrapy.Spider) -> scrapy.http.Request:
+    """Deserializes a request stored in a frontier.
+
+    :param record: The record.
+    :param spider: The spider, which holds the callbacks.
+    :return: The request."""
+    data = json.loads(record)
+    request = scrapy.http.Request(
+        data["url"],
+        callback=getattr(spider, data["callback"]) if data["callback"] is not None else None,
+        errback=getattr(spider, data["errback"]) if data["errback"] is not None else None,
+        method=data["method"],
+        headers=data["headers"],
+        body=base64.b64decode(data["body"]),
+        cookies=data["cookies"],
+        priority=data["priority"],
+        dont_filter=data["dont_filter"],
+        meta=data["meta"],
+    )
+
+    # pylint: disable-next=protected-access
+    return PlaywrightMixin._to_playwright_request(request) if data["playwright"] else request
+
+
+class FrontierBase(LoggerMixin, ABC):
+    """Base class for frontiers, the queues of requests shared by the worker processes of a sharded crawl, each owning
+    a shard of the requests.
+
+    Requests are stored once per key, so that the frontier is also the filter of duplicates for all the workers, and
+    each is pending until claimed by a worker of its shard, and claimed until completed by the same worker once it
+    is idle, that is once the requests were downloaded and parsed and the new requests found were pushed. The requests
+    claimed by a worker that stops without completing them are pending again.
+
+    The frontier also holds the politeness state of each domain, shared by the workers, see :meth:`acquire`."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        """Class constructor.
+
+        :param logger: The logger for the frontier."""
+        #: The logger to use internally in the frontier.
+        self.__logger = logger if logger is not None else logging.getLogger("dummy")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @abstractmethod
+    def open(self, shard: int) -> None:
+        """Opens the frontier for the worker of a shard, the requests claimed by a previous worker of the shard that
+        did not complete them are pending again.
+
+        :param shard: The shard of the worker."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Closes the frontier."""
+
+    @abstractmethod
+    def push(self, key: bytes, shard: int, priority: int, record: bytes) -> bool:
+        """Pushes a request, if no request with the same key was pushed before.
+
+        :param key: The key of the request, its fingerprint unless the request skips the filter of duplicates.
+        :param shard: The shard that owns the request.
+        :param priority: The priority of the request, higher first.
+        :param record: The request, as serialized by :func:`request_to_record`.
+        :return: ``True`` if the request was pushed, ``False`` if it is a duplicate."""
+
+    @abstractmethod
+    def pop(self, shard: int, count: int) -> list[bytes]:
+        """Claims the pending requests of highest priority of a shard.
+
+        :param shard: The shard.
+        :param count: The maximum number of requests.
+        :return: The requests, as serialized by :func:`request_to_record`."""
+
+    @abstractmethod
+    def complete(self, shard: int) -> int:
+        """Completes the requests claimed by the worker of a shard.
+
+        :param shard: The shard.
+        :return: The number of requests completed."""
+
+    @abstractmethod
+    def pending(self, shard: int) -> int:
+        """Returns the number of pending requests of a shard.
+
+        :param shard: The shard.
+        :return: The number of requests."""
+
+    @abstractmethod
+    def acquire(self, domain: str, interval: float) -> float:
+        """Acquires the slot of a domain for a download, the slot is acquired by at most one worker per interval.
+
+        :param domain: The domain.
+        :param interval: Seconds between downloads from the domain, among all the workers.
+        :return: Zero if acquired, otherwise the seconds to wait before trying again."""
+
+    @abstractmethod
+    def is_active(self) -> bool:
+        """Returns whether there are pending or claimed requests in any shard, thus the crawl has not finished.
+
+        :return: ``True`` if the crawl has not finished, ``False`` otherwise."""
+
+    @property
+    def logger(self) -> logging.Logger:
+        """Returns the logger.
+
+        :return: The logger."""
+        return self.__logger
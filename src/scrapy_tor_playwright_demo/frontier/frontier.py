@@ -0,0 +1,631 @@
+"""Frontiers and the scheduler of the worker processes of a sharded crawl."""
+
+import collections
+import datetime
+import functools
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any
+
+import scrapy
+import scrapy.core.scheduler
+import scrapy.crawler
+import scrapy.exceptions
+import scrapy.http
+import scrapy.signals
+import scrapy.statscollectors
+import scrapy.utils.httpobj
+
+from .defs import FrontierBase, RedisFrontierSettings, ShardSettings, get_shard, request_from_record, request_to_record
+
+#: The state of a pending request in a SQLite frontier.
+SQLITE_PENDING = 0
+#: The state of a claimed request in a SQLite frontier.
+SQLITE_CLAIMED = 1
+#: The state of a completed request in a SQLite frontier.
+SQLITE_COMPLETED = 2
+#: The statements that create the schema of a SQLite frontier, if it does not exist.
+SQLITE_SCHEMA = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "CREATE TABLE IF NOT EXISTS requests ("
+    "id INTEGER PRIMARY KEY, key BLOB NOT NULL UNIQUE, shard INTEGER NOT NULL, priority INTEGER NOT NULL, "
+    "state INTEGER NOT NULL, record BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS requests_shard_state ON requests(shard, state, priority DESC, id)",
+    "CREATE INDEX IF NOT EXISTS requests_state ON requests(state)",
+    "CREATE TABLE IF NOT EXISTS politeness (domain TEXT PRIMARY KEY, next REAL NOT NULL)",
+)
+
+
+class SQLiteFrontier(FrontierBase):
+    """Frontier in a SQLite database in WAL mode, shared by the worker processes of a sharded crawl in the same host.
+
+    Each request is a row with a state, that is pending, claimed or completed, and the rows of completed requests are
+    kept so that their keys still filter duplicates."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, path: str, timeout: float = 30.0, logger: logging.Logger | None = None) -> None:
+        """Class constructor.
+
+        :param path: Path to the database.
+        :param timeout: Seconds to wait for the lock of the database held by another worker.
+        :param logger: The logger for the frontier."""
+        super().__init__(logger)
+        #: Path to the database.
+        self.__path = path
+        #: Seconds to wait for the lock of the database held by another worker.
+        self.__timeout = timeout
+        #: The connection to the database, while open.
+        self.__connection: sqlite3.Connection | None = None
+
+    @property
+    def __db(self) -> sqlite3.Connection:
+        """The connection to the database.
+
+        :raises RuntimeError: The frontier is not open.
+        :return: The connection."""
+        if self.__connection is None:
+            raise RuntimeError("The frontier is not open.")
+
+        return self.__connection
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def open(self, shard: int) -> None:
+        """Opens the database, creating it if it does not exist, see :meth:`FrontierBase.open`.
+
+        :param shard: The shard of the worker."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.__path)), exist_ok=True)
+        self._log_debug(f"Opening frontier at '{self.__path}' for shard {shard}...")
+        # In autocommit mode, each statement is a transaction.
+        self.__connection = sqlite3.connect(self.__path, timeout=self.__timeout, isolation_level=None)
+        for statement in SQLITE_SCHEMA:
+            self.__connection.execute(statement)
+        self.__connection.execute(
+            "UPDATE requests SET state = ? WHERE shard = ? AND state = ?", (SQLITE_PENDING, shard, SQLITE_CLAIMED)
+        )
+
+    def close(self) -> None:
+        """Closes the database."""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def push(self, key: bytes, shard: int, priority: int, record: bytes) -> bool:
+        """Inserts a request, unless there is a request with the same key, see :meth:`FrontierBase.push`.
+
+        :param key: The key of the request.
+        :param shard: The shard that owns the request.
+        :param priority: The priority of the request.
+        :param record: The request.
+        :return: ``True`` if the request was pushed, ``False`` if it is a duplicate."""
+        cursor = self.__db.execute(
+            "INSERT INTO requests (key, shard, priority, state, record) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO NOTHING",
+            (key, shard, priority, SQLITE_PENDING, record),
+        )
+
+        return cursor.rowcount > 0
+
+    def pop(self, shard: int, count: int) -> list[bytes]:
+        """Claims requests atomically, so that they are never claimed twice, see :meth:`FrontierBase.pop`.
+
+        :param shard: The shard.
+        :param count: The maximum number of requests.
+        :return: The requests."""
+        rows = self.__db.execute(
+            "UPDATE requests SET state = ? WHERE id IN ("
+            "SELECT id FROM requests WHERE shard = ? AND state = ? ORDER BY priority DESC, id LIMIT ?) "
+            "RETURNING priority, id, record",
+            (SQLITE_CLAIMED, shard, SQLITE_PENDING, count),
+        ).fetchall()
+
+        # The order of the rows returned is not defined.
+        return [record for _, _, record in sorted(rows, key=lambda row: (-row[0], row[1]))]
+
+    def complete(self, shard: int) -> int:
+        """Completes the claimed requests of a shard, see :meth:`FrontierBase.complete`.
+
+        :param shard: The shard.
+        :return: The number of requests completed."""
+        cursor = self.__db.execute(
+            "UPDATE requests SET state = ? WHERE shard = ? AND state = ?", (SQLITE_COMPLETED, shard, SQLITE_CLAIMED)
+        )
+
+        return cursor.rowcount
+
+    def pending(self, shard: int) -> int:
+        """Counts the pending requests of a shard, see :meth:`FrontierBase.pending`.
+
+        :param shard: The shard.
+        :return: The number of requests."""
+        return self.__db.execute(
+            "SELECT COUNT(*) FROM requests WHERE shard = ? AND state = ?", (shard, SQLITE_PENDING)
+        ).fetchone()[0]
+
+    def acquire(self, domain: str, interval: float) -> float:
+        """Acquires the slot of a domain if its next download is due, see :meth:`FrontierBase.acquire`.
+
+        :param domain: The domain.
+        :param interval: Seconds between downloads from the domain.
+        :return: Zero if acquired, otherwise the seconds to wait."""
+        now = time.time()
+        cursor = self.__db.execute(
+            "INSERT INTO politeness (domain, next) VALUES (?, ?) "
+            "ON CONFLICT (domain) DO UPDATE SET next = excluded.next WHERE politeness.next <= ?",
+            (domain, now + interval, now),
+        )
+        if cursor.rowcount > 0:
+            return 0.0
+        due = self.__db.execute("SELECT next FROM politeness WHERE domain = ?", (domain,)).fetchone()[0]
+
+        return max(0.001, due - now)
+
+    def is_active(self) -> bool:
+        """Checks for requests not completed in any shard, see :meth:`FrontierBase.is_active`.
+
+        :return: ``True`` if the crawl has not finished, ``False`` otherwise."""
+        return bool(
+            self.__db.execute(
+                "SELECT EXISTS (SELECT 1 FROM requests WHERE state < ?)", (SQLITE_COMPLETED,)
+            ).fetchone()[0]
+        )
+
+
+class RedisFrontier(FrontierBase):
+    """Frontier in a Redis server, or a server compatible with its commands, shared by the worker processes of a crawl
+    in several hosts.
+
+    Requests are claimed in batches with two round trips, and leased to the worker while it is alive, that is while it
+    renews its lease from a background thread. Once the lease of a worker expires, the requests it claimed and did not
+    complete are pending again for any worker of the shard, and they are also pending again when the worker is closed.
+    The keys below are used, under a prefix:
+
+    - ``seen``: Set with the keys of all the requests pushed, the filter of duplicates.
+    - ``entries``: Hash with the records of the requests not completed, by identifier.
+    - ``pending:<shard>``: Sorted set with the identifiers of the pending requests of a shard, by priority.
+    - ``claims:<worker>``: Sorted set with the identifiers of the requests claimed by a worker, by priority.
+    - ``workers``: Hash with the shard of each worker.
+    - ``worker:<worker>``: The lease of a worker, which expires unless renewed.
+    - ``politeness:<domain>``: The slot of a domain, which expires after the interval between downloads."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, client: Any, settings: RedisFrontierSettings, logger: logging.Logger | None = None) -> None:
+        """Class constructor.
+
+        :param client: The client, ``redis.Redis`` or a client compatible with the commands used.
+        :param settings: The settings of the worker, that is the prefix of the keys, its lease and its identifier.
+        :param logger: The logger for the frontier."""
+        super().__init__(logger)
+        #: The client of the server.
+        self.__client = client
+        #: The settings of the worker.
+        self.__settings = settings
+        #: The shard of the worker, while open.
+        self.__shard: int | None = None
+        #: The thread that renews the lease of the worker, while open.
+        self.__heartbeat: threading.Thread | None = None
+        #: Set to stop the thread that renews the lease of the worker.
+        self.__stopping = threading.Event()
+        #: Time of the last check for workers whose lease expired, in seconds of the monotonic clock.
+        self.__last_sweep = 0.0
+
+    def __key(self, *parts: Any) -> str:
+        """Returns a key of the crawl.
+
+        :param parts: The parts of the key after the prefix.
+        :return: The key."""
+        return ":".join((self.__settings.prefix, *(str(part) for part in parts)))
+
+    def __renew(self) -> None:
+        """Renews the lease of the worker from a background thread, until the frontier is closed."""
+        worker, lease_time = self.__settings.worker, self.__settings.lease_time
+        # Renew a third of the lease time after the previous renewal, the wait returns ``True`` once stopping.
+        for _ in iter(functools.partial(self.__stopping.wait, lease_time / 3), True):
+            try:
+                self.__client.set(self.__key("worker", worker), 1, px=round(lease_time * 1000))
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self._log_error(f"Failed to renew the lease of worker '{worker}': {error}")
+
+    def __release(self, worker: str, shard: int) -> int:
+        """Makes the requests claimed by a worker pending again, and removes the worker, atomically.
+
+        :param worker: The identifier of the worker.
+        :param shard: The shard of the worker.
+        :return: The number of requests pending again, zero if already released by another worker."""
+        claims, pending = self.__key("claims", worker), self.__key("pending", shard)
+        pipeline = self.__client.pipeline(transaction=True)
+        pipeline.zcard(claims)
+        pipeline.zunionstore(pending, [pending, claims], aggregate="MIN")
+        pipeline.delete(claims, self.__key("worker", worker))
+        pipeline.hdel(self.__key("workers"), worker)
+
+        return pipeline.execute()[0]
+
+    def __sweep(self) -> None:
+        """Releases the requests claimed by the workers whose lease expired."""
+        self.__last_sweep = time.monotonic()
+        workers = {
+            worker.decode("utf8"): int(shard)
+            for worker, shard in self.__client.hgetall(self.__key("workers")).items()
+            if worker.decode("utf8") != self.__settings.worker
+        }
+        if not workers:
+            return
+        pipeline = self.__client.pipeline(transaction=False)
+        for worker in workers:
+            pipeline.exists(self.__key("worker", worker))
+        for (worker, shard), alive in zip(workers.items(), pipeline.execute()):
+            if not alive and (released := self.__release(worker, shard)) > 0:
+                self._log_info(f"Worker '{worker}' is gone, {released} requests of shard {shard} are pending again.")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_url(cls, url: str, settings: RedisFrontierSettings) -> "RedisFrontier":
+        """Creates a frontier from the URL of the server.
+
+        :param url: The URL, e.g. ``redis://localhost:6379/0``, or ``rediss://`` for TLS.
+        :param settings: The settings of the worker.
+        :raises ValueError: The URL is not the URL of a Redis server.
+        :raises RuntimeError: The ``redis`` package is not installed.
+        :return: The frontier."""
+        if not url.startswith(("redis://", "rediss://")):
+            raise ValueError(f"The frontier at '{url}' is not a 'redis://' or 'rediss://' URL.")
+        if importlib.util.find_spec("redis") is None:
+            raise RuntimeError(f"The frontier at '{url}' requires the 'redis' extra with 'redis'.")
+        # pylint: disable-next=import-outside-toplevel
+        import redis
+
+        return cls(redis.Redis.from_url(url), settings)
+
+    def open(self, shard: int) -> None:
+        """Registers the worker and starts renewing its lease, see :meth:`FrontierBase.open`.
+
+        :param shard: The shard of the worker."""
+        worker = self.__settings.worker
+        self._log_debug(f"Opening frontier at '{self.__settings.prefix}' for worker '{worker}' of shard {shard}...")
+        self.__shard = shard
+        pipeline = self.__client.pipeline(transaction=True)
+        pipeline.hset(self.__key("workers"), worker, shard)
+        pipeline.set(self.__key("worker", worker), 1, px=round(self.__settings.lease_time * 1000))
+        pipeline.execute()
+        self.__stopping.clear()
+        self.__heartbeat = threading.Thread(target=self.__renew, name="frontier-heartbeat", daemon=True)
+        self.__heartbeat.start()
+        self.__sweep()
+
+    def close(self) -> None:
+        """Stops renewing the lease, and makes the requests claimed and not completed pending again."""
+        if self.__shard is None:
+            return
+        self.__stopping.set()
+        if self.__heartbeat is not None:
+            self.__heartbeat.join()
+            self.__heartbeat = None
+        self.__release(self.__settings.worker, self.__shard)
+        self.__shard = None
+        self.__client.close()
+
+    def push(self, key: bytes, shard: int, priority: int, record: bytes) -> bool:
+        """Adds the key of a request to the filter of duplicates, and then the request, see :meth:`FrontierBase.push`.
+
+        :param key: The key of the request.
+        :param shard: The shard that owns the request.
+        :param priority: The priority of the request.
+        :param record: The request.
+        :return: ``True`` if the request was pushed, ``False`` if it is a duplicate."""
+        if not self.__client.sadd(self.__key("seen"), key):
+            return False
+        # The identifiers sort as the requests were pushed, for requests of the same priority.
+        identifier = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        pipeline = self.__client.pipeline(transaction=True)
+        pipeline.hset(self.__key("entries"), identifier, record)
+        pipeline.zadd(self.__key("pending", shard), {identifier: -priority})
+        pipeline.execute()
+
+        return True
+
+    def pop(self, shard: int, count: int) -> list[bytes]:
+        """Claims requests, reading the pending requests of the shard first and then moving them to the claims of the
+        worker atomically, so that a request claimed by another worker in between is skipped, see
+        :meth:`FrontierBase.pop`.
+
+        :param shard: The shard.
+        :param count: The maximum number of requests.
+        :return: The requests."""
+        if time.monotonic() - self.__last_sweep >= self.__settings.lease_time / 3:
+            self.__sweep()
+        pending, claims = self.__key("pending", shard), self.__key("claims", self.__settings.worker)
+        if not (candidates := self.__client.zrange(pending, 0, count - 1, withscores=True)):
+            return []
+
+        pipeline = self.__client.pipeline(transaction=True)
+        for identifier, _ in candidates:
+            pipeline.zrem(pending, identifier)
+        pipeline.zadd(claims, dict(candidates))
+        pipeline.hmget(self.__key("entries"), [identifier for identifier, _ in candidates])
+        *claimed, _, records = pipeline.execute()
+        if lost := [identifier for (identifier, _), removed in zip(candidates, claimed) if not removed]:
+            self.__client.zrem(claims, *lost)
+
+        return [record for removed, record in zip(claimed, records) if removed and record is not None]
+
+    def complete(self, shard: int) -> int:
+        """Completes the requests claimed by the worker, removing their records, see :meth:`FrontierBase.complete`.
+
+        :param shard: The shard.
+        :return: The number of requests completed."""
+        claims = self.__key("claims", self.__settings.worker)
+        if not (identifiers := self.__client.zrange(claims, 0, -1)):
+            return 0
+        pipeline = self.__client.pipeline(transaction=True)
+        pipeline.hdel(self.__key("entries"), *identifiers)
+        pipeline.zrem(claims, *identifiers)
+        pipeline.execute()
+
+        return len(identifiers)
+
+    def pending(self, shard: int) -> int:
+        """Counts the pending requests of a shard, see :meth:`FrontierBase.pending`.
+
+        :param shard: The shard.
+        :return: The number of requests."""
+        return self.__client.zcard(self.__key("pending", shard))
+
+    def acquire(self, domain: str, interval: float) -> float:
+        """Acquires the slot of a domain by creating its key, which expires after the interval, see
+        :meth:`FrontierBase.acquire`.
+
+        :param domain: The domain.
+        :param interval: Seconds between downloads from the domain.
+        :return: Zero if acquired, otherwise the seconds to wait."""
+        key = self.__key("politeness", domain)
+        pipeline = self.__client.pipeline(transaction=False)
+        pipeline.set(key, 1, px=max(1, round(interval * 1000)), nx=True)
+        pipeline.pttl(key)
+        acquired, ttl = pipeline.execute()
+
+        return 0.0 if acquired else max(1, ttl) / 1000
+
+    def is_active(self) -> bool:
+        """Checks for records of requests not completed, after releasing the requests of the workers that are gone, see
+        :meth:`FrontierBase.is_active`.
+
+        :return: ``True`` if the crawl has not finished, ``False`` otherwise."""
+        self.__sweep()
+
+        return self.__client.hlen(self.__key("entries")) > 0
+
+
+class FrontierScheduler(scrapy.core.scheduler.BaseScheduler):
+    """Scheduler of a worker process of a sharded crawl, the requests are pushed to a frontier shared by all the
+    workers, which also filters duplicates, and each worker only schedules the requests of its shard.
+
+    Requests are claimed from the frontier in batches, and completed when the worker is idle, which is also when the
+    worker checks whether the crawl has finished, so it is kept open while other workers have requests that could
+    find new requests for its shard. The frontier is a SQLite database for the workers in one host, or a Redis server
+    for the workers in several hosts, which can also share the interval between downloads from each domain. It can be
+    configured with the settings below:
+
+    .. code-block:: python
+
+        # Use the scheduler.
+        SCHEDULER = "scrapy_tor_playwright_demo.frontier.frontier.FrontierScheduler"
+        # Path to the SQLite database of the frontier.
+        FRONTIER_PATH = "frontier.sqlite3"
+        # URL of the Redis server of the frontier, e.g. 'redis://localhost:6379/0', instead of the SQLite database.
+        FRONTIER_URL = None
+        # Seconds for the lease of the requests claimed by a worker of a frontier in a Redis server.
+        FRONTIER_LEASE_TIME = 60
+        # Maximum number of requests claimed at once.
+        FRONTIER_BATCH_SIZE = 16
+        # Seconds between downloads from each domain among all the workers, zero to not share it.
+        FRONTIER_DOMAIN_DELAY = 0
+        # The shard of the worker, and the number of shards.
+        SHARD_INDEX = 0
+        SHARD_COUNT = 1"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler, frontier: FrontierBase) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this scheduler.
+        :param frontier: The frontier shared by the workers.
+        :raises ValueError: The shard of this worker is not one of the shards."""
+        #: Crawler that uses this scheduler.
+        self.__crawler = crawler
+        #: The frontier shared by the workers.
+        self.__frontier = frontier
+        #: The settings of the shard of this worker.
+        self.__settings = ShardSettings.from_settings(crawler.settings)
+        #: The requests claimed and not scheduled yet.
+        self.__claimed: collections.deque[scrapy.http.Request] = collections.deque()
+        #: The spider, while open.
+        self.__spider: scrapy.Spider | None = None
+
+        crawler.signals.connect(self.__on_spider_idle, signal=scrapy.signals.spider_idle)
+
+    def __inc_stat(self, key: str) -> None:
+        """Increments a value in the stats.
+
+        :param key: The key of the value, under ``frontier/``."""
+        if self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"frontier/{key}", spider=self.__spider)
+
+    def __on_spider_idle(self, spider: scrapy.Spider) -> None:
+        """Completes the claimed requests, and keeps the spider open while the crawl has not finished.
+
+        :param spider: The spider.
+        :raises scrapy.exceptions.DontCloseSpider: The crawl has not finished."""
+        # pylint: disable=unused-argument
+        self.__frontier.complete(self.__settings.shard)
+        if self.__frontier.is_active():
+            raise scrapy.exceptions.DontCloseSpider()
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "FrontierScheduler":
+        """Method in Scrapy workflow that will create a new instance of the scheduler.
+
+        :param crawler: Crawler that uses this scheduler.
+        :return: The instance of the scheduler."""
+        if url := crawler.settings.get("FRONTIER_URL", None):
+            frontier: FrontierBase = RedisFrontier.from_url(
+                url,
+                RedisFrontierSettings(
+                    prefix=f"frontier:{crawler.spidercls.name}",
+                    lease_time=crawler.settings.getfloat("FRONTIER_LEASE_TIME", 60.0),
+                ),
+            )
+        else:
+            frontier = SQLiteFrontier(crawler.settings.get("FRONTIER_PATH", "frontier.sqlite3"))
+
+        return cls(crawler, frontier)
+
+    def open(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is opened, it opens the frontier.
+
+        :param spider: The spider."""
+        self.__spider = spider
+        self.__frontier.open(self.__settings.shard)
+
+    def close(self, reason: str) -> None:
+        """Called when the spider is closed, it closes the frontier, the requests claimed and not scheduled are pending
+        again when the frontier is opened for the shard.
+
+        :param reason: The reason why the spider was closed."""
+        # pylint: disable=unused-argument
+        self.__frontier.close()
+        self.__spider = None
+
+    def has_pending_requests(self) -> bool:
+        """Checks whether there are requests to schedule, claiming a batch if needed.
+
+        :return: ``True`` if there are requests, ``False`` otherwise."""
+        if not self.__claimed:
+            self.__claimed.extend(
+                request_from_record(record, self.__spider)
+                for record in self.__frontier.pop(self.__settings.shard, self.__settings.batch_size)
+            )
+
+        return len(self.__claimed) > 0
+
+    def enqueue_request(self, request: scrapy.http.Request) -> bool:
+        """Pushes a request to the frontier, in the shard that owns it.
+
+        :param request: The request.
+        :return: ``True`` if pushed, ``False`` if it is a duplicate."""
+        fingerprint = self.__crawler.request_fingerprinter.fingerprint(request)
+        # Requests that skip the filter of duplicates, e.g. retries, have a unique key but stay in the same shard.
+        key = fingerprint + uuid.uuid4().bytes if request.dont_filter else fingerprint
+        shard = get_shard(fingerprint, self.__settings.shards)
+        if not self.__frontier.push(key, shard, request.priority, request_to_record(request)):
+            self.__inc_stat("filtered")
+            self.__crawler.signals.send_catch_log(scrapy.signals.request_dropped, request=request, spider=self.__spider)
+            return False
+        self.__inc_stat("enqueued/local" if shard == self.__settings.shard else "enqueued/remote")
+
+        return True
+
+    def next_request(self) -> scrapy.http.Request | None:
+        """Returns the next request of the shard to schedule, unless its domain was downloaded from by any worker in
+        the last ``FRONTIER_DOMAIN_DELAY`` seconds, in which case the engine is woken up once the delay is over.
+
+        :return: The request, ``None`` if there are no requests or the request must wait."""
+        if not self.has_pending_requests():
+            return None
+        if (domain_delay := self.__settings.domain_delay) > 0:
+            domain = scrapy.utils.httpobj.urlparse_cached(self.__claimed[0]).netloc
+            if (wait := self.__frontier.acquire(domain, domain_delay)) > 0:
+                self.__inc_stat("delayed")
+                if self.__crawler.engine is not None and self.__crawler.engine.slot is not None:
+                    self.__crawler.engine.slot.nextcall.schedule(wait)
+                return None
+        self.__inc_stat("dequeued")
+
+        return self.__claimed.popleft()
+
+    def __len__(self) -> int:
+        """Returns the number of requests of the shard to schedule, claimed or pending.
+
+        :return: The number of requests."""
+        return len(self.__claimed) + self.__frontier.pending(self.__settings.shard)
+
+
+class ShardStatsCollector(scrapy.statscollectors.MemoryStatsCollector):
+    """Stats collector of a worker process of a sharded crawl, it writes the stats to a JSON file when the spider is
+    closed, so that they can be merged by the launcher of the workers. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Use the stats collector.
+        STATS_CLASS = "scrapy_tor_playwright_demo.frontier.frontier.ShardStatsCollector"
+        # Path to the JSON file with the stats.
+        SHARD_STATS_PATH = "worker-0.json\""""
+
+    ## Private API #####################################################################################################
+    def __init__(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this stats collector."""
+        super().__init__(crawler)
+        #: Path to the JSON file with the stats, ``None`` to not write them.
+        self.__path = crawler.settings.get("SHARD_STATS_PATH", None)
+
+    ## Protected API ###################################################################################################
+    def _persist_stats(self, stats: dict, spider: scrapy.Spider) -> None:
+        """Writes the stats to the JSON file, dates in ISO format.
+
+        :param stats: The stats.
+        :param spider: The spider."""
+        super()._persist_stats(stats, spider)
+        if (path := self.__path) is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf8") as stream:
+            json.dump(
+                stats,
+                stream,
+                indent=2,
+                default=lambda value: value.isoformat() if isinstance(value, datetime.datetime) else str(value),
+            )
+
+
+def merge_stats(stats: list[dict]) -> dict:
+    """Merges the stats of the workers of a sharded crawl, as written by :class:`ShardStatsCollector`.
+
+    Counts are added, except for maximums and minimums, and for the start and finish times, which are the earliest and
+    the latest. Other values, such as the finish reason, are kept if the same for all the workers, otherwise listed.
+
+    :param stats: The stats of each worker.
+    :return: The merged stats."""
+    merged: dict = {}
+    for key in sorted({key for worker_stats in stats for key in worker_stats}):
+        values = [worker_stats[key] for worker_stats in stats if key in worker_stats]
+        name = key.rsplit("/", 1)[-1]
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            if name.startswith("max") or name.endswith("max") or "peak" in name:
+                merged[key] = max(values)
+            elif name.startswith("min") or name.endswith("min"):
+                merged[key] = min(values)
+            else:
+                merged[key] = sum(values)
+        elif key == "start_time":
+            merged[key] = min(values)
+        elif key == "finish_time":
+            merged[key] = max(values)
+        else:
+            merged[key] = values[0] if all(value == values[0] for value in values) else values
+
+    return merged
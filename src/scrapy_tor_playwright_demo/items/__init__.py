@@ -3,5 +3,6 @@
 ## Initialization code #################################################################################################
 
 ## Public API ##########################################################################################################
-from .items import AuthorItem, HTMLItem, QuoteItem
+from .defs import CompactItemBase
+from .items import AuthorItem, CompactAuthorItem, CompactHTMLItem, CompactQuoteItem, HTMLItem, QuoteItem
 from .parsers import QuotesParser
@@ -2,16 +2,33 @@
 
     - https://docs.scrapy.org/en/latest/topics/items.html"""
 
+import collections
+import contextlib
+import hashlib
+import json
 import logging
+import os
+import pickle
+import re
+import sys
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 from urllib.parse import urlparse
 
-import bs4
 import scrapy
 import scrapy.http
 import scrapy.item
+import scrapy.utils.trackref
 
-from ..defs import LoggerMixin, PlaywrightMixin
+from ..defs import LoggerMixin, PlaywrightMixin, SpooledBody
+from ..stores.defs import list_folder
+
+if TYPE_CHECKING:
+    import bs4
+
+#: The pattern of the placeholders of segments in routes, see :class:`RouteRegistry`.
+ROUTE_PLACEHOLDER = re.compile(r"<\w+>")
 
 
 class BSMixin:
@@ -23,11 +40,15 @@ class BSMixin:
 
     ## Protected API ###################################################################################################
     @staticmethod
-    def _as_bs4_obj(html: str) -> bs4.BeautifulSoup:
-        """Loads the given HTML content as a Beautiful Soup 4 object.
+    def _as_bs4_obj(html: str) -> "bs4.BeautifulSoup":
+        """Loads the given HTML content as a Beautiful Soup 4 object, Beautiful Soup 4 is imported on first use so
+        that importing the items does not load it.
 
         :param html: The HTML to load.
         :return: The Beautiful Soup 4 object."""
+        # pylint: disable-next=import-outside-toplevel
+        import bs4
+
         return bs4.BeautifulSoup(html, "html.parser")
 
     @staticmethod
@@ -69,40 +90,550 @@ class BSMixin:
     ## Public API ######################################################################################################
 
 
-class ParserBase(BSMixin, LoggerMixin, PlaywrightMixin, ABC):
-    """Base class for parsers, defines common functionality for all."""
+@dataclass(slots=True)
+class CompactItemBase:
+    """Base class for compact items, an alternative to :class:`scrapy.item.Item` for high volumes of items.
+
+    Compact items are dataclasses with slots, so they hold no dictionary per instance, they intern the strings that
+    repeat across items, such as names of authors or tags, and they serialize to bytes without an intermediate
+    dictionary. Scrapy and the pipelines handle them as any other item through ``itemadapter``."""
+
+    #: The fields whose strings are interned, either a string or a sequence of strings, stored as a tuple.
+    _interned: ClassVar[tuple[str, ...]] = ()
+
+    ## Private API #####################################################################################################
+    def __post_init__(self) -> None:
+        """Interns the strings of the fields that repeat across items."""
+        for name in self._interned:
+            if (value := getattr(self, name)) is None:
+                continue
+            if isinstance(value, str):
+                setattr(self, name, sys.intern(value))
+            else:
+                setattr(self, name, tuple(sys.intern(element) for element in value))
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def to_bytes(self) -> bytes:
+        """Serializes the item to indented JSON, the same as the JSON of the dictionary of the item.
+
+        :return: The JSON in UTF-8."""
+        fields = ",\n".join(
+            f"  {json.dumps(name)}: {json.dumps(getattr(self, name), indent=2).replace(chr(10), chr(10) + '  ')}"
+            for name in self.__slots__  # pylint: disable=no-member
+        )
+
+        return f"{{\n{fields}\n}}".encode("utf8")
+
+
+@dataclass(frozen=True)
+class ParseResult:
+    """The result of parsing a response, immutable so that it can be shared by the responses with the same body."""
+
+    #: The type of page identified while parsing.
+    page_type: str | None
+    #: The items parsed, pickled so that every response gets items of its own.
+    items: bytes
+    #: The URLs of the requests parsed.
+    urls: tuple[str, ...]
+
+    ## Public API ######################################################################################################
+    @property
+    def size(self) -> int:
+        """The approximate size of the result in memory.
+
+        :return: The size in bytes."""
+        return len(self.items) + sum(len(url) for url in self.urls)
+
+
+@dataclass
+class ParseOutput:
+    """The output of a parser, filled in while parsing a response or rebuilt from the parse cache."""
+
+    #: The items parsed from the response.
+    items: list[scrapy.item.Item | CompactItemBase] = field(default_factory=list)
+    #: The requests parsed from the response.
+    requests: list[scrapy.http.Request] = field(default_factory=list)
+    #: Whether the result was reused from the parse cache, ``None`` if the cache was not used.
+    cache_hit: bool | None = None
+
+
+class _ParseMemoryTier:
+    """The results of parsing kept in memory, the least recently used are evicted once they exceed the maximum size."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The maximum size of the results, in bytes.
+        self.__max_size = 0
+        #: The results, from the least to the most recently used.
+        self.__entries: collections.OrderedDict[bytes, ParseResult] = collections.OrderedDict()
+        #: The size of the results, in bytes.
+        self.__size = 0
+
+    def __len__(self) -> int:
+        """Returns the number of results.
+
+        :return: The number of results."""
+        return len(self.__entries)
+
+    ## Public API ######################################################################################################
+    @property
+    def max_size(self) -> int:
+        """The maximum size of the results.
+
+        :return: The size in bytes."""
+        return self.__max_size
+
+    @property
+    def size(self) -> int:
+        """The size of the results.
+
+        :return: The size in bytes."""
+        return self.__size
+
+    def clear(self, max_size: int = 0) -> None:
+        """Removes all the results, and sets the maximum size of the results added from then on.
+
+        :param max_size: The maximum size of the results, in bytes."""
+        self.__entries.clear()
+        self.__max_size, self.__size = max_size, 0
+
+    def get(self, key: bytes) -> ParseResult | None:
+        """Returns a result, and marks it as the most recently used.
+
+        :param key: The key of the result.
+        :return: The result, or ``None`` if not in memory."""
+        if (result := self.__entries.get(key, None)) is not None:
+            self.__entries.move_to_end(key)
+
+        return result
+
+    def add(self, key: bytes, result: ParseResult) -> int:
+        """Adds a result as the most recently used, and evicts the least recently used results until they fit in the
+        maximum size.
+
+        :param key: The key of the result.
+        :param result: The result.
+        :return: The number of results evicted."""
+        if (previous := self.__entries.pop(key, None)) is not None:
+            self.__size -= previous.size
+        self.__entries[key] = result
+        self.__size += result.size
+        evicted, excess = [], self.__size - self.__max_size
+        for evicted_key, evicted_result in self.__entries.items():
+            if excess <= 0:
+                break
+            evicted.append(evicted_key)
+            excess -= evicted_result.size
+        for evicted_key in evicted:
+            self.__size -= self.__entries.pop(evicted_key).size
+
+        return len(evicted)
+
+
+class _ParseDiskTier:
+    """The results of parsing written to a folder, one file per result, so that they are found once evicted from
+    memory and by the next crawls, the least recently used files are removed once they exceed the maximum size."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The folder of the results, ``None`` if not open.
+        self.__folder: str | None = None
+        #: The maximum size of the results, in bytes.
+        self.__max_size = 0
+        #: The sizes of the files of the results, from the least to the most recently used.
+        self.__files: collections.OrderedDict[bytes, int] = collections.OrderedDict()
+        #: The size of the results, in bytes.
+        self.__size = 0
+
+    def __len__(self) -> int:
+        """Returns the number of results.
+
+        :return: The number of results."""
+        return len(self.__files)
+
+    def __get_path(self, key: bytes) -> str:
+        """Returns the path to the file of a result.
+
+        :param key: The key of the result.
+        :return: The path."""
+        return os.path.join(self.__folder or "", key.hex())
+
+    def __add_file(self, key: bytes, size: int) -> None:
+        """Adds a file to the index as the most recently used, and removes the least recently used files until they
+        fit in the maximum size.
+
+        :param key: The key of the result.
+        :param size: The size of the file."""
+        self.__remove_file(key, unlink=False)
+        self.__files[key] = size
+        self.__size += size
+        removed, excess = [], self.__size - self.__max_size
+        for removed_key, removed_size in self.__files.items():
+            if excess <= 0:
+                break
+            removed.append(removed_key)
+            excess -= removed_size
+        for removed_key in removed:
+            self.__remove_file(removed_key)
+
+    def __remove_file(self, key: bytes, unlink: bool = True) -> None:
+        """Removes a file from the index.
+
+        :param key: The key of the result.
+        :param unlink: Whether to also remove the file."""
+        if (size := self.__files.pop(key, None)) is not None:
+            self.__size -= size
+        if unlink:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.__get_path(key))
+
+    @staticmethod
+    def __load(path: str) -> Any:
+        """Loads the object pickled in a file.
+
+        :param path: The path to the file.
+        :return: The object."""
+        with open(path, "rb") as stream:
+            return pickle.load(stream)
+
+    @staticmethod
+    def __replace(path: str, data: bytes) -> None:
+        """Replaces the contents of a file at once, so that it is never read partially written.
+
+        :param path: The path to the file.
+        :param data: The new contents."""
+        with open(f"{path}.tmp", "wb") as stream:
+            stream.write(data)
+        os.replace(f"{path}.tmp", path)
+
+    ## Public API ######################################################################################################
+    @property
+    def size(self) -> int:
+        """The size of the results.
+
+        :return: The size in bytes."""
+        return self.__size
+
+    def open(self, folder: str, max_size: int) -> None:
+        """Opens the folder, created if missing, indexing the results stored in it by previous crawls.
+
+        :param folder: The folder.
+        :param max_size: The maximum size of the results, in bytes."""
+        self.__folder, self.__max_size = folder, max_size
+        # The files are marked when used, so that the least recently used are removed first.
+        for name, path in list_folder(folder):
+            try:
+                self.__add_file(bytes.fromhex(name), os.path.getsize(path))
+            except ValueError:
+                os.remove(path)
+
+    def close(self) -> None:
+        """Closes the folder, the results remain in it for the next crawls."""
+        self.__folder = None
+        self.__files.clear()
+        self.__size = 0
+
+    def read(self, key: bytes) -> ParseResult | None:
+        """Reads a result from its file, and marks the file as used.
+
+        :param key: The key of the result.
+        :return: The result, or ``None`` if not on disk or unreadable, in which case the file is removed."""
+        if self.__folder is None or key not in self.__files:
+            return None
+        path = self.__get_path(key)
+        try:
+            result = self.__load(path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            result = None
+        if not isinstance(result, ParseResult):
+            self.__remove_file(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.__files.move_to_end(key)
+
+        return result
+
+    def write(self, key: bytes, result: ParseResult) -> None:
+        """Writes a result to its file, unless already on disk.
+
+        :param key: The key of the result.
+        :param result: The result."""
+        if self.__folder is None or key in self.__files:
+            return
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.__replace(self.__get_path(key), data)
+        except OSError:
+            return
+        self.__add_file(key, len(data))
+
+
+class ParseCache:
+    """A cache of the results of parsing, keyed by the digest of the body of the responses and the version of the
+    parser, so that retries, duplicates and pages served again with the same body are not parsed again.
+
+    The results are kept in memory, and the least recently used are evicted once they exceed the maximum size. If a
+    folder is given, the results are also written to it, one file per result, so that they are found once evicted
+    from memory and by the next crawls, and the least recently used files are removed once they exceed their own
+    maximum size."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: Whether the cache is open.
+        self.__open = False
+        #: The results in memory.
+        self.__memory = _ParseMemoryTier()
+        #: The results on disk.
+        self.__disk = _ParseDiskTier()
+        #: The counters of the cache since it was opened.
+        self.__counters: collections.Counter[str] = collections.Counter()
+
+    def __len__(self) -> int:
+        """Returns the number of results in memory.
+
+        :return: The number of results."""
+        return len(self.__memory)
+
+    def __add(self, key: bytes, result: ParseResult) -> None:
+        """Adds a result to memory as the most recently used.
+
+        :param key: The key of the result.
+        :param result: The result."""
+        self.__counters["evicted"] += self.__memory.add(key, result)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @property
+    def is_open(self) -> bool:
+        """Whether the cache is open.
+
+        :return: ``True`` if open, ``False`` otherwise."""
+        return self.__open
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """The stats of the cache since it was opened.
+
+        :return: The stats, keyed by name."""
+        lookups = self.__counters["hits"] + self.__counters["misses"]
+        return {
+            "hits": self.__counters["hits"],
+            "disk_hits": self.__counters["disk_hits"],
+            "misses": self.__counters["misses"],
+            "hit_ratio": self.__counters["hits"] / lookups if lookups else 0.0,
+            "stored": self.__counters["stored"],
+            "evicted": self.__counters["evicted"],
+            "entries": len(self.__memory),
+            "size": self.__memory.size,
+            "disk_entries": len(self.__disk),
+            "disk_size": self.__disk.size,
+        }
+
+    def open(self, max_size: int, folder: str | None = None, max_disk_size: int = 0) -> None:
+        """Opens the cache, with the results stored in the folder by previous crawls if any.
+
+        :param max_size: The maximum size of the results in memory, in bytes.
+        :param folder: The folder of the results on disk, created if missing, ``None`` to only keep them in memory.
+        :param max_disk_size: The maximum size of the results on disk, in bytes."""
+        self.close()
+        self.__open = True
+        self.__memory.clear(max_size)
+        self.__counters.clear()
+        if folder is not None:
+            self.__disk.open(folder, max_disk_size)
+
+    def close(self) -> None:
+        """Closes the cache, the results on disk remain in the folder for the next crawls."""
+        self.__open = False
+        self.__memory.clear()
+        self.__disk.close()
+
+    def get(self, key: bytes) -> ParseResult | None:
+        """Returns a result, from memory or otherwise from disk, and marks it as the most recently used.
+
+        :param key: The key of the result.
+        :return: The result, or ``None`` if not in the cache."""
+        if (result := self.__memory.get(key)) is None and (result := self.__disk.read(key)) is not None:
+            self.__add(key, result)
+            self.__counters["disk_hits"] += 1
+        self.__counters["hits" if result is not None else "misses"] += 1
+
+        return result
+
+    def put(self, key: bytes, result: ParseResult) -> None:
+        """Stores a result, in memory and on disk if there is a folder.
+
+        :param key: The key of the result.
+        :param result: The result."""
+        if not self.__open:
+            return
+        if result.size <= self.__memory.max_size:
+            self.__add(key, result)
+        self.__disk.write(key, result)
+        self.__counters["stored"] += 1
+
+
+class ParseCacheMixin:
+    """A mixin that provides the cache of the results of parsing, shared by all the parsers once opened by an
+    extension."""
+
+    # pylint: disable=too-few-public-methods
+
+    #: The cache of the results of parsing.
+    _parse_cache: ClassVar[ParseCache] = ParseCache()
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+
+
+class RouteRegistry:
+    """A registry of the URL routes of the parsers, compiled into a single pattern so that the parser and the type of
+    page of a response are found with a single match of the path of its URL.
+
+    Routes are paths where ``<name>`` stands for any segment, as in ``/author/<slug>/``, and match the whole path. A
+    route registered later takes precedence over the same route registered before, so that a parser can be
+    specialised by a subclass."""
 
     ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The routes, with the parser and the type of page of each, in the order they were registered.
+        self.__routes: list[tuple[str, Any, str]] = []
+        #: The pattern of all the routes, compiled on first match after a route is registered.
+        self.__pattern: re.Pattern[str] | None = None
+
+    def __len__(self) -> int:
+        """Returns the number of routes.
+
+        :return: The number of routes."""
+        return len(self.__routes)
+
+    def __compile(self) -> re.Pattern[str]:
+        """Compiles the routes into a single pattern, with a named group per route, the latest registered first.
+
+        :return: The pattern."""
+        alternatives = []
+        for i in reversed(range(len(self.__routes))):
+            parts = ROUTE_PLACEHOLDER.split(self.__routes[i][0])
+            alternatives.append(f"(?P<r{i}>{'[^/]+'.join(re.escape(part) for part in parts)})")
+
+        return re.compile("|".join(alternatives) or "(?!)")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def register(self, parser: Any, routes: dict[str, str]) -> None:
+        """Registers the routes of a parser.
+
+        :param parser: The class of the parser.
+        :param routes: The routes, mapped to the type of page they serve.
+        :raises ValueError: A route is not an absolute path."""
+        for route, page_type in routes.items():
+            if not route.startswith("/"):
+                raise ValueError(f"The route '{route}' of {parser.__name__} is not an absolute path.")
+            self.__routes.append((route, parser, page_type))
+        self.__pattern = None
+
+    def match(self, url: str) -> tuple[Any, str] | None:
+        """Finds the parser and the type of page of a URL from its path.
+
+        :param url: The URL.
+        :return: The class of the parser and the type of page, or ``None`` if no route matches."""
+        if self.__pattern is None:
+            self.__pattern = self.__compile()
+        if (match := self.__pattern.fullmatch(urlparse(url).path or "/")) is None:
+            return None
+        _, parser, page_type = self.__routes[int(cast(str, match.lastgroup)[1:])]
+
+        return parser, page_type
+
+
+class ParserBase(BSMixin, LoggerMixin, PlaywrightMixin, scrapy.utils.trackref.object_ref, ABC):
+    """Base class for parsers, defines common functionality for all.
+
+    Live instances are tracked with :mod:`scrapy.utils.trackref`, as they hold the parsed HTML tree. While the parse
+    cache is open, the result of parsing a response is reused for the responses with the same body, see
+    :class:`ParseCache`. Parsers declare the routes of the pages they handle in :attr:`routes`, which are registered
+    when the class is defined, so that :meth:`for_response` creates the parser of a response from its URL alone. The
+    responses whose body was spooled to a file, see :attr:`_spooled`, are never decoded nor cached."""
+
+    #: The routes of the pages the parser handles, mapped to the type of page they serve, see :class:`RouteRegistry`.
+    routes: ClassVar[dict[str, str]] = {}
+    #: The version of the parser, to increase whenever its results change so that cached results are not reused.
+    version: ClassVar[int] = 1
+    #: The types of page whose results are not cached, for pages that cost less to parse again than to cache.
+    uncached_page_types: ClassVar[frozenset[str]] = frozenset()
+
+    #: The registry of the routes of all the parsers.
+    _route_registry: ClassVar[RouteRegistry] = RouteRegistry()
+    #: The cache of the results of parsing, the same one the extension opens, see :class:`ParseCacheMixin`.
+    _parse_cache: ClassVar[ParseCache] = ParseCacheMixin._parse_cache  # pylint: disable=protected-access
+
+    ## Private API #####################################################################################################
+    @classmethod
+    def __init_subclass__(cls) -> None:
+        """Registers the routes declared by the parser, if it declares any."""
+        super().__init_subclass__()
+        if "routes" in cls.__dict__:
+            cls._route_registry.register(cls, cls.routes)
+
     def __init__(
         self,
         response: scrapy.http.Response,
         logger: logging.Logger | None = None,
+        compact_items: bool = False,
     ) -> None:
         """Class constructor.
 
         :param response: The HTTP response to parse.
-        :param logger: The logger for the parser."""
+        :param logger: The logger for the parser.
+        :param compact_items: Whether to parse compact items instead of Scrapy items."""
         #: The HTTP response object passed during initialization.
         self._response = response
-        #: The raw HTML contents extracted from the response.
-        self._html = response.text
-        #: A Beautiful Soup 4 object with parsed HTML content.
-        self._root = self._as_bs4_obj(self._html)
-        #: The items parsed from the response.
-        self.__items: list[scrapy.item.Item] = []
-        #: The requests parsed from the response.
-        self.__requests: list[scrapy.http.Request] = []
+        #: A Beautiful Soup 4 object with parsed HTML content, built on first use.
+        self.__root: "bs4.BeautifulSoup | None" = None
+        #: Whether to parse compact items instead of Scrapy items.
+        self._compact_items = compact_items
+        #: The items, the requests and the use of the parse cache, as parsed from the response.
+        self.__output = ParseOutput()
+        #: The type of page identified while parsing, if any.
+        self._page_type: str | None = None
+        #: The type of page given by the route of the URL, if it is routed to this parser.
+        self._routed_page_type: str | None = None
+        if (route := self._route_registry.match(response.url)) is not None and route[0] is type(self):
+            self._routed_page_type = route[1]
         #: The logger to use internally in the parser.
         self.__logger = logger if logger is not None else logging.getLogger("dummy")
 
-    ## Protected API ###################################################################################################
-    def _add_request_from_response(self, path: str) -> "ParserBase":
-        """Creates a request from the response and the path given.
+    def __get_cache_key(self) -> bytes:
+        """Returns the key of the response in the parse cache, from its body, the parser and its version, the type of
+        items and the base URL, as the URLs of the requests are built from it.
 
-        :param path: The path for the request, this is tipically the ``href`` argument.
-        :return: The same instance of the class on which this method was called."""
-        # Create the URL.
-        url = self._join_url(self._get_url_base(self._response.url), path)
+        :return: The BLAKE2 digest."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{type(self).__qualname__}\x1f{self.version}\x1f{self._compact_items:d}\x1f".encode("utf8"))
+        digest.update(f"{self._get_url_base(self._response.url)}\x1f".encode("utf8"))
+        digest.update(self._response.body)
+
+        return digest.digest()
+
+    def __add_request(self, url: str) -> None:
+        """Creates a request to a URL, bound to the callback of the request of the response.
+
+        :param url: The URL.
+        :raises RuntimeError: There is no request for the response."""
         # Ensure there is a request associated for the response.
         if self._response.request is None:
             raise RuntimeError("No request to response.")
@@ -111,30 +642,138 @@ class ParserBase(BSMixin, LoggerMixin, PlaywrightMixin, ABC):
         if self._is_playwright_request(self._response.request):
             request = self._to_playwright_request(request)
         # Append request.
-        self.__requests.append(request)
+        self.__output.requests.append(request)
+
+    ## Protected API ###################################################################################################
+    @property
+    def _spooled(self) -> SpooledBody | None:
+        """The body of the response spooled to a file, see ``SpoolMiddleware``, in which case the response has no body.
+
+        :return: The spooled body, ``None`` if the body is in the response."""
+        return self._response.request.meta.get("spool", None) if self._response.request is not None else None
+
+    @property
+    def _html(self) -> str:
+        """The raw HTML contents extracted from the response, decoded on first use and then kept by the response.
+
+        :raises RuntimeError: The body of the response was spooled to a file, it is never decoded whole.
+        :return: The HTML."""
+        if (spooled := self._spooled) is not None:
+            raise RuntimeError(f"The body of '{self._response.url}' was spooled to '{spooled.path}'.")
+        return self._response.text
+
+    @property
+    def _root(self) -> "bs4.BeautifulSoup":
+        """A Beautiful Soup 4 object with parsed HTML content, built on first use so that pages told apart from their
+        bytes never get a tree.
+
+        :return: The Beautiful Soup 4 object."""
+        if self.__root is None:
+            self.__root = self._as_bs4_obj(self._html)
+        return self.__root
+
+    def _search_body(self, pattern: re.Pattern[bytes], default: bool = True) -> bool:
+        """Searches the body of the response as bytes, without decoding it, to rule out pages before their tree is
+        built. The pattern must only match ASCII, so bodies in encodings that are not compatible with ASCII, such as
+        UTF-16, can not be searched.
+
+        :param pattern: The pattern to search.
+        :param default: The result for bodies that can not be searched, by default they may match.
+        :return: Whether the pattern may be found in the body."""
+        if self._spooled is not None:
+            return default
+        if "<".encode(self._response.encoding, errors="ignore") != b"<":
+            return default
+        return pattern.search(self._response.body) is not None
+
+    def _add_request_from_response(self, path: str) -> "ParserBase":
+        """Creates a request from the response and the path given.
+
+        :param path: The path for the request, this is tipically the ``href`` argument.
+        :return: The same instance of the class on which this method was called."""
+        self.__add_request(self._join_url(self._get_url_base(self._response.url), path))
 
         return self
 
-    def _add_item(self, item: scrapy.item.Item | list[scrapy.item.Item]) -> "ParserBase":
+    def _add_item(
+        self, item: scrapy.item.Item | CompactItemBase | list[scrapy.item.Item | CompactItemBase]
+    ) -> "ParserBase":
         """Adds an item or multiple items to the collection of parsed items.
 
         :papram item: The item or items to add.
         :return: The same instance of the class on which this method was called."""
         # Check if single item or multiple and add them.
-        if isinstance(item, scrapy.item.Item):
-            self.__items.append(item)
+        if isinstance(item, (scrapy.item.Item, CompactItemBase)):
+            self.__output.items.append(item)
         else:
-            self.__items.extend(item)
+            self.__output.items.extend(item)
 
         return self
 
-    ## Public API ######################################################################################################
     @abstractmethod
-    def parse(self) -> "ParserBase":
+    def _parse(self) -> "ParserBase":
         """Performs the parsing process.
 
         :return: Same instance of the class on which this method was called."""
 
+    ## Public API ######################################################################################################
+    @classmethod
+    def for_response(
+        cls,
+        response: scrapy.http.Response,
+        logger: logging.Logger | None = None,
+        compact_items: bool = False,
+    ) -> "ParserBase":
+        """Creates the parser of a response, the one whose route matches its URL, or otherwise this parser.
+
+        :param response: The HTTP response to parse.
+        :param logger: The logger for the parser.
+        :param compact_items: Whether to parse compact items instead of Scrapy items.
+        :return: The parser."""
+        route = cls._route_registry.match(response.url)
+        parser = route[0] if route is not None else cls
+
+        return parser(response, logger=logger, compact_items=compact_items)
+
+    def parse(self) -> "ParserBase":
+        """Performs the parsing process, unless the result of a response with the same body is in the parse cache,
+        from which the items and the requests, bound to the callback of this response, are rebuilt.
+
+        :return: Same instance of the class on which this method was called."""
+        # Responses spooled to a file have no body to key them by.
+        if not self._parse_cache.is_open or self._spooled is not None:
+            return self._parse()
+
+        key = self.__get_cache_key()
+        if (result := self._parse_cache.get(key)) is not None:
+            self.__output.cache_hit = True
+            self._page_type = result.page_type
+            self._add_item(pickle.loads(result.items))
+            for url in result.urls:
+                self.__add_request(url)
+            return self
+
+        self.__output.cache_hit = False
+        self._parse()
+        if self._page_type not in self.uncached_page_types:
+            self._parse_cache.put(
+                key,
+                ParseResult(
+                    page_type=self._page_type,
+                    items=pickle.dumps(self.__output.items, protocol=pickle.HIGHEST_PROTOCOL),
+                    urls=tuple(request.url for request in self.__output.requests),
+                ),
+            )
+
+        return self
+
+    @property
+    def cache_hit(self) -> bool | None:
+        """Whether the result was reused from the parse cache.
+
+        :return: ``True`` if reused, ``False`` if parsed, ``None`` if the cache is not open."""
+        return self.__output.cache_hit
+
     @property
     def logger(self) -> logging.Logger:
         """Returns the logger.
@@ -142,16 +781,23 @@ class ParserBase(BSMixin, LoggerMixin, PlaywrightMixin, ABC):
         :return: The logger."""
         return self.__logger
 
+    @property
+    def page_type(self) -> str | None:
+        """The type of page identified while parsing the response.
+
+        :return: The type of page, or ``None`` if not parsed yet."""
+        return self._page_type
+
     @property
     def requests(self) -> list[scrapy.http.Request]:
         """The requests parsed from the links in the response.
 
         :return: The requests."""
-        return self.__requests
+        return self.__output.requests
 
     @property
-    def items(self) -> list[scrapy.item.Item]:
+    def items(self) -> list[scrapy.item.Item | CompactItemBase]:
         """The items parsed from the links in the response.
 
         :return: The requests."""
-        return self.__items
+        return self.__output.items
@@ -1,8 +1,13 @@
 """Items."""
 
+from dataclasses import dataclass
+from typing import ClassVar
+
 import scrapy
 import scrapy.item
 
+from .defs import CompactItemBase
+
 
 class QuoteItem(scrapy.item.Item):
     """Quote item, serialized to JSON file."""
@@ -25,7 +30,55 @@ class AuthorItem(scrapy.item.Item):
 
 
 class HTMLItem(scrapy.item.Item):
-    """HTML item, serialized to HTML file."""
+    """HTML item, serialized to HTML file with the bytes of the response as they were received."""
+
+    #: The body of a response, not decoded, ``None`` if it was spooled to a file.
+    body = scrapy.item.Field()
+    #: The encoding of the body, ``None`` if it is not text.
+    encoding = scrapy.item.Field()
+    #: The path to the file with the body, if it was spooled to a file, moved along with the file by the pipelines.
+    path = scrapy.item.Field()
+    #: The SHA-256 digest of the body, if already known, so that the pipelines do not hash the body again.
+    digest = scrapy.item.Field()
+
+
+@dataclass(slots=True)
+class CompactQuoteItem(CompactItemBase):
+    """Compact version of :class:`QuoteItem`, serialized to JSON file."""
+
+    _interned: ClassVar[tuple[str, ...]] = ("author", "tags")
+
+    #: The text of the quote.
+    text: str
+    #: The name of the author of the quote.
+    author: str
+    #: The tags associated to the quote.
+    tags: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class CompactAuthorItem(CompactItemBase):
+    """Compact version of :class:`AuthorItem`, serialized to JSON file."""
+
+    _interned: ClassVar[tuple[str, ...]] = ("name",)
+
+    #: Name of the author.
+    name: str
+    #: Description of the author.
+    description: str
+
+
+@dataclass(slots=True)
+class CompactHTMLItem(CompactItemBase):
+    """Compact version of :class:`HTMLItem`, serialized to HTML file."""
+
+    _interned: ClassVar[tuple[str, ...]] = ("encoding",)
 
-    #: The text of a response.
-    html = scrapy.item.Field()
+    #: The body of a response, not decoded, ``None`` if it was spooled to a file.
+    body: bytes | None
+    #: The encoding of the body, ``None`` if it is not text.
+    encoding: str | None
+    #: The path to the file with the body, if it was spooled to a file, moved along with the file by the pipelines.
+    path: str | None = None
+    #: The SHA-256 digest of the body, if already known, so that the pipelines do not hash the body again.
+    digest: bytes | None = None
@@ -2,24 +2,60 @@
 
 
 import re
-from typing import Literal
+from typing import TYPE_CHECKING, ClassVar, Literal
 
 from .defs import ParserBase
-from .items import AuthorItem, HTMLItem, QuoteItem
+from .items import AuthorItem, CompactAuthorItem, CompactHTMLItem, CompactQuoteItem, HTMLItem, QuoteItem
+
+if TYPE_CHECKING:
+    import bs4
 
 # pyright: reportGeneralTypeIssues=false,reportOptionalSubscript=false,reportOptionalMemberAccess=false
 
+#: The patterns of the markers of every type of HTML content but the fallback, searched in the bytes of the body.
+QUOTES_PAGE_MARKERS = {
+    "quotes_nojs": re.compile(rb"tags-box"),
+    "quotes_js": re.compile(rb"jquery\.js"),
+    "author": re.compile(rb"author-details"),
+}
+#: The pattern of the markers of any type of HTML content but the fallback.
+QUOTES_MARKERS = re.compile(b"|".join(marker.pattern for marker in QUOTES_PAGE_MARKERS.values()))
+
 
 class QuotesParser(ParserBase):
     """A parser for items."""
 
+    #: The routes of the quotes website, the type of each is only trusted if the marker of the type is in the page.
+    routes: ClassVar[dict[str, str]] = {
+        "/": "quotes_nojs",
+        "/page/<n>/": "quotes_nojs",
+        "/tag/<tag>/": "quotes_nojs",
+        "/tag/<tag>/page/<n>/": "quotes_nojs",
+        "/js/": "quotes_js",
+        "/js/page/<n>/": "quotes_js",
+        "/author/<slug>/": "author",
+    }
+    #: The fallback pages are told apart from their bytes and never get a tree, so caching them saves nothing.
+    uncached_page_types: ClassVar[frozenset[str]] = frozenset({"html"})
+
     ## Private API #####################################################################################################
     def __get_html_contents_type(self) -> Literal["quotes_nojs", "quotes_js", "author", "html"]:
         """Retrieves the type of the HTML contents.
 
         :return: The type of HTML content."""
+        # If the body was spooled to a file, as it is large or not HTML, then it is stored as is without reading it.
+        if self._spooled is not None:
+            html_type = "html"
+        # If none of the markers is in the bytes, then it is an 'html' type of HTML, known without building a tree.
+        elif not self._search_body(QUOTES_MARKERS):
+            html_type = "html"
+        # If the route of the URL gives a type whose marker is in the bytes, then it is of that type.
+        elif self._routed_page_type is not None and self._search_body(
+            QUOTES_PAGE_MARKERS[self._routed_page_type], default=False
+        ):
+            html_type = self._routed_page_type
         # If there is a tags box, then it is a 'quotes_nojs' type of HTML.
-        if self._root.find("div", {"class": "tags-box"}) is not None:
+        elif self._root.find("div", {"class": "tags-box"}) is not None:
             html_type = "quotes_nojs"
         # If there is an import of jquery, then it is a 'quotes_js' type of HTML.
         elif self._root.find("script", {"src": re.compile(r".*jquery.js")}) is not None:
@@ -33,6 +69,46 @@ class QuotesParser(ParserBase):
 
         return html_type
 
+    def __parse_quote(self, quote: "bs4.Tag", is_nojs: bool) -> None:
+        """Parses a quote of HTML contents of quotes type.
+
+        :param quote: The element of the quote.
+        :param is_nojs: Whether it is the no javascript version, which has links."""
+        # Get the text.
+        elem = quote.find_next("span", {"class": "text"})
+        text = self._remove_whitespace(elem.get_text(), "“”")
+        self._log_debug(f"Found text '{text}'...")
+
+        # Get the author.
+        elem = elem.find_next("span")
+        author = self._remove_whitespace(elem.find("small", {"class": "author"}).get_text())
+        self._log_debug(f"Found author '{author}'...")
+
+        # Get the link to the author details in the no javascript version.
+        if is_nojs:
+            author_link = self._remove_whitespace(elem.find("a")["href"])
+            self._log_debug(f"Found link to author details '{author_link}'...")
+            self._add_request_from_response(author_link)
+
+        # Get the tags for the quote.
+        tag_texts = []
+        for tag in elem.find_next("div", {"class": "tags"}).find_all("a", {"class": "tag"}):
+            # Get the text.
+            tag_texts.append(self._remove_whitespace(tag.get_text()))
+            self._log_debug(f"Found tag '{tag_texts[-1]}'...")
+
+            # Get the link in the no javascript version.
+            if is_nojs:
+                tag_link = self._remove_whitespace(tag["href"])
+                self._log_debug(f"Found tag link '{tag_link}'...")
+
+        # Add item with the quote.
+        self._log_debug("Added 'quote' item to collection of parsed items...")
+        if self._compact_items:
+            self._add_item(CompactQuoteItem(text=text, author=author, tags=tag_texts))
+        else:
+            self._add_item(QuoteItem(text=text, author=author, tags=tag_texts))
+
     def __parse_html_contents_quotes(self) -> "QuotesParser":
         """Parses HTML contents of quotes type.
 
@@ -40,46 +116,17 @@ class QuotesParser(ParserBase):
         :return: The same instance of the class on which this method was called."""
         self._log_debug(f"Parsing HTML contents of 'quotes' type from '{self._response.url}'...")
 
+        # The version was determined along with the type of the page.
+        is_nojs = self._page_type == "quotes_nojs"
+
         # Loop all the quotes.
         for i, quote in enumerate(self._root.find_all("div", {"class": "quote"})):
             self._log_debug(f"Parsing quote #{i + 1} in page...")
-
-            # Get the text.
-            elem = quote.find_next("span", {"class": "text"})
-            text = self._remove_whitespace(elem.get_text(), "“”")
-            self._log_debug(f"Found text '{text}'...")
-
-            # Get the author.
-            elem = elem.find_next("span")
-            author = self._remove_whitespace(elem.find("small", {"class": "author"}).get_text())
-            self._log_debug(f"Found author '{author}'...")
-
-            # Get the link to the author details in the no javascript version.
-            if self.__get_html_contents_type() == "quotes_nojs":
-                author_link = self._remove_whitespace(elem.find("a")["href"])
-                self._log_debug(f"Found link to author details '{author_link}'...")
-                self._add_request_from_response(author_link)
-
-            # Get the tags for the quote.
-            tag_texts = []
-            for tag in elem.find_next("div", {"class": "tags"}).find_all("a", {"class": "tag"}):
-                # Get the text.
-                tag_texts.append(self._remove_whitespace(tag.get_text()))
-                self._log_debug(f"Found tag '{tag_texts[-1]}'...")
-
-                # Get the link in the no javascript version.
-                if self.__get_html_contents_type() == "quotes_nojs":
-                    tag_link = self._remove_whitespace(tag["href"])
-                    self._log_debug(f"Found tag link '{tag_link}'...")
-
-            # Add item with the quote.
-            self._log_debug("Added 'quote' item to collection of parsed items...")
-            self._add_item(QuoteItem(text=text, author=author, tags=tag_texts))
-
+            self.__parse_quote(quote, is_nojs)
             self._log_debug(f"Finished parsing quote #{i + 1}.")
 
         # There is only a tag box in the no javascript version.
-        if self.__get_html_contents_type() == "quotes_nojs":
+        if is_nojs:
             # Get the tags box with the top tags.
             if (tags_box := self._root.find("div", {"class": "tags-box"})) is None:
                 raise RuntimeError("Could not find tags box.")
@@ -139,7 +186,10 @@ class QuotesParser(ParserBase):
         self._log_debug(f"Found author description '{author_description}'...")
 
         # Add item.
-        self._add_item(AuthorItem(name=author, description=author_description))
+        if self._compact_items:
+            self._add_item(CompactAuthorItem(name=author, description=author_description))
+        else:
+            self._add_item(AuthorItem(name=author, description=author_description))
         self._log_debug("Added 'author' item to collection of parsed items...")
 
         self._log_debug("Parsing of HTML contents of type 'author' finished.")
@@ -152,8 +202,14 @@ class QuotesParser(ParserBase):
         :return: The same instance of the class on which this method was called."""
         self._log_debug(f"Parsing HTML contents of 'html' type from '{self._response.url}'...")
 
-        # Add item.
-        self._add_item(HTMLItem(html=self._response.text))
+        # Add item, with the body as received so that it is neither decoded nor copied, or with the file it was
+        # spooled to so that it is not read.
+        fields = (
+            {"body": None, "encoding": spooled.encoding, "path": spooled.path, "digest": spooled.digest}
+            if (spooled := self._spooled) is not None
+            else {"body": self._response.body, "encoding": self._response.encoding}
+        )
+        self._add_item(CompactHTMLItem(**fields) if self._compact_items else HTMLItem(**fields))
         self._log_debug("Added 'html' item to collection of parsed items...")
 
         self._log_debug("Parsing of HTML contents of type 'html' finished.")
@@ -161,9 +217,7 @@ class QuotesParser(ParserBase):
         return self
 
     ## Protected API ###################################################################################################
-
-    ## Public API ######################################################################################################
-    def parse(self) -> "QuotesParser":
+    def _parse(self) -> "QuotesParser":
         """Runs the parsing process.
 
         :raises RuntimeError: The type of HTML content identified could not be handled.
@@ -171,7 +225,7 @@ class QuotesParser(ParserBase):
         self._log_debug("Starting parsing of HTML...")
 
         # Get the type of the HTML.
-        html_type = self.__get_html_contents_type()
+        html_type = self._page_type = self.__get_html_contents_type()
         self._log_debug(f"HTML contents are of type '{html_type}'...")
 
         ## Handle 'quotes_nojs' and 'quotes_js' HTML contents ##########################################################
@@ -190,3 +244,5 @@ class QuotesParser(ParserBase):
         self._log_debug("Parsing of HTML finished.")
 
         return self
+
+    ## Public API ######################################################################################################
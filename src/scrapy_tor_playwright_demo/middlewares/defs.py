@@ -3,11 +3,286 @@
     - https://docs.scrapy.org/en/latest/topics/spider-middleware.html
     - https://docs.scrapy.org/en/latest/topics/downloader-middleware.html"""
 
+import dataclasses
+import io
 import logging
+import math
+import socket
+from collections import deque
+from typing import Any
+from urllib.parse import urlparse
+
+import scrapy.http
+import scrapy.settings
+import twisted.internet.defer
+from rotating_proxies.policy import BanDetectionPolicy
 
 from ..defs import LoggerMixin
 
 
+class LatencyWindow:
+    """A rolling window with the latest latencies, to estimate the quantiles of the recent requests exactly."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, size: int = 200) -> None:
+        """Class constructor.
+
+        :param size: The number of latest latencies to keep."""
+        #: The latest latencies in seconds, oldest first.
+        self.__latencies: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        """Returns the number of latencies in the window.
+
+        :return: The number of latencies."""
+        return len(self.__latencies)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def observe(self, latency: float) -> None:
+        """Adds a latency to the window, discarding the oldest one if full.
+
+        :param latency: The latency in seconds."""
+        self.__latencies.append(latency)
+
+    def quantile(self, quantile: float) -> float | None:
+        """Returns a quantile of the latencies in the window, with the nearest rank method.
+
+        :param quantile: The quantile, between 0 and 1.
+        :return: The quantile in seconds, ``None`` if the window is empty."""
+        if not self.__latencies:
+            return None
+        latencies = sorted(self.__latencies)
+
+        return latencies[min(len(latencies) - 1, max(0, math.ceil(quantile * len(latencies)) - 1))]
+
+
+@dataclasses.dataclass(frozen=True)
+class AdaptiveTimeoutSettings:
+    """The settings of the adaptive timeouts, refer to :class:`PlaywrightMiddleware` for details."""
+
+    #: The quantile of the latencies the timeouts are derived from.
+    quantile: float = 0.99
+    #: The factor the quantile is multiplied by.
+    factor: float = 3.0
+    #: The minimum timeout in seconds.
+    floor: float = 15.0
+    #: The maximum timeout in seconds, and the timeout until there are enough latencies.
+    ceiling: float = 180.0
+    #: The number of recent latencies kept per proxy and page type.
+    window: int = 200
+    #: The number of latencies needed before they are used.
+    min_samples: int = 20
+    #: The download timeout of the settings, which is replaced when set by ``DownloadTimeoutMiddleware``.
+    default_timeout: float = 180.0
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "AdaptiveTimeoutSettings":
+        """Reads the settings of the adaptive timeouts.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the adaptive timeouts."""
+        default_timeout = settings.getfloat("DOWNLOAD_TIMEOUT", 180.0)
+
+        return cls(
+            quantile=settings.getfloat("ADAPTIVE_TIMEOUT_QUANTILE", 0.99),
+            factor=settings.getfloat("ADAPTIVE_TIMEOUT_FACTOR", 3.0),
+            floor=settings.getfloat("ADAPTIVE_TIMEOUT_FLOOR", 15.0),
+            ceiling=settings.getfloat("ADAPTIVE_TIMEOUT_CEILING", default_timeout),
+            window=settings.getint("ADAPTIVE_TIMEOUT_WINDOW", 200),
+            min_samples=settings.getint("ADAPTIVE_TIMEOUT_MIN_SAMPLES", 20),
+            default_timeout=default_timeout,
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class HedgingSettings:
+    """The settings of the hedging middleware, refer to :class:`HedgingMiddleware` for details."""
+
+    #: The quantile of the latencies after which a request is hedged.
+    quantile: float = 0.95
+    #: The number of recent latencies kept per page type.
+    window: int = 200
+    #: The minimum number of latencies of a page type before its requests are hedged.
+    min_samples: int = 20
+    #: The maximum fraction of the requests that can be hedged.
+    budget: float = 0.05
+    #: The proxies that hedges can be sent through.
+    proxies: tuple[str, ...] = ()
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "HedgingSettings":
+        """Reads the settings of the hedging middleware.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the hedging middleware."""
+        return cls(
+            quantile=settings.getfloat("HEDGING_QUANTILE", 0.95),
+            window=settings.getint("HEDGING_WINDOW", 200),
+            min_samples=settings.getint("HEDGING_MIN_SAMPLES", 20),
+            budget=settings.getfloat("HEDGING_BUDGET", 0.05),
+            proxies=tuple(settings.getlist("ROTATING_PROXY_LIST")),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class SessionSettings:
+    """The settings of the sticky sessions middleware, refer to :class:`SessionMiddleware` for details."""
+
+    #: The maximum age of a session in seconds.
+    max_age: float = 15.0
+    #: The Tor control port on the host of each proxy, ``None`` if the circuits are never renewed.
+    control_port: int | None = None
+    #: The password of the Tor control port.
+    control_password: str | None = None
+    #: The minimum seconds between two renewals of the same proxy.
+    cooldown: float = 10.0
+    #: The timeout of the Tor control port in seconds.
+    timeout: float = 5.0
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "SessionSettings":
+        """Reads the settings of the sticky sessions middleware.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the sticky sessions middleware."""
+        return cls(
+            max_age=settings.getfloat("SESSION_MAX_AGE", 15.0),
+            control_port=settings.get("SESSION_TOR_CONTROL_PORT", None),
+            control_password=settings.get("SESSION_TOR_CONTROL_PASSWORD", None),
+            cooldown=settings.getfloat("SESSION_RENEWAL_COOLDOWN", 10.0),
+            timeout=settings.getfloat("SESSION_RENEWAL_TIMEOUT", 5.0),
+        )
+
+
+@dataclasses.dataclass
+class HedgeRace:
+    """The race of a request, downloaded by the downloader, against its hedge, sent out of band once it is slow."""
+
+    #: The delayed call that sends the hedge.
+    timer: Any
+    #: The hedge, once sent.
+    hedge: scrapy.http.Request | None = None
+    #: The deferred of the download of the hedge once sent, fires with its response or ``None`` if it failed.
+    download: twisted.internet.defer.Deferred | None = None
+    #: The response of the hedge, if it responded before the request.
+    response: scrapy.http.Response | None = None
+
+
+class RecrawlBanDetectionPolicy(BanDetectionPolicy):
+    """The ban detection policy of ``scrapy-rotating-proxies``, except for the ``304 Not Modified`` responses of the
+    :class:`~scrapy_tor_playwright_demo.middlewares.middlewares.RecrawlMiddleware`, which are not bans."""
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def response_is_ban(self, request: scrapy.http.Request, response: scrapy.http.Response) -> bool | None:
+        """Determines if a response is a ban.
+
+        :param request: The request.
+        :param response: The response.
+        :return: ``True`` if a ban, ``False`` if not, ``None`` if unknown, as for responses not downloaded."""
+        if request.meta.get("recrawl", None) == "not_due":
+            return None
+        if response.status == 304 and request.meta.get("recrawl_conditional", False):
+            return False
+
+        return super().response_is_ban(request, response)
+
+
+class TorController:
+    """A minimal client of the control port of a Tor proxy, to request a new circuit with ``SIGNAL NEWNYM``, for
+    details refer to https://spec.torproject.org/control-spec/.
+
+    Each command opens its own connection, as the signals are rare and the proxies may restart in between."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, host: str, port: int, password: str | None = None, timeout: float = 5.0) -> None:
+        """Class constructor.
+
+        :param host: The host of the control port.
+        :param port: The control port.
+        :param password: The password of the control port, ``None`` if it has no authentication.
+        :param timeout: The timeout of the connection and of each reply in seconds."""
+        #: The host of the control port.
+        self.__host = host
+        #: The control port.
+        self.__port = port
+        #: The password of the control port.
+        self.__password = password
+        #: The timeout in seconds.
+        self.__timeout = timeout
+
+    @staticmethod
+    def __read_reply(stream: io.BufferedRWPair) -> tuple[str, list[str]]:
+        """Reads a reply, including its continuation lines.
+
+        :param stream: The stream of the connection.
+        :raises RuntimeError: The connection was closed before the end of the reply.
+        :return: The status code and the text of each line."""
+        lines = []
+        for raw_line in iter(stream.readline, b""):
+            line = raw_line.decode("utf8", errors="replace").rstrip("\r\n")
+            if len(line) < 4:
+                raise RuntimeError(f"Unexpected reply from Tor control port: '{line}'.")
+            lines.append(line[4:])
+            # The last line of a reply has a space after the status code, the others a dash or a plus.
+            if line[3] == " ":
+                return line[:3], lines
+
+        raise RuntimeError("Unexpected end of the reply from Tor control port.")
+
+    def __command(self, stream: io.BufferedRWPair, command: str) -> list[str]:
+        """Sends a command and reads its reply.
+
+        :param stream: The stream of the connection.
+        :param command: The command, without line terminator.
+        :raises RuntimeError: The command failed.
+        :return: The text of each line of the reply."""
+        stream.write(f"{command}\r\n".encode("utf8"))
+        stream.flush()
+        status, lines = self.__read_reply(stream)
+        if status != "250":
+            raise RuntimeError(f"Tor control port {self.__host}:{self.__port} replied {status}: {' '.join(lines)}.")
+
+        return lines
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @property
+    def address(self) -> str:
+        """The address of the control port.
+
+        :return: The host and port."""
+        return f"{self.__host}:{self.__port}"
+
+    def signal(self, name: str = "NEWNYM") -> None:
+        """Authenticates and sends a signal, ``NEWNYM`` by default, which switches to clean circuits so that the next
+        requests use a different exit IP.
+
+        It blocks until the signal is acknowledged, so it must run in a thread from the reactor.
+
+        :param name: The name of the signal.
+        :raises OSError: The control port cannot be reached.
+        :raises RuntimeError: The authentication or the signal failed."""
+        with socket.create_connection((self.__host, self.__port), timeout=self.__timeout) as connection:
+            with connection.makefile("rwb") as stream:
+                if self.__password is None:
+                    self.__command(stream, "AUTHENTICATE")
+                else:
+                    escaped = self.__password.replace("\\", "\\\\").replace('"', '\\"')
+                    self.__command(stream, f'AUTHENTICATE "{escaped}"')
+                self.__command(stream, f"SIGNAL {name}")
+                self.__command(stream, "QUIT")
+
+
 class MiddlewareBase(LoggerMixin):
     """Base class for middlewares, defines common functionality for all."""
 
@@ -22,6 +297,20 @@ class MiddlewareBase(LoggerMixin):
         self.__logger = logger if logger is not None else logging.getLogger("dummy")
 
     ## Protected API ###################################################################################################
+    @staticmethod
+    def _get_page_type(request: scrapy.http.Request) -> str:
+        """Returns the page type a request is expected to fetch, so that latencies can be tracked per page type before
+        the response is parsed.
+
+        It is the ``page_type`` in the request metadata if any, otherwise the first segment of the path of the URL, for
+        example ``author`` for ``https://quotes.toscrape.com/author/Thomas-A-Edison/``.
+
+        :param request: The request.
+        :return: The page type, ``root`` for the root path."""
+        if (page_type := request.meta.get("page_type", None)) is not None:
+            return page_type
+
+        return urlparse(request.url).path.strip("/").split("/", 1)[0] or "root"
 
     ## Public API ######################################################################################################
     @property
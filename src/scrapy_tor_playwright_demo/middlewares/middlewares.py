@@ -1,13 +1,46 @@
 """Spider and downloader middlewares."""
 
+import functools
+import hashlib
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, cast
+from urllib.parse import urlsplit
+
 import scrapy
 import scrapy.crawler
 import scrapy.exceptions
 import scrapy.http
+import scrapy.settings
 import scrapy.signals
+import scrapy.utils.defer
+import scrapy.utils.project
+import twisted.internet.defer
+import twisted.internet.threads
+import twisted.python.failure
+from rotating_proxies.middlewares import RotatingProxyMiddleware
+
+from ..defs import PlaywrightMixin, PlaywrightStores, RecrawlMixin, SpooledBody
+from ..stores.recrawl import PageValidators, RecrawlStore
+from ..stores.sessions import CircuitSession
+from .defs import (
+    AdaptiveTimeoutSettings,
+    HedgeRace,
+    HedgingSettings,
+    LatencyWindow,
+    MiddlewareBase,
+    SessionSettings,
+    TorController,
+)
 
-from ..defs import PlaywrightMixin
-from .defs import MiddlewareBase
+#: The number of bytes from the start of a body from which the spool middleware infers its encoding, if not declared.
+SPOOL_ENCODING_SAMPLE_SIZE = 64 * 1024
 
 
 class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
@@ -21,12 +54,91 @@ class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
             "rotating_proxies.middlewares.RotatingProxyMiddleware": 610,
             "scrapy_tor_playwright_demo.proxies.middlewares.PlaywrightProxyDownloaderMiddleware": 615,
             "rotating_proxies.middlewares.BanDetectionMiddleware": 620,
-        }"""
+        }
+
+    The download timeout and the Playwright navigation timeout of each request are adapted to the latencies of the
+    recent requests through the same proxy and of the same page type, as a quantile of them multiplied by a factor,
+    bounded by a floor and a ceiling, so that a dead Tor circuit is given up on long before ``DOWNLOAD_TIMEOUT``. Until
+    there are enough latencies, those of the page type through any proxy are used, and otherwise the ceiling. The
+    chosen timeouts are stored in the stats under ``adaptive_timeout/``. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the adaptive timeouts.
+        ADAPTIVE_TIMEOUT_ENABLED = True
+        # Quantile of the recent latencies the timeout is derived from.
+        ADAPTIVE_TIMEOUT_QUANTILE = 0.99
+        # Factor the quantile is multiplied by.
+        ADAPTIVE_TIMEOUT_FACTOR = 3.0
+        # Minimum and maximum timeouts in seconds.
+        ADAPTIVE_TIMEOUT_FLOOR = 15
+        ADAPTIVE_TIMEOUT_CEILING = DOWNLOAD_TIMEOUT
+        # Number of recent latencies kept per proxy and page type, and number needed before they are used.
+        ADAPTIVE_TIMEOUT_WINDOW = 200
+        ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20"""
 
     ## Private API #####################################################################################################
-    def __init__(self, *args, **kwargs) -> None:
-        """Class constructor."""
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this middleware, for its stores and the settings and stats of the timeouts."""
         super().__init__(*args, **kwargs)
+        settings = crawler.settings if crawler is not None else scrapy.settings.Settings()
+        #: Crawler that uses this middleware.
+        self.__crawler = crawler
+        #: The Playwright stores of the crawler, the registry of the contexts is owned by this middleware.
+        self.__stores = PlaywrightStores.from_crawler(crawler)
+        #: Whether the timeouts are adaptive.
+        self.__adaptive = crawler is not None and settings.getbool("ADAPTIVE_TIMEOUT_ENABLED", False)
+        #: The settings of the adaptive timeouts.
+        self.__timeouts = AdaptiveTimeoutSettings.from_settings(settings)
+        #: The latencies of the recent requests, keyed by proxy and page type, with ``None`` as proxy for any proxy.
+        self.__windows: defaultdict[tuple[str | None, str], LatencyWindow] = defaultdict(
+            functools.partial(LatencyWindow, self.__timeouts.window)
+        )
+
+    def __get_timeout(self, proxy: str | None, page_type: str) -> float:
+        """Derives the timeout for a proxy and a page type from the recent latencies.
+
+        :param proxy: The proxy, ``None`` if no proxy.
+        :param page_type: The page type.
+        :return: The timeout in seconds."""
+        settings = self.__timeouts
+        for key in ((proxy, page_type), (None, page_type)):
+            window = self.__windows.get(key, None)
+            if window is not None and len(window) >= settings.min_samples:
+                quantile = cast(float, window.quantile(settings.quantile))
+                return min(settings.ceiling, max(settings.floor, quantile * settings.factor))
+
+        return settings.ceiling
+
+    def __set_timeout(self, request: scrapy.http.Request) -> None:
+        """Sets the adaptive download and navigation timeouts of a request, unless the request has its own download
+        timeout.
+
+        :param request: The request, with its proxy already assigned."""
+        default_timeout = self.__timeouts.default_timeout
+        current = request.meta.get("download_timeout", default_timeout)
+        if current not in (default_timeout, request.meta.get("adaptive_timeout", None)):
+            return
+
+        proxy, page_type = request.meta.get("proxy", None), self._get_page_type(request)
+        timeout = self.__get_timeout(proxy, page_type)
+        request.meta["download_timeout"] = request.meta["adaptive_timeout"] = timeout
+        if self._is_playwright_request(request):
+            request.meta.setdefault("playwright_page_goto_kwargs", {})["timeout"] = timeout * 1000
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.set_value(f"adaptive_timeout/{proxy or 'none'}/{page_type}", timeout)
+
+    def __observe_latency(self, request: scrapy.http.Request) -> None:
+        """Adds the latency of a request from the assignment of the proxy to the response to the recent latencies.
+
+        :param request: The request, with the response already marked."""
+        start, end = self._get_mark(request, "proxy_end"), self._get_mark(request, "response")
+        if start is not None and end is not None:
+            page_type = self._get_page_type(request)
+            self.__windows[(request.meta.get("proxy", None), page_type)].observe(end - start)
+            self.__windows[(None, page_type)].observe(end - start)
 
     ## Protected API ###################################################################################################
 
@@ -37,11 +149,14 @@ class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
 
         :param crawler: Crawler that uses this middleware.
         :return: The instance of the middleware."""
-        return PlaywrightMiddleware(logger=crawler.spider.logger if crawler.spider is not None else None)
+        return PlaywrightMiddleware(
+            crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None
+        )
 
     def process_request(self, request: scrapy.http.Request, spider: scrapy.crawler.Spider) -> None:
-        """Processes the request, by fetching the proxy configured by ``scrapy-rotating-proxies`` if there is one
-        and adding it in the Playwright context in a suitable format.
+        """Processes the request, by binding its Playwright callbacks to the stores of the crawler, fetching the proxy
+        configured by ``scrapy-rotating-proxies`` if there is one and adding it in the Playwright context in a suitable
+        format, and setting the adaptive timeouts.
 
         If the request is not a Playwright request, then there is no processing on the request.
 
@@ -50,11 +165,16 @@ class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
         # pylint: disable=unused-argument
 
         # Process request if a Playwright request.
+        self._mark(request, "proxy_start")
         if self._is_playwright_request(request):
-            self._add_playwright_proxy(request)
+            self._bind_playwright_request(request, self.__stores)
+            self._add_playwright_proxy(request, self.__stores)
             if (proxy := self._get_playwright_proxy(request)) is not None:
                 identifier = self._get_playwright_context_id(request)
                 self._log_debug(f"Added proxy '{proxy}' to Playwright request with context ID {identifier}.")
+        if self.__adaptive:
+            self.__set_timeout(request)
+        self._mark(request, "proxy_end")
 
     def process_response(
         self,
@@ -62,15 +182,19 @@ class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
         response: scrapy.http.Response,
         spider: scrapy.crawler.Spider,
     ) -> scrapy.http.Response | scrapy.http.Request | None:
-        """Processes the response, doing nothing to it and returning it as is.
+        """Processes the response, marking the time it was received and adding its latency to the recent latencies,
+        returning it as is.
 
         :param request: The request that originated the response.
         :param response: The response being processed.
         :param spider: The spider that performed the request.
         :returns: The response."""
-        # pylint: disable=unused-argument,no-self-use
+        # pylint: disable=unused-argument
 
         # Return response as is, without further processing.
+        self._mark(request, "response")
+        if self.__adaptive:
+            self.__observe_latency(request)
         return response
 
     def process_exception(
@@ -89,3 +213,859 @@ class PlaywrightMiddleware(PlaywrightMixin, MiddlewareBase):
 
         if self._is_playwright_request(request):
             self._log_debug(f"Request to '{request.url}' ended with exception '{exception}'...")
+            # Close the context now instead of relying on the errback, which is not set if the request already had
+            # one, and give the request a new context, so that a retry does not reuse the failed one or its proxy.
+            identifier = self._get_playwright_context_id(request)
+            if (context := self.__stores.contexts.get(identifier)) is not None:
+                deferred = scrapy.utils.defer.deferred_from_coro(self._close_playwright_page(context.page))
+                deferred.addErrback(lambda failure: self._log_error(f"Failed closing context {identifier}: {failure}"))
+            request.meta.pop("playwright_page", None)
+            request.meta.pop("playwright_prewarmed", None)
+            request.meta["playwright_context"] = f"{uuid.uuid4()}"
+
+
+class HedgingMiddleware(PlaywrightMixin, MiddlewareBase):
+    """Hedging downloader middleware, which sends a duplicate of a Playwright request through a different proxy when it
+    takes longer than a quantile of the latencies of the recent requests of the same page type, so that a slow Tor
+    circuit does not hold a request until the download timeout. The first response wins, and the other download is
+    cancelled by closing its Playwright context, which is why only Playwright requests are hedged.
+
+    The requests are downloaded by the downloader as usual, subject to the delays and concurrency of the download slots.
+    Only the hedges are downloaded out of band with the download handlers, once the request is slow, and they are capped
+    by a budget, a fraction of the requests. It must be the closest to the downloader, and it can be configured with the
+    settings below:
+
+    .. code-block:: python
+
+        # Enables the middleware.
+        HEDGING_ENABLED = False
+        # Quantile of the latencies of the recent requests of the same page type after which a request is hedged.
+        HEDGING_QUANTILE = 0.95
+        # Number of recent latencies kept per page type.
+        HEDGING_WINDOW = 200
+        # Number of latencies of a page type needed before its requests are hedged.
+        HEDGING_MIN_SAMPLES = 20
+        # Maximum fraction of the requests that can be hedged.
+        HEDGING_BUDGET = 0.05"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this middleware, to download and close the hedges and store the stats."""
+        super().__init__(*args, **kwargs)
+        #: Crawler that uses this middleware.
+        self.__crawler = crawler
+        #: The Playwright stores of the crawler.
+        self.__stores = PlaywrightStores.from_crawler(crawler)
+        #: The settings of the middleware.
+        self.__settings = HedgingSettings.from_settings(
+            crawler.settings if crawler is not None else scrapy.settings.Settings()
+        )
+        #: The latencies of the recent requests, keyed by page type.
+        self.__windows: defaultdict[str, LatencyWindow] = defaultdict(
+            functools.partial(LatencyWindow, self.__settings.window)
+        )
+        #: The races of the requests that may be hedged, until their download finishes.
+        self.__races: dict[scrapy.http.Request, HedgeRace] = {}
+        #: The number of requests seen.
+        self.__requests = 0
+        #: The number of hedges sent.
+        self.__hedges = 0
+
+    def __inc_stat(self, key: str) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``hedging/``."""
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"hedging/{key}")
+
+    def __has_budget(self) -> bool:
+        """Checks if there is budget for another hedge.
+
+        :return: ``True`` if there is budget, ``False`` otherwise."""
+        return self.__hedges + 1 <= self.__settings.budget * self.__requests
+
+    def __to_hedge(self, request: scrapy.http.Request) -> scrapy.http.Request | None:
+        """Creates the hedge of a request, through a proxy different to the one of the request.
+
+        :param request: The request.
+        :return: The hedge, or ``None`` if there is no other proxy."""
+        if not (proxies := [proxy for proxy in self.__settings.proxies if proxy != request.meta.get("proxy", None)]):
+            return None
+
+        proxy = random.choice(proxies)
+        hedge = request.replace()
+        hedge.meta["proxy"] = proxy
+        hedge.meta["hedging_hedge"] = True
+        hedge.meta["instrumentation"] = dict(request.meta.get("instrumentation", {}))
+        hedge.meta.pop("_rotating_proxy", None)
+        # The hedge needs its own context, as the proxy is set per context.
+        hedge.meta.pop("playwright_page", None)
+        hedge.meta.pop("playwright_prewarmed", None)
+        hedge.meta["playwright_context"] = f"{uuid.uuid4()}"
+        hedge.meta["playwright_context_kwargs"] = {**request.meta["playwright_context_kwargs"]}
+        hedge.meta["playwright_context_kwargs"]["proxy"] = {"server": proxy}
+
+        return hedge
+
+    def __close(self, request: scrapy.http.Request) -> None:
+        """Closes the Playwright page and context of a request in the background, which also makes its download fail
+        if it is still in progress.
+
+        :param request: The request."""
+        closing = scrapy.utils.defer.deferred_from_coro(self._close_playwright_context(request, self.__stores))
+        closing.addErrback(lambda failure: self._log_error(f"Failed closing the context of '{request.url}': {failure}"))
+
+    def __adopt(self, request: scrapy.http.Request, hedge: scrapy.http.Request) -> None:
+        """Moves the Playwright page and proxy of a winning hedge to the original request, so that they are used and
+        closed through it from then on.
+
+        :param request: The original request.
+        :param hedge: The hedge."""
+        request.meta["proxy"] = hedge.meta["proxy"]
+        request.meta["instrumentation"] = hedge.meta["instrumentation"]
+        request.meta["playwright_context"] = hedge.meta["playwright_context"]
+        request.meta["playwright_context_kwargs"] = hedge.meta["playwright_context_kwargs"]
+        if (page := hedge.meta.get("playwright_page", None)) is not None:
+            request.meta["playwright_page"] = page
+            # Otherwise, the context would be seen as orphaned once the hedge is released.
+            self.__stores.contexts.register(request, page)
+
+    def __send_hedge(self, request: scrapy.http.Request, spider: scrapy.Spider, delay: float) -> None:
+        """Sends the hedge of a request out of band with the download handlers, if the request is still downloading
+        and there is budget and a different proxy.
+
+        :param request: The request.
+        :param spider: The spider that performed the request.
+        :param delay: The delay in seconds after which the request is hedged."""
+        if (
+            (race := self.__races.get(request, None)) is None
+            or not self.__has_budget()
+            or (hedge := self.__to_hedge(request)) is None
+        ):
+            return
+
+        self.__hedges += 1
+        self.__inc_stat("sent")
+        request.meta["hedging_hedged"] = True
+        self._log_debug(f"Hedging request to '{request.url}' after {delay:.2f}s via '{hedge.meta['proxy']}'.")
+        handlers = self.__crawler.engine.downloader.handlers
+        race.hedge = hedge
+        race.download = scrapy.utils.defer.mustbe_deferred(handlers.download_request, hedge, spider)
+        race.download.addBoth(self.__hedge_done, request, hedge)
+
+    def __hedge_done(
+        self, outcome: Any, request: scrapy.http.Request, hedge: scrapy.http.Request
+    ) -> scrapy.http.Response | None:
+        """Records the outcome of a hedge, and if it responded first, cancels the download of the request.
+
+        :param outcome: The response or the failure of the hedge.
+        :param request: The original request.
+        :param hedge: The hedge.
+        :return: The response of the hedge, ``None`` if it failed or it was too late."""
+        if isinstance(outcome, twisted.python.failure.Failure) or (race := self.__races.get(request, None)) is None:
+            self.__close(hedge)
+            return None
+
+        race.response = outcome
+        # The download of the request fails once its page is closed, then the response of the hedge is used instead.
+        self.__close(request)
+
+        return outcome
+
+    def __settle(
+        self, request: scrapy.http.Request, race: HedgeRace, response: scrapy.http.Response | None
+    ) -> scrapy.http.Response | None:
+        """Settles the race of a request that finished downloading, with the response of the hedge if it came first.
+
+        :param request: The request.
+        :param race: The race of the request.
+        :param response: The response of the request, ``None`` if it failed.
+        :return: The response that won, ``None`` if both failed."""
+        if race.timer.active():
+            race.timer.cancel()
+        if race.hedge is not None and race.response is not None:
+            self.__inc_stat("won")
+            self.__adopt(request, race.hedge)
+            return race.response
+        if race.download is not None and response is not None:
+            self.__inc_stat("lost")
+            race.download.cancel()
+
+        return response
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "HedgingMiddleware":
+        """Method in Scrapy workflow that will create a new instance of the middleware.
+
+        :param crawler: Crawler that uses this middleware.
+        :raises scrapy.exceptions.NotConfigured: The middleware is not enabled.
+        :return: The instance of the middleware."""
+        if not crawler.settings.getbool("HEDGING_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def process_request(self, request: scrapy.http.Request, spider: scrapy.crawler.Spider) -> None:
+        """Processes the request, which is left to the downloader, and schedules its hedge after the quantile of the
+        latencies of its page type, if there are enough of them and there is budget for a hedge.
+
+        :param request: The request.
+        :param spider: The spider that performed the request."""
+        self.__requests += 1
+        request.meta["hedging_start"] = time.monotonic()
+
+        page_type = self._get_page_type(request)
+        window = self.__windows[page_type]
+        if (
+            len(window) < self.__settings.min_samples
+            or not self.__has_budget()
+            or self.__crawler is None
+            or not self._is_playwright_request(request)
+        ):
+            return
+
+        delay = cast(float, window.quantile(self.__settings.quantile))
+        if self.__crawler.stats is not None:
+            self.__crawler.stats.set_value(f"hedging/threshold/{page_type}", delay)
+
+        # Imported here so that the reactor configured in the settings is installed first, the module is replaced by
+        # the installed reactor, thus its members are unknown until then.
+        from twisted.internet import reactor  # pylint: disable=import-outside-toplevel
+
+        # pylint: disable-next=no-member
+        self.__races[request] = HedgeRace(timer=reactor.callLater(delay, self.__send_hedge, request, spider, delay))
+
+    def process_response(
+        self,
+        request: scrapy.http.Request,
+        response: scrapy.http.Response,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.http.Response | scrapy.http.Request | None:
+        """Processes the response, replacing it with the response of the hedge if it came first, and adding the
+        latency of the request to the latencies of its page type.
+
+        :param request: The request that originated the response.
+        :param response: The response being processed.
+        :param spider: The spider that performed the request.
+        :returns: The response of the request or of its hedge."""
+        # pylint: disable=unused-argument
+        if (race := self.__races.pop(request, None)) is not None:
+            response = cast(scrapy.http.Response, self.__settle(request, race, response))
+        if (start := request.meta.get("hedging_start", None)) is not None:
+            self.__windows[self._get_page_type(request)].observe(time.monotonic() - start)
+
+        return response
+
+    async def process_exception(
+        self, request: scrapy.http.Request, exception: Exception, spider: scrapy.crawler.Spider
+    ) -> scrapy.http.Response | None:
+        """Processes the failed download of a request, using the response of its hedge instead if it came first or
+        once it comes, if it is still downloading.
+
+        :param request: The request that failed.
+        :param exception: The exception of the download.
+        :param spider: The spider that performed the request.
+        :return: The response of the hedge, ``None`` if there is none so that the exception is handled as usual."""
+        # pylint: disable=unused-argument
+        if (race := self.__races.get(request, None)) is None:
+            return None
+
+        if race.download is not None and not race.download.called:
+            # The request failed on its own, its context is closed and the hedge left to finish.
+            self.__close(request)
+            await scrapy.utils.defer.maybe_deferred_to_future(race.download)
+        del self.__races[request]
+
+        return self.__settle(request, race, None)
+
+
+class SessionMiddleware(PlaywrightMixin, MiddlewareBase):
+    """Sticky sessions downloader middleware, which pins the requests with the same ``session`` metadata to the proxy
+    and the Playwright context of the first successful response of the session, so that related requests share the
+    exit IP and the cookies of the context, and renews the Tor circuit of a proxy as soon as a ban is detected.
+
+    A session lasts for a circuit epoch of its proxy, which ends when its circuit is renewed, and for a maximum age at
+    most, as the Tor proxies also renew their circuits on their own. On a ban, the sessions of the proxy are ended and
+    their contexts closed, and ``SIGNAL NEWNYM`` is sent to the Tor control port of the proxy, on the same host, so
+    that once acknowledged the proxy is revived in ``scrapy-rotating-proxies`` instead of waiting out its backoff.
+
+    It must be called after ``scrapy-rotating-proxies`` assigns a proxy and before the proxy is added to the Playwright
+    context, for example:
+
+    .. code-block:: python
+
+        DOWNLOADER_MIDDLEWARES = {
+            "rotating_proxies.middlewares.RotatingProxyMiddleware": 610,
+            "scrapy_tor_playwright_demo.middlewares.middlewares.SessionMiddleware": 612,
+            "scrapy_tor_playwright_demo.middlewares.middlewares.PlaywrightMiddleware": 615,
+            "rotating_proxies.middlewares.BanDetectionMiddleware": 620,
+        }
+
+    The sessions and renewals are stored in the stats under ``sessions/``. It can be configured with the settings
+    below:
+
+    .. code-block:: python
+
+        # Enables the middleware.
+        SESSION_ENABLED = False
+        # Maximum age of a session in seconds, at most the interval at which the Tor proxies change circuits.
+        SESSION_MAX_AGE = 15
+        # Tor control port on the host of each proxy, or None to never renew the circuits.
+        SESSION_TOR_CONTROL_PORT = None
+        # Password of the Tor control port, or None if it has no authentication.
+        SESSION_TOR_CONTROL_PASSWORD = None
+        # Minimum seconds between two renewals of the circuit of the same proxy.
+        SESSION_RENEWAL_COOLDOWN = 10
+        # Timeout of the Tor control port in seconds.
+        SESSION_RENEWAL_TIMEOUT = 5"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this middleware, for its stores, the settings, the stats and the proxies."""
+        super().__init__(*args, **kwargs)
+        #: Crawler that uses this middleware.
+        self.__crawler = crawler
+        #: The Playwright stores of the crawler, the sessions are owned by this middleware.
+        self.__stores = PlaywrightStores.from_crawler(crawler)
+        #: The settings of the middleware.
+        self.__settings = SessionSettings.from_settings(
+            crawler.settings if crawler is not None else scrapy.settings.Settings()
+        )
+        #: The monotonic time of the last renewal of each proxy.
+        self.__renewed: dict[str, float] = {}
+
+        if crawler is not None:
+            crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_closed(self) -> None:
+        """Ends all the sessions, closing their contexts."""
+        self.__end(self.__stores.sessions.clear())
+
+    def __inc_stat(self, key: str, count: int = 1) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``sessions/``.
+        :param count: The increment."""
+        if self.__crawler is not None and self.__crawler.stats is not None and count:
+            self.__crawler.stats.inc_value(f"sessions/{key}", count)
+
+    def __end(self, sessions: list[CircuitSession]) -> None:
+        """Closes the Playwright contexts of sessions that have ended, unless another session uses them.
+
+        :param sessions: The sessions."""
+        for session in sessions:
+            if session.context is None or self.__stores.sessions.owns(session.context):
+                continue
+            if (context := self.__stores.contexts.get(session.context)) is not None:
+                closing = scrapy.utils.defer.deferred_from_coro(self._close_playwright_page(context.page))
+                closing.addErrback(lambda failure: self._log_error(f"Failed closing session context: {failure}"))
+        self.__inc_stat("ended", len(sessions))
+
+    def __renew(self, proxy: str) -> list[CircuitSession]:
+        """Ends the sessions of a banned proxy and renews its Tor circuit, unless it was renewed recently.
+
+        :param proxy: The proxy.
+        :return: The sessions ended."""
+        ended = self.__stores.sessions.renew(proxy)
+        self.__end(ended)
+
+        host = urlsplit(proxy).hostname
+        settings = self.__settings
+        if settings.control_port is None or host is None:
+            return ended
+        if time.monotonic() - self.__renewed.get(proxy, -math.inf) < settings.cooldown:
+            return ended
+
+        self.__renewed[proxy] = time.monotonic()
+        controller = TorController(host, int(settings.control_port), settings.control_password, settings.timeout)
+        self._log_debug(f"Renewing the Tor circuit of proxy '{proxy}' via {controller.address}...")
+        deferred = twisted.internet.threads.deferToThread(controller.signal, "NEWNYM")
+        deferred.addCallbacks(lambda _: self.__renewed_circuit(proxy), lambda f: self.__failed_renewal(proxy, f))
+
+        return ended
+
+    def __renew_banned(self, request: scrapy.http.Request, proxy: str) -> None:
+        """Renews the circuit of the proxy of a banned request, and gives the request a new context if the context of
+        its session is being closed, as the retry must not reuse it.
+
+        :param request: The banned request.
+        :param proxy: The proxy of the request."""
+        closing = {session.context for session in self.__renew(proxy)}
+        if self._is_playwright_request(request) and request.meta["playwright_context"] in closing:
+            request.meta.pop("playwright_page", None)
+            request.meta["playwright_context"] = f"{uuid.uuid4()}"
+
+    def __renewed_circuit(self, proxy: str) -> None:
+        """Revives a proxy in ``scrapy-rotating-proxies`` once its circuit was renewed, so that it is used again.
+
+        :param proxy: The proxy."""
+        self.__inc_stat("renewals")
+        self._log_info(f"Renewed the Tor circuit of proxy '{proxy}'.")
+        if (engine := self.__crawler.engine if self.__crawler is not None else None) is None:
+            return
+
+        for middleware in engine.downloader.middleware.middlewares:
+            if isinstance(middleware, RotatingProxyMiddleware):
+                if (name := middleware.proxies.get_proxy(proxy)) is not None and name in middleware.proxies.dead:
+                    middleware.proxies.dead.discard(name)
+                    middleware.proxies.unchecked.add(name)
+
+    def __failed_renewal(self, proxy: str, failure: twisted.python.failure.Failure) -> None:
+        """Logs a renewal that failed, the proxy is then left to the backoff of ``scrapy-rotating-proxies``.
+
+        :param proxy: The proxy.
+        :param failure: The failure of the renewal."""
+        self.__inc_stat("renewal_failures")
+        self._log_error(f"Failed renewing the Tor circuit of proxy '{proxy}': {failure.getErrorMessage()}")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "SessionMiddleware":
+        """Method in Scrapy workflow that will create a new instance of the middleware.
+
+        :param crawler: Crawler that uses this middleware.
+        :raises scrapy.exceptions.NotConfigured: The middleware is not enabled.
+        :return: The instance of the middleware."""
+        if not crawler.settings.getbool("SESSION_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def process_request(self, request: scrapy.http.Request, spider: scrapy.crawler.Spider) -> None:
+        """Processes the request, sending it through the proxy and the Playwright context of its session if the
+        session is live, and ending the sessions that are no longer live.
+
+        :param request: The request, with the proxy assigned by ``scrapy-rotating-proxies`` if any.
+        :param spider: The spider that performed the request."""
+        # pylint: disable=unused-argument
+        self.__end(self.__stores.sessions.expire(self.__settings.max_age))
+
+        key = request.meta.get("session", None)
+        if key is None or (session := self.__stores.sessions.get(key, self.__settings.max_age)) is None:
+            return
+
+        request.meta["proxy"] = session.proxy
+        request.meta["download_slot"] = urlsplit(session.proxy).hostname
+        if session.context is not None and self._is_playwright_request(request):
+            request.meta["playwright_context"] = session.context
+            request.meta.pop("playwright_prewarmed", None)
+        self.__inc_stat("reused")
+
+    def process_response(
+        self,
+        request: scrapy.http.Request,
+        response: scrapy.http.Response,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.http.Response | scrapy.http.Request | None:
+        """Processes the response, renewing the circuit of the proxy if banned, otherwise pinning the session of the
+        request to its proxy and context.
+
+        :param request: The request that originated the response.
+        :param response: The response being processed.
+        :param spider: The spider that performed the request.
+        :returns: The response."""
+        # pylint: disable=unused-argument
+        if (proxy := request.meta.get("proxy", None)) is None:
+            return response
+
+        if request.meta.get("_ban", None) is True:
+            self.__renew_banned(request, proxy)
+        elif (key := request.meta.get("session", None)) is not None:
+            context = self._get_playwright_context_id(request)
+            session = self.__stores.sessions.get(key, self.__settings.max_age)
+            if session is None or (session.proxy, session.context) != (proxy, context):
+                _, replaced = self.__stores.sessions.pin(key, proxy, context)
+                self._log_debug(f"Pinned session '{key}' to proxy '{proxy}' and context {context}.")
+                self.__inc_stat("pinned")
+                if replaced is not None:
+                    self.__end([replaced])
+
+        return response
+
+    def process_exception(
+        self,
+        request: scrapy.http.Request,
+        exception: Exception,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.http.Response | scrapy.http.Request | None:
+        """Called when a download handler or the processing of a request of the download middleware raises an exception,
+        ending the session of the request, and renewing the circuit of the proxy if banned.
+
+        :param request: The request that generated the exception.
+        :param exception: The raised exception.
+        :param spider: The spider for which this request is intended."""
+        # pylint: disable=unused-argument
+        if (key := request.meta.get("session", None)) is not None and (ended := self.__stores.sessions.end(key)):
+            self.__end([ended])
+        if request.meta.get("_ban", None) is True and (proxy := request.meta.get("proxy", None)) is not None:
+            self.__renew(proxy)
+
+
+class RecrawlMiddleware(RecrawlMixin, PlaywrightMixin, MiddlewareBase):
+    """Conditional recrawl downloader middleware, which detects the pages that did not change since the previous crawl,
+    so that the spider neither parses nor stores them again, and visits less often the pages that rarely change.
+
+    The state of each page as of its last visit is kept in a store across crawls, see ``RecrawlStore``. Requests that
+    are not Playwright requests are sent with the ``If-None-Match`` and ``If-Modified-Since`` headers of the previous
+    response of the page, and otherwise the digest of the normalized content of the response, after rendering, is
+    compared to the one of the previous visit. Pages whose interval since the last visit has not elapsed are not
+    downloaded at all. In those cases ``recrawl`` is set in the request metadata to ``not_modified``, ``unchanged`` and
+    ``not_due`` respectively, with the links found in the page when last parsed in ``recrawl_links``, and otherwise it
+    is set to ``changed``. Pages not downloaded are given a ``304 Not Modified`` response without body.
+
+    It must be called before ``scrapy-rotating-proxies``, so that pages not downloaded do not take a proxy, and the
+    ``304`` responses must not be seen as bans, for example:
+
+    .. code-block:: python
+
+        DOWNLOADER_MIDDLEWARES = {
+            "scrapy_tor_playwright_demo.middlewares.middlewares.RecrawlMiddleware": 605,
+            "rotating_proxies.middlewares.RotatingProxyMiddleware": 610,
+        }
+        ROTATING_PROXY_BAN_POLICY = "scrapy_tor_playwright_demo.middlewares.defs.RecrawlBanDetectionPolicy"
+
+    The counts of pages per outcome are stored in the stats under ``recrawl/``. It can be configured with the settings
+    below:
+
+    .. code-block:: python
+
+        # Enables the middleware.
+        RECRAWL_ENABLED = False
+        # Path to the database of the store, relative to the '.scrapy' folder of the project unless absolute.
+        RECRAWL_PATH = "recrawl.sqlite3"
+        # Interval in seconds before visiting again a page that did not change once, doubled every time it does not.
+        RECRAWL_MIN_INTERVAL = 12 * 3600
+        # Maximum interval in seconds before visiting again a page that does not change.
+        RECRAWL_MAX_INTERVAL = 7 * 24 * 3600"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this middleware, for its recrawl store, the settings and the stats."""
+        super().__init__(*args, **kwargs)
+        settings = crawler.settings if crawler is not None else scrapy.settings.Settings()
+        #: Crawler that uses this middleware.
+        self.__crawler = crawler
+        #: The recrawl store of the crawler, owned by this middleware.
+        self.__store = RecrawlStore.from_crawler(crawler) if crawler is not None else RecrawlStore()
+        #: The path to the database of the store.
+        self.__path = scrapy.utils.project.data_path(settings.get("RECRAWL_PATH", "recrawl.sqlite3"))
+        #: The interval in seconds before visiting again a page that did not change once.
+        self.__min_interval = settings.getfloat("RECRAWL_MIN_INTERVAL", 12 * 3600.0)
+        #: The maximum interval in seconds before visiting again a page that does not change.
+        self.__max_interval = settings.getfloat("RECRAWL_MAX_INTERVAL", 7 * 24 * 3600.0)
+
+        if crawler is not None:
+            crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+            crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Opens the store, with the pages visited by previous crawls."""
+        self.__store.open(self.__path, self.__min_interval, self.__max_interval)
+        self._log_info(f"Opened the recrawl store at '{self.__path}'.")
+
+    def __spider_closed(self) -> None:
+        """Closes the store."""
+        self.__store.close()
+
+    def __inc_stat(self, key: str) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``recrawl/``."""
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"recrawl/{key}")
+
+    def __is_tracked(self, request: scrapy.http.Request) -> bool:
+        """Determines if the changes of the page of a request are tracked, which excludes requests without callback,
+        such as those of ``robots.txt``, and requests with ``dont_recrawl`` in their metadata.
+
+        :param request: The request.
+        :return: ``True`` if tracked, ``False`` otherwise."""
+        return (
+            self.__store.is_open
+            and request.callback is not scrapy.http.request.NO_CALLBACK
+            and not request.meta.get("dont_recrawl", False)
+        )
+
+    def __mark_not_modified(self, request: scrapy.http.Request) -> None:
+        """Marks a request whose page the origin replied was not modified, with the links of its previous visit, if
+        the page was visited before.
+
+        :param request: The request."""
+        if (record := self.__store.not_modified(request.url)) is not None:
+            request.meta["recrawl"] = "not_modified"
+            request.meta["recrawl_links"] = record.links
+            self.__inc_stat("not_modified")
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "RecrawlMiddleware":
+        """Method in Scrapy workflow that will create a new instance of the middleware.
+
+        :param crawler: Crawler that uses this middleware.
+        :raises scrapy.exceptions.NotConfigured: The middleware is not enabled.
+        :return: The instance of the middleware."""
+        if not crawler.settings.getbool("RECRAWL_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def process_request(
+        self, request: scrapy.http.Request, spider: scrapy.crawler.Spider
+    ) -> scrapy.http.Response | None:
+        """Processes the request, returning a response without body if its page is not due, and otherwise making it
+        conditional if it is not a Playwright request.
+
+        :param request: The request.
+        :param spider: The spider that performed the request.
+        :return: A ``304`` response if the page is not due, ``None`` otherwise."""
+        # pylint: disable=unused-argument
+        if not self.__is_tracked(request) or (record := self.__store.get(request.url)) is None:
+            return None
+
+        # Otherwise, the spider middlewares would drop the response.
+        if 304 not in (allowed := request.meta.get("handle_httpstatus_list", [])):
+            request.meta["handle_httpstatus_list"] = [*allowed, 304]
+
+        if not record.due:
+            request.meta["recrawl"] = "not_due"
+            request.meta["recrawl_links"] = record.links
+            self.__inc_stat("not_due")
+            return scrapy.http.Response(request.url, status=304, request=request, flags=["recrawl"])
+
+        if not self._is_playwright_request(request) and (headers := record.validators.headers):
+            request.headers.update(headers)
+            request.meta["recrawl_conditional"] = True
+
+        return None
+
+    def process_response(
+        self,
+        request: scrapy.http.Request,
+        response: scrapy.http.Response,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.http.Response | scrapy.http.Request | None:
+        """Processes the response, comparing it to the previous visit of its page.
+
+        :param request: The request that originated the response.
+        :param response: The response being processed.
+        :param spider: The spider that performed the request.
+        :returns: The response."""
+        # pylint: disable=unused-argument
+        if not self.__is_tracked(request) or request.meta.get("recrawl", None) == "not_due":
+            return response
+
+        if response.status == 304 and request.meta.get("recrawl_conditional", False):
+            self.__mark_not_modified(request)
+        elif response.status == 200:
+            etag, last_modified = response.headers.get("ETag", None), response.headers.get("Last-Modified", None)
+            validators = PageValidators(
+                etag.decode("latin1") if etag is not None else None,
+                last_modified.decode("latin1") if last_modified is not None else None,
+            )
+            record, changed = self.__store.observe(request.url, self._get_digest(response), validators)
+            request.meta["recrawl"] = "changed" if changed else "unchanged"
+            if not changed:
+                request.meta["recrawl_links"] = record.links
+            self.__inc_stat(request.meta["recrawl"])
+
+        return response
+
+
+class SpoolMiddleware(MiddlewareBase):
+    """Spool downloader middleware, which moves the body of large or non HTML responses to a file, so that the spider,
+    the parsers and the pipelines never hold it in memory again, nor decode it or build a tree of it.
+
+    The download handlers of Scrapy and of Playwright give the body whole, so it is spooled by the first middleware
+    that sees it after those that need it. The response then reaches the spider without body, with the path, the size
+    and the encoding of the body in ``spool`` in the request metadata, see :class:`SpooledBody`, and the parsers store
+    it as an HTML item that points to the file, which the pipelines move into their store or read in chunks. Only the
+    successful responses of requests with a callback are spooled, and not those with ``dont_spool`` in their metadata.
+    The files not moved by the pipelines are deleted once the spider is closed.
+
+    It must be called after the middlewares that read the body, such as the decompression, the meta refresh and the
+    ban detection, thus before them in the order, for example:
+
+    .. code-block:: python
+
+        DOWNLOADER_MIDDLEWARES = {
+            "scrapy_tor_playwright_demo.middlewares.middlewares.SpoolMiddleware": 570,
+            "scrapy.downloadermiddlewares.redirect.MetaRefreshMiddleware": 580,
+        }
+
+    The count and the size of the responses spooled are stored in the stats under ``spool/``. It can be configured
+    with the settings below:
+
+    .. code-block:: python
+
+        # Enables the middleware.
+        SPOOL_ENABLED = True
+        # Size in bytes over which a body is spooled.
+        SPOOL_THRESHOLD = 8 * 1024 * 1024
+        # Spools the bodies that are not HTML, whatever their size.
+        SPOOL_NON_HTML = True
+        # Folder of the spool files, relative to the '.scrapy' folder of the project unless absolute, or None for the
+        # temporary folder of the system.
+        SPOOL_DIR = None"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Class constructor.
+
+        :param crawler: Crawler that uses this middleware, for the settings and the stats."""
+        super().__init__(*args, **kwargs)
+        settings = crawler.settings if crawler is not None else scrapy.settings.Settings()
+        #: Crawler that uses this middleware.
+        self.__crawler = crawler
+        #: The size in bytes over which a body is spooled.
+        self.__threshold = settings.getint("SPOOL_THRESHOLD", 8 * 1024 * 1024)
+        #: Whether to spool the bodies that are not HTML, whatever their size.
+        self.__non_html = settings.getbool("SPOOL_NON_HTML", True)
+        #: The folder in which the spool folder of the crawl is created, ``None`` for the temporary folder.
+        self.__parent = scrapy.utils.project.data_path(folder, True) if (folder := settings.get("SPOOL_DIR")) else None
+        #: The spool folder of the crawl, while the spider is open.
+        self.__folder: str | None = None
+
+        if crawler is not None:
+            crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+            crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    def __spider_opened(self) -> None:
+        """Creates the spool folder of the crawl."""
+        self.__folder = tempfile.mkdtemp(prefix="spool-", dir=self.__parent)
+        self._log_info(f"Spooling large responses to '{self.__folder}'.")
+
+    def __spider_closed(self) -> None:
+        """Deletes the spool folder of the crawl, with the files not moved by the pipelines."""
+        folder, self.__folder = self.__folder, None
+        if folder is not None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def __inc_stat(self, key: str, count: int = 1) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``spool/``.
+        :param count: The increment."""
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"spool/{key}", count)
+
+    def __is_spooled(self, request: scrapy.http.Request, response: scrapy.http.Response) -> bool:
+        """Determines if the body of a response is spooled, which excludes requests without callback, such as those of
+        ``robots.txt``, and requests with ``dont_spool`` in their metadata.
+
+        :param request: The request that originated the response.
+        :param response: The response.
+        :return: ``True`` if spooled, ``False`` otherwise."""
+        return (
+            self.__folder is not None
+            and 200 <= response.status < 300
+            and request.callback is not scrapy.http.request.NO_CALLBACK
+            and not request.meta.get("dont_spool", False)
+            and (
+                len(response.body) > self.__threshold
+                or (self.__non_html and not isinstance(response, scrapy.http.HtmlResponse))
+            )
+        )
+
+    @staticmethod
+    def __get_encoding(response: scrapy.http.Response) -> str | None:
+        """Returns the encoding of the body of a response, the one declared or otherwise the one inferred from the
+        start of the body, as inferring it from the whole body decodes it.
+
+        :param response: The response.
+        :return: The encoding, ``None`` if the response is not text."""
+        if not isinstance(response, scrapy.http.TextResponse):
+            return None
+        sample = scrapy.http.TextResponse(
+            response.url,
+            headers=response.headers,
+            body=response.body[:SPOOL_ENCODING_SAMPLE_SIZE],
+            encoding=response._declared_encoding(),  # pylint: disable=protected-access
+        )
+
+        return sample.encoding
+
+    def __write(self, body: bytes) -> tuple[str, bytes]:
+        """Writes a body to a new file in the spool folder, and hashes it while still in memory.
+
+        :param body: The body.
+        :return: The path to the file and the SHA-256 digest of the body."""
+        descriptor, path = tempfile.mkstemp(suffix=".body", dir=self.__folder)
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(body)
+
+        return path, hashlib.sha256(body).digest()
+
+    def __to_spooled_response(
+        self, request: scrapy.http.Request, response: scrapy.http.Response, written: tuple[str, bytes]
+    ) -> scrapy.http.Response:
+        """Replaces a response by the same response without body, once its body is spooled.
+
+        :param request: The request that originated the response.
+        :param response: The response.
+        :param written: The path to the file with the body and the digest of the body.
+        :return: The response without body."""
+        path, digest = written
+        spooled = SpooledBody(path=path, size=len(response.body), encoding=self.__get_encoding(response), digest=digest)
+        request.meta["spool"] = spooled
+        self.__inc_stat("responses")
+        self.__inc_stat("bytes", spooled.size)
+        self._log_debug(f"Spooled the {spooled.size} bytes of the body of '{response.url}' to '{path}'.")
+
+        # Not replaced with 'Response.replace', which reads every attribute, and thus infers the encoding of the body.
+        kwargs = {name: getattr(response, name) for name in response.attributes if name not in {"body", "encoding"}}
+        kwargs["flags"] = [*response.flags, "spooled"]
+        if isinstance(response, scrapy.http.TextResponse):
+            kwargs["encoding"] = spooled.encoding
+
+        return type(response)(body=b"", **kwargs)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "SpoolMiddleware":
+        """Method in Scrapy workflow that will create a new instance of the middleware.
+
+        :param crawler: Crawler that uses this middleware.
+        :raises scrapy.exceptions.NotConfigured: The middleware is not enabled.
+        :return: The instance of the middleware."""
+        if not crawler.settings.getbool("SPOOL_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def process_response(
+        self,
+        request: scrapy.http.Request,
+        response: scrapy.http.Response,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.http.Response | twisted.internet.defer.Deferred:
+        """Processes the response, spooling its body in a thread if it is large or not HTML.
+
+        :param request: The request that originated the response.
+        :param response: The response being processed.
+        :param spider: The spider that performed the request.
+        :returns: The response, or a deferred that fires with the response without body once spooled."""
+        # pylint: disable=unused-argument
+        # A retry copies the metadata of the request, with the body spooled for the previous response.
+        request.meta.pop("spool", None)
+        if not self.__is_spooled(request, response):
+            return response
+
+        deferred = twisted.internet.threads.deferToThread(self.__write, response.body)
+        deferred.addCallback(lambda written: self.__to_spooled_response(request, response, written))
+
+        return deferred
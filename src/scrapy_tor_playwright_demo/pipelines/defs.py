@@ -2,9 +2,106 @@
 
     - https://docs.scrapy.org/en/latest/topics/item-pipeline.html"""
 
+import dataclasses
+import functools
+import hashlib
+import json
 import logging
+import os
+import unicodedata
+from collections.abc import Iterator
+from typing import Any, Literal
+
+import itemadapter
+import scrapy.settings
 
 from ..defs import LoggerMixin
+from ..items import AuthorItem, CompactAuthorItem, CompactHTMLItem, CompactQuoteItem, HTMLItem, QuoteItem
+
+
+@dataclasses.dataclass(frozen=True)
+class FileSystemSettings:
+    """The settings of the filesystem pipeline, refer to :class:`FileSystemPipeline` for details."""
+
+    #: Base path to the folder where the serialized items will be stored.
+    folder: str
+    #: Whether each run writes into a new generation instead of replacing the previous output.
+    incremental: bool = False
+    #: Number of finished generations to keep, including the one of the current run.
+    keep_generations: int = 3
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings, default_folder: str) -> "FileSystemSettings":
+        """Reads the settings of the filesystem pipeline.
+
+        :param settings: The settings of the crawler.
+        :param default_folder: The folder where the items are stored when ``FS_PIPELINE_FOLDER`` is not set.
+        :return: The settings of the filesystem pipeline."""
+        return cls(
+            folder=os.path.normpath(settings.get("FS_PIPELINE_FOLDER", None) or default_folder),
+            incremental=settings.getbool("FS_PIPELINE_INCREMENTAL", False),
+            keep_generations=max(1, settings.getint("FS_PIPELINE_KEEP_GENERATIONS", 3)),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class SQLiteSettings:
+    """The settings of the SQLite pipeline, refer to :class:`SQLitePipeline` for details."""
+
+    #: Path to the database, ``None`` for the default path of the spider.
+    path: str | None = None
+    #: Maximum number of items per transaction.
+    batch_size: int = 500
+    #: Maximum seconds an item waits before its batch is written.
+    flush_interval: float = 1.0
+    #: Level of the compression of the HTML documents.
+    compression_level: int = 6
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "SQLiteSettings":
+        """Reads the settings of the SQLite pipeline.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the SQLite pipeline."""
+        return cls(
+            path=settings.get("SQLITE_PIPELINE_PATH", None),
+            batch_size=settings.getint("SQLITE_PIPELINE_BATCH_SIZE", 500),
+            flush_interval=settings.getfloat("SQLITE_PIPELINE_FLUSH_INTERVAL", 1.0),
+            compression_level=settings.getint("SQLITE_PIPELINE_COMPRESSION_LEVEL", 6),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class ParquetSettings:
+    """The settings of the Parquet pipeline, refer to :class:`ParquetPipeline` for details."""
+
+    #: Path to the folder of the files, ``None`` for the default folder of the spider.
+    folder: str | None = None
+    #: Number of rows per record batch.
+    batch_size: int = 10000
+    #: Size in bytes after which a file is rolled over.
+    roll_size: int = 128 * 1024 * 1024
+    #: Seconds after which a file is rolled over.
+    roll_interval: float = 3600.0
+    #: Compression codec of the files.
+    compression: str = "zstd"
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_settings(cls, settings: scrapy.settings.BaseSettings) -> "ParquetSettings":
+        """Reads the settings of the Parquet pipeline.
+
+        :param settings: The settings of the crawler.
+        :return: The settings of the Parquet pipeline."""
+        return cls(
+            folder=settings.get("PARQUET_PIPELINE_FOLDER", None),
+            batch_size=max(1, settings.getint("PARQUET_PIPELINE_BATCH_SIZE", 10000)),
+            roll_size=settings.getint("PARQUET_PIPELINE_ROLL_SIZE", 128 * 1024 * 1024),
+            roll_interval=settings.getfloat("PARQUET_PIPELINE_ROLL_INTERVAL", 3600.0),
+            compression=settings.get("PARQUET_PIPELINE_COMPRESSION", "zstd"),
+        )
 
 
 class PipelineBase(LoggerMixin):
@@ -21,6 +118,78 @@ class PipelineBase(LoggerMixin):
         self.__logger = logger if logger is not None else logging.getLogger("dummy")
 
     ## Protected API ###################################################################################################
+    @staticmethod
+    def _get_item_type(item: Any) -> Literal["quote", "author", "html", "other"]:
+        """Returns the type of an item, the same for Scrapy items and compact items.
+
+        :param item: The item.
+        :return: The type of the item."""
+        if isinstance(item, (QuoteItem, CompactQuoteItem)):
+            return "quote"
+        if isinstance(item, (AuthorItem, CompactAuthorItem)):
+            return "author"
+        if isinstance(item, (HTMLItem, CompactHTMLItem)):
+            return "html"
+        return "other"
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalizes a text for comparison, with its unicode composed and its whitespace collapsed.
+
+        :param text: The text.
+        :return: The normalized text."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def _get_content_hash(item: Any) -> bytes:
+        """Hashes the identity of an item, that is the text and author for quotes, the name for authors and the whole
+        document for HTML, normalized so that copies of the same item found in different pages hash the same. The
+        digest of HTML items is kept in the item, so that the document is hashed once for all the pipelines, or never
+        if it was hashed while spooled.
+
+        :param item: The item.
+        :return: The SHA-256 digest."""
+        adapter = itemadapter.ItemAdapter(item)
+        match PipelineBase._get_item_type(item):
+            case "quote":
+                parts = [PipelineBase._normalize(adapter["text"]), PipelineBase._normalize(adapter["author"])]
+            case "author":
+                parts = [PipelineBase._normalize(adapter["name"])]
+            case "html":
+                if (digest := adapter.get("digest", None)) is None:
+                    # The document is hashed as received, without decoding it, and in chunks if spooled to a file.
+                    digest = hashlib.sha256()
+                    for chunk in PipelineBase._iter_body(item):
+                        digest.update(chunk)
+                    adapter["digest"] = digest = digest.digest()
+                return digest
+            case _:
+                parts = [type(item).__name__, json.dumps(adapter.asdict(), sort_keys=True, default=str)]
+
+        return PipelineBase._hash(*parts)
+
+    @staticmethod
+    def _iter_body(item: Any, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Iterates over the body of an HTML item, read in chunks from its file if it was spooled to a file, so that it
+        is never held whole in memory.
+
+        :param item: The HTML item.
+        :param chunk_size: The size in bytes of the chunks read from the file.
+        :return: The body, whole if not spooled."""
+        adapter = itemadapter.ItemAdapter(item)
+        if (path := adapter.get("path", None)) is None:
+            yield adapter["body"]
+            return
+        with open(path, "rb") as stream:
+            yield from iter(functools.partial(stream.read, chunk_size), b"")
+
+    @staticmethod
+    def _hash(*parts: str) -> bytes:
+        """Hashes texts already normalized, as done for the identity of items.
+
+        :param parts: The texts.
+        :return: The SHA-256 digest."""
+        return hashlib.sha256("\x1f".join(parts).encode("utf8")).digest()
 
     ## Public API ######################################################################################################
     @property
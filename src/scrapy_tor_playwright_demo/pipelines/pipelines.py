@@ -1,34 +1,187 @@
 """Pipelines."""
 
+import dataclasses
+import functools
+import importlib.util
 import json
 import os
+import queue
 import shutil
+import sqlite3
+import threading
+import time
 import uuid
-from typing import cast
+import zlib
+from collections import Counter
+from typing import Any, TextIO, cast
 
+import itemadapter
 import scrapy
 import scrapy.crawler
+import scrapy.exceptions
 import scrapy.item
+import scrapy.settings
 import twisted.internet.defer
+import twisted.internet.threads
 
-from ..items import HTMLItem
-from .defs import PipelineBase
+from ..extensions.defs import STAGE_MEASURED
+from ..items import CompactHTMLItem, CompactItemBase, HTMLItem
+from .defs import FileSystemSettings, ParquetSettings, PipelineBase, SQLiteSettings
+
+#: The folder where the file system pipeline stores the items when ``FS_PIPELINE_FOLDER`` is not set.
+FS_DEFAULT_FOLDER = os.path.normpath(os.path.join(os.path.dirname(__file__), "fs"))
+#: The number of bytes of the hashes kept by the deduplication pipeline, enough to make collisions negligible.
+DEDUP_DIGEST_SIZE = 16
+#: The number of new hashes after which the deduplication pipeline commits them to the database.
+DEDUP_COMMIT_INTERVAL = 1000
+#: The columns of the rows of each type of item stored by the Parquet pipeline.
+PARQUET_COLUMNS: dict[str, tuple[str, ...]] = {"quote": ("text", "author", "tags"), "author": ("name", "description")}
+#: The statements that create the schema of the SQLite pipeline, if it does not exist.
+SQLITE_SCHEMA = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "CREATE TABLE IF NOT EXISTS authors ("
+    "id INTEGER PRIMARY KEY, hash BLOB NOT NULL UNIQUE, name TEXT NOT NULL, description TEXT)",
+    "CREATE TABLE IF NOT EXISTS quotes ("
+    "id INTEGER PRIMARY KEY, hash BLOB NOT NULL UNIQUE, text TEXT NOT NULL, "
+    "author_id INTEGER NOT NULL REFERENCES authors(id))",
+    "CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS quote_tags ("
+    "quote_id INTEGER NOT NULL REFERENCES quotes(id), tag_id INTEGER NOT NULL REFERENCES tags(id), "
+    "PRIMARY KEY (quote_id, tag_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS documents ("
+    "id INTEGER PRIMARY KEY, hash BLOB NOT NULL UNIQUE, body BLOB NOT NULL, encoding TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS authors_name ON authors(name)",
+    "CREATE INDEX IF NOT EXISTS quotes_author_id ON quotes(author_id)",
+    "CREATE INDEX IF NOT EXISTS quote_tags_tag_id ON quote_tags(tag_id, quote_id)",
+)
 
 
 class FileSystemPipeline(PipelineBase):
-    """Pipeline that serializes items to the local filesystem."""
+    """Pipeline that serializes items to the local filesystem.
+
+    In incremental mode, each run writes its items into a new generation folder under
+    ``<folder>/<spider>/generations``, in which ``items.jsonl`` records the file, the type and the content hash of
+    each item, and the encoding of HTML documents, which are written with the bytes of the response as received.
+    Once the run finishes, a line for the generation is appended to the manifest
+    ``<folder>/<spider>/manifest.jsonl`` and its name is written to ``<folder>/<spider>/LATEST``. Opening the spider
+    only creates the new folder, while the generations over the number to keep and those of runs that never finished
+    are deleted in a background thread, which also compacts the manifest. Otherwise, the folder of the spider is
+    deleted and recreated on every run. The HTML documents spooled to a file, see ``SpoolMiddleware``, are moved into
+    the store instead of being written, and their items point to the moved file. It can be configured with the
+    settings below:
+
+    .. code-block:: python
+
+        # Path to the folder where the items are stored, None for the ``fs`` folder next to this module.
+        FS_PIPELINE_FOLDER = None
+        # Enables the incremental mode.
+        FS_PIPELINE_INCREMENTAL = False
+        # Number of finished generations to keep, including the one of the current run.
+        FS_PIPELINE_KEEP_GENERATIONS = 3"""
 
     ## Private API #####################################################################################################
-    def __init__(self, *args, **kwargs) -> None:
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
         """Pipeline constructor.
 
-        Called by :meth:`scrapy.Spider.from_crawler` when Scrapy creates pipelines."""
+        Called by :meth:`scrapy.Spider.from_crawler` when Scrapy creates pipelines.
+
+        :param crawler: Crawler that uses this pipeline, to send signals."""
         # Call the parent constructor.
         super().__init__(*args, **kwargs)
-        #: Base path to the folder where the serialized items will be stored.
-        self.__folder = os.path.normpath(os.path.join(os.path.dirname(__file__), "fs"))
+        #: Crawler that uses this pipeline.
+        self.__crawler = crawler
+        #: The settings of the pipeline.
+        self.__settings = FileSystemSettings.from_settings(
+            crawler.settings if crawler is not None else scrapy.settings.Settings(), FS_DEFAULT_FOLDER
+        )
         #: Path in the folder where the files will be stored.
         self.__store_path = None
+        #: The record of the generation of the current run, in incremental mode.
+        self.__generation: dict | None = None
+        #: The stream of the manifest of the items of the current generation, in incremental mode.
+        self.__items_manifest = None
+        #: The thread that deletes the old generations, while running.
+        self.__collector: threading.Thread | None = None
+
+    @staticmethod
+    def __read_manifest(path: str) -> list[dict]:
+        """Reads the records of the finished generations from a manifest, ignoring a truncated last line.
+
+        :param path: Path to the manifest.
+        :return: The records, from the oldest to the newest."""
+        records = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf8") as stream:
+                for line in stream:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+
+        return records
+
+    def __collect_garbage(self, spider_path: str, current: str) -> None:
+        """Deletes the generations that are not kept and compacts the manifest to the generations kept.
+
+        :param spider_path: Path to the folder of the spider.
+        :param current: Name of the generation of the current run, which is never deleted."""
+        manifest_path = os.path.join(spider_path, "manifest.jsonl")
+        generations_path = os.path.join(spider_path, "generations")
+        records = [
+            record
+            for record in self.__read_manifest(manifest_path)
+            if os.path.isdir(os.path.join(generations_path, record["generation"]))
+        ]
+        keep = self.__settings.keep_generations
+        kept = records[-(keep - 1) :] if keep > 1 else []
+        kept_names = {record["generation"] for record in kept} | {current}
+
+        # Compact the manifest first, so that it never lists a deleted generation.
+        if len(kept) != len(records):
+            with open(f"{manifest_path}.tmp", "w", encoding="utf8") as stream:
+                stream.writelines(json.dumps(record) + "\n" for record in kept)
+            os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        # Generation names sort by creation time, so unfinished ones newer than this run may belong to another run.
+        for name in sorted(os.listdir(generations_path)):
+            if name not in kept_names and name < current:
+                self._log_debug(f"Deleting generation '{name}' at '{generations_path}'...")
+                shutil.rmtree(os.path.join(generations_path, name), ignore_errors=True)
+
+    def __open_generation(self, spider_path: str) -> None:
+        """Creates the folder of a new generation and starts the deletion of the old generations in the background.
+
+        :param spider_path: Path to the folder of the spider."""
+        # The name sorts by creation time, to the nanosecond so that runs in the same second are ordered.
+        now = time.time_ns()
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now // 10**9))}.{now % 10**9:09d}-{uuid.uuid4().hex[:8]}"
+        self.__store_path = os.path.join(spider_path, "generations", name)
+        os.makedirs(self.__store_path)
+        self.__generation = {"generation": name, "started": time.time(), "items": 0}
+        # pylint: disable-next=consider-using-with
+        self.__items_manifest = open(os.path.join(self.__store_path, "items.jsonl"), "w", encoding="utf8")
+
+        self.__collector = threading.Thread(
+            target=self.__collect_garbage, args=(spider_path, name), name="fs-pipeline-gc", daemon=True
+        )
+        self.__collector.start()
+
+    def __close_generation(self, spider_path: str) -> None:
+        """Records the generation of the current run as finished in the manifest.
+
+        :param spider_path: Path to the folder of the spider."""
+        cast(TextIO, self.__items_manifest).close()
+        self.__items_manifest = None
+        generation, self.__generation = cast(dict, self.__generation), None
+        generation["finished"] = time.time()
+
+        with open(os.path.join(spider_path, "manifest.jsonl"), "a", encoding="utf8") as stream:
+            stream.write(json.dumps(generation) + "\n")
+        with open(os.path.join(spider_path, "LATEST.tmp"), "w", encoding="utf8") as stream:
+            stream.write(generation["generation"])
+        os.replace(os.path.join(spider_path, "LATEST.tmp"), os.path.join(spider_path, "LATEST"))
 
     ## Protected API ###################################################################################################
 
@@ -39,42 +192,82 @@ class FileSystemPipeline(PipelineBase):
 
         :param crawler: Crawler that uses this pipeline.
         :return: The instance of the pipeline."""
-        return FileSystemPipeline(logger=crawler.spider.logger if crawler.spider is not None else None)
+        return FileSystemPipeline(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
 
     def open_spider(self, spider: scrapy.Spider) -> None:
         """Called when the spider is opened.
 
         :param spider: The spider which scraped the item."""
-        # Create folder for spider.
-        self.__store_path = os.path.join(self.__folder, spider.name)
+        spider_path = os.path.join(self.__settings.folder, spider.name)
 
-        # If the path to the folder exists, then delete it and recreate it anew.
-        if os.path.exists(self.__store_path):
-            shutil.rmtree(self.__store_path)
-        os.makedirs(self.__store_path)
+        if self.__settings.incremental:
+            self.__open_generation(spider_path)
+        else:
+            # Create folder for spider, if the path to the folder exists, then delete it and recreate it anew.
+            self.__store_path = spider_path
+            if os.path.exists(self.__store_path):
+                shutil.rmtree(self.__store_path)
+            os.makedirs(self.__store_path)
 
         self._log_debug(f"Creating local folder at '{self.__store_path}'...")
 
+    def close_spider(self, spider: scrapy.Spider) -> twisted.internet.defer.Deferred | None:
+        """Called when the spider is closed, in incremental mode it records the generation as finished.
+
+        :param spider: The spider which scraped the item.
+        :return: A deferred that fires once the generation is recorded, ``None`` if already recorded or not in
+            incremental mode."""
+        if not self.__settings.incremental or self.__generation is None:
+            return None
+        collector, self.__collector = cast(threading.Thread, self.__collector), None
+        spider_path = os.path.join(self.__settings.folder, spider.name)
+        if not collector.is_alive():
+            self.__close_generation(spider_path)
+            return None
+
+        # The manifest is only appended once the deletion of the old generations, which compacts it, has finished.
+        deferred = twisted.internet.threads.deferToThread(collector.join)
+        deferred.addCallback(lambda _: self.__close_generation(spider_path))
+
+        return deferred
+
     def process_item(
         self,
-        item: scrapy.item.Item,
+        item: scrapy.item.Item | CompactItemBase,
         spider: scrapy.crawler.Spider,
-    ) -> scrapy.item.Item | twisted.internet.defer.Deferred:
+    ) -> scrapy.item.Item | CompactItemBase | twisted.internet.defer.Deferred:
         """Called for every item pipeline component. Must return an item, a deferred or raise an exception to drop the
         item.
 
         :param item: The scraped item.
         :param spider: The spider which scraped the item.
         :return: An item or a deferred."""
+        start = time.perf_counter()
+
         # Determine in which format to store the item.
-        if isinstance(item, HTMLItem):
-            # Create path to file.
-            filepath = os.path.join(cast(str, self.__store_path), f"{uuid.uuid4()}.html")
+        adapter = itemadapter.ItemAdapter(item)
+        if isinstance(item, (HTMLItem, CompactHTMLItem)):
+            # Create path to file, bodies that are not text are not HTML.
+            extension = "html" if adapter["encoding"] is not None else "bin"
+            filepath = os.path.join(cast(str, self.__store_path), f"{uuid.uuid4()}.{extension}")
             self._log_debug(f"Storing HTML response at '{filepath}' for spider '{spider.name}'...")
 
-            # Write contents to file.
-            with open(filepath, "w+", encoding="utf8") as stream:
-                stream.write(item["html"])
+            if (spooled_path := adapter.get("path", None)) is not None:
+                # Move the file the body was spooled to, without reading it, and point the item to its new path.
+                shutil.move(spooled_path, filepath)
+                adapter["path"] = filepath
+            else:
+                # Write contents to file, the bytes as received in their own encoding.
+                with open(filepath, "wb") as stream:
+                    stream.write(adapter["body"])
+        elif isinstance(item, CompactItemBase):
+            # Create path to file.
+            filepath = os.path.join(cast(str, self.__store_path), f"{uuid.uuid4()}.json")
+            self._log_debug(f"Storing item at '{filepath}' for spider '{spider.name}'...")
+
+            # Write contents to file, compact items serialize themselves to the same JSON as other items.
+            with open(filepath, "wb") as stream:
+                stream.write(item.to_bytes())
         else:
             # Create path to file.
             filepath = os.path.join(cast(str, self.__store_path), f"{uuid.uuid4()}.json")
@@ -82,6 +275,694 @@ class FileSystemPipeline(PipelineBase):
 
             # Write contents to file, make the JSON readable.
             with open(filepath, "w+", encoding="utf8") as stream:
-                stream.write(json.dumps(dict(item), indent=2))
+                stream.write(json.dumps(adapter.asdict(), indent=2))
+
+        # Record the item in the manifest of the generation.
+        if self.__items_manifest is not None:
+            entry = {
+                "file": os.path.basename(filepath),
+                "type": self._get_item_type(item),
+                "hash": self._get_content_hash(item).hex(),
+            }
+            if entry["type"] == "html":
+                entry["encoding"] = adapter["encoding"]
+            self.__items_manifest.write(json.dumps(entry) + "\n")
+            cast(dict, self.__generation)["items"] += 1
+
+        # Report the duration of the write, with the type of item in place of the page type.
+        if self.__crawler is not None:
+            self.__crawler.signals.send_catch_log(
+                STAGE_MEASURED,
+                stage="pipeline",
+                duration=time.perf_counter() - start,
+                proxy=None,
+                page_type=type(item).__name__,
+            )
 
         return item
+
+
+class DedupPipeline(PipelineBase):
+    """Pipeline that drops the items already seen, such as a quote found in several pages or in both versions of the
+    website, so it must run before the pipelines that store items.
+
+    Items are identified by the hash of their identity, as in :meth:`PipelineBase._get_content_hash`, and the hashes
+    seen are kept in an exact set bounded in size, from which the least recently seen are evicted when full, thus a
+    repeat may go through after an eviction but a new item is never dropped. Optionally, the hashes are also stored in
+    a SQLite database, so that items are deduplicated across runs. As the items seen in previous runs are then dropped,
+    this requires ``FS_PIPELINE_INCREMENTAL`` if the :class:`FileSystemPipeline` is enabled, which otherwise replaces
+    the items of the previous run with those not seen before. The counts of unique and dropped items per type of item
+    are stored in the stats under ``dedup/``. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the pipeline.
+        DEDUP_PIPELINE_ENABLED = True
+        # Maximum number of hashes kept in memory.
+        DEDUP_PIPELINE_MAX_ENTRIES = 1000000
+        # Path to the database with the hashes of previous runs, or None to deduplicate only within a run. It requires
+        # 'FS_PIPELINE_INCREMENTAL' if the file system pipeline is enabled.
+        DEDUP_PIPELINE_PATH = None"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Pipeline constructor.
+
+        :param crawler: Crawler that uses this pipeline, for the settings and the stats."""
+        super().__init__(*args, **kwargs)
+        settings = crawler.settings if crawler is not None else scrapy.settings.Settings()
+        #: Crawler that uses this pipeline.
+        self.__crawler = crawler
+        #: Maximum number of hashes kept in memory.
+        self.__max_entries = settings.getint("DEDUP_PIPELINE_MAX_ENTRIES", 1000000)
+        #: Path to the database with the hashes, ``None`` if not persistent.
+        self.__path = settings.get("DEDUP_PIPELINE_PATH", None)
+        #: The hashes seen, from the least to the most recently seen, a dictionary is used as an ordered set.
+        self.__seen: dict[bytes, None] = {}
+        #: The connection to the database, while the spider is open and if persistent.
+        self.__connection: sqlite3.Connection | None = None
+        #: The number of hashes not committed yet to the database.
+        self.__pending = 0
+
+    def __inc_stat(self, key: str) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``dedup/``."""
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"dedup/{key}")
+
+    def __remember(self, digest: bytes) -> None:
+        """Adds a hash to the most recently seen, evicting the least recently seen if full.
+
+        :param digest: The hash."""
+        self.__seen.pop(digest, None)
+        self.__seen[digest] = None
+        if len(self.__seen) > self.__max_entries:
+            del self.__seen[next(iter(self.__seen))]
+
+    def __is_seen(self, digest: bytes) -> bool:
+        """Checks if a hash was seen, in memory or in the database, and marks it as seen.
+
+        :param digest: The hash.
+        :return: ``True`` if seen before, ``False`` otherwise."""
+        seen = digest in self.__seen
+        if not seen and self.__connection is not None:
+            inserted = self.__connection.execute(
+                "INSERT INTO seen (hash) VALUES (?) ON CONFLICT (hash) DO NOTHING RETURNING hash", (digest,)
+            ).fetchone()
+            seen = inserted is None
+            self.__pending += 0 if seen else 1
+            if self.__pending >= DEDUP_COMMIT_INTERVAL:
+                self.__connection.commit()
+                self.__pending = 0
+        self.__remember(digest)
+
+        return seen
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "DedupPipeline":
+        """Method in Scrapy workflow that will create a new instance of the pipeline.
+
+        :param crawler: Crawler that uses this pipeline.
+        :raises scrapy.exceptions.NotConfigured: The pipeline is not enabled.
+        :raises ValueError: The hashes are kept across runs, but the file system pipeline replaces the items of the
+            previous run.
+        :return: The instance of the pipeline."""
+        settings = crawler.settings
+        if not settings.getbool("DEDUP_PIPELINE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+        # The file system pipeline deletes the items of the previous run, those seen in it would not be stored again.
+        persistent = settings.get("DEDUP_PIPELINE_PATH", None) is not None
+        fs_pipeline = settings.getwithbase("ITEM_PIPELINES").get(f"{__name__}.FileSystemPipeline", None)
+        if persistent and fs_pipeline is not None and not settings.getbool("FS_PIPELINE_INCREMENTAL"):
+            raise ValueError("'DEDUP_PIPELINE_PATH' requires 'FS_PIPELINE_INCREMENTAL' with the file system pipeline.")
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def open_spider(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is opened, it opens the database if persistent.
+
+        :param spider: The spider which scraped the item."""
+        # pylint: disable=unused-argument
+        if self.__path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__path)), exist_ok=True)
+            self._log_debug(f"Opening deduplication database at '{self.__path}'...")
+            self.__connection = sqlite3.connect(self.__path)
+            self.__connection.execute("PRAGMA journal_mode = WAL")
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS seen (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+
+    def close_spider(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is closed, it commits the pending hashes and closes the database if persistent.
+
+        :param spider: The spider which scraped the item."""
+        # pylint: disable=unused-argument
+        if self.__connection is not None:
+            self.__connection.commit()
+            self.__connection.close()
+            self.__connection = None
+
+    def process_item(
+        self,
+        item: scrapy.item.Item | CompactItemBase,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.item.Item | CompactItemBase:
+        """Drops the item if seen before.
+
+        :param item: The scraped item.
+        :param spider: The spider which scraped the item.
+        :raises scrapy.exceptions.DropItem: The item was seen before.
+        :return: The item, if not seen before."""
+        # pylint: disable=unused-argument
+        item_type = self._get_item_type(item)
+        if self.__is_seen(self._get_content_hash(item)[:DEDUP_DIGEST_SIZE]):
+            self.__inc_stat(f"dropped/{item_type}")
+            raise scrapy.exceptions.DropItem(f"Duplicate {item_type} item.")
+        self.__inc_stat(f"unique/{item_type}")
+
+        return item
+
+
+class SQLitePipeline(PipelineBase):
+    """Pipeline that stores quotes and authors in a normalized SQLite database, with the tables ``quotes``,
+    ``authors``, ``tags`` and ``quote_tags``, and HTML documents compressed in the table ``documents``, with the bytes
+    as received and their encoding. The documents spooled to a file are compressed from it in chunks by the writer
+    thread, and bodies that are not text are not stored.
+
+    Items are written in batches, each in a transaction, by a writer thread on a database in WAL mode. Quotes,
+    authors and documents are upserted on the hash of their identity, as in :meth:`PipelineBase._get_content_hash`,
+    so each is stored once however many times it is scraped, and there are indexes to query quotes by author and by
+    tag. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the pipeline.
+        SQLITE_PIPELINE_ENABLED = False
+        # Path to the database, or None for a database per spider next to the folders of the filesystem pipeline.
+        SQLITE_PIPELINE_PATH = None
+        # Maximum number of items written per transaction.
+        SQLITE_PIPELINE_BATCH_SIZE = 500
+        # Maximum seconds an item waits before its batch is written.
+        SQLITE_PIPELINE_FLUSH_INTERVAL = 1.0
+        # Level of the zlib compression of the HTML documents.
+        SQLITE_PIPELINE_COMPRESSION_LEVEL = 6"""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Pipeline constructor.
+
+        :param crawler: Crawler that uses this pipeline, for the settings and the stats."""
+        super().__init__(*args, **kwargs)
+        #: Crawler that uses this pipeline.
+        self.__crawler = crawler
+        #: The settings of the pipeline.
+        self.__settings = SQLiteSettings.from_settings(
+            crawler.settings if crawler is not None else scrapy.settings.Settings()
+        )
+        #: The writer thread, while the spider is open.
+        self.__writer: _SQLiteWriter | None = None
+
+    def __store_stats(self, writer: "_SQLiteWriter") -> None:
+        """Stores the counts of the writer in the stats, and logs its error if it failed.
+
+        :param writer: The writer, already finished."""
+        if writer.error is not None:
+            self._log_error(f"Writing to the SQLite database failed: {writer.error!r}")
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            for key, count in writer.counts.items():
+                self.__crawler.stats.set_value(f"sqlite/{key}", count)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "SQLitePipeline":
+        """Method in Scrapy workflow that will create a new instance of the pipeline.
+
+        :param crawler: Crawler that uses this pipeline.
+        :raises scrapy.exceptions.NotConfigured: The pipeline is not enabled.
+        :return: The instance of the pipeline."""
+        if not crawler.settings.getbool("SQLITE_PIPELINE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def open_spider(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is opened, it starts the writer thread.
+
+        :param spider: The spider which scraped the item."""
+        path = self.__settings.path or os.path.join(os.path.dirname(__file__), "fs", f"{spider.name}.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._log_debug(f"Opening SQLite database at '{path}'...")
+        self.__writer = _SQLiteWriter(dataclasses.replace(self.__settings, path=path))
+        self.__writer.start()
+
+    def close_spider(self, spider: scrapy.Spider) -> twisted.internet.defer.Deferred:
+        """Called when the spider is closed, it waits for the writer thread to write the pending items.
+
+        :param spider: The spider which scraped the item.
+        :return: A deferred that fires once the pending items are written."""
+        # pylint: disable=unused-argument
+        writer, self.__writer = cast(_SQLiteWriter, self.__writer), None
+        writer.stop()
+
+        deferred = twisted.internet.threads.deferToThread(writer.join)
+        deferred.addCallback(lambda _: self.__store_stats(writer))
+
+        return deferred
+
+    def process_item(
+        self,
+        item: scrapy.item.Item | CompactItemBase,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.item.Item | CompactItemBase:
+        """Queues the item to be written by the writer thread, items other than quotes, authors and HTML are ignored.
+
+        :param item: The scraped item.
+        :param spider: The spider which scraped the item.
+        :raises RuntimeError: The writer thread failed.
+        :return: The item."""
+        # pylint: disable=unused-argument
+        adapter = itemadapter.ItemAdapter(item)
+        match self._get_item_type(item):
+            case "quote":
+                author = self._normalize(adapter["author"])
+                row: tuple = (
+                    "quote",
+                    self._get_content_hash(item),
+                    adapter["text"],
+                    self._hash(author),
+                    author,
+                    tuple(self._normalize(tag) for tag in adapter["tags"]),
+                )
+            case "author":
+                name = self._normalize(adapter["name"])
+                row = ("author", self._hash(name), name, adapter["description"])
+            case "html":
+                # Bodies that are not text are not HTML documents.
+                if adapter["encoding"] is None:
+                    return item
+                row = (
+                    "html",
+                    self._get_content_hash(item),
+                    adapter["body"],
+                    adapter["encoding"],
+                    adapter.get("path", None),
+                )
+            case _:
+                return item
+
+        cast(_SQLiteWriter, self.__writer).put(row)
+
+        return item
+
+
+class _SQLiteWriter(threading.Thread):
+    """Thread that writes the rows of the items queued by a :class:`SQLitePipeline` in batches."""
+
+    def __init__(self, settings: SQLiteSettings) -> None:
+        """Class constructor.
+
+        :param settings: The settings of the pipeline, with the path to the database."""
+        super().__init__(name="sqlite-pipeline-writer", daemon=True)
+        #: The settings of the pipeline, with the path to the database.
+        self.__settings = settings
+        #: The rows to write, ``None`` to stop.
+        self.__queue: queue.SimpleQueue[tuple | None] = queue.SimpleQueue()
+        #: The identifiers of the authors, keyed by hash.
+        self.__author_ids: dict[bytes, int] = {}
+        #: The identifiers of the tags, keyed by name.
+        self.__tag_ids: dict[str, int] = {}
+        #: The number of rows inserted per table, of duplicates and of batches.
+        self.counts: Counter[str] = Counter()
+        #: The error that stopped the thread, if any.
+        self.error: BaseException | None = None
+
+    def __get_author_id(self, connection: sqlite3.Connection, author_hash: bytes, name: str) -> int:
+        """Returns the identifier of an author, inserting the author if it does not exist.
+
+        :param connection: The connection.
+        :param author_hash: The hash of the author.
+        :param name: The name of the author.
+        :return: The identifier."""
+        if (author_id := self.__author_ids.get(author_hash, None)) is None:
+            connection.execute(
+                "INSERT INTO authors (hash, name) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING", (author_hash, name)
+            )
+            author_id = connection.execute("SELECT id FROM authors WHERE hash = ?", (author_hash,)).fetchone()[0]
+            self.__author_ids[author_hash] = author_id
+
+        return author_id
+
+    def __get_tag_id(self, connection: sqlite3.Connection, name: str) -> int:
+        """Returns the identifier of a tag, inserting the tag if it does not exist.
+
+        :param connection: The connection.
+        :param name: The name of the tag.
+        :return: The identifier."""
+        if (tag_id := self.__tag_ids.get(name, None)) is None:
+            connection.execute("INSERT INTO tags (name) VALUES (?) ON CONFLICT (name) DO NOTHING", (name,))
+            tag_id = connection.execute("SELECT id FROM tags WHERE name = ?", (name,)).fetchone()[0]
+            self.__tag_ids[name] = tag_id
+
+        return tag_id
+
+    def __write_quote(self, connection: sqlite3.Connection, row: tuple) -> None:
+        """Writes the row of a quote, with its author and tags.
+
+        :param connection: The connection.
+        :param row: The row."""
+        _, quote_hash, text, author_hash, author, tags = row
+        author_id = self.__get_author_id(connection, author_hash, author)
+        inserted = connection.execute(
+            "INSERT INTO quotes (hash, text, author_id) VALUES (?, ?, ?) ON CONFLICT (hash) DO NOTHING RETURNING id",
+            (quote_hash, text, author_id),
+        ).fetchone()
+        if inserted is None:
+            self.counts["duplicates"] += 1
+            return
+        connection.executemany(
+            "INSERT OR IGNORE INTO quote_tags (quote_id, tag_id) VALUES (?, ?)",
+            [(inserted[0], self.__get_tag_id(connection, tag)) for tag in tags],
+        )
+        self.counts["quotes"] += 1
+
+    def __write_row(self, connection: sqlite3.Connection, row: tuple) -> None:
+        """Writes the row of an item.
+
+        :param connection: The connection.
+        :param row: The row, its first element is the type of item."""
+        match row:
+            case ("quote", *_):
+                self.__write_quote(connection, row)
+            case ("author", author_hash, name, description):
+                connection.execute(
+                    "INSERT INTO authors (hash, name, description) VALUES (?, ?, ?) "
+                    "ON CONFLICT (hash) DO UPDATE SET description = excluded.description",
+                    (author_hash, name, description),
+                )
+                self.counts["authors"] += 1
+            case ("html", document_hash, body, encoding, path):
+                inserted = connection.execute(
+                    "INSERT INTO documents (hash, body, encoding) VALUES (?, ?, ?) ON CONFLICT (hash) DO NOTHING "
+                    "RETURNING id",
+                    (document_hash, self.__compress(body, path), encoding),
+                ).fetchone()
+                self.counts["documents" if inserted is not None else "duplicates"] += 1
+
+    def __compress(self, body: bytes | None, path: str | None) -> bytes:
+        """Compresses an HTML document, read in chunks from its file if it was spooled to a file.
+
+        :param body: The body of the document, ``None`` if spooled.
+        :param path: The path to the file with the body, ``None`` if not spooled.
+        :return: The compressed body."""
+        if path is None:
+            return zlib.compress(cast(bytes, body), self.__settings.compression_level)
+        compressor, chunks = zlib.compressobj(self.__settings.compression_level), []
+        with open(path, "rb") as stream:
+            for chunk in iter(functools.partial(stream.read, 1024 * 1024), b""):
+                chunks.append(compressor.compress(chunk))
+        chunks.append(compressor.flush())
+
+        return b"".join(chunks)
+
+    def __write_transaction(self, connection: sqlite3.Connection, batch: list[tuple]) -> None:
+        """Writes rows in a transaction, which is committed, or rolled back if any of them fails.
+
+        :param connection: The connection.
+        :param batch: The rows."""
+        with connection:
+            connection.execute("BEGIN")
+            for row in batch:
+                self.__write_row(connection, row)
+
+    def __write_batch(self, connection: sqlite3.Connection, batch: list[tuple]) -> None:
+        """Writes a batch of rows in a transaction.
+
+        :param connection: The connection.
+        :param batch: The rows."""
+        try:
+            self.__write_transaction(connection, batch)
+        except BaseException:
+            # The identifiers inserted in the transaction no longer exist.
+            self.__author_ids.clear()
+            self.__tag_ids.clear()
+            raise
+        self.counts["batches"] += 1
+
+    def __gather(self, row: tuple) -> tuple[list[tuple], bool]:
+        """Gathers rows into a batch until it is full, its first row waited long enough or the thread is stopped.
+
+        :param row: The first row of the batch.
+        :return: The batch, and whether the thread is stopped."""
+        batch, deadline = [row], time.monotonic() + self.__settings.flush_interval
+        for _ in range(self.__settings.batch_size - 1):
+            try:
+                next_row = self.__queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if next_row is None:
+                return batch, True
+            batch.append(next_row)
+
+        return batch, False
+
+    def __write_batches(self, connection: sqlite3.Connection) -> None:
+        """Creates the schema and writes the queued rows in batches until stopped.
+
+        :param connection: The connection."""
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+        for row in iter(self.__queue.get, None):
+            batch, stopped = self.__gather(row)
+            self.__write_batch(connection, batch)
+            if stopped:
+                break
+
+    def run(self) -> None:
+        """Writes the queued rows in batches until stopped."""
+        connection = sqlite3.connect(cast(str, self.__settings.path), isolation_level=None)
+        try:
+            self.__write_batches(connection)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self.error = error
+        finally:
+            connection.close()
+
+    def put(self, row: tuple) -> None:
+        """Queues a row to be written.
+
+        :param row: The row.
+        :raises RuntimeError: The thread failed."""
+        if self.error is not None:
+            raise RuntimeError("The SQLite writer failed.") from self.error
+        self.__queue.put(row)
+
+    def stop(self) -> None:
+        """Stops the thread once the rows queued so far are written."""
+        self.__queue.put(None)
+
+
+class ParquetPipeline(PipelineBase):
+    """Pipeline that exports quotes and authors to Parquet files for analytic consumers, it requires the ``parquet``
+    extra with :mod:`pyarrow`.
+
+    Quotes and authors are buffered into record batches, each written as a row group to a file per type of item, in
+    which the author and tag columns of quotes are dictionary encoded. Files are written with the suffix ``.partial``,
+    which is removed when the file is rolled over, once it exceeds a size or an age, or when the spider is closed, so
+    consumers only read complete files. Other items are ignored. It can be configured with the settings below:
+
+    .. code-block:: python
+
+        # Enables the pipeline.
+        PARQUET_PIPELINE_ENABLED = False
+        # Path to the folder of the files, or None for a folder per spider next to the filesystem pipeline folders.
+        PARQUET_PIPELINE_FOLDER = None
+        # Number of rows per record batch, and thus per row group.
+        PARQUET_PIPELINE_BATCH_SIZE = 10000
+        # Size in bytes after which a file is rolled over.
+        PARQUET_PIPELINE_ROLL_SIZE = 128 * 1024 * 1024
+        # Seconds after which a file is rolled over.
+        PARQUET_PIPELINE_ROLL_INTERVAL = 3600.0
+        # Compression codec of the files.
+        PARQUET_PIPELINE_COMPRESSION = "zstd\""""
+
+    ## Private API #####################################################################################################
+    def __init__(self, *args, crawler: scrapy.crawler.Crawler | None = None, **kwargs) -> None:
+        """Pipeline constructor.
+
+        :param crawler: Crawler that uses this pipeline, for the settings and the stats."""
+        super().__init__(*args, **kwargs)
+        #: Crawler that uses this pipeline.
+        self.__crawler = crawler
+        #: The settings of the pipeline, with the folder of the spider once opened.
+        self.__settings = ParquetSettings.from_settings(
+            crawler.settings if crawler is not None else scrapy.settings.Settings()
+        )
+        #: The buffered rows of each type of item, as a list of values per column.
+        self.__buffers: dict[str, dict[str, list]] = {}
+        #: The open file of each type of item, if any.
+        self.__files: dict[str, _ParquetFile] = {}
+        #: The schema of each type of item, created when the spider is opened.
+        self.__schemas: dict = {}
+
+    def __inc_stat(self, key: str, count: int = 1) -> None:
+        """Increments a value in the stats, if there are stats.
+
+        :param key: The key of the value, under ``parquet/``.
+        :param count: The increment."""
+        if self.__crawler is not None and self.__crawler.stats is not None:
+            self.__crawler.stats.inc_value(f"parquet/{key}", count)
+
+    def __flush(self, item_type: str, final: bool = False) -> None:
+        """Writes the buffered rows of a type of item as a row group, rolling the file over if needed.
+
+        :param item_type: The type of item.
+        :param final: Whether the spider is closing, to close the file."""
+        # pylint: disable-next=import-outside-toplevel
+        import pyarrow
+
+        settings, buffer, file = self.__settings, self.__buffers[item_type], self.__files.get(item_type)
+        if (rows := len(buffer[PARQUET_COLUMNS[item_type][0]])) > 0:
+            if file is None:
+                self.__files[item_type] = file = _ParquetFile(
+                    cast(str, settings.folder), item_type, self.__schemas[item_type], settings.compression
+                )
+                self.__inc_stat("files")
+            file.write(pyarrow.RecordBatch.from_pydict(buffer, schema=self.__schemas[item_type]))
+            self.__buffers[item_type] = {column: [] for column in PARQUET_COLUMNS[item_type]}
+            self.__inc_stat(f"rows/{item_type}", rows)
+            self.__inc_stat("row_groups")
+        if file is not None and (final or file.size >= settings.roll_size or file.age >= settings.roll_interval):
+            self._log_debug(f"Closing Parquet file '{file.path}'...")
+            file.close()
+            del self.__files[item_type]
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "ParquetPipeline":
+        """Method in Scrapy workflow that will create a new instance of the pipeline.
+
+        :param crawler: Crawler that uses this pipeline.
+        :raises scrapy.exceptions.NotConfigured: The pipeline is not enabled, or :mod:`pyarrow` is not installed.
+        :return: The instance of the pipeline."""
+        if not crawler.settings.getbool("PARQUET_PIPELINE_ENABLED"):
+            raise scrapy.exceptions.NotConfigured()
+        if importlib.util.find_spec("pyarrow") is None:
+            raise scrapy.exceptions.NotConfigured("The Parquet pipeline requires the 'parquet' extra with 'pyarrow'.")
+
+        return cls(crawler=crawler, logger=crawler.spider.logger if crawler.spider is not None else None)
+
+    def open_spider(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is opened, it creates the folder of the files.
+
+        :param spider: The spider which scraped the item."""
+        # pylint: disable-next=import-outside-toplevel
+        import pyarrow
+
+        if self.__settings.folder is None:
+            folder = os.path.join(os.path.dirname(__file__), "fs", f"{spider.name}.parquet")
+            self.__settings = dataclasses.replace(self.__settings, folder=folder)
+        os.makedirs(cast(str, self.__settings.folder), exist_ok=True)
+
+        categories = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        self.__schemas = {
+            "quote": pyarrow.schema(
+                [("text", pyarrow.string()), ("author", categories), ("tags", pyarrow.list_(categories))]
+            ),
+            "author": pyarrow.schema([("name", pyarrow.string()), ("description", pyarrow.string())]),
+        }
+        self.__buffers = {
+            item_type: {column: [] for column in columns} for item_type, columns in PARQUET_COLUMNS.items()
+        }
+
+    def close_spider(self, spider: scrapy.Spider) -> None:
+        """Called when the spider is closed, it writes the buffered rows and closes the files.
+
+        :param spider: The spider which scraped the item."""
+        # pylint: disable=unused-argument
+        for item_type in PARQUET_COLUMNS:
+            self.__flush(item_type, final=True)
+
+    def process_item(
+        self,
+        item: scrapy.item.Item | CompactItemBase,
+        spider: scrapy.crawler.Spider,
+    ) -> scrapy.item.Item | CompactItemBase:
+        """Buffers the item as a row, and writes the rows of its type once there is a full batch.
+
+        :param item: The scraped item.
+        :param spider: The spider which scraped the item.
+        :return: The item."""
+        # pylint: disable=unused-argument
+        if (item_type := self._get_item_type(item)) in PARQUET_COLUMNS:
+            adapter, buffer = itemadapter.ItemAdapter(item), self.__buffers[item_type]
+            for column in PARQUET_COLUMNS[item_type]:
+                buffer[column].append(list(adapter.get(column) or []) if column == "tags" else adapter.get(column))
+            rows, file = len(buffer[PARQUET_COLUMNS[item_type][0]]), self.__files.get(item_type)
+            if rows >= self.__settings.batch_size or (file is not None and file.age >= self.__settings.roll_interval):
+                self.__flush(item_type)
+
+        return item
+
+
+class _ParquetFile:
+    """A Parquet file of a :class:`ParquetPipeline` being written, with the suffix ``.partial`` until closed."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, folder: str, item_type: str, schema: Any, compression: str) -> None:
+        """Class constructor, it creates the file.
+
+        :param folder: Path to the folder of the file.
+        :param item_type: The type of item of the rows, the prefix of the name of the file.
+        :param schema: The :class:`pyarrow.Schema` of the rows.
+        :param compression: Compression codec of the file."""
+        # pylint: disable-next=import-outside-toplevel
+        import pyarrow.parquet
+
+        now = time.time_ns()
+        #: Path to the file once closed.
+        self.path = os.path.join(
+            folder,
+            f"{item_type}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now // 10**9))}.{now % 10**9:09d}.parquet",
+        )
+        #: The time when the file was created.
+        self.__created = time.monotonic()
+        #: The stream of the file.
+        self.__sink = pyarrow.OSFile(f"{self.path}.partial", "wb")
+        #: The writer of the file, the columns with dictionaries are stored dictionary encoded.
+        self.__writer = pyarrow.parquet.ParquetWriter(self.__sink, schema, compression=compression)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def write(self, batch: Any) -> None:
+        """Writes a record batch as a row group.
+
+        :param batch: The :class:`pyarrow.RecordBatch`."""
+        self.__writer.write_batch(batch, row_group_size=batch.num_rows)
+
+    def close(self) -> None:
+        """Closes the file and removes its ``.partial`` suffix."""
+        self.__writer.close()
+        self.__sink.close()
+        os.replace(f"{self.path}.partial", self.path)
+
+    @property
+    def size(self) -> int:
+        """The size of the file written so far.
+
+        :return: The size in bytes."""
+        return self.__sink.tell()
+
+    @property
+    def age(self) -> float:
+        """The time since the file was created.
+
+        :return: The time in seconds."""
+        return time.monotonic() - self.__created
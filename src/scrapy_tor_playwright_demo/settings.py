@@ -17,9 +17,6 @@
 
 import os
 
-import scrapy_playwright
-import scrapy_playwright.headers
-
 ## Scrapy and general extensions settings ##############################################################################
 BOT_NAME = "scrapy_tor_playwright_demo"
 
@@ -57,6 +54,7 @@ DOWNLOADER_MIDDLEWARES = {
     # Details:
     #   https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#module-scrapy.downloadermiddlewares.ajaxcrawl
     "scrapy.downloadermiddlewares.ajaxcrawl.AjaxCrawlMiddleware": 560,
+    "scrapy_tor_playwright_demo.middlewares.middlewares.SpoolMiddleware": 570,
     # Details:
     #   https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#metarefreshmiddleware
     "scrapy.downloadermiddlewares.redirect.MetaRefreshMiddleware": 580,
@@ -66,9 +64,11 @@ DOWNLOADER_MIDDLEWARES = {
     # Details:
     #   https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#module-scrapy.downloadermiddlewares.redirect
     "scrapy.downloadermiddlewares.redirect.RedirectMiddleware": 600,
+    "scrapy_tor_playwright_demo.middlewares.middlewares.RecrawlMiddleware": 605,
     # Details:
     #   https://github.com/TeamHG-Memex/scrapy-rotating-proxies#usage
     "rotating_proxies.middlewares.RotatingProxyMiddleware": 610,
+    "scrapy_tor_playwright_demo.middlewares.middlewares.SessionMiddleware": 612,
     "scrapy_tor_playwright_demo.middlewares.middlewares.PlaywrightMiddleware": 615,
     "rotating_proxies.middlewares.BanDetectionMiddleware": 620,
     # Details:
@@ -83,6 +83,7 @@ DOWNLOADER_MIDDLEWARES = {
     # Details:
     #   https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#module-scrapy.downloadermiddlewares.httpcache
     "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": 900,
+    "scrapy_tor_playwright_demo.middlewares.middlewares.HedgingMiddleware": 950,
 }
 DOWNLOADER_CLIENT_TLS_VERBOSE_LOGGING = True
 DOWNLOADER_STATS = True
@@ -130,11 +131,21 @@ EXTENSIONS = {
     # Details:
     #   https://docs.scrapy.org/en/latest/topics/autothrottle.html
     "scrapy.extensions.throttle.AutoThrottle": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.InstrumentationExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.ContextWatchdogExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.BrowserPrewarmExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.SubresourceCacheExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.ParseCacheExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.MemoryProfilerExtension": 0,
+    "scrapy_tor_playwright_demo.extensions.extensions.BackpressureExtension": 0,
 }
 
 # For details, refer to https://docs.scrapy.org/en/latest/topics/item-pipeline.html.
 ITEM_PIPELINES = {
+    "scrapy_tor_playwright_demo.pipelines.pipelines.DedupPipeline": 200,
     "scrapy_tor_playwright_demo.pipelines.pipelines.FileSystemPipeline": 300,
+    "scrapy_tor_playwright_demo.pipelines.pipelines.SQLitePipeline": 310,
+    "scrapy_tor_playwright_demo.pipelines.pipelines.ParquetPipeline": 320,
 }
 
 LOG_ENABLED = True
@@ -200,7 +211,7 @@ CONCURRENT_REQUESTS_PER_DOMAIN = CONCURRENT_REQUESTS
 CONCURRENT_REQUESTS_PER_IP = 0
 DOWNLOAD_DELAY = 0
 
-COMMANDS_MODULE = ""
+COMMANDS_MODULE = "scrapy_tor_playwright_demo.commands"
 
 COOKIES_ENABLED = False
 COOKIES_DEBUG = True
@@ -222,6 +233,107 @@ HTTPCACHE_GZIP = False
 HTTPCACHE_ALWAYS_STORE = False
 HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS = []
 
+COMPACT_ITEMS = False
+
+FRONTIER_PATH = "frontier.sqlite3"
+FRONTIER_URL = None
+FRONTIER_LEASE_TIME = 60
+FRONTIER_BATCH_SIZE = 16
+FRONTIER_DOMAIN_DELAY = 0
+SHARD_INDEX = 0
+SHARD_COUNT = 1
+SHARD_STATS_PATH = None
+
+FS_PIPELINE_FOLDER = None
+FS_PIPELINE_INCREMENTAL = False
+FS_PIPELINE_KEEP_GENERATIONS = 3
+
+DEDUP_PIPELINE_ENABLED = True
+DEDUP_PIPELINE_MAX_ENTRIES = 1000000
+DEDUP_PIPELINE_PATH = None
+
+SQLITE_PIPELINE_ENABLED = False
+SQLITE_PIPELINE_PATH = None
+SQLITE_PIPELINE_BATCH_SIZE = 500
+SQLITE_PIPELINE_FLUSH_INTERVAL = 1.0
+SQLITE_PIPELINE_COMPRESSION_LEVEL = 6
+
+PARQUET_PIPELINE_ENABLED = False
+PARQUET_PIPELINE_FOLDER = None
+PARQUET_PIPELINE_BATCH_SIZE = 10000
+PARQUET_PIPELINE_ROLL_SIZE = 128 * 1024 * 1024
+PARQUET_PIPELINE_ROLL_INTERVAL = 3600.0
+PARQUET_PIPELINE_COMPRESSION = "zstd"
+
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_METRICS_PORT = [9410, 9420]
+INSTRUMENTATION_METRICS_HOST = "127.0.0.1"
+
+CONTEXT_WATCHDOG_ENABLED = True
+CONTEXT_WATCHDOG_INTERVAL = 30
+CONTEXT_WATCHDOG_MAX_AGE = DOWNLOAD_TIMEOUT * 2
+CONTEXT_WATCHDOG_RESTART_THRESHOLD = 0
+
+PREWARM_ENABLED = False
+PREWARM_CONTEXTS_PER_PROXY = 1
+PREWARM_MAX_AGE = 60
+
+SUBRESOURCE_CACHE_ENABLED = True
+SUBRESOURCE_CACHE_DIR = "subresources"
+SUBRESOURCE_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+PARSE_CACHE_ENABLED = True
+PARSE_CACHE_MAX_SIZE = 64 * 1024 * 1024
+PARSE_CACHE_DIR = None
+PARSE_CACHE_DIR_MAX_SIZE = 1024 * 1024 * 1024
+
+MEMPROFILER_ENABLED = False
+MEMPROFILER_INTERVAL = 60
+MEMPROFILER_TRACEMALLOC = True
+MEMPROFILER_TOP_MODULES = 10
+MEMPROFILER_TIMELINE = "memprofiler.jsonl"
+MEMPROFILER_SOFT_LIMIT_MB = 0
+MEMPROFILER_RESUME_RATIO = 0.9
+
+BACKPRESSURE_ENABLED = True
+BACKPRESSURE_INTERVAL = 1.0
+BACKPRESSURE_LOW_ITEMS = 200
+BACKPRESSURE_HIGH_ITEMS = 1000
+BACKPRESSURE_LOW_LATENCY = 5.0
+BACKPRESSURE_HIGH_LATENCY = 30.0
+BACKPRESSURE_MIN_CONCURRENT_ITEMS = 10
+
+ADAPTIVE_TIMEOUT_ENABLED = True
+ADAPTIVE_TIMEOUT_QUANTILE = 0.99
+ADAPTIVE_TIMEOUT_FACTOR = 3.0
+ADAPTIVE_TIMEOUT_FLOOR = 15
+ADAPTIVE_TIMEOUT_CEILING = DOWNLOAD_TIMEOUT
+ADAPTIVE_TIMEOUT_WINDOW = 200
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20
+
+HEDGING_ENABLED = False
+HEDGING_QUANTILE = 0.95
+HEDGING_WINDOW = 200
+HEDGING_MIN_SAMPLES = 20
+HEDGING_BUDGET = 0.05
+
+SESSION_ENABLED = False
+SESSION_MAX_AGE = 15
+SESSION_TOR_CONTROL_PORT = None
+SESSION_TOR_CONTROL_PASSWORD = None
+SESSION_RENEWAL_COOLDOWN = 10
+SESSION_RENEWAL_TIMEOUT = 5
+
+RECRAWL_ENABLED = False
+RECRAWL_PATH = "recrawl.sqlite3"
+RECRAWL_MIN_INTERVAL = 12 * 3600
+RECRAWL_MAX_INTERVAL = 7 * 24 * 3600
+
+SPOOL_ENABLED = True
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+SPOOL_NON_HTML = True
+SPOOL_DIR = None
+
 HTTPERROR_ALLOWED_CODES = []
 HTTPERROR_ALLOW_ALL = False
 
@@ -245,7 +357,7 @@ PLAYWRIGHT_LAUNCH_OPTIONS = {"proxy": {"server": "per-context"}}
 PLAYWRIGHT_CONTEXTS = {}
 PLAYWRIGHT_MAX_CONTEXTS = CONCURRENT_REQUESTS
 PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = DOWNLOAD_TIMEOUT * 1000
-PLAYWRIGHT_PROCESS_REQUEST_HEADERS = scrapy_playwright.headers.use_scrapy_headers
+PLAYWRIGHT_PROCESS_REQUEST_HEADERS = "scrapy_playwright.headers.use_scrapy_headers"
 PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 1
 PLAYWRIGHT_ABORT_REQUEST = None
 
@@ -266,7 +378,7 @@ ROTATING_PROXY_CLOSE_SPIDER = False
 ROTATING_PROXY_PAGE_RETRY_TIMES = 100
 ROTATING_PROXY_BACKOFF_BASE = 300
 ROTATING_PROXY_BACKOFF_CAP = 3600
-ROTATING_PROXY_BAN_POLICY = "rotating_proxies.policy.BanDetectionPolicy"
+ROTATING_PROXY_BAN_POLICY = "scrapy_tor_playwright_demo.middlewares.defs.RecrawlBanDetectionPolicy"
 
 ## Other ###############################################################################################################
 
@@ -3,4 +3,4 @@
 ## Initialization code #################################################################################################
 
 ## Public API ##########################################################################################################
-from .spiders import QuotesSpider
+from .spiders import QuotesSpider, ReparseSpider
@@ -3,8 +3,11 @@
     - https://docs.scrapy.org/en/latest/topics/spiders.html"""
 
 import scrapy
+import scrapy.http
 
 from ..defs import LoggerMixin, PlaywrightMixin
+from ..extensions.defs import ITEMS_PARSED, PAGE_NOT_MODIFIED, STAGE_MEASURED
+from ..stores.recrawl import RecrawlStore
 
 
 class SpiderBase(PlaywrightMixin, LoggerMixin, scrapy.Spider):  # pylint: disable=abstract-method
@@ -13,5 +16,55 @@ class SpiderBase(PlaywrightMixin, LoggerMixin, scrapy.Spider):  # pylint: disabl
     ## Private API #####################################################################################################
 
     ## Protected API ###################################################################################################
+    def _send_stage_durations(self, request: scrapy.http.Request, page_type: str | None) -> None:
+        """Sends the durations of the stages the request went through, for the extensions that instrument them.
+
+        :param request: The request, after its response has been parsed.
+        :param page_type: The type of page of the response, or ``None`` if unknown."""
+        for stage, duration in self._get_stage_durations(request).items():
+            self.crawler.signals.send_catch_log(
+                STAGE_MEASURED,
+                stage=stage,
+                duration=duration,
+                proxy=request.meta.get("proxy", None),
+                page_type=page_type,
+            )
+
+    def _send_items_parsed(self, request: scrapy.http.Request, count: int) -> None:
+        """Sends the number of items parsed from a response before they enter the item pipelines, for the extensions
+        that measure how long they wait in them.
+
+        :param request: The request, after its response has been parsed.
+        :param count: The number of items."""
+        self.crawler.signals.send_catch_log(ITEMS_PARSED, request=request, count=count)
+
+    def _get_not_modified_requests(self, response: scrapy.http.Response) -> list[scrapy.http.Request] | None:
+        """Returns the requests to the links of a page that did not change since the previous crawl, as found when it
+        was last parsed, and sends :data:`PAGE_NOT_MODIFIED`, so that the page is neither parsed nor stored again.
+
+        :param response: The response.
+        :return: The requests, or ``None`` if the page changed or its changes are not tracked."""
+        reason = response.meta.get("recrawl", None)
+        if reason not in ("not_modified", "unchanged", "not_due") or response.request is None:
+            return None
+
+        self.crawler.signals.send_catch_log(PAGE_NOT_MODIFIED, url=response.url, reason=reason)
+        requests = []
+        for url in response.meta.get("recrawl_links", ()):
+            request = scrapy.http.Request(url, response.request.callback)
+            if self._is_playwright_request(response.request):
+                request = self._to_playwright_request(request)
+            requests.append(request)
+
+        return requests
+
+    def _set_recrawl_links(self, response: scrapy.http.Response, requests: list[scrapy.http.Request]) -> None:
+        """Stores the links found in a page that changed, so that they are followed while it does not change again.
+
+        :param response: The response.
+        :param requests: The requests to the links of the page."""
+        store = RecrawlStore.from_crawler(self.crawler)
+        if store.is_open and response.request is not None and response.meta.get("recrawl") == "changed":
+            store.set_links(response.request.url, [request.url for request in requests])
 
     ## Public API ######################################################################################################
@@ -1,7 +1,13 @@
 """Spiders."""
 
-from collections.abc import AsyncIterator
+import asyncio
+import collections
+import concurrent.futures
+import os
+import time
+from collections.abc import AsyncIterator, Iterator
 from typing import Any, Literal
+from urllib.parse import urlparse
 
 import scrapy
 import scrapy.crawler
@@ -10,7 +16,9 @@ import scrapy.http
 import scrapy.item
 import scrapy.settings
 
-from ..items import QuotesParser
+from ..commands.defs import CorpusDocument, iter_corpus, reparse_documents
+from ..defs import PlaywrightStores
+from ..items import CompactItemBase, QuotesParser
 from .defs import SpiderBase
 
 
@@ -25,6 +33,8 @@ class QuotesSpider(SpiderBase):
         ./manage.ps1 scrapy crawl quotes `-a mode='nojs'
         # Obtain stealth and IP statuses.
         ./manage.ps1 scrapy crawl quotes `-a mode='test'
+        # No JavaScript website, served from a different host such as a local stand-in.
+        ./manage.ps1 scrapy crawl quotes `-a mode='nojs' `-a base_url='http://quotes.bench'
     """
 
     # pylint: disable=abstract-method
@@ -43,12 +53,19 @@ class QuotesSpider(SpiderBase):
     state: dict[str, Any] = {}
 
     ## Private API #####################################################################################################
-    def __init__(self, mode: Literal["nojs", "js", "test"], *args, **kwargs) -> None:
+    def __init__(
+        self,
+        mode: Literal["nojs", "js", "test"],
+        *args,
+        base_url: str = "https://quotes.toscrape.com",
+        **kwargs,
+    ) -> None:
         """Spider constructor.
 
         Called by :meth:`scrapy.Spider.from_crawler` when Scrapy creates spiders.
 
-        :param mode: The mode under which to run the spider."""
+        :param mode: The mode under which to run the spider.
+        :param base_url: The protocol and host of the quotes website, this is ignored in ``test`` mode."""
         # Call the parent constructor.
         super().__init__(*args, **kwargs)
 
@@ -62,6 +79,13 @@ class QuotesSpider(SpiderBase):
         self.__mode = mode
         self._log_debug(f"Mode set to '{self.__mode}'...")
 
+        #: The protocol and host of the quotes website, without trailing slash.
+        self.__base_url = base_url.rstrip("/")
+        if (hostname := urlparse(self.__base_url).hostname) is None:
+            raise RuntimeError(f"An invalid base URL '{base_url}' was supplied.")
+        self.allowed_domains = [hostname]
+        self._log_debug(f"Base URL set to '{self.__base_url}'...")
+
         # Signal that initialization has finished.
         self._log_debug("Spider initialized.")
 
@@ -83,9 +107,9 @@ class QuotesSpider(SpiderBase):
 
         # Create requests, depending on whether scraping website with JavaScript or not.
         if self.__mode == "nojs":
-            urls = ["https://quotes.toscrape.com/"]
+            urls = [f"{self.__base_url}/"]
         elif self.__mode == "js":
-            urls = ["https://quotes.toscrape.com/js/"]
+            urls = [f"{self.__base_url}/js/"]
         elif self.__mode == "test":
             urls = [
                 "https://bot.sannysoft.com/",
@@ -126,16 +150,164 @@ class QuotesSpider(SpiderBase):
 
         # CLose Playwright context.
         self._log_debug("Closing context of Playwright request")
-        await self._close_playwright_context(response.request)
+        await self._close_playwright_context(response.request, PlaywrightStores.from_crawler(self.crawler))
         self._log_debug("Playwright context closed.")
 
-        # Parse response.
-        parser = QuotesParser(response, self.logger.logger).parse()
+        # Follow the links of pages that did not change, without parsing them nor storing their items again.
+        if (requests := self._get_not_modified_requests(response)) is not None:
+            self._log_debug(f"Skipping parsing of '{response.url}' as it did not change since the previous crawl.")
+            for request in requests:
+                yield request
+            return
+
+        # Parse response, with the parser routed from its URL.
+        self._mark(response.request, "parse_start")
+        parser = QuotesParser.for_response(
+            response, self.logger.logger, compact_items=self.settings.getbool("COMPACT_ITEMS", False)
+        ).parse()
+        self._mark(response.request, "parse_end")
+        self._send_stage_durations(response.request, parser.page_type)
+        self._set_recrawl_links(response, parser.requests)
         # Yield requests.
         for request in parser.requests:
             yield request
         # Yield items.
+        self._send_items_parsed(response.request, len(parser.items))
         for item in parser.items:
             yield item
 
         self._log_debug("Asynchronously parsed response.")
+
+
+class ReparseSpider(SpiderBase):
+    """Spider that parses a corpus of stored HTML again, in a pool of processes, instead of crawling, so that items can
+    be regenerated after a fix in the parser. The items go through the item pipelines as in a crawl. It is run by the
+    ``reparse`` command, or as below:
+
+    .. code-block:: powershell
+
+        # Corpus in the HTTP cache, in WARC files or in the output of the filesystem pipeline.
+        ./manage.ps1 scrapy crawl reparse `-a source='.scrapy/httpcache/quotes'
+    """
+
+    # pylint: disable=abstract-method
+
+    #: The name of the spider.
+    name: str = "reparse"
+    #: Custom settings, will override project-wide settings.
+    custom_settings: dict[str, str | int | bool | list[str | int | bool]] = {}
+    #: Crawler object to which the spider is bound.
+    crawler: scrapy.crawler.Crawler
+    #: Configuration for running the spider.
+    settings: scrapy.settings.Settings
+
+    ## Private API #####################################################################################################
+    def __init__(
+        self,
+        source: str,
+        *args,
+        processes: int | str | None = None,
+        batch_size: int | str = 64,
+        **kwargs,
+    ) -> None:
+        """Spider constructor.
+
+        :param source: Path to the corpus, as read by :func:`~scrapy_tor_playwright_demo.commands.defs.iter_corpus`.
+        :param processes: Number of worker processes, ``None`` for the number of processors.
+        :param batch_size: Number of documents sent to a worker process at once."""
+        super().__init__(*args, **kwargs)
+
+        if not os.path.exists(source):
+            raise RuntimeError(f"The corpus at '{source}' does not exist.")
+
+        #: Path to the corpus.
+        self.__source = source
+        #: Number of worker processes.
+        self.__processes = int(processes) if processes is not None else os.cpu_count() or 1
+        #: Number of documents sent to a worker process at once.
+        self.__batch_size = max(1, int(batch_size))
+
+    def __iter_batches(self) -> Iterator[list[CorpusDocument]]:
+        """Reads the documents of the corpus in batches.
+
+        :return: An iterator with the batches."""
+        batch = []
+        for document in iter_corpus(self.__source):
+            batch.append(document)
+            if len(batch) >= self.__batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def __submit_batches(
+        self, executor: concurrent.futures.Executor, compact_items: bool
+    ) -> Iterator[concurrent.futures.Future]:
+        """Submits the batches of documents of the corpus to be parsed, keeping two batches in flight per process, so
+        that workers never wait while items are yielded.
+
+        :param executor: The pool of processes.
+        :param compact_items: If the items parsed are compact items.
+        :return: An iterator with the results of the batches, in order."""
+        pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        for batch in self.__iter_batches():
+            pending.append(executor.submit(reparse_documents, batch, compact_items))
+            if len(pending) >= 2 * self.__processes:
+                yield pending.popleft()
+        yield from pending
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def update_settings(cls, settings: scrapy.settings.BaseSettings) -> None:
+        """Disables the downloader middlewares and the download handlers of the project, as nothing is crawled, the
+        handler of Scrapy for data URLs is used for the start request.
+
+        :param settings: The settings of the crawler."""
+        super().update_settings(settings)
+        for name in ("DOWNLOADER_MIDDLEWARES", "DOWNLOAD_HANDLERS"):
+            settings.set(name, {key: None for key in settings.getdict(name) if key != "data"}, priority="spider")
+
+    def start_requests(self) -> list[scrapy.http.Request]:
+        """Generates a single request to an inline data URL, which needs no network, whose callback parses the corpus.
+
+        :return: A list with the start request."""
+        return [scrapy.http.Request("data:,", self.areparse, dont_filter=True)]
+
+    async def areparse(
+        self,
+        response: scrapy.http.Response,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[scrapy.item.Item | CompactItemBase]:
+        """Asynchronous callback that parses the batches of documents of the corpus in a pool of processes, and yields
+        their items as the batches are parsed, in order, with a bounded number of batches in flight.
+
+        :param response: The response to the start request, ignored.
+        :param args: Remaining Scrapy positional arguments.
+        :param kwargs: Remaining Scrapy keyword arguments.
+        :returns: The items parsed."""
+        # pylint: disable=unused-argument
+        compact_items, stats = self.settings.getbool("COMPACT_ITEMS", False), self.crawler.stats
+        self._log_info(f"Parsing corpus at '{self.__source}' in {self.__processes} processes...")
+        start, documents = time.monotonic(), 0
+
+        with concurrent.futures.ProcessPoolExecutor(self.__processes) as executor:
+            for future in self.__submit_batches(executor, compact_items):
+                for result in await asyncio.wrap_future(future):
+                    documents += 1
+                    if result.error is not None:
+                        self._log_error(f"Parsing of '{result.url}' failed: {result.error}")
+                        stats.inc_value("reparse/errors")
+                        continue
+                    stats.inc_value(f"reparse/page_type/{result.page_type}")
+                    stats.inc_value("reparse/items", len(result.items))
+                    for item in result.items:
+                        yield item
+
+        elapsed = time.monotonic() - start
+        stats.set_value("reparse/documents", documents)
+        stats.set_value("reparse/elapsed", elapsed)
+        stats.set_value("reparse/docs_per_second", documents / elapsed if elapsed > 0 else 0.0)
+        self._log_info(f"Parsed {documents} documents in {elapsed:.2f} seconds, {documents / (elapsed or 1):.1f}/s.")
@@ -0,0 +1,5 @@
+"""Public API for stores."""
+
+## Initialization code #################################################################################################
+
+## Public API ##########################################################################################################
@@ -0,0 +1,151 @@
+"""The registry of the Playwright contexts that are open and the pool of the contexts created ahead of the requests."""
+
+import collections
+import dataclasses
+import time
+import weakref
+from typing import Any
+
+import scrapy.http
+
+from .defs import StoreBase
+
+
+@dataclasses.dataclass
+class OpenContext:
+    """A Playwright context that has been opened for a request and not closed yet."""
+
+    #: The identifier of the context, as in the ``playwright_context`` metadata of the request.
+    name: str
+    #: The page of the context.
+    page: Any
+    #: A weak reference to the request that owns the context, it is dead once nothing can close the context anymore.
+    request: weakref.ReferenceType
+    #: The URL of the request that owns the context.
+    url: str
+    #: The monotonic time when the context was opened.
+    created: float
+
+    ## Public API ######################################################################################################
+    @property
+    def age(self) -> float:
+        """The time elapsed since the context was opened.
+
+        :return: The age in seconds."""
+        return time.monotonic() - self.created
+
+    @property
+    def orphaned(self) -> bool:
+        """Whether the request that owns the context no longer exists, so that the context can only be reclaimed.
+
+        :return: ``True`` if orphaned, ``False`` otherwise."""
+        return self.request() is None
+
+
+class ContextRegistry(StoreBase):
+    """A registry of the Playwright contexts that are open, keyed by their identifier.
+
+    Contexts are registered when their page is created and unregistered when the context is closed, whatever the
+    reason. The registry only keeps weak references to the requests, so that it can tell which contexts are leaked."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The open contexts, keyed by identifier.
+        self.__contexts: dict[str, OpenContext] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of open contexts.
+
+        :return: The number of open contexts."""
+        return len(self.__contexts)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def register(self, request: scrapy.http.Request, page: Any) -> OpenContext:
+        """Registers the context of a page that has been created for a request.
+
+        :param request: The Playwright request.
+        :param page: The page created for the request.
+        :return: The registered context."""
+        name = request.meta["playwright_context"]
+        context = OpenContext(
+            name=name, page=page, request=weakref.ref(request), url=request.url, created=time.monotonic()
+        )
+        self.__contexts[name] = context
+        # Unregister on close, including contexts closed by Scrapy Playwright or by a browser that crashed.
+        page.context.once("close", lambda _: self.unregister(name))
+
+        return context
+
+    def unregister(self, name: str) -> OpenContext | None:
+        """Unregisters a context.
+
+        :param name: The identifier of the context.
+        :return: The unregistered context, or ``None`` if it was not registered."""
+        return self.__contexts.pop(name, None)
+
+    def get(self, name: str) -> OpenContext | None:
+        """Returns a registered context.
+
+        :param name: The identifier of the context.
+        :return: The context, or ``None`` if it is not registered."""
+        return self.__contexts.get(name, None)
+
+    @property
+    def contexts(self) -> list[OpenContext]:
+        """The open contexts, from the oldest to the newest.
+
+        :return: The open contexts."""
+        return list(self.__contexts.values())
+
+
+class ContextPool(StoreBase):
+    """A pool of the Playwright contexts created ahead of the requests, with stealth already applied, keyed by the proxy
+    of the context.
+
+    Each context is taken by a single request through the same proxy, which then closes it as any other context."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The identifiers of the contexts, keyed by proxy, ``None`` for contexts without proxy.
+        self.__contexts: collections.defaultdict[str | None, collections.deque[str]] = collections.defaultdict(
+            collections.deque
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of contexts in the pool.
+
+        :return: The number of contexts."""
+        return sum(len(names) for names in self.__contexts.values())
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def put(self, proxy: str | None, name: str) -> None:
+        """Adds a context to the pool.
+
+        :param proxy: The proxy of the context, ``None`` if without proxy.
+        :param name: The identifier of the context."""
+        self.__contexts[proxy].append(name)
+
+    def take(self, proxy: str | None) -> str | None:
+        """Takes a context through a proxy out of the pool.
+
+        :param proxy: The proxy, ``None`` for a context without proxy.
+        :return: The identifier of the context, or ``None`` if there are none left for the proxy."""
+        if not (names := self.__contexts.get(proxy, None)):
+            return None
+
+        return names.popleft()
+
+    def clear(self) -> list[str]:
+        """Takes all the contexts out of the pool.
+
+        :return: The identifiers of the contexts."""
+        names = [name for names in self.__contexts.values() for name in names]
+        self.__contexts.clear()
+
+        return names
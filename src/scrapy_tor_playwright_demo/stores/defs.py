@@ -0,0 +1,61 @@
+"""Common definitions for stores, the state shared by the components of a crawler, such as its middlewares, extensions
+and spiders."""
+
+import os
+import weakref
+from typing import ClassVar, TypeVar, cast
+
+import scrapy.crawler
+
+#: The type of a store, for the stores returned by :meth:`StoreBase.from_crawler`.
+StoreT = TypeVar("StoreT", bound="StoreBase")
+
+
+def list_folder(folder: str) -> list[tuple[str, str]]:
+    """Lists the files of a folder, created if missing, from the least to the most recently modified, removing the
+    files left partially written by a previous crawl.
+
+    :param folder: The folder.
+    :return: The names and paths of the files."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(".tmp"):
+            os.remove(path)
+        elif os.path.isfile(path):
+            paths.append((os.path.getmtime(path), name, path))
+
+    return [(name, path) for _, name, path in sorted(paths)]
+
+
+class StoreBase:
+    """Base class for stores, defines common functionality for all.
+
+    There is a single instance of each store per crawler, created by the first component of the crawler that asks for
+    it, usually the component that owns it, so that the components of different crawlers in the same process never
+    see the state of each other."""
+
+    # pylint: disable=too-few-public-methods
+
+    #: The stores of each crawler keyed by their class, which are dropped along with the crawler.
+    __stores: ClassVar[weakref.WeakKeyDictionary[scrapy.crawler.Crawler, dict[type, "StoreBase"]]] = (
+        weakref.WeakKeyDictionary()
+    )
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_crawler(cls: type[StoreT], crawler: scrapy.crawler.Crawler) -> StoreT:
+        """Returns the store of a crawler, creating it if no component of the crawler asked for it before.
+
+        :param crawler: The crawler.
+        :return: The store of the crawler."""
+        stores = StoreBase.__stores.setdefault(crawler, {})
+        if (store := stores.get(cls, None)) is None:
+            store = stores[cls] = cls()
+
+        return cast(StoreT, store)
@@ -0,0 +1,225 @@
+"""The store of the state of the pages as of their last visit, kept across crawls to recrawl only what changed."""
+
+import dataclasses
+import json
+import os
+import sqlite3
+import time
+
+from .defs import StoreBase
+
+#: The number of writes to the recrawl store after which they are committed to the database.
+RECRAWL_COMMIT_INTERVAL = 100
+
+
+@dataclasses.dataclass(frozen=True)
+class PageValidators:
+    """The validators the origin sent for a page, to request it again only if it was modified."""
+
+    #: The ``ETag`` header of the page, if the origin sent one.
+    etag: str | None = None
+    #: The ``Last-Modified`` header of the page, if the origin sent one.
+    last_modified: str | None = None
+
+    ## Public API ######################################################################################################
+    @property
+    def headers(self) -> dict[str, str]:
+        """The headers of a conditional request for the page.
+
+        :return: The headers, empty if the origin sent no validators."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+    def update(self, validators: "PageValidators") -> "PageValidators":
+        """Returns the validators updated with those of a later visit, keeping the current ones the origin did not send.
+
+        :param validators: The validators of the later visit.
+        :return: The validators updated."""
+        return PageValidators(validators.etag or self.etag, validators.last_modified or self.last_modified)
+
+
+@dataclasses.dataclass
+class PageRecord:
+    """The state of a page as of its last visit, kept across crawls to detect whether it changed."""
+
+    #: The URL of the page.
+    url: str
+    #: The SHA-256 digest of the normalized content of the page.
+    digest: bytes
+    #: The validators the origin sent for the page.
+    validators: PageValidators
+    #: The time of the last visit, as a Unix timestamp.
+    visited: float
+    #: The seconds after the last visit before the page is visited again.
+    interval: float
+    #: The number of consecutive visits in which the page did not change.
+    unchanged: int
+    #: The URLs of the links found in the page when it was last parsed.
+    links: tuple[str, ...] = ()
+
+    ## Public API ######################################################################################################
+    @property
+    def due(self) -> bool:
+        """Whether the interval since the last visit has elapsed.
+
+        :return: ``True`` if due, ``False`` otherwise."""
+        return time.time() >= self.visited + self.interval
+
+
+class RecrawlStore(StoreBase):
+    """A store of the state of the pages as of their last visit, in a SQLite database kept across crawls, so that
+    pages that did not change are neither parsed nor stored again.
+
+    A page that changes is visited on every crawl, while the interval before visiting a page that did not change is
+    doubled on every visit, between a minimum and a maximum, so that pages that rarely change are visited less often."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The connection to the database, ``None`` if the store is not open.
+        self.__connection: sqlite3.Connection | None = None
+        #: The interval in seconds after the first visit in which a page did not change.
+        self.__min_interval = 0.0
+        #: The maximum interval in seconds between two visits.
+        self.__max_interval = 0.0
+        #: The number of writes not committed yet.
+        self.__pending = 0
+
+    def __execute(self, sql: str, parameters: tuple) -> sqlite3.Cursor:
+        """Executes a statement, committing the writes periodically.
+
+        :param sql: The statement.
+        :param parameters: The parameters of the statement.
+        :raises RuntimeError: The store is not open.
+        :return: The cursor."""
+        if self.__connection is None:
+            raise RuntimeError("The recrawl store is not open.")
+
+        cursor = self.__connection.execute(sql, parameters)
+        if not sql.startswith("SELECT"):
+            self.__pending += 1
+            if self.__pending >= RECRAWL_COMMIT_INTERVAL:
+                self.__connection.commit()
+                self.__pending = 0
+
+        return cursor
+
+    def __save(self, record: PageRecord) -> None:
+        """Inserts or replaces a record.
+
+        :param record: The record."""
+        self.__execute(
+            "INSERT OR REPLACE INTO pages (url, digest, etag, last_modified, visited, interval, unchanged, links) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.url,
+                record.digest,
+                record.validators.etag,
+                record.validators.last_modified,
+                record.visited,
+                record.interval,
+                record.unchanged,
+                json.dumps(record.links),
+            ),
+        )
+
+    def __slow_down(self, record: PageRecord) -> PageRecord:
+        """Records a visit in which a page did not change, doubling the interval before the next visit.
+
+        :param record: The record of the page.
+        :return: The record updated."""
+        record.visited = time.time()
+        record.interval = min(self.__max_interval, max(self.__min_interval, record.interval * 2))
+        record.unchanged += 1
+        self.__save(record)
+
+        return record
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @property
+    def is_open(self) -> bool:
+        """Whether the store is open.
+
+        :return: ``True`` if open, ``False`` otherwise."""
+        return self.__connection is not None
+
+    def open(self, path: str, min_interval: float, max_interval: float) -> None:
+        """Opens the store, creating the database if it does not exist.
+
+        :param path: The path to the database.
+        :param min_interval: The interval in seconds after the first visit in which a page did not change.
+        :param max_interval: The maximum interval in seconds between two visits."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute("PRAGMA journal_mode = WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, digest BLOB NOT NULL, etag TEXT, "
+            "last_modified TEXT, visited REAL NOT NULL, interval REAL NOT NULL, unchanged INTEGER NOT NULL, "
+            "links TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self.__min_interval, self.__max_interval = min_interval, max_interval
+
+    def close(self) -> None:
+        """Commits the pending writes and closes the store, if open."""
+        if self.__connection is not None:
+            self.__connection.commit()
+            self.__connection.close()
+            self.__connection = None
+            self.__pending = 0
+
+    def get(self, url: str) -> PageRecord | None:
+        """Returns the record of a page.
+
+        :param url: The URL of the page.
+        :return: The record, or ``None`` if the page was never visited."""
+        row = self.__execute(
+            "SELECT url, digest, etag, last_modified, visited, interval, unchanged, links FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        url, digest, etag, last_modified, *schedule, links = row
+
+        return PageRecord(url, digest, PageValidators(etag, last_modified), *schedule, links=tuple(json.loads(links)))
+
+    def observe(self, url: str, digest: bytes, validators: PageValidators) -> tuple[PageRecord, bool]:
+        """Records a visit in which the content of a page was downloaded.
+
+        :param url: The URL of the page.
+        :param digest: The digest of the normalized content of the page.
+        :param validators: The validators of the response.
+        :return: The record updated, and whether the page changed since the last visit or was never visited."""
+        if (record := self.get(url)) is not None and record.digest == digest:
+            record.validators = record.validators.update(validators)
+            return self.__slow_down(record), False
+
+        links = record.links if record is not None else ()
+        record = PageRecord(url, digest, validators, time.time(), interval=0.0, unchanged=0, links=links)
+        self.__save(record)
+
+        return record, True
+
+    def not_modified(self, url: str) -> PageRecord | None:
+        """Records a visit in which the origin replied that a page was not modified.
+
+        :param url: The URL of the page.
+        :return: The record updated, or ``None`` if the page was never visited."""
+        if (record := self.get(url)) is None:
+            return None
+
+        return self.__slow_down(record)
+
+    def set_links(self, url: str, links: list[str]) -> None:
+        """Stores the links found in a page, so that they are followed even if the page is not parsed again.
+
+        :param url: The URL of the page, which must have been visited.
+        :param links: The URLs of the links."""
+        self.__execute("UPDATE pages SET links = ? WHERE url = ?", (json.dumps(links), url))
@@ -0,0 +1,142 @@
+"""The sessions of related requests pinned to a proxy and a Playwright context."""
+
+import collections
+import dataclasses
+import time
+
+from .defs import StoreBase
+
+
+@dataclasses.dataclass
+class CircuitSession:
+    """A group of related requests pinned to a proxy, and to a Playwright context, for a circuit epoch of the proxy."""
+
+    #: The key of the session, as in the ``session`` metadata of its requests.
+    key: str
+    #: The proxy the requests are sent through.
+    proxy: str
+    #: The identifier of the Playwright context of the requests, ``None`` if they are not Playwright requests.
+    context: str | None
+    #: The circuit epoch of the proxy when the session was pinned.
+    epoch: int
+    #: The monotonic time when the session was pinned.
+    created: float = dataclasses.field(default_factory=time.monotonic)
+
+    ## Public API ######################################################################################################
+    @property
+    def age(self) -> float:
+        """The time elapsed since the session was pinned.
+
+        :return: The age in seconds."""
+        return time.monotonic() - self.created
+
+
+class SessionManager(StoreBase):
+    """The sessions that pin groups of related requests to a proxy and a Playwright context, so that they share the
+    same exit IP and cookies, keyed by the ``session`` metadata of the requests.
+
+    A session lasts for a circuit epoch of its proxy, which ends when the circuit of the proxy is renewed, and for a
+    maximum age at most, as the Tor proxies also change circuits on their own. The next request of an ended session is
+    sent as any other request, and the session is pinned again to the proxy and context of its response."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The sessions, keyed by their key.
+        self.__sessions: dict[str, CircuitSession] = {}
+        #: The current circuit epoch of each proxy, which starts at 0.
+        self.__epochs: collections.Counter[str] = collections.Counter()
+
+    def __len__(self) -> int:
+        """Returns the number of sessions, including those that ended but were not expired yet.
+
+        :return: The number of sessions."""
+        return len(self.__sessions)
+
+    def __is_live(self, session: CircuitSession, max_age: float) -> bool:
+        """Determines if a session is in the current circuit epoch of its proxy and younger than the maximum age.
+
+        :param session: The session.
+        :param max_age: The maximum age of the sessions in seconds.
+        :return: ``True`` if live, ``False`` otherwise."""
+        return session.epoch == self.__epochs[session.proxy] and session.age < max_age
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def get(self, key: str, max_age: float) -> CircuitSession | None:
+        """Returns a live session.
+
+        :param key: The key of the session.
+        :param max_age: The maximum age of the sessions in seconds.
+        :return: The session, or ``None`` if there is no live session with the key."""
+        if (session := self.__sessions.get(key, None)) is None or not self.__is_live(session, max_age):
+            return None
+
+        return session
+
+    def pin(self, key: str, proxy: str, context: str | None) -> tuple[CircuitSession, CircuitSession | None]:
+        """Pins a session to a proxy and a context for the current circuit epoch of the proxy.
+
+        :param key: The key of the session.
+        :param proxy: The proxy.
+        :param context: The identifier of the Playwright context, ``None`` if not Playwright requests.
+        :return: The session, and the session it replaces or ``None`` if there was none."""
+        session = CircuitSession(key=key, proxy=proxy, context=context, epoch=self.__epochs[proxy])
+        replaced = self.__sessions.pop(key, None)
+        self.__sessions[key] = session
+
+        return session, replaced
+
+    def end(self, key: str) -> CircuitSession | None:
+        """Ends a session.
+
+        :param key: The key of the session.
+        :return: The session, or ``None`` if there was none."""
+        return self.__sessions.pop(key, None)
+
+    def renew(self, proxy: str) -> list[CircuitSession]:
+        """Starts a new circuit epoch for a proxy, ending the sessions pinned to it.
+
+        :param proxy: The proxy.
+        :return: The sessions ended."""
+        self.__epochs[proxy] += 1
+        ended = [session for session in self.__sessions.values() if session.proxy == proxy]
+        for session in ended:
+            del self.__sessions[session.key]
+
+        return ended
+
+    def expire(self, max_age: float) -> list[CircuitSession]:
+        """Ends the sessions that are no longer live.
+
+        :param max_age: The maximum age of the sessions in seconds.
+        :return: The sessions ended."""
+        ended = [session for session in self.__sessions.values() if not self.__is_live(session, max_age)]
+        for session in ended:
+            del self.__sessions[session.key]
+
+        return ended
+
+    def epoch(self, proxy: str) -> int:
+        """Returns the current circuit epoch of a proxy.
+
+        :param proxy: The proxy.
+        :return: The epoch, the number of times its circuit was renewed."""
+        return self.__epochs[proxy]
+
+    def owns(self, context: str | None) -> bool:
+        """Determines if a Playwright context belongs to a session, so that it is kept open between its requests.
+
+        :param context: The identifier of the context.
+        :return: ``True`` if it belongs to a session, ``False`` otherwise."""
+        return context is not None and any(session.context == context for session in self.__sessions.values())
+
+    def clear(self) -> list[CircuitSession]:
+        """Ends all the sessions.
+
+        :return: The sessions ended."""
+        ended = list(self.__sessions.values())
+        self.__sessions.clear()
+
+        return ended
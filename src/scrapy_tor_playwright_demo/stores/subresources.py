@@ -0,0 +1,319 @@
+"""The cache on disk of the static subresources of pages, shared by all the Playwright contexts of a crawler."""
+
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import email.utils
+import hashlib
+import json
+import os
+from typing import Any
+
+import scrapy.extensions.httpcache
+import scrapy.http
+import scrapy.settings
+
+from .defs import StoreBase, list_folder
+
+#: The types of resources cached, as reported by Playwright.
+SUBRESOURCE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+#: The headers not stored, the body is stored decoded and cookies are private to each context.
+SUBRESOURCE_IGNORED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+)
+
+
+@dataclasses.dataclass
+class CachedSubresource:
+    """A subresource stored in the subresource cache, its body is only on disk."""
+
+    #: The URL of the subresource.
+    url: str
+    #: The HTTP status of the response.
+    status: int
+    #: The headers of the response, as given by Playwright.
+    headers: dict[str, str]
+    #: The size of the body in bytes.
+    size: int
+
+    ## Public API ######################################################################################################
+    def to_response(self) -> scrapy.http.Response:
+        """Converts the subresource to a response without body, as expected by the cache policies of Scrapy.
+
+        :return: The response."""
+        return scrapy.http.Response(self.url, status=self.status, headers=self.headers)
+
+
+class SubresourceCache(StoreBase):
+    """A cache on disk of the static subresources of pages, such as scripts, stylesheets, fonts and images, shared by
+    the pages of all the Playwright contexts of a crawler, as every context starts with an empty browser cache.
+
+    Once installed on a page, subresources are served from the cache while fresh, and otherwise requested as usual and
+    stored from their response if cacheable, both as decided by :class:`scrapy.extensions.httpcache.RFC2616Policy`.
+    The least recently used subresources are evicted once their bodies exceed the maximum size. Each subresource is a
+    file in the folder of the cache, with a line of JSON with the response followed by the body."""
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The folder of the cache, ``None`` if the cache is not open.
+        self.__folder: str | None = None
+        #: The maximum size of the bodies in the cache, in bytes.
+        self.__max_size = 0
+        #: The subresources in the cache keyed by the hash of their URL, from the least to the most recently used.
+        self.__entries: collections.OrderedDict[str, CachedSubresource] = collections.OrderedDict()
+        #: The size of the bodies in the cache, in bytes.
+        self.__size = 0
+        #: The counters of the cache since it was opened.
+        self.__counters: collections.Counter[str] = collections.Counter()
+        #: The policy that decides which responses are stored and which are fresh.
+        self.__policy = scrapy.extensions.httpcache.RFC2616Policy(scrapy.settings.Settings())
+
+    def __len__(self) -> int:
+        """Returns the number of subresources in the cache.
+
+        :return: The number of subresources."""
+        return len(self.__entries)
+
+    @staticmethod
+    def __get_key(url: str) -> str:
+        """Returns the key of a subresource.
+
+        :param url: The URL of the subresource.
+        :return: The key."""
+        return hashlib.sha1(url.encode("utf8")).hexdigest()
+
+    def __get_path(self, key: str) -> str:
+        """Returns the path to the file of a subresource.
+
+        :param key: The key of the subresource.
+        :return: The path."""
+        return os.path.join(self.__folder or "", key)
+
+    @staticmethod
+    def __read_entry(path: str) -> CachedSubresource:
+        """Reads a subresource from its file, without its body.
+
+        :param path: The path to the file.
+        :return: The subresource.
+        :raises OSError: The file cannot be read.
+        :raises ValueError: The file is not a subresource."""
+        with open(path, "rb") as stream:
+            entry = json.loads(stream.readline())
+
+        return CachedSubresource(
+            url=entry["url"], status=entry["status"], headers=entry["headers"], size=os.path.getsize(path)
+        )
+
+    @staticmethod
+    def __read_body(path: str) -> bytes:
+        """Reads the body of a subresource from its file, and marks the file as used.
+
+        :param path: The path to the file.
+        :return: The body.
+        :raises OSError: The file cannot be read."""
+        with open(path, "rb") as stream:
+            stream.readline()
+            body = stream.read()
+        os.utime(path)
+
+        return body
+
+    @staticmethod
+    def __write(path: str, entry: CachedSubresource, body: bytes) -> None:
+        """Writes a subresource to its file, replacing it at once so that it is never read partially written.
+
+        :param path: The path to the file.
+        :param entry: The subresource.
+        :param body: The body of the subresource."""
+        with open(f"{path}.tmp", "wb") as stream:
+            stream.write(json.dumps({"url": entry.url, "status": entry.status, "headers": entry.headers}).encode())
+            stream.write(b"\n")
+            stream.write(body)
+        os.replace(f"{path}.tmp", path)
+
+    def __add(self, key: str, entry: CachedSubresource) -> None:
+        """Adds a subresource to the index as the most recently used, and evicts the least recently used subresources
+        until the cache fits in its maximum size.
+
+        :param key: The key of the subresource.
+        :param entry: The subresource."""
+        self.__remove(key)
+        self.__entries[key] = entry
+        self.__size += entry.size
+        evicted, excess = [], self.__size - self.__max_size
+        for evicted_key, evicted_entry in self.__entries.items():
+            if excess <= 0:
+                break
+            evicted.append(evicted_key)
+            excess -= evicted_entry.size
+        for evicted_key in evicted:
+            self.__remove(evicted_key, unlink=True)
+        self.__counters["evicted"] += len(evicted)
+
+    def __remove(self, key: str, unlink: bool = False) -> None:
+        """Removes a subresource from the index.
+
+        :param key: The key of the subresource.
+        :param unlink: Whether to also remove its file."""
+        if (entry := self.__entries.pop(key, None)) is not None:
+            self.__size -= entry.size
+        if unlink:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.__get_path(key))
+
+    @staticmethod
+    def __to_scrapy_request(request: Any) -> scrapy.http.Request:
+        """Converts a Playwright request to a Scrapy request, as expected by the cache policies of Scrapy.
+
+        :param request: The Playwright request.
+        :return: The Scrapy request."""
+        return scrapy.http.Request(request.url, headers=request.headers)
+
+    def __is_cacheable(self, request: Any) -> bool:
+        """Determines if a Playwright request is for a static subresource that the cache can serve.
+
+        :param request: The Playwright request.
+        :return: ``True`` if cacheable, ``False`` otherwise."""
+        return (
+            self.is_open
+            and request.method == "GET"
+            and request.resource_type in SUBRESOURCE_TYPES
+            and request.url.startswith(("http://", "https://"))
+        )
+
+    def __get_fresh(self, request: Any) -> tuple[str, CachedSubresource | None]:
+        """Returns the subresource of a Playwright request if it is in the cache and fresh.
+
+        :param request: The Playwright request, which must be cacheable.
+        :return: The key of the subresource, and the subresource or ``None`` if not in the cache or stale."""
+        key = self.__get_key(request.url)
+        if (entry := self.__entries.get(key, None)) is None:
+            return key, None
+        if not self.__policy.is_cached_response_fresh(entry.to_response(), self.__to_scrapy_request(request)):
+            return key, None
+
+        return key, entry
+
+    async def __route(self, route: Any) -> None:
+        """Route handler that serves the fresh subresources in the cache, and lets any other request through.
+
+        :param route: The Playwright route."""
+        if not self.__is_cacheable(route.request):
+            await route.fallback()
+            return
+
+        key, entry = self.__get_fresh(route.request)
+        body = None
+        if entry is not None:
+            try:
+                body = await asyncio.to_thread(self.__read_body, self.__get_path(key))
+            except OSError:
+                self.__remove(key)
+        if entry is None or body is None:
+            self.__counters["misses"] += 1
+            await route.fallback()
+            return
+
+        self.__entries.move_to_end(key)
+        self.__counters["hits"] += 1
+        self.__counters["bytes_saved"] += len(body)
+        await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+
+    async def __on_response(self, response: Any) -> None:
+        """Stores the response of a subresource that is not in the cache or stale, if cacheable.
+
+        :param response: The Playwright response."""
+        # pylint: disable-next=import-outside-toplevel
+        import playwright.async_api
+
+        if not self.__is_cacheable(request := response.request) or self.__get_fresh(request)[1] is not None:
+            return
+        headers = {name: value for name, value in response.headers.items() if name not in SUBRESOURCE_IGNORED_HEADERS}
+        # The age of the subresource is computed from its date, so that it expires even if the server gives none.
+        headers.setdefault("date", email.utils.formatdate(usegmt=True))
+        scrapy_response = scrapy.http.Response(request.url, status=response.status, headers=headers)
+        if "*" in headers.get("vary", "") or not self.__policy.should_cache_response(
+            scrapy_response, self.__to_scrapy_request(request)
+        ):
+            return
+
+        try:
+            body = await response.body()
+        except playwright.async_api.Error:
+            # The page was closed, or the response is a redirect without body.
+            return
+        if len(body) > self.__max_size or not self.is_open:
+            return
+
+        key = self.__get_key(request.url)
+        entry = CachedSubresource(url=request.url, status=response.status, headers=headers, size=len(body))
+        try:
+            await asyncio.to_thread(self.__write, self.__get_path(key), entry, body)
+        except OSError:
+            return
+        # The size on disk includes the line with the response, as it does when loaded from the folder.
+        entry.size = os.path.getsize(self.__get_path(key))
+        self.__add(key, entry)
+        self.__counters["stored"] += 1
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @property
+    def is_open(self) -> bool:
+        """Whether the cache is open.
+
+        :return: ``True`` if open, ``False`` otherwise."""
+        return self.__folder is not None
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """The stats of the cache since it was opened, the hit ratio is over the requests for static subresources.
+
+        :return: The stats, keyed by name."""
+        requests = self.__counters["hits"] + self.__counters["misses"]
+        return {
+            "hits": self.__counters["hits"],
+            "misses": self.__counters["misses"],
+            "hit_ratio": self.__counters["hits"] / requests if requests else 0.0,
+            "bytes_saved": self.__counters["bytes_saved"],
+            "stored": self.__counters["stored"],
+            "evicted": self.__counters["evicted"],
+            "entries": len(self.__entries),
+            "size": self.__size,
+        }
+
+    def open(self, folder: str, max_size: int) -> None:
+        """Opens the cache, loading the subresources stored in the folder by previous crawls.
+
+        :param folder: The folder of the cache, created if missing.
+        :param max_size: The maximum size of the subresources in the cache, in bytes."""
+        self.__folder = folder
+        self.__max_size = max_size
+        self.__entries.clear()
+        self.__size = 0
+        self.__counters.clear()
+
+        # The files are marked when used, so that the least recently used are evicted first.
+        for name, path in list_folder(folder):
+            try:
+                self.__add(name, self.__read_entry(path))
+            except (OSError, ValueError, KeyError):
+                os.remove(path)
+        self.__counters["evicted"] = 0
+
+    def close(self) -> None:
+        """Closes the cache, the subresources remain in the folder for the next crawls."""
+        self.__folder = None
+        self.__entries.clear()
+        self.__size = 0
+
+    async def install(self, page: Any) -> None:
+        """Installs the cache on a page, before it navigates. The cache serves the subresources before any other route
+        handler of the page, as handlers run in the reverse order they are added.
+
+        :param page: The Playwright page."""
+        await page.route("**/*", self.__route)
+        page.on("response", self.__on_response)
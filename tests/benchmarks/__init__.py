@@ -0,0 +1,5 @@
+"""Benchmarks."""
+
+## Initialization code #################################################################################################
+
+## Public API ##########################################################################################################
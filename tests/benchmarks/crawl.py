@@ -0,0 +1,242 @@
+"""End to end crawl throughput benchmark of :class:`QuotesSpider` against a local stand-in of the quotes website.
+
+The benchmark serves a :class:`SyntheticQuotesSite` locally, places a set of :class:`StandInProxy` in front of it as
+the rotating proxies, and runs the spider in each mode in a separate process with the project settings. The results
+are written to a JSON file so that they can be compared across changes. It can be executed as below, from the root
+directory:
+
+.. code-block:: powershell
+
+    python -m tests.benchmarks.crawl --pages 200 --authors 300 --latency 0.05 --failure-rate 0.01
+
+Requires a Playwright browser to be installed, e.g. with ``playwright install chromium``."""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any
+
+import scrapy
+import scrapy.crawler
+import scrapy.http
+import scrapy.settings
+import scrapy.signals
+
+from .defs import save_results
+from .site import SiteServer, StandInProxy, SyntheticQuotesSite
+
+#: The host under which the stand-in website is requested, it must not be a loopback address.
+BENCHMARK_HOST = "quotes.bench"
+#: Default path to the results file.
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".benchmarks", "crawl.json")
+#: Path to the sources of the project.
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src")
+
+
+def _percentile(values: list[float], percentile: float) -> float | None:
+    """Computes a percentile with the nearest rank method.
+
+    :param values: The values.
+    :param percentile: The percentile, between 0 and 100.
+    :return: The percentile, or ``None`` if there are no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))]
+
+
+class BenchmarkCollector:
+    """Extension that collects the measurements of the benchmark and stores them in the stats under ``benchmark/``."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Class constructor.
+
+        :param crawler: The crawler."""
+        #: The crawler.
+        self.__crawler = crawler
+        #: Time at which the spider was opened.
+        self.__start = time.monotonic()
+        #: Download latencies of the responses, in seconds.
+        self.__latencies: list[float] = []
+        #: Number of pages and items.
+        self.__pages = self.__items = 0
+
+        crawler.signals.connect(self.__spider_opened, signal=scrapy.signals.spider_opened)
+        crawler.signals.connect(self.__response_received, signal=scrapy.signals.response_received)
+        crawler.signals.connect(self.__item_scraped, signal=scrapy.signals.item_scraped)
+        crawler.signals.connect(self.__spider_closed, signal=scrapy.signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "BenchmarkCollector":
+        """Method in Scrapy workflow that will create a new instance of the extension.
+
+        :param crawler: Crawler that uses this extension.
+        :return: The instance of the extension."""
+        return cls(crawler)
+
+    def __spider_opened(self) -> None:
+        """Starts measuring."""
+        self.__start = time.monotonic()
+
+    def __response_received(self, response: scrapy.http.Response, request: scrapy.http.Request) -> None:
+        """Records a response.
+
+        :param response: The response.
+        :param request: The request of the response."""
+        if response.status == 200:
+            self.__pages += 1
+        if (latency := request.meta.get("download_latency")) is not None:
+            self.__latencies.append(latency)
+
+    def __item_scraped(self) -> None:
+        """Records an item."""
+        self.__items += 1
+
+    def __spider_closed(self) -> None:
+        """Stores the measurements in the stats."""
+        elapsed = time.monotonic() - self.__start
+        stats = self.__crawler.stats
+        stats.set_value("benchmark/elapsed", elapsed)
+        stats.set_value("benchmark/pages", self.__pages)
+        stats.set_value("benchmark/items", self.__items)
+        stats.set_value("benchmark/pages_per_second", self.__pages / elapsed if elapsed else 0.0)
+        stats.set_value("benchmark/items_per_second", self.__items / elapsed if elapsed else 0.0)
+        stats.set_value("benchmark/latency_p50", _percentile(self.__latencies, 50))
+        stats.set_value("benchmark/latency_p99", _percentile(self.__latencies, 99))
+
+
+def _run_mode(mode: str, base_url: str, proxies: list[str], overrides: dict[str, Any], queue: Any) -> None:
+    """Runs the spider in a given mode and puts the results in the queue, must run in its own process.
+
+    :param mode: The mode of the spider.
+    :param base_url: The base URL of the website.
+    :param proxies: The URLs of the proxies.
+    :param overrides: Settings that override the project settings.
+    :param queue: The queue where to put the results."""
+    # pylint: disable=import-outside-toplevel
+    from scrapy_tor_playwright_demo.spiders import QuotesSpider
+
+    settings = scrapy.settings.Settings()
+    settings.setmodule("scrapy_tor_playwright_demo.settings", priority="project")
+    settings.set("ROTATING_PROXY_LIST", proxies, priority="cmdline")
+    settings.set("EXTENSIONS", {**settings.getdict("EXTENSIONS"), BenchmarkCollector: 0}, priority="cmdline")
+    for key, value in overrides.items():
+        settings.set(key, value, priority="cmdline")
+
+    process = scrapy.crawler.CrawlerProcess(settings)
+    crawler = process.create_crawler(QuotesSpider)
+    process.crawl(crawler, mode=mode, base_url=base_url)
+    process.start()
+
+    stats = crawler.stats.get_stats() if crawler.stats is not None else {}
+    queue.put(
+        {
+            "elapsed": stats.get("benchmark/elapsed"),
+            "pages": stats.get("benchmark/pages"),
+            "items": stats.get("benchmark/items"),
+            "pages_per_second": stats.get("benchmark/pages_per_second"),
+            "items_per_second": stats.get("benchmark/items_per_second"),
+            "latency_p50": stats.get("benchmark/latency_p50"),
+            "latency_p99": stats.get("benchmark/latency_p99"),
+            # In kilobytes, for the browser it is the largest descendant process, which includes Chromium processes.
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "peak_rss_children_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            "browser_contexts": stats.get("playwright/context_count", 0),
+            "retries": stats.get("retry/count", 0),
+            "finish_reason": stats.get("finish_reason"),
+        }
+    )
+
+
+def run(
+    modes: list[str],
+    site: SyntheticQuotesSite,
+    proxies: int = 4,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Runs the benchmark in each mode.
+
+    :param modes: The modes of the spider to benchmark.
+    :param site: The website to serve.
+    :param proxies: The number of stand-in proxies.
+    :param latency: The latency in seconds added by the proxies to every request.
+    :param jitter: The maximum random latency in seconds added by the proxies on top of ``latency``.
+    :param failure_rate: The probability of a request failing in the proxies.
+    :param overrides: Settings that override the project settings.
+    :return: The results, keyed by mode."""
+    # pylint: disable=too-many-arguments
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with ExitStack() as stack:
+        server = stack.enter_context(SiteServer(site))
+        proxy_urls = [
+            stack.enter_context(StandInProxy(server.url, latency, jitter, failure_rate)).url for _ in range(proxies)
+        ]
+        for mode in modes:
+            queue = context.Queue()
+            process = context.Process(
+                target=_run_mode,
+                args=(mode, f"http://{BENCHMARK_HOST}", proxy_urls, overrides or {}, queue),
+            )
+            process.start()
+            process.join()
+            # The results are small enough to not block the process on exit until they are consumed.
+            results[mode] = queue.get() if not queue.empty() else {"error": f"Exit code {process.exitcode}."}
+
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the benchmark.
+
+    :param argv: The command line arguments, defaults to the arguments of the process."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--modes", nargs="+", default=["nojs", "js"], choices=["nojs", "js"])
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages with quotes in each mode.")
+    parser.add_argument("--authors", type=int, default=300, help="Number of distinct authors.")
+    parser.add_argument("--proxies", type=int, default=4, help="Number of stand-in proxies.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency added by the proxies, in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random latency added, in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a request failing.")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override a setting.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Path to the JSON file with the results.")
+    args = parser.parse_args(argv)
+
+    # Ensure the project is importable, the processes running the spider inherit the paths.
+    if SRC_PATH not in sys.path:
+        sys.path.append(SRC_PATH)
+
+    # Measure the spider and not the delays of the project settings, unless overriden explicitly.
+    overrides: dict[str, Any] = {
+        "AUTOTHROTTLE_ENABLED": False,
+        "ITEM_PIPELINES": {},
+        "LOG_FILE": None,
+        "LOG_LEVEL": "INFO",
+    }
+    overrides.update(dict(item.split("=", maxsplit=1) for item in args.set))
+
+    site = SyntheticQuotesSite(pages=args.pages, authors=args.authors)
+    results = run(args.modes, site, args.proxies, args.latency, args.jitter, args.failure_rate, overrides)
+
+    save_results(
+        args.output,
+        results,
+        scrapy=scrapy.__version__,
+        parameters={key: value for key, value in vars(args).items() if key != "output"},
+    )
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Common definitions for benchmarks."""
+
+import json
+import os
+import platform
+import time
+from typing import Any
+
+
+def save_results(path: str, results: dict[str, Any], **metadata: Any) -> None:
+    """Saves the results of a benchmark to a JSON file, along with the time and the version of Python they were taken
+    with.
+
+    :param path: The path to the JSON file.
+    :param results: The results.
+    :param metadata: Additional metadata of the results, such as the parameters of the benchmark."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w+", encoding="utf8") as stream:
+        stream.write(
+            json.dumps(
+                {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "python": platform.python_version(),
+                    **metadata,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
@@ -0,0 +1,83 @@
+"""Pytest options, fixtures and hooks for benchmarks."""
+
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from .parser import BASELINES_PATH, ParserBenchmark
+from .site import SyntheticQuotesSite
+from .startup import StartupMeasurement, run
+
+#: Stash key of the parser benchmark of the session.
+PARSER_BENCHMARK_KEY = pytest.StashKey[ParserBenchmark]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Adds the options of the benchmarks.
+
+    :param parser: The Pytest parser."""
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-baselines",
+        default=BASELINES_PATH,
+        help="Path to the JSON file with the baselines of the parser benchmarks.",
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.5,
+        help="Relative regression in throughput or memory allowed against the baselines, e.g. 0.5 for a 50%%.",
+    )
+    group.addoption(
+        "--benchmark-update",
+        action="store_true",
+        default=False,
+        help="Replace the existing baselines with the measurements of this session.",
+    )
+
+
+@pytest.fixture(scope="session")
+def parser_benchmark(request: pytest.FixtureRequest) -> Iterator[ParserBenchmark]:
+    """A fixture with the parser benchmark of the session, the baselines are saved at the end of the session if updated.
+
+    :param request: The Pytest request object.
+    :returns: The parser benchmark."""
+    benchmark = ParserBenchmark(
+        path=request.config.getoption("--benchmark-baselines"),
+        threshold=request.config.getoption("--benchmark-threshold"),
+        update=request.config.getoption("--benchmark-update"),
+    )
+    request.config.stash[PARSER_BENCHMARK_KEY] = benchmark
+
+    yield benchmark
+
+    if benchmark.update:
+        benchmark.save()
+
+
+@pytest.fixture(scope="module")
+def site() -> SyntheticQuotesSite:
+    """A fixture with a small synthetic website.
+
+    :returns: The website."""
+    return SyntheticQuotesSite(pages=3, authors=5)
+
+
+@pytest.fixture(scope="module")
+def startup() -> dict[str, StartupMeasurement]:
+    """A fixture with the cold start measurements, with a single repetition so that the test suite remains fast.
+
+    :returns: The measurements, keyed by the name of the command."""
+    return run(repeat=1)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    """Reports the measurements of the parser benchmarks.
+
+    :param terminalreporter: The terminal reporter of Pytest.
+    :param config: The Pytest configuration."""
+    if (benchmark := config.stash.get(PARSER_BENCHMARK_KEY, None)) is not None and benchmark.has_results:
+        terminalreporter.section("parser benchmarks")
+        for line in benchmark.report():
+            terminalreporter.write_line(line)
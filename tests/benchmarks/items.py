@@ -0,0 +1,145 @@
+"""Memory and throughput benchmark of the Scrapy items against the compact items, at a million quotes by default.
+
+The quotes are generated with fresh strings for every field, as they come out of a parsed document, so that the
+interning of the compact items is accounted for. The results are written to a JSON file so that they can be compared
+across changes. It can be executed as below, from the root directory:
+
+.. code-block:: powershell
+
+    python -m tests.benchmarks.items --quotes 1000000"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import itemadapter
+
+from .defs import save_results
+
+#: Default path to the results file.
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".benchmarks", "items.json")
+#: Path to the sources of the project.
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src")
+
+
+@dataclass(frozen=True)
+class ItemsMeasurement:
+    """The measurements of a type of item."""
+
+    #: Memory retained per item, including its fields, in bytes as reported by :mod:`tracemalloc`.
+    bytes_per_item: float
+    #: Number of items created per second.
+    created_per_second: float
+    #: Number of items serialized to JSON bytes per second.
+    serialized_per_second: float
+
+
+def generate_quotes(count: int, authors: int = 300, tags: int = 50) -> Iterator[tuple[str, str, list[str]]]:
+    """Generates the fields of quotes, with fresh strings as if parsed from a document.
+
+    :param count: The number of quotes.
+    :param authors: The number of distinct authors.
+    :param tags: The number of distinct tags.
+    :return: The text, author and tags of each quote."""
+    author_names = [f"Author {i:05d}" for i in range(authors)]
+    tag_names = [f"tag-{i:03d}" for i in range(tags)]
+    for i in range(count):
+        # Encoding and decoding creates a new string, as the parser does for every quote.
+        yield (
+            f"Quote {i} of the synthetic website.",
+            author_names[i % authors].encode().decode(),
+            [tag_names[(i * step) % tags].encode().decode() for step in range(1, 2 + i % 4)],
+        )
+
+
+def measure(
+    factory: Callable[[str, str, list[str]], Any], serialize: Callable[[Any], bytes], count: int
+) -> ItemsMeasurement:
+    """Measures a type of item.
+
+    :param factory: Creates an item from the text, author and tags of a quote.
+    :param serialize: Serializes an item to JSON bytes.
+    :param count: The number of quotes.
+    :return: The measurement."""
+    # Throughput, without tracing as it slows down allocations.
+    gc.collect()
+    start = time.perf_counter()
+    items = [factory(*fields) for fields in generate_quotes(count)]
+    created = count / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for item in items:
+        serialize(item)
+    serialized = count / (time.perf_counter() - start)
+    del items
+
+    # Retained memory, with tracing.
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        items = [factory(*fields) for fields in generate_quotes(count)]
+    finally:
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+    return ItemsMeasurement(
+        bytes_per_item=retained / count, created_per_second=created, serialized_per_second=serialized
+    )
+
+
+def run(count: int) -> dict[str, ItemsMeasurement]:
+    """Measures the Scrapy and compact quote items.
+
+    :param count: The number of quotes.
+    :return: The measurements, keyed by the name of the type of item."""
+    # pylint: disable=import-outside-toplevel
+    from scrapy_tor_playwright_demo.items import CompactQuoteItem, QuoteItem
+
+    return {
+        "QuoteItem": measure(
+            lambda text, author, tags: QuoteItem(text=text, author=author, tags=tags),
+            lambda item: json.dumps(itemadapter.ItemAdapter(item).asdict(), indent=2).encode("utf8"),
+            count,
+        ),
+        "CompactQuoteItem": measure(
+            lambda text, author, tags: CompactQuoteItem(text=text, author=author, tags=tags),
+            lambda item: item.to_bytes(),
+            count,
+        ),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the benchmark.
+
+    :param argv: The command line arguments, defaults to the arguments of the process."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--quotes", type=int, default=1_000_000, help="Number of quotes of each type of item.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Path to the JSON file with the results.")
+    args = parser.parse_args(argv)
+
+    if SRC_PATH not in sys.path:
+        sys.path.append(SRC_PATH)
+
+    results = run(args.quotes)
+
+    save_results(
+        args.output, {name: asdict(measurement) for name, measurement in results.items()}, quotes=args.quotes
+    )
+    for name, measurement in results.items():
+        print(
+            f"{name}: {measurement.bytes_per_item:.0f} bytes/item, {measurement.created_per_second:.0f} created/s, "
+            f"{measurement.serialized_per_second:.0f} serialized/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Micro-benchmarks of the parsers, with baselines to detect regressions in throughput and memory."""
+
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+from scrapy_tor_playwright_demo.items.defs import ParserBase
+
+#: Default path to the file with the baselines.
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".benchmarks", "parser.json")
+
+
+@dataclass(frozen=True)
+class ParserMeasurement:
+    """The measurements of a parser on a page type."""
+
+    #: Number of parses per second, from the fastest repetition.
+    ops_per_second: float
+    #: Peak of memory allocated during a parse, in bytes, as reported by :mod:`tracemalloc`.
+    peak_bytes: int
+
+
+class ParserBenchmark:
+    """Measures parsers on page types and compares the measurements against stored baselines.
+
+    A measurement regresses when its throughput is below the baseline, or its memory peak above the baseline, by more
+    than the given threshold. The baselines are only replaced by the new measurements, and saved, when updating, and
+    page types without a baseline are otherwise not compared."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, path: str = BASELINES_PATH, threshold: float = 0.5, update: bool = False) -> None:
+        """Class constructor.
+
+        :param path: Path to the JSON file with the baselines.
+        :param threshold: The relative regression allowed, e.g. ``0.5`` for a 50%.
+        :param update: Whether to replace existing baselines with new measurements."""
+        #: Path to the JSON file with the baselines.
+        self.__path = path
+        #: The relative regression allowed.
+        self.__threshold = threshold
+        #: Whether to replace existing baselines.
+        self.__update = update
+        #: The baselines, keyed by page type.
+        self.__baselines: dict[str, ParserMeasurement] = {}
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf8") as stream:
+                self.__baselines = {key: ParserMeasurement(**value) for key, value in json.load(stream).items()}
+        #: The measurements of this session, keyed by page type.
+        self.__results: dict[str, ParserMeasurement] = {}
+        #: A logger that discards the debug messages of the parsers, so that logging does not skew the measurements.
+        self.__logger = logging.getLogger("benchmark")
+        self.__logger.setLevel(logging.WARNING)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def measure(
+        self,
+        name: str,
+        parser_factory: Callable[[logging.Logger], ParserBase],
+        iterations: int,
+        repeat: int = 3,
+    ) -> list[str]:
+        """Measures a parser on a page type and compares the measurement with the baseline.
+
+        :param name: The name of the page type.
+        :param parser_factory: Creates a parser with the given logger, ready to parse the page.
+        :param iterations: The number of parses in each repetition.
+        :param repeat: The number of repetitions, the fastest one is taken.
+        :return: The descriptions of the regressions, empty if there are none."""
+        # Measure throughput, taking the fastest repetition to reduce noise.
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                parser_factory(self.__logger).parse()
+            best = min(best, time.perf_counter() - start)
+
+        # Measure memory on a separate parse, as tracing allocations slows down the parse.
+        tracemalloc.start()
+        try:
+            parser_factory(self.__logger).parse()
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        measurement = ParserMeasurement(ops_per_second=iterations / best, peak_bytes=peak)
+        self.__results[name] = measurement
+
+        # Compare with the baseline, or replace the baseline when updating.
+        regressions = []
+        if self.__update:
+            self.__baselines[name] = measurement
+        elif (baseline := self.__baselines.get(name)) is not None:
+            if measurement.ops_per_second < baseline.ops_per_second * (1 - self.__threshold):
+                regressions.append(
+                    f"'{name}' throughput regressed to {measurement.ops_per_second:.2f} ops/s "
+                    f"from a baseline of {baseline.ops_per_second:.2f} ops/s."
+                )
+            if measurement.peak_bytes > baseline.peak_bytes * (1 + self.__threshold):
+                regressions.append(
+                    f"'{name}' memory peak regressed to {measurement.peak_bytes} bytes "
+                    f"from a baseline of {baseline.peak_bytes} bytes."
+                )
+
+        return regressions
+
+    def baseline(self, name: str) -> ParserMeasurement | None:
+        """Returns the baseline of a page type.
+
+        :param name: The name of the page type.
+        :return: The baseline, ``None`` if there is none."""
+        return self.__baselines.get(name)
+
+    def save(self) -> None:
+        """Saves the baselines to the file."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.__path)), exist_ok=True)
+        with open(self.__path, "w+", encoding="utf8") as stream:
+            stream.write(json.dumps({key: asdict(value) for key, value in sorted(self.__baselines.items())}, indent=2))
+
+    def report(self) -> list[str]:
+        """Creates a report of the measurements of this session.
+
+        :return: The lines of the report."""
+        lines = [f"{'page type':<24}{'ops/s':>12}{'baseline ops/s':>16}{'peak KiB':>12}{'baseline KiB':>14}"]
+        for name, result in sorted(self.__results.items()):
+            baseline = self.__baselines.get(name)
+            baselines = (
+                (f"{baseline.ops_per_second:>16.2f}", f"{baseline.peak_bytes / 1024:>14.1f}")
+                if baseline is not None
+                else (f"{'-':>16}", f"{'-':>14}")
+            )
+            lines.append(
+                f"{name:<24}{result.ops_per_second:>12.2f}{baselines[0]}{result.peak_bytes / 1024:>12.1f}{baselines[1]}"
+            )
+        return lines
+
+    @property
+    def update(self) -> bool:
+        """Whether the baselines are replaced by the measurements of this session.
+
+        :return: ``True`` if updating, ``False`` otherwise."""
+        return self.__update
+
+    @property
+    def has_results(self) -> bool:
+        """Whether there are measurements in this session.
+
+        :return: ``True`` if there are measurements, ``False`` otherwise."""
+        return bool(self.__results)
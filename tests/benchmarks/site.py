@@ -0,0 +1,383 @@
+"""A synthetic stand-in of the quotes website and of the proxies in front of it, served locally for benchmarks.
+
+The pages are generated from the HTML files in ``tests/assets/quotes``, so that they keep the exact same structure as
+the real website, and are served from memory by a local HTTP server. Proxies are local HTTP forward proxies that route
+every request to the local server regardless of the host requested, and which can inject latency and failures. The Tor
+control port of the proxies is a local TCP server that acknowledges and records the signals."""
+
+import contextlib
+import copy
+import http.client
+import http.server
+import os
+import random
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import bs4
+
+#: Path to the folder with the HTML files used as templates.
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "quotes")
+
+
+@dataclass(frozen=True)
+class SyntheticQuote:
+    """A quote in the synthetic website."""
+
+    #: The text of the quote, without quotation marks.
+    text: str
+    #: The name of the author of the quote.
+    author: str
+    #: The tags of the quote.
+    tags: tuple[str, ...]
+
+    @property
+    def author_slug(self) -> str:
+        """The slug of the author, as used in the link to the author details.
+
+        :return: The slug."""
+        return self.author.replace(" ", "-").replace(".", "")
+
+
+@dataclass
+class SyntheticQuotesSite:
+    """A synthetic clone of the quotes website, with the pages rendered in memory keyed by path.
+
+    Both the non JavaScript version, under ``/``, and the JavaScript version, under ``/js/``, are generated. The
+    JavaScript pages are served already rendered, as saved in the assets, thus a browser does not need to run any
+    script to find the quotes."""
+
+    #: Number of pages with quotes in each version of the website.
+    pages: int = 200
+    #: Number of distinct authors.
+    authors: int = 300
+    #: Number of quotes in each page.
+    quotes_per_page: int = 10
+    #: Seed for the random generator, so that the website is the same across runs.
+    seed: int = 0
+    #: The rendered pages, keyed by path.
+    documents: dict[str, bytes] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Renders all the pages of the website."""
+        rng = random.Random(self.seed)
+        author_names = [f"Author {i:05d}" for i in range(self.authors)]
+        tag_names = [f"tag-{i:03d}" for i in range(50)]
+
+        # Load the templates.
+        nojs_template = self.__load("first_page_nojs.html")
+        js_template = self.__load("first_page_js.html")
+        author_template = self.__load("author_page_nojs.html")
+
+        # Render the pages with quotes.
+        for page in range(1, self.pages + 1):
+            quotes = [
+                SyntheticQuote(
+                    text=f"Quote {(page - 1) * self.quotes_per_page + i} of the synthetic website.",
+                    author=author_names[((page - 1) * self.quotes_per_page + i) % self.authors],
+                    tags=tuple(sorted(rng.sample(tag_names, rng.randint(1, 5)))),
+                )
+                for i in range(self.quotes_per_page)
+            ]
+            nojs_page = self.render_quotes_page(nojs_template, quotes, page, self.pages, javascript=False)
+            js_page = self.render_quotes_page(js_template, quotes, page, self.pages, javascript=True)
+            self.documents[f"/page/{page}/"] = nojs_page
+            self.documents[f"/js/page/{page}/"] = js_page
+            if page == 1:
+                self.documents["/"] = nojs_page
+                self.documents["/js/"] = js_page
+
+        # Render the author pages.
+        for name in author_names:
+            quote = SyntheticQuote(text="", author=name, tags=())
+            self.documents[f"/author/{quote.author_slug}/"] = self.render_author_page(author_template, name)
+
+        # The JavaScript version requests this script, serve it empty as the pages are already rendered.
+        self.documents["/static/jquery.js"] = b""
+
+    @staticmethod
+    def __load(name: str) -> bs4.BeautifulSoup:
+        """Loads a template from the assets.
+
+        :param name: The name of the HTML file in the assets.
+        :return: The parsed template."""
+        with open(os.path.join(ASSETS_PATH, name), "rb") as stream:
+            # The HTML of the author page is badly formatted, fix it so that the rendered pages are well formed.
+            return bs4.BeautifulSoup(stream.read().replace(b"</h2>", b"</h3>"), "html.parser")
+
+    @staticmethod
+    def render_quotes_page(
+        template: bs4.BeautifulSoup,
+        quotes: list[SyntheticQuote],
+        page: int,
+        pages: int,
+        javascript: bool,
+    ) -> bytes:
+        """Renders a page with quotes from a template page with quotes.
+
+        :param template: The template, one of the pages with quotes in the assets.
+        :param quotes: The quotes to render in the page.
+        :param page: The number of the page, starting at one.
+        :param pages: The total number of pages, to know if there is a next page.
+        :param javascript: If the template is the JavaScript version of the website.
+        :return: The rendered page, encoded as UTF-8."""
+        soup = copy.copy(template)
+        prefix = "/js" if javascript else ""
+
+        # Replace the quotes in the template with the given quotes, using the first one as a model.
+        existing = soup.find_all("div", {"class": "quote"})
+        for quote in quotes:
+            elem = SyntheticQuotesSite.__render_quote(soup, existing[0], quote, javascript)
+            existing[-1].insert_after(elem)
+            existing.append(elem)
+        for elem in existing[: len(existing) - len(quotes)]:
+            elem.decompose()
+
+        # Rebuild the pager with the links to the previous and next pages.
+        SyntheticQuotesSite.__render_pager(soup, page, pages, prefix)
+
+        return soup.encode("utf8")
+
+    @staticmethod
+    def __render_quote(
+        soup: bs4.BeautifulSoup, model: bs4.Tag, quote: SyntheticQuote, javascript: bool
+    ) -> bs4.Tag:
+        """Renders a quote from the element of a quote in a template page with quotes.
+
+        :param soup: The page being rendered.
+        :param model: The element of the quote used as a model.
+        :param quote: The quote to render.
+        :param javascript: If the template is the JavaScript version of the website.
+        :return: The element of the rendered quote."""
+        elem = copy.copy(model)
+        elem.find("span", {"class": "text"}).string = f"“{quote.text}”"
+        elem.find("small", {"class": "author"}).string = quote.author
+        if (author_link := elem.find("a", href=True)) is not None and not javascript:
+            author_link["href"] = f"/author/{quote.author_slug}"
+        tags = elem.find("div", {"class": "tags"})
+        for tag in tags.find_all("a", {"class": "tag"}):
+            tag.decompose()
+        for name in quote.tags:
+            tag = soup.new_tag("a", attrs={"class": "tag"})
+            if not javascript:
+                tag["href"] = f"/tag/{name}/page/1/"
+            tag.string = name
+            tags.append(tag)
+
+        return elem
+
+    @staticmethod
+    def __render_pager(soup: bs4.BeautifulSoup, page: int, pages: int, prefix: str) -> None:
+        """Rebuilds the pager of a page with quotes, with the links to the previous and next pages.
+
+        :param soup: The page being rendered.
+        :param page: The number of the page, starting at one.
+        :param pages: The total number of pages.
+        :param prefix: The prefix of the paths of the version of the website."""
+        pager = soup.find("nav").find("ul", {"class": "pager"})
+        pager.clear()
+        for name, number, text in (("previous", page - 1, "Previous"), ("next", page + 1, "Next")):
+            if 1 <= number <= pages:
+                item = soup.new_tag("li", attrs={"class": name})
+                link = soup.new_tag("a", href=f"{prefix}/page/{number}/")
+                link.string = text
+                item.append(link)
+                pager.append(item)
+
+    @staticmethod
+    def render_author_page(template: bs4.BeautifulSoup, name: str) -> bytes:
+        """Renders an author page from the template author page.
+
+        :param template: The template, the author page in the assets.
+        :param name: The name of the author.
+        :return: The rendered page, encoded as UTF-8."""
+        soup = copy.copy(template)
+        soup.find(class_="author-title").string = name
+        soup.find("div", {"class": "author-description"}).string = f"Description of {name}."
+
+        return soup.encode("utf8")
+
+
+class _ThreadedServer(http.server.ThreadingHTTPServer):
+    """A threaded HTTP server bound to a random local port and served from a daemon thread."""
+
+    daemon_threads = True
+
+    def __init__(self, handler: type[http.server.BaseHTTPRequestHandler]) -> None:
+        """Class constructor.
+
+        :param handler: The request handler."""
+        super().__init__(("127.0.0.1", 0), handler)
+        #: The thread serving requests.
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self) -> "_ThreadedServer":
+        """Starts serving requests.
+
+        :return: The server."""
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stops serving requests and releases the port.
+
+        :param args: The exception details, if any."""
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def url(self) -> str:
+        """The URL of the server.
+
+        :return: The URL."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class SiteServer(_ThreadedServer):
+    """A local HTTP server for a :class:`SyntheticQuotesSite`."""
+
+    def __init__(self, site: SyntheticQuotesSite) -> None:
+        """Class constructor.
+
+        :param site: The website to serve."""
+        documents = site.documents
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            """Serves the documents of the website."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Serves a document, or a not found error."""
+                path = urlsplit(self.path).path
+                body = documents.get(path if path.endswith((".js", "/")) else f"{path}/")
+                content_type = "application/javascript" if path.endswith(".js") else "text/html; charset=utf-8"
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+                """Disables logging of requests.
+
+                :param args: Unused."""
+
+        super().__init__(Handler)
+
+
+class StandInProxy(_ThreadedServer):
+    """A local HTTP forward proxy that routes every request to an upstream server, regardless of the host requested,
+    with optional latency and failure injection.
+
+    This stands in for the TOR proxies in ``ROTATING_PROXY_LIST``, the website must be requested over plain HTTP with a
+    host that is not a loopback address, otherwise browsers bypass the proxy."""
+
+    def __init__(self, upstream: str, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0) -> None:
+        """Class constructor.
+
+        :param upstream: The URL of the upstream server, e.g. the URL of a :class:`SiteServer`.
+        :param latency: The latency in seconds added to every request.
+        :param jitter: The maximum random latency in seconds added on top of ``latency``.
+        :param failure_rate: The probability of a request failing with a ``503`` status code."""
+        upstream_netloc = urlsplit(upstream).netloc
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            """Forwards requests to the upstream server."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Forwards the request after injecting latency and failures."""
+                time.sleep(latency + random.uniform(0.0, jitter))
+                if random.random() < failure_rate:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                # Forward the path of the request only, the host is always the upstream server.
+                parts = urlsplit(self.path)
+                with contextlib.closing(http.client.HTTPConnection(upstream_netloc, timeout=30)) as connection:
+                    connection.request("GET", parts.path + (f"?{parts.query}" if parts.query else ""))
+                    response = connection.getresponse()
+                    body = response.read()
+
+                self.send_response(response.status)
+                self.send_header("Content-Type", response.getheader("Content-Type", "text/html"))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+                """Disables logging of requests.
+
+                :param args: Unused."""
+
+        super().__init__(Handler)
+
+
+class StandInTorControl(socketserver.ThreadingTCPServer):
+    """A local stand-in for the control port of a Tor proxy, bound to a random local port and served from a daemon
+    thread, that implements ``AUTHENTICATE``, ``SIGNAL`` and ``QUIT``, recording the signals it acknowledges."""
+
+    daemon_threads = True
+
+    def __init__(self, password: str | None = None) -> None:
+        """Class constructor.
+
+        :param password: The password of the control port, ``None`` if it accepts any authentication."""
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            """Replies to the commands of a connection."""
+
+            def handle(self) -> None:
+                """Replies to each command until the connection is closed or ``QUIT`` is received."""
+                authenticated = False
+                for raw in self.rfile:
+                    command, _, argument = raw.decode("utf8").rstrip("\r\n").partition(" ")
+                    if command == "AUTHENTICATE":
+                        unquoted = argument[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+                        authenticated = password is None or unquoted == password
+                        self.wfile.write(b"250 OK\r\n" if authenticated else b"515 Authentication failed\r\n")
+                    elif command == "QUIT":
+                        self.wfile.write(b"250 closing connection\r\n")
+                        return
+                    elif not authenticated:
+                        self.wfile.write(b"514 Authentication required.\r\n")
+                    elif command == "SIGNAL":
+                        server.signals.append(argument)
+                        self.wfile.write(b"250 OK\r\n")
+                    else:
+                        self.wfile.write(f'510 Unrecognized command "{command}"\r\n'.encode("utf8"))
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        #: The signals acknowledged, in the order they were received.
+        self.signals: list[str] = []
+        #: The thread serving connections.
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandInTorControl":
+        """Starts serving connections.
+
+        :return: The server."""
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stops serving connections and releases the port.
+
+        :param args: The exception details, if any."""
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def port(self) -> int:
+        """The port of the server.
+
+        :return: The port."""
+        return self.server_address[1]
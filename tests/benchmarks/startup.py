@@ -0,0 +1,148 @@
+"""Cold start benchmark of the project, measured with ``python -X importtime`` in fresh interpreters.
+
+It measures the import of :mod:`scrapy_tor_playwright_demo.items`, and a ``scrapy crawl`` that is closed as soon as
+the spider opens, without download handlers so that neither a browser nor the network are needed. The results are
+written to a JSON file so that they can be compared across changes. It can be executed as below, from the root
+directory:
+
+.. code-block:: powershell
+
+    python -m tests.benchmarks.startup --repeat 5"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+from .defs import save_results
+
+#: Default path to the results file.
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".benchmarks", "startup.json")
+#: Path to the sources of the project.
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src")
+#: Dependencies that must only be imported on first use, as they load the browser and parsing stacks.
+HEAVY_MODULES = ("bs4", "playwright", "playwright.async_api", "playwright_stealth", "scrapy_playwright")
+
+
+@dataclass(frozen=True)
+class StartupMeasurement:
+    """The measurements of a cold start."""
+
+    #: Time from the start of the interpreter to its exit, in seconds, the fastest of the repetitions.
+    wall_time: float
+    #: Time spent importing modules, in seconds, as reported by ``-X importtime``.
+    import_time: float
+    #: Cumulative import time of every imported module, in seconds.
+    modules: dict[str, float] = field(repr=False)
+
+
+def parse_importtime(output: str) -> tuple[float, dict[str, float]]:
+    """Parses the output of ``python -X importtime``.
+
+    :param output: The standard error of the interpreter.
+    :return: The total import time and the cumulative import time of every module, both in seconds."""
+    total = 0.0
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|", maxsplit=2)
+        if not cumulative.strip().isdigit():
+            # The header of the output.
+            continue
+        seconds = int(cumulative) / 1_000_000
+        modules[name.strip()] = seconds
+        # The modules imported by other modules are indented, their time is in the cumulative time of the importer.
+        if not name.startswith("  "):
+            total += seconds
+    return total, modules
+
+
+def measure(args: list[str], repeat: int = 3) -> StartupMeasurement:
+    """Measures the cold start of a Python command, run from the sources of the project.
+
+    :param args: The arguments of the interpreter, after ``-X importtime``.
+    :param repeat: The number of repetitions, the fastest is kept.
+    :return: The measurement.
+    :raises subprocess.CalledProcessError: The command failed."""
+    # Measured without the coverage that pytest-cov enables in subprocesses, which slows down the interpreter.
+    env = {name: value for name, value in os.environ.items() if not name.startswith("COV_CORE_")}
+    env["PYTHONPATH"] = os.pathsep.join(path for path in (SRC_PATH, os.environ.get("PYTHONPATH")) if path)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=SRC_PATH,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        wall_time = time.perf_counter() - start
+        import_time, modules = parse_importtime(process.stderr)
+        if best is None or wall_time < best.wall_time:
+            best = StartupMeasurement(wall_time=wall_time, import_time=import_time, modules=modules)
+    assert best is not None
+    return best
+
+
+def run(repeat: int = 3) -> dict[str, StartupMeasurement]:
+    """Measures the import of the items and a ``scrapy crawl`` that closes as soon as the spider opens.
+
+    :param repeat: The number of repetitions of each measurement.
+    :return: The measurements, keyed by the name of the command."""
+    with tempfile.TemporaryDirectory() as folder:
+        crawl = [
+            "-m",
+            "scrapy",
+            "crawl",
+            "quotes",
+            "-a",
+            "mode=nojs",
+            "-s",
+            'DOWNLOAD_HANDLERS={"http": null, "https": null}',
+            "-s",
+            "ROTATING_PROXY_LIST=",
+            "-s",
+            "CLOSESPIDER_TIMEOUT=0.01",
+            "-s",
+            "TELNETCONSOLE_ENABLED=0",
+            "-s",
+            f"LOG_FILE={os.path.join(folder, 'scrapy.log')}",
+            "-s",
+            f"FS_PIPELINE_FOLDER={os.path.join(folder, 'fs')}",
+            "-s",
+            f"SUBRESOURCE_CACHE_DIR={os.path.join(folder, 'subresources')}",
+        ]
+        return {
+            "import_items": measure(["-c", "import scrapy_tor_playwright_demo.items"], repeat),
+            "scrapy_crawl": measure(crawl, repeat),
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the benchmark.
+
+    :param argv: The command line arguments, defaults to the arguments of the process."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repetitions of each command.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Path to the JSON file with the results.")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+
+    save_results(args.output, {name: asdict(measurement) for name, measurement in results.items()})
+    for name, measurement in results.items():
+        heavy = [module for module in HEAVY_MODULES if module in measurement.modules] or ["none"]
+        print(
+            f"{name}: {measurement.wall_time * 1000:.0f} ms wall, {measurement.import_time * 1000:.0f} ms importing, "
+            f"heavy modules imported: {', '.join(heavy)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,4 +5,5 @@ pytest_plugins = [
     ## Third Party Plugins #############################################################################################
     ## Project Plugins #################################################################################################
     "tests.fixtures",
+    "tests.benchmarks.fixtures",
 ]
@@ -4,7 +4,10 @@ import os
 from collections.abc import Iterator
 
 import pytest
+import scrapy
+import scrapy.crawler
 import scrapy.http
+import scrapy.utils.test
 
 
 @pytest.fixture()
@@ -51,3 +54,26 @@ def response(request: pytest.FixtureRequest) -> Iterator[scrapy.http.Response]:
 
     # Yield the response.
     yield scrapy.http.HtmlResponse(request=scrapy.http.Request(url), url=url, body=html_contents, status=status)
+
+
+@pytest.fixture()
+def crawler(request: pytest.FixtureRequest) -> Iterator[scrapy.crawler.Crawler]:
+    """A fixture that creates a crawler with its settings applied, but without running it, suitable to create
+    extensions, middlewares and pipelines.
+
+    The example below shows an example on how to use the fixture and its parameters:
+
+    .. code-block:: python
+
+        @pytest.mark.parametrize("crawler", [{"INSTRUMENTATION_ENABLED": True}], indirect=True)
+        def test_example(crawler: scrapy.crawler.Crawler):
+            pass
+
+    The parameter is a dictionary with the settings of the crawler, it is optional and defaults to no settings. The
+    built-in extensions of Scrapy are disabled, so that signals can be sent without a running crawl.
+
+    :param request: The Pytest request object.
+    :returns: The crawler."""
+    settings: dict = {"EXTENSIONS_BASE": {}, **getattr(request, "param", {})}
+
+    yield scrapy.utils.test.get_crawler(scrapy.Spider, settings)
@@ -0,0 +1,335 @@
+"""An in-process stand-in of a Redis server, for the tests of the frontiers of sharded crawls."""
+
+import threading
+import time
+from typing import Any
+
+
+class MemoryRedis:
+    """In-process stand-in for a Redis client, with the subset of the commands of ``redis.Redis`` used by
+    :class:`~scrapy_tor_playwright_demo.frontier.frontier.RedisFrontier`.
+
+    Instances are shared per URL, like connections to the same server, and each command and transaction is atomic among
+    threads.
+    Keys, members and values are stored and returned as bytes, as by a Redis server."""
+
+    #: The instances, per URL.
+    __instances: dict[str, "MemoryRedis"] = {}
+    #: The lock for the instances.
+    __instances_lock = threading.Lock()
+
+    ## Private API #####################################################################################################
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The lock for the commands, reentrant for transactions.
+        self.__lock = threading.RLock()
+        #: The values, by key: bytes for strings, and sets, dictionaries or dictionaries of scores for the others.
+        self.__data: dict[bytes, Any] = {}
+        #: The time of expiration of keys, in seconds of the monotonic clock.
+        self.__expiry: dict[bytes, float] = {}
+
+    @staticmethod
+    def __encode(value: Any) -> bytes:
+        """Encodes a key, member or value to bytes, as the Redis client.
+
+        :param value: The value.
+        :return: The encoded value."""
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, float):
+            return repr(value).encode("utf8")
+
+        return str(value).encode("utf8")
+
+    def __get(self, name: Any, default: Any = None) -> Any:
+        """Returns the value of a key, removing it first if expired.
+
+        :param name: The key.
+        :param default: The value to store and return if the key does not exist, ``None`` to not store it.
+        :return: The value, ``None`` if the key does not exist and there is no default."""
+        key = self.__encode(name)
+        if key in self.__expiry and self.__expiry[key] <= time.monotonic():
+            del self.__expiry[key]
+            self.__data.pop(key, None)
+        if key not in self.__data and default is not None:
+            self.__data[key] = default
+
+        return self.__data.get(key)
+
+    def __discard_empty(self, name: Any) -> None:
+        """Removes a key if its set, hash or sorted set is empty, as a Redis server does.
+
+        :param name: The key."""
+        key = self.__encode(name)
+        if key in self.__data and not self.__data[key]:
+            del self.__data[key]
+            self.__expiry.pop(key, None)
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @classmethod
+    def from_url(cls, url: str) -> "MemoryRedis":
+        """Returns the instance for an URL, creating it if it does not exist.
+
+        :param url: The URL.
+        :return: The instance."""
+        with cls.__instances_lock:
+            return cls.__instances.setdefault(url, cls())
+
+    def pipeline(self, transaction: bool = True) -> "_MemoryRedisPipeline":
+        """Returns a pipeline, whose commands are executed at once, always atomically.
+
+        :param transaction: Unused, the commands are always executed in a transaction.
+        :return: The pipeline."""
+        # pylint: disable=unused-argument
+        return _MemoryRedisPipeline(self, self.__lock)
+
+    def close(self) -> None:
+        """Closes the client, the data is kept for other clients of the same URL."""
+
+    def delete(self, *names: Any) -> int:
+        """Removes keys.
+
+        :param names: The keys.
+        :return: The number of keys removed."""
+        with self.__lock:
+            removed = sum(1 for name in names if self.__get(name) is not None)
+            for name in names:
+                self.__data.pop(self.__encode(name), None)
+                self.__expiry.pop(self.__encode(name), None)
+
+            return removed
+
+    def exists(self, *names: Any) -> int:
+        """Counts the keys that exist.
+
+        :param names: The keys.
+        :return: The number of keys."""
+        with self.__lock:
+            return sum(1 for name in names if self.__get(name) is not None)
+
+    # The arguments are named as those of the Redis client.
+    # pylint: disable-next=invalid-name
+    def set(self, name: Any, value: Any, px: int | None = None, nx: bool = False) -> bool | None:
+        """Sets a string.
+
+        :param name: The key.
+        :param value: The value.
+        :param px: Milliseconds until the key expires, ``None`` to never expire.
+        :param nx: Only set the key if it does not exist.
+        :return: ``True`` if set, ``None`` otherwise."""
+        with self.__lock:
+            if nx and self.__get(name) is not None:
+                return None
+            key = self.__encode(name)
+            self.__data[key] = self.__encode(value)
+            self.__expiry.pop(key, None)
+            if px is not None:
+                self.__expiry[key] = time.monotonic() + px / 1000
+
+            return True
+
+    def pttl(self, name: Any) -> int:
+        """Returns the time to live of a key.
+
+        :param name: The key.
+        :return: The milliseconds until the key expires, -1 if it never expires, -2 if it does not exist."""
+        with self.__lock:
+            if self.__get(name) is None:
+                return -2
+            if (expiry := self.__expiry.get(self.__encode(name))) is None:
+                return -1
+
+            return max(0, round((expiry - time.monotonic()) * 1000))
+
+    def sadd(self, name: Any, *values: Any) -> int:
+        """Adds members to a set.
+
+        :param name: The key.
+        :param values: The members.
+        :return: The number of members added."""
+        with self.__lock:
+            members = self.__get(name, set())
+            size = len(members)
+            members.update(self.__encode(value) for value in values)
+
+            return len(members) - size
+
+    def hset(self, name: Any, key: Any = None, value: Any = None, mapping: dict | None = None) -> int:
+        """Sets fields of a hash.
+
+        :param name: The key.
+        :param key: A field.
+        :param value: The value of the field.
+        :param mapping: Other fields and their values.
+        :return: The number of fields added."""
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        with self.__lock:
+            fields = self.__get(name, {})
+            size = len(fields)
+            fields.update({self.__encode(field): self.__encode(field_value) for field, field_value in items.items()})
+
+            return len(fields) - size
+
+    def hmget(self, name: Any, keys: list) -> list[bytes | None]:
+        """Returns the values of fields of a hash.
+
+        :param name: The key.
+        :param keys: The fields.
+        :return: The values, ``None`` for the fields that do not exist."""
+        with self.__lock:
+            fields = self.__get(name) or {}
+
+            return [fields.get(self.__encode(key)) for key in keys]
+
+    def hgetall(self, name: Any) -> dict[bytes, bytes]:
+        """Returns the fields of a hash.
+
+        :param name: The key.
+        :return: The fields and their values."""
+        with self.__lock:
+            return dict(self.__get(name) or {})
+
+    def hdel(self, name: Any, *keys: Any) -> int:
+        """Removes fields of a hash.
+
+        :param name: The key.
+        :param keys: The fields.
+        :return: The number of fields removed."""
+        with self.__lock:
+            fields = self.__get(name) or {}
+            removed = sum(1 for key in keys if fields.pop(self.__encode(key), None) is not None)
+            self.__discard_empty(name)
+
+            return removed
+
+    def hlen(self, name: Any) -> int:
+        """Counts the fields of a hash.
+
+        :param name: The key.
+        :return: The number of fields."""
+        with self.__lock:
+            return len(self.__get(name) or {})
+
+    # The arguments are named as those of the Redis client.
+    # pylint: disable-next=invalid-name
+    def zadd(self, name: Any, mapping: dict, nx: bool = False) -> int:
+        """Adds members to a sorted set, or updates their scores.
+
+        :param name: The key.
+        :param mapping: The members and their scores.
+        :param nx: Only add new members, do not update the scores of existing members.
+        :return: The number of members added."""
+        with self.__lock:
+            scores = self.__get(name, {})
+            size = len(scores)
+            for member, score in mapping.items():
+                if not nx or self.__encode(member) not in scores:
+                    scores[self.__encode(member)] = float(score)
+
+            return len(scores) - size
+
+    def zrange(self, name: Any, start: int, end: int, withscores: bool = False) -> list:
+        """Returns a range of members of a sorted set, ordered by score and then by member.
+
+        :param name: The key.
+        :param start: The index of the first member, negative from the end.
+        :param end: The index of the last member, included, negative from the end.
+        :param withscores: Return the members with their scores.
+        :return: The members, or tuples with the members and their scores."""
+        with self.__lock:
+            members = sorted((self.__get(name) or {}).items(), key=lambda item: (item[1], item[0]))
+            members = members[start : (end + 1) or None]
+
+            return members if withscores else [member for member, _ in members]
+
+    def zrem(self, name: Any, *values: Any) -> int:
+        """Removes members of a sorted set.
+
+        :param name: The key.
+        :param values: The members.
+        :return: The number of members removed."""
+        with self.__lock:
+            scores = self.__get(name) or {}
+            removed = sum(1 for value in values if scores.pop(self.__encode(value), None) is not None)
+            self.__discard_empty(name)
+
+            return removed
+
+    def zcard(self, name: Any) -> int:
+        """Counts the members of a sorted set.
+
+        :param name: The key.
+        :return: The number of members."""
+        with self.__lock:
+            return len(self.__get(name) or {})
+
+    def zunionstore(self, dest: Any, keys: list, aggregate: str | None = None) -> int:
+        """Stores the union of sorted sets, adding the scores of the members in several sets.
+
+        :param dest: The key of the union.
+        :param keys: The keys of the sorted sets.
+        :param aggregate: ``MIN`` or ``MAX`` to keep the minimum or maximum score, ``None`` to add them.
+        :return: The number of members of the union."""
+        merge = {"MIN": min, "MAX": max}.get((aggregate or "SUM").upper(), lambda *scores: sum(scores))
+        with self.__lock:
+            union: dict[bytes, float] = {}
+            for key in keys:
+                for member, score in (self.__get(key) or {}).items():
+                    union[member] = merge(union[member], score) if member in union else score
+            self.delete(dest)
+            if union:
+                self.__data[self.__encode(dest)] = union
+
+            return len(union)
+
+
+class _MemoryRedisPipeline:
+    """Pipeline of :class:`MemoryRedis`, it queues the commands and executes them at once atomically."""
+
+    ## Private API #####################################################################################################
+    def __init__(self, client: MemoryRedis, lock: threading.RLock) -> None:
+        """Class constructor.
+
+        :param client: The client that executes the commands.
+        :param lock: The lock for the commands of the client."""
+        #: The client that executes the commands.
+        self.__client = client
+        #: The lock for the commands of the client.
+        self.__lock = lock
+        #: The commands queued, with their arguments.
+        self.__commands: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        """Returns a function that queues a command of the client.
+
+        :param name: The name of the command.
+        :raises AttributeError: The client has no such command.
+        :return: The function, which returns the pipeline."""
+        if name.startswith("_") or not callable(getattr(self.__client, name, None)):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs) -> "_MemoryRedisPipeline":
+            """Queues the command.
+
+            :param args: The positional arguments of the command.
+            :param kwargs: The keyword arguments of the command.
+            :return: The pipeline."""
+            self.__commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def execute(self) -> list:
+        """Executes the commands queued.
+
+        :return: The result of each command."""
+        commands, self.__commands = self.__commands, []
+        with self.__lock:
+            return [getattr(self.__client, name)(*args, **kwargs) for name, args, kwargs in commands]
@@ -0,0 +1,79 @@
+"""Tests for the synthetic stand-in of the quotes website used in benchmarks."""
+
+import logging
+import urllib.error
+import urllib.request
+
+import pytest
+import pytest_check as check
+import scrapy.http
+
+from scrapy_tor_playwright_demo.items import AuthorItem, QuoteItem, QuotesParser
+from tests.benchmarks.site import SiteServer, StandInProxy, SyntheticQuotesSite
+
+
+class TestSyntheticQuotesSite:
+    """A collection of tests for the synthetic quotes website."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+    @staticmethod
+    def __parse(site: SyntheticQuotesSite, path: str) -> QuotesParser:
+        """Parses a page of the website.
+
+        :param site: The website.
+        :param path: The path of the page.
+        :return: The parser after parsing the page."""
+        url = f"http://quotes.bench{path}"
+        response = scrapy.http.HtmlResponse(
+            request=scrapy.http.Request(url), url=url, body=site.documents[path], status=200
+        )
+        return QuotesParser(response, logger=logging.getLogger()).parse()
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        ("path", "requests"),
+        [("/", 11), ("/page/2/", 11), ("/page/3/", 10), ("/js/", 1), ("/js/page/2/", 1), ("/js/page/3/", 0)],
+    )
+    def test_parse_quotes_pages(self, site: SyntheticQuotesSite, path: str, requests: int) -> None:
+        """Tests the pages with quotes are parsed as the pages of the real website.
+
+        :param site: The website.
+        :param path: The path of the page.
+        :param requests: The expected number of requests."""
+        parser = self.__parse(site, path)
+
+        check.equal(len(parser.requests), requests)
+        check.equal(len(parser.items), 10)
+        check.is_true(all(isinstance(item, QuoteItem) for item in parser.items))
+
+    def test_parse_author_page(self, site: SyntheticQuotesSite) -> None:
+        """Tests the author pages are parsed as the pages of the real website.
+
+        :param site: The website."""
+        parser = self.__parse(site, "/author/Author-00001/")
+
+        check.equal(len(parser.requests), 0)
+        check.equal(len(parser.items), 1)
+        check.equal(dict(parser.items[0])["name"], "Author 00001")
+        check.is_instance(parser.items[0], AuthorItem)
+
+    def test_proxy_forwards_to_site(self, site: SyntheticQuotesSite) -> None:
+        """Tests the stand-in proxy serves the website for any host, and injects failures.
+
+        :param site: The website."""
+        with SiteServer(site) as server, StandInProxy(server.url) as proxy, StandInProxy(
+            server.url, failure_rate=1.0
+        ) as failing_proxy:
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy.url}))
+            with opener.open("http://quotes.bench/page/2/", timeout=10) as response:
+                check.equal(response.read(), site.documents["/page/2/"])
+
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": failing_proxy.url}))
+            with pytest.raises(urllib.error.HTTPError) as error:
+                opener.open("http://quotes.bench/page/2/", timeout=10)
+            check.equal(error.value.code, 503)
+            error.value.close()
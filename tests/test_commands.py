@@ -0,0 +1,153 @@
+"""Tests for the commands."""
+
+import asyncio
+import gzip
+import os
+import shutil
+
+import pytest
+import pytest_check as check
+import scrapy.http
+import scrapy.utils.test
+from w3lib.http import headers_dict_to_raw
+
+from scrapy_tor_playwright_demo.commands.defs import CorpusDocument, iter_corpus, reparse_documents
+from scrapy_tor_playwright_demo.items import QuoteItem, QuotesParser
+from scrapy_tor_playwright_demo.spiders import ReparseSpider
+
+#: Path to the HTML files of the quotes website.
+ASSETS_PATH = os.path.join(os.path.dirname(__file__), "assets", "quotes")
+
+
+class TestReparse:
+    """A collection of tests for parsing a corpus of stored HTML again."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+    @staticmethod
+    def __read_asset(name: str) -> bytes:
+        """Reads an HTML file of the quotes website.
+
+        :param name: The name of the file.
+        :return: The contents of the file."""
+        with open(os.path.join(ASSETS_PATH, name), "rb") as stream:
+            return stream.read()
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def test_iter_corpus(self, tmp_path: os.PathLike) -> None:
+        """Tests documents are read with their URLs from the HTTP cache, WARC files and HTML files.
+
+        :param tmp_path: A temporary folder for the corpus."""
+        # An entry of the HTTP cache, compressed with gzip.
+        entry_path = os.path.join(tmp_path, "httpcache", "quotes", "ab", "abcdef")
+        os.makedirs(entry_path)
+        url = "https://quotes.toscrape.com/author/Thomas-A-Edison/"
+        for name, contents in (
+            ("meta", repr({"url": url, "method": "GET", "status": 200, "response_url": url}).encode("utf8")),
+            ("response_headers", headers_dict_to_raw({b"Content-Type": [b"text/html; charset=utf-8"]})),
+            ("response_body", self.__read_asset("author_page_nojs.html")),
+        ):
+            with gzip.open(os.path.join(entry_path, name), "wb") as stream:
+                stream.write(contents)
+
+        # A WARC file with a request record, which is skipped, and a response record.
+        body = self.__read_asset("first_page_nojs.html")
+        block = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n" + body
+        with open(os.path.join(tmp_path, "quotes.warc"), "wb") as stream:
+            for warc_type, record_block in (("request", b"GET / HTTP/1.1\r\n\r\n"), ("response", block)):
+                stream.write(
+                    f"WARC/1.0\r\nWARC-Type: {warc_type}\r\nWARC-Target-URI: https://quotes.toscrape.com/page/1/\r\n"
+                    f"Content-Length: {len(record_block)}\r\n\r\n".encode("utf8")
+                    + record_block
+                    + b"\r\n\r\n"
+                )
+
+        # An HTML file stored by the filesystem pipeline.
+        os.makedirs(os.path.join(tmp_path, "fs"))
+        shutil.copy(os.path.join(ASSETS_PATH, "last_page_js.html"), os.path.join(tmp_path, "fs", "page.html"))
+
+        documents = list(iter_corpus(str(tmp_path)))
+        check.equal(
+            [document.url for document in documents],
+            [
+                "https://quotes.toscrape.com/page/1/",
+                f"file://{os.path.join(tmp_path, 'fs', 'page.html')}",
+                "https://quotes.toscrape.com/author/Thomas-A-Edison/",
+            ],
+        )
+        check.equal(documents[0].body, body)
+        check.equal(documents[0].headers, {b"Content-Type": [b"text/html"]})
+        check.equal(documents[2].body, self.__read_asset("author_page_nojs.html"))
+
+    def test_reparse_documents(self) -> None:
+        """Tests documents are parsed into the same items as in a crawl, and failures are reported per document."""
+        url = "https://quotes.toscrape.com/page/1/"
+        body = self.__read_asset("first_page_nojs.html")
+        results = reparse_documents(
+            [CorpusDocument(url=url, body=body), CorpusDocument(url=url, body=b'<div class="tags-box"></div>')]
+        )
+
+        response = scrapy.http.HtmlResponse(request=scrapy.http.Request(url), url=url, body=body)
+        check.equal(results[0].page_type, "quotes_nojs")
+        check.equal(results[0].items, QuotesParser(response).parse().items)
+        check.is_instance(results[0].items[0], QuoteItem)
+        check.is_none(results[0].error)
+        check.is_none(results[1].page_type)
+        check.is_not_none(results[1].error)
+
+    def test_spider(self, tmp_path: os.PathLike) -> None:
+        """Tests the spider yields the items of all the documents in a pool of processes, and reports the throughput.
+
+        :param tmp_path: A temporary folder for the corpus."""
+        for name in ("first_page_nojs.html", "second_page_nojs.html", "author_page_nojs.html"):
+            shutil.copy(os.path.join(ASSETS_PATH, name), os.path.join(tmp_path, name))
+        crawler = scrapy.utils.test.get_crawler(ReparseSpider, {"EXTENSIONS_BASE": {}})
+        spider = ReparseSpider.from_crawler(crawler, source=str(tmp_path), processes=2, batch_size=1)
+
+        async def collect() -> list:
+            """Collects the items of the spider.
+
+            :return: The items."""
+            return [item async for item in spider.areparse(scrapy.http.Response("data:,"))]
+
+        items = asyncio.run(collect())
+        stats = crawler.stats.get_stats()
+        check.equal(len(items), 21)
+        check.equal(stats["reparse/documents"], 3)
+        check.equal(stats["reparse/items"], 21)
+        check.equal(stats["reparse/page_type/quotes_nojs"], 2)
+        check.equal(stats["reparse/page_type/author"], 1)
+        check.greater(stats["reparse/docs_per_second"], 0)
+
+    def test_settings(self) -> None:
+        """Tests the downloader middlewares and download handlers of the project are disabled, but for data URLs."""
+        crawler = scrapy.utils.test.get_crawler(
+            ReparseSpider,
+            {
+                "DOWNLOADER_MIDDLEWARES": {"scrapy_tor_playwright_demo.middlewares.PlaywrightMiddleware": 100},
+                "DOWNLOAD_HANDLERS": {
+                    "data": "scrapy.core.downloader.handlers.datauri.DataURIDownloadHandler",
+                    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+                },
+            },
+        )
+        check.equal(
+            crawler.settings.getdict("DOWNLOADER_MIDDLEWARES"),
+            {"scrapy_tor_playwright_demo.middlewares.PlaywrightMiddleware": None},
+        )
+        check.equal(crawler.settings.getdict("DOWNLOAD_HANDLERS"), {"https": None})
+        check.equal(
+            crawler.settings.getwithbase("DOWNLOAD_HANDLERS")["data"],
+            "scrapy.core.downloader.handlers.datauri.DataURIDownloadHandler",
+        )
+
+    def test_missing_corpus(self, tmp_path: os.PathLike) -> None:
+        """Tests the spider can't be created for a corpus that does not exist.
+
+        :param tmp_path: A temporary folder without corpus."""
+        crawler = scrapy.utils.test.get_crawler(ReparseSpider, {"EXTENSIONS_BASE": {}})
+        with pytest.raises(RuntimeError):
+            ReparseSpider.from_crawler(crawler, source=os.path.join(tmp_path, "missing"))
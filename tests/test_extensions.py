@@ -0,0 +1,903 @@
+"""Tests for the extensions."""
+
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import time
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+import pytest_check as check
+import pytest_mock
+import scrapy.crawler
+import scrapy.exceptions
+import scrapy.http
+import scrapy.signals
+import scrapy.utils.test
+
+from scrapy_tor_playwright_demo.defs import PlaywrightMixin, PlaywrightStores
+from scrapy_tor_playwright_demo.extensions.defs import ITEMS_PARSED, STAGE_MEASURED, Histogram
+from scrapy_tor_playwright_demo.extensions.extensions import (
+    BackpressureExtension,
+    BrowserPrewarmExtension,
+    ContextWatchdogExtension,
+    InstrumentationExtension,
+    MemoryProfilerExtension,
+    ParseCacheExtension,
+    SubresourceCacheExtension,
+)
+from scrapy_tor_playwright_demo.items import QuoteItem, QuotesParser
+from scrapy_tor_playwright_demo.middlewares.middlewares import PlaywrightMiddleware
+from scrapy_tor_playwright_demo.stores.contexts import ContextRegistry
+from scrapy_tor_playwright_demo.stores.subresources import SubresourceCache
+
+
+class _FakeContext:
+    """A stand-in for a Playwright context, that only supports being closed and recording its scripts."""
+
+    def __init__(self, kwargs: dict | None = None) -> None:
+        """Class constructor.
+
+        :param kwargs: The arguments the context was created with."""
+        #: The listeners of the close event.
+        self.__listeners: list[Callable[[Any], None]] = []
+        #: Whether the context is closed.
+        self.closed = False
+        #: The arguments the context was created with.
+        self.kwargs = kwargs or {}
+        #: The scripts added to the context.
+        self.scripts: list[str] = []
+
+    async def add_init_script(self, script: str) -> None:
+        """Adds a script to run in the pages of the context.
+
+        :param script: The script."""
+        self.scripts.append(script)
+
+    def once(self, event: str, listener: Callable[[Any], None]) -> None:
+        """Adds a listener to an event.
+
+        :param event: The event, only ``close`` is supported.
+        :param listener: The listener."""
+        assert event == "close"
+        self.__listeners.append(listener)
+
+    async def close(self) -> None:
+        """Closes the context and calls the listeners of the close event."""
+        if not self.closed:
+            self.closed = True
+            for listener in self.__listeners:
+                listener(self)
+
+
+class _FakePage:
+    """A stand-in for a Playwright page, that only supports being closed."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self) -> None:
+        """Class constructor."""
+        #: The context of the page.
+        self.context = _FakeContext()
+        #: Whether the page is closed.
+        self.closed = False
+
+    async def close(self) -> None:
+        """Closes the page."""
+        self.closed = True
+
+
+class _FakeHandler:
+    """A stand-in for the Scrapy Playwright download handler, whose contexts are stand-ins that record their scripts."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, max_contexts: int | None) -> None:
+        """Class constructor.
+
+        :param max_contexts: The maximum number of contexts."""
+        #: The lock to launch the browser, which identifies the handler.
+        self.browser_launch_lock = asyncio.Lock()
+        #: The configuration of the handler.
+        self.config = SimpleNamespace(cdp_url=None, max_contexts=max_contexts)
+        #: The contexts, keyed by name.
+        self.context_wrappers: dict[str, SimpleNamespace] = {}
+        #: The Playwright instance, once launched.
+        self.playwright: object | None = None
+        #: Whether the browser is launched.
+        self.browser_launched = False
+
+    def _engine_started(self) -> None:
+        """Launches Playwright when the engine is started."""
+
+    async def _launch(self) -> None:
+        """Launches Playwright."""
+        self.playwright = object()
+
+    async def _maybe_launch_browser(self) -> None:
+        """Launches the browser."""
+        self.browser_launched = True
+
+    async def _create_browser_context(self, name: str, context_kwargs: dict, spider: scrapy.Spider) -> SimpleNamespace:
+        """Creates a context.
+
+        :param name: The name of the context.
+        :param context_kwargs: The arguments of the context.
+        :param spider: The spider.
+        :return: The wrapper of the context."""
+        # pylint: disable=unused-argument
+        context = _FakeContext(context_kwargs)
+        context.once("close", lambda _: self.context_wrappers.pop(name, None))
+        self.context_wrappers[name] = SimpleNamespace(context=context)
+
+        return self.context_wrappers[name]
+
+
+class _FakeRoute:
+    """A stand-in for a Playwright route, that records how it is resolved."""
+
+    def __init__(self, url: str, resource_type: str = "script") -> None:
+        """Class constructor.
+
+        :param url: The URL of the request.
+        :param resource_type: The type of resource of the request."""
+        #: The request of the route.
+        self.request = SimpleNamespace(url=url, method="GET", resource_type=resource_type, headers={})
+        #: How the route was resolved, ``fallback`` or ``fulfill``.
+        self.resolution: str | None = None
+        #: The arguments of ``fulfill``.
+        self.fulfilled: dict[str, Any] = {}
+
+    async def fallback(self) -> None:
+        """Lets the request through."""
+        self.resolution = "fallback"
+
+    async def fulfill(self, **kwargs) -> None:
+        """Fulfills the request.
+
+        :param kwargs: The status, headers and body."""
+        self.resolution = "fulfill"
+        self.fulfilled = kwargs
+
+    def respond(self, body: bytes, headers: dict[str, str], status: int = 200) -> SimpleNamespace:
+        """Returns the response of the request, as the response event of the page.
+
+        :param body: The body.
+        :param headers: The headers.
+        :param status: The status.
+        :return: The response."""
+
+        async def get_body() -> bytes:
+            """Returns the body of the response.
+
+            :return: The body."""
+            return body
+
+        return SimpleNamespace(request=self.request, status=status, headers=headers, body=get_body)
+
+
+class _FakeRoutedPage(_FakePage):
+    """A stand-in for a Playwright page, that also records its route handler and response listener."""
+
+    def __init__(self) -> None:
+        """Class constructor."""
+        super().__init__()
+        #: The route handler.
+        self.route_handler: Callable[[Any], Any] | None = None
+        #: The listener of the response event.
+        self.response_listener: Callable[[Any], Any] | None = None
+
+    async def route(self, url: str, handler: Callable[[Any], Any]) -> None:
+        """Adds a route handler.
+
+        :param url: The pattern of the URLs, all are expected.
+        :param handler: The handler."""
+        assert url == "**/*"
+        self.route_handler = handler
+
+    # Named as the method of Playwright pages.
+    # pylint: disable-next=invalid-name
+    def on(self, event: str, listener: Callable[[Any], Any]) -> None:
+        """Adds a listener to an event.
+
+        :param event: The event, only ``response`` is supported.
+        :param listener: The listener."""
+        assert event == "response"
+        self.response_listener = listener
+
+    def once(self, event: str, listener: Callable[[Any], Any]) -> None:
+        """Adds a listener to an event, only ``load`` is supported and never sent.
+
+        :param event: The event.
+        :param listener: The listener."""
+        # pylint: disable=unused-argument,no-self-use
+        assert event == "load"
+
+    async def request(self, route: _FakeRoute, body: bytes, headers: dict[str, str]) -> str:
+        """Requests a subresource, responding with the given body and headers if the cache lets it through.
+
+        :param route: The route of the request.
+        :param body: The body of the response.
+        :param headers: The headers of the response.
+        :return: How the route was resolved."""
+        assert self.route_handler is not None and self.response_listener is not None
+        await self.route_handler(route)
+        if route.resolution == "fallback":
+            await self.response_listener(route.respond(body, headers))
+
+        return route.resolution or ""
+
+
+class TestInstrumentationExtension:
+    """A collection of tests for the instrumentation extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def test_histogram_quantiles(self) -> None:
+        """Tests the quantiles are estimated from the upper bounds of the buckets."""
+        histogram = Histogram()
+        for _ in range(98):
+            histogram.observe(0.02)
+        histogram.observe(3.0)
+        histogram.observe(200.0)
+
+        check.equal(histogram.count, 100)
+        check.equal(histogram.quantile(0.5), 0.025)
+        check.equal(histogram.quantile(0.99), 5.0)
+        check.equal(histogram.quantile(1.0), float("inf"))
+        check.equal(histogram.cumulative_buckets()[-1], (float("inf"), 100))
+
+    @pytest.mark.parametrize(
+        "crawler", [{"INSTRUMENTATION_ENABLED": True, "INSTRUMENTATION_METRICS_PORT": None}], indirect=True
+    )
+    def test_stats_and_prometheus(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the measured stages are stored in the stats per stage, proxy and page type, and rendered in
+        Prometheus format.
+
+        :param crawler: The crawler."""
+        extension = InstrumentationExtension.from_crawler(crawler)
+
+        for duration in (0.2, 0.3, 0.4):
+            crawler.signals.send_catch_log(
+                STAGE_MEASURED, stage="parse", duration=duration, proxy="http://proxy:8888", page_type="author"
+            )
+        crawler.signals.send_catch_log(
+            STAGE_MEASURED, stage="pipeline", duration=0.001, proxy=None, page_type="QuoteItem"
+        )
+        crawler.signals.send_catch_log(scrapy.signals.spider_closed, spider=None, reason="finished")
+
+        stats = crawler.stats.get_stats()
+        check.equal(stats["instrumentation/parse/count"], 3)
+        check.equal(stats["instrumentation/parse/p50"], 0.5)
+        check.equal(stats["instrumentation/parse/proxy/http://proxy:8888/p99"], 0.5)
+        check.equal(stats["instrumentation/parse/page_type/author/count"], 3)
+        check.equal(stats["instrumentation/pipeline/page_type/QuoteItem/count"], 1)
+
+        metrics = extension.to_prometheus()
+        check.is_in(
+            'scrapy_stage_duration_seconds_count{stage="parse",proxy="http://proxy:8888",page_type="author"} 3', metrics
+        )
+        check.is_in(
+            'scrapy_stage_duration_seconds_bucket{stage="pipeline",proxy="none",page_type="QuoteItem",le="+Inf"} 1',
+            metrics,
+        )
+
+    @pytest.mark.parametrize("crawler", [{"INSTRUMENTATION_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            InstrumentationExtension.from_crawler(crawler)
+
+
+class TestContextWatchdogExtension:
+    """A collection of tests for the context watchdog extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _open_context(crawler: scrapy.crawler.Crawler, url: str) -> tuple[scrapy.http.Request, _FakePage]:
+        """Creates a Playwright request and registers a context for it in the registry of a crawler, as if its page
+        had been created.
+
+        :param crawler: The crawler.
+        :param url: The URL of the request.
+        :return: The request and the page of its context."""
+        request = PlaywrightMixin._to_playwright_request(scrapy.http.Request(url))  # pylint: disable=protected-access
+        page = _FakePage()
+        ContextRegistry.from_crawler(crawler).register(request, page)
+
+        return request, page
+
+    ## Public API ######################################################################################################
+    def test_close_without_page(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests closing the context of a request without a page in the metadata falls back to the registry, and
+        does nothing if the context was never opened.
+
+        :param crawler: The crawler."""
+        # pylint: disable=protected-access
+        request, page = self._open_context(crawler, "https://quotes.toscrape.com/page/1/")
+        never_opened = PlaywrightMixin._to_playwright_request(scrapy.http.Request("https://quotes.toscrape.com/"))
+        stores = PlaywrightStores.from_crawler(crawler)
+
+        asyncio.run(PlaywrightMixin._close_playwright_context(request, stores))
+        asyncio.run(PlaywrightMixin._close_playwright_context(never_opened, stores))
+
+        check.is_true(page.closed)
+        check.is_true(page.context.closed)
+        check.is_none(stores.contexts.get(request.meta["playwright_context"]))
+
+    def test_process_exception(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the middleware closes the context of a failed request and gives it a new one for retries.
+
+        :param crawler: The crawler."""
+        request, page = self._open_context(crawler, "https://quotes.toscrape.com/page/2/")
+        identifier = request.meta["playwright_context"]
+
+        PlaywrightMiddleware.from_crawler(crawler).process_exception(request, TimeoutError(), scrapy.Spider("quotes"))
+
+        check.is_true(page.context.closed)
+        check.not_equal(request.meta["playwright_context"], identifier)
+
+    @pytest.mark.parametrize(
+        "crawler", [{"CONTEXT_WATCHDOG_ENABLED": True, "CONTEXT_WATCHDOG_MAX_AGE": 3600}], indirect=True
+    )
+    def test_reclaim_orphaned(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests contexts whose request no longer exists are reclaimed, while those in use are kept.
+
+        :param crawler: The crawler."""
+        extension = ContextWatchdogExtension.from_crawler(crawler)
+        request, page = self._open_context(crawler, "https://quotes.toscrape.com/page/3/")
+        orphan_request, orphan_page = self._open_context(crawler, "https://quotes.toscrape.com/page/4/")
+        del orphan_request
+        gc.collect()
+
+        extension.check()
+
+        stats = crawler.stats.get_stats()
+        check.is_true(orphan_page.context.closed)
+        check.is_false(page.context.closed)
+        check.equal(stats["playwright/watchdog/orphaned"], 1)
+        check.is_not_in("playwright/watchdog/expired", stats)
+        check.is_not_none(ContextRegistry.from_crawler(crawler).get(request.meta["playwright_context"]))
+
+    @pytest.mark.parametrize(
+        "crawler", [{"CONTEXT_WATCHDOG_ENABLED": True, "CONTEXT_WATCHDOG_MAX_AGE": 0}], indirect=True
+    )
+    def test_reclaim_expired(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests contexts older than the maximum age are reclaimed even if their request exists.
+
+        :param crawler: The crawler."""
+        extension = ContextWatchdogExtension.from_crawler(crawler)
+        request, page = self._open_context(crawler, "https://quotes.toscrape.com/page/5/")
+
+        extension.check()
+
+        check.is_true(page.context.closed)
+        check.equal(crawler.stats.get_value("playwright/watchdog/expired"), 1)
+        check.equal(crawler.stats.get_value("playwright/watchdog/open"), 0)
+        check.is_none(ContextRegistry.from_crawler(crawler).get(request.meta["playwright_context"]))
+
+    @pytest.mark.parametrize(
+        "crawler", [{"CONTEXT_WATCHDOG_ENABLED": True, "CONTEXT_WATCHDOG_MAX_AGE": 0}], indirect=True
+    )
+    def test_stores_per_crawler(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests each crawler has its own stores, so that the extension never reclaims the contexts of another crawler
+        in the same process.
+
+        :param crawler: The crawler."""
+        other = scrapy.utils.test.get_crawler(scrapy.Spider, {"EXTENSIONS_BASE": {}})
+        extension = ContextWatchdogExtension.from_crawler(crawler)
+        _, page = self._open_context(crawler, "https://quotes.toscrape.com/page/8/")
+        other_request, other_page = self._open_context(other, "https://quotes.toscrape.com/page/9/")
+
+        extension.check()
+
+        check.is_true(page.context.closed)
+        check.is_false(other_page.context.closed)
+        check.equal(len(ContextRegistry.from_crawler(crawler)), 0)
+        check.is_not_none(ContextRegistry.from_crawler(other).get(other_request.meta["playwright_context"]))
+        check.is_not(PlaywrightStores.from_crawler(crawler).sessions, PlaywrightStores.from_crawler(other).sessions)
+
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"CONTEXT_WATCHDOG_ENABLED": True, "CONTEXT_WATCHDOG_MAX_AGE": 0, "CONTEXT_WATCHDOG_RESTART_THRESHOLD": 1}],
+        indirect=True,
+    )
+    def test_restart_browser(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the browser is closed after too many leaks, so that the handler launches a new one, and that the
+        restart is skipped for handlers that do not launch the browser on demand.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        # pylint: disable=protected-access
+
+        extension = ContextWatchdogExtension.from_crawler(crawler)
+        browser = mocker.AsyncMock()
+        handler = SimpleNamespace(
+            browser_launch_lock=asyncio.Lock(), _maybe_launch_browser=mocker.AsyncMock(), browser=browser
+        )
+        crawler.engine = mocker.MagicMock()
+        crawler.engine.downloader.handlers._get_handler.return_value = handler
+
+        self._open_context(crawler, "https://quotes.toscrape.com/page/6/")
+        extension.check()
+        unsupported = SimpleNamespace(browser=mocker.AsyncMock())
+        crawler.engine.downloader.handlers._get_handler.return_value = unsupported
+        self._open_context(crawler, "https://quotes.toscrape.com/page/7/")
+        extension.check()
+
+        check.is_true(browser.close.called)
+        check.is_not_in("browser", vars(handler))
+        check.is_false(unsupported.browser.close.called)
+        check.equal(crawler.stats.get_value("playwright/watchdog/browser_restarts"), 1)
+
+    @pytest.mark.parametrize("crawler", [{"CONTEXT_WATCHDOG_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            ContextWatchdogExtension.from_crawler(crawler)
+
+
+class TestMemoryProfilerExtension:
+    """A collection of tests for the memory profiler extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "response",
+        [{"url": "https://quotes.toscrape.com/page/1/", "path": "quotes/first_page_nojs.html"}],
+        indirect=True,
+    )
+    @pytest.mark.parametrize(
+        "crawler", [{"MEMPROFILER_ENABLED": True, "MEMPROFILER_TIMELINE": "memprofiler.jsonl"}], indirect=True
+    )
+    def test_sample(
+        self,
+        crawler: scrapy.crawler.Crawler,
+        response: scrapy.http.Response,
+        tmp_path: os.PathLike,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Tests the samples attribute the memory to the Python packages and the live parsers, and are stored in the
+        stats and the timeline.
+
+        :param crawler: The crawler.
+        :param response: The response to parse.
+        :param tmp_path: A temporary folder for the timeline.
+        :param monkeypatch: The monkeypatch, to write the timeline in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        timeline_path = os.path.join(tmp_path, "memprofiler.jsonl")
+        extension = MemoryProfilerExtension.from_crawler(crawler)
+
+        crawler.signals.send_catch_log(scrapy.signals.spider_opened, spider=None)
+        parser = QuotesParser(response)
+        parser.parse()
+        sample = extension.sample()
+        crawler.signals.send_catch_log(scrapy.signals.spider_closed, spider=None, reason="finished")
+
+        stats = crawler.stats.get_stats()
+        check.greater_equal(sample.parsers.get("QuotesParser", 0), 1)
+        check.greater(sample.python.traced, 0)
+        check.is_in("bs4", sample.python.modules)
+        check.is_in("other", sample.python.modules)
+        check.greater_equal(stats["memprofiler/parsers/QuotesParser"], 1)
+        check.greater(stats["memprofiler/python/module/bs4"], 0)
+        if os.path.isdir("/proc"):
+            check.greater(stats["memprofiler/rss"], 0)
+        with open(timeline_path, "r", encoding="utf8") as stream:
+            lines = [json.loads(line) for line in stream]
+        check.equal(len(lines), 2)
+        check.equal(lines[0]["parsers"], sample.parsers)
+
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"MEMPROFILER_ENABLED": True, "MEMPROFILER_TIMELINE": None, "MEMPROFILER_SOFT_LIMIT_MB": 1}],
+        indirect=True,
+    )
+    def test_soft_limit(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the engine is paused when the memory is over the soft limit and resumed when it is back under it.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        crawler.engine = mocker.MagicMock(paused=False, slot=None)
+        extension = MemoryProfilerExtension.from_crawler(crawler)
+
+        mocker.patch("scrapy_tor_playwright_demo.extensions.extensions.get_process_memory", return_value=2 * 1048576)
+        extension.sample()
+        extension.sample()
+        mocker.patch("scrapy_tor_playwright_demo.extensions.extensions.get_process_memory", return_value=1024)
+        extension.sample()
+
+        check.equal(crawler.engine.pause.call_count, 1)
+        check.equal(crawler.engine.unpause.call_count, 1)
+        check.equal(crawler.stats.get_value("memprofiler/pauses"), 1)
+
+    @pytest.mark.parametrize("crawler", [{"MEMPROFILER_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            MemoryProfilerExtension.from_crawler(crawler)
+
+
+class TestBrowserPrewarmExtension:
+    """A collection of tests for the browser prewarm extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [
+            {
+                "PREWARM_ENABLED": True,
+                "PREWARM_CONTEXTS_PER_PROXY": 2,
+                "DOWNLOADER_MIDDLEWARES": {"rotating_proxies.middlewares.RotatingProxyMiddleware": 610},
+                "ROTATING_PROXY_LIST": ["http://proxy-a:8888", "http://proxy-b:8888"],
+            }
+        ],
+        indirect=True,
+    )
+    def test_prewarm(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the browser is launched and contexts with stealth are created per proxy up to the maximum, then taken
+        by requests through the same proxy, and the time to the first item is stored.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        # pylint: disable=protected-access
+        handler = _FakeHandler(max_contexts=3)
+        crawler.engine = mocker.MagicMock()
+        crawler.engine.downloader.handlers._get_handler.return_value = handler
+        crawler.signals.connect(handler._engine_started, signal=scrapy.signals.engine_started)
+        extension = BrowserPrewarmExtension.from_crawler(crawler)
+
+        check.equal(asyncio.run(extension.prewarm(crawler.spider)), 3)
+        check.is_not_none(handler.playwright)
+        check.is_true(handler.browser_launched)
+        check.equal(crawler.signals.send_catch_log(scrapy.signals.engine_started), [])
+        check.equal(len(handler.context_wrappers), 3)
+        proxies = [wrapper.context.kwargs["proxy"]["server"] for wrapper in handler.context_wrappers.values()]
+        check.equal(sorted(proxies), ["http://proxy-a:8888", "http://proxy-a:8888", "http://proxy-b:8888"])
+        check.is_true(all(wrapper.context.scripts for wrapper in handler.context_wrappers.values()))
+        check.equal(crawler.stats.get_value("prewarm/contexts"), 3)
+
+        request = PlaywrightMixin._to_playwright_request(scrapy.http.Request("https://quotes.toscrape.com/"))
+        request.meta.update({"proxy": "http://proxy-b:8888", "_rotating_proxy": True})
+        PlaywrightMixin._add_playwright_proxy(request, PlaywrightStores.from_crawler(crawler))
+        check.is_in(request.meta["playwright_context"], handler.context_wrappers)
+        check.is_true(request.meta["playwright_prewarmed"])
+        other = PlaywrightMixin._to_playwright_request(scrapy.http.Request("https://quotes.toscrape.com/page/2/"))
+        other.meta.update({"proxy": "http://proxy-b:8888", "_rotating_proxy": True})
+        PlaywrightMixin._add_playwright_proxy(other, PlaywrightStores.from_crawler(crawler))
+        check.is_not_in(other.meta["playwright_context"], handler.context_wrappers)
+        check.is_not_in("playwright_prewarmed", other.meta)
+
+        # The contexts not taken are closed, releasing their slots.
+        check.equal(asyncio.run(extension.close_unused()), 2)
+        check.equal(list(handler.context_wrappers), [request.meta["playwright_context"]])
+        check.equal(crawler.stats.get_value("prewarm/unused"), 2)
+
+        # Without the handler, opening the spider only starts the clock of the time to the first item.
+        crawler.engine.downloader.handlers._get_handler.return_value = None
+        crawler.signals.send_catch_log(scrapy.signals.spider_opened, spider=crawler.spider)
+        crawler.signals.send_catch_log(scrapy.signals.item_scraped, item={}, response=None, spider=crawler.spider)
+        check.greater_equal(crawler.stats.get_value("prewarm/time_to_first_item"), 0)
+
+    @pytest.mark.parametrize("crawler", [{"PREWARM_ENABLED": True}], indirect=True)
+    def test_without_playwright(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests nothing is prewarmed if HTTPS requests are not downloaded with Scrapy Playwright.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        crawler.engine = mocker.MagicMock()
+        crawler.engine.downloader.handlers._get_handler.return_value = None  # pylint: disable=protected-access
+        extension = BrowserPrewarmExtension.from_crawler(crawler)
+
+        check.equal(asyncio.run(extension.prewarm(crawler.spider)), 0)
+        check.is_none(crawler.stats.get_value("prewarm/contexts"))
+
+    @pytest.mark.parametrize("crawler", [{"PREWARM_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            BrowserPrewarmExtension.from_crawler(crawler)
+
+    @pytest.mark.parametrize("crawler", [{"PREWARM_ENABLED": True}], indirect=True)
+    def test_unsupported(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the extension is not configured if Scrapy Playwright does not have the methods it relies on.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        mocker.patch("scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler", type("Handler", (), {}))
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            BrowserPrewarmExtension.from_crawler(crawler)
+
+
+class TestSubresourceCacheExtension:
+    """A collection of tests for the subresource cache extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler", [{"SUBRESOURCE_CACHE_ENABLED": True, "SUBRESOURCE_CACHE_MAX_SIZE": 1000}], indirect=True
+    )
+    def test_cache(self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike) -> None:
+        """Tests fresh static subresources are served from the cache, shared by the pages, others are let through, the
+        least recently used are evicted, the cache is kept for the next crawls and its stats are stored.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder."""
+        # pylint: disable=protected-access
+        crawler.settings.frozen = False
+        crawler.settings.set("SUBRESOURCE_CACHE_DIR", str(tmp_path))
+        cacheable = {"cache-control": "max-age=3600", "content-encoding": "gzip"}
+        # Kept referenced, as the signals only hold weak references to the extension.
+        _extension = SubresourceCacheExtension.from_crawler(crawler)
+        crawler.signals.send_catch_log(scrapy.signals.spider_opened, spider=crawler.spider)
+        cache = SubresourceCache.from_crawler(crawler)
+        check.is_true(cache.is_open)
+
+        async def crawl() -> list[str]:
+            """Requests subresources from two pages, the second one with the subresources cached by the first one.
+
+            :return: The resolutions of the requests."""
+            first, second = _FakeRoutedPage(), _FakeRoutedPage()
+            for page in (first, second):
+                request = PlaywrightMixin._to_playwright_request(scrapy.http.Request("https://quotes.toscrape.com/"))
+                PlaywrightMixin._bind_playwright_request(request, PlaywrightStores.from_crawler(crawler))
+                request.meta["playwright_prewarmed"] = True
+                await request.meta["playwright_page_init_callback"](page, request)
+
+            jquery, css = "https://quotes.toscrape.com/static/jquery.js", "https://quotes.toscrape.com/static/main.css"
+            return [
+                await first.request(_FakeRoute(jquery), b"j" * 300, cacheable),
+                await second.request(route := _FakeRoute(jquery), b"j" * 300, cacheable),
+                route.fulfilled["body"] == b"j" * 300 and "content-encoding" not in route.fulfilled["headers"],
+                await second.request(_FakeRoute("https://quotes.toscrape.com/", "document"), b"d" * 300, cacheable),
+                # Not cacheable as not to be stored, and as it has neither expiration nor validators.
+                await second.request(_FakeRoute(css, "stylesheet"), b"x", {"cache-control": "no-store"}),
+                await second.request(_FakeRoute(css, "stylesheet"), b"x", {}),
+                # Fills the cache past its maximum size, jquery.js was used last so the first font is evicted.
+                await second.request(_FakeRoute("https://a.test/a.woff", "font"), b"a" * 300, cacheable),
+                await second.request(_FakeRoute(jquery), b"j" * 300, cacheable),
+                await second.request(_FakeRoute("https://a.test/b.woff", "font"), b"b" * 300, cacheable),
+                await second.request(_FakeRoute("https://a.test/a.woff", "font"), b"a" * 300, cacheable),
+            ]
+
+        check.equal(
+            asyncio.run(crawl()),
+            ["fallback", "fulfill", True, "fallback", "fallback", "fallback"]
+            + ["fallback", "fulfill", "fallback", "fallback"],
+        )
+        crawler.signals.send_catch_log(scrapy.signals.spider_closed, spider=crawler.spider, reason="finished")
+        check.is_false(cache.is_open)
+        check.equal(crawler.stats.get_value("subresource_cache/hits"), 2)
+        check.equal(crawler.stats.get_value("subresource_cache/misses"), 6)
+        check.equal(crawler.stats.get_value("subresource_cache/hit_ratio"), 0.25)
+        check.equal(crawler.stats.get_value("subresource_cache/bytes_saved"), 600)
+        check.equal(crawler.stats.get_value("subresource_cache/stored"), 4)
+        check.equal(crawler.stats.get_value("subresource_cache/evicted"), 2)
+        check.equal(crawler.stats.get_value("subresource_cache/entries"), 2)
+
+        # The next crawl starts with the subresources left in the folder.
+        reopened = SubresourceCache()
+        reopened.open(str(tmp_path), 1000)
+        check.equal(len(reopened), 2)
+        reopened.close()
+        check.equal(len(os.listdir(tmp_path)), 2)
+
+    @pytest.mark.parametrize("crawler", [{"SUBRESOURCE_CACHE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            SubresourceCacheExtension.from_crawler(crawler)
+
+
+class TestParseCacheExtension:
+    """A collection of tests for the parse cache extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "response",
+        [{"url": "https://quotes.toscrape.com/page/1/", "path": "quotes/first_page_nojs.html"}],
+        indirect=True,
+    )
+    @pytest.mark.parametrize("crawler", [{"PARSE_CACHE_ENABLED": True}], indirect=True)
+    def test_cache(
+        self, crawler: scrapy.crawler.Crawler, response: scrapy.http.Response, tmp_path: os.PathLike
+    ) -> None:
+        """Tests a response with the same body as one already parsed is not parsed again, and gets items of its own
+        and requests bound to its callback, the results are kept on disk for the next crawls and the stats are stored.
+
+        :param crawler: The crawler.
+        :param response: The response to parse.
+        :param tmp_path: A temporary folder."""
+        # pylint: disable=protected-access
+        crawler.settings.frozen = False
+        crawler.settings.set("PARSE_CACHE_DIR", str(tmp_path))
+        extension = ParseCacheExtension.from_crawler(crawler)
+        crawler.signals.send_catch_log(scrapy.signals.spider_opened, spider=crawler.spider)
+        check.is_true(extension._parse_cache.is_open)
+
+        def callback(_: scrapy.http.Response) -> None:
+            """A callback for the retry of the response."""
+
+        parsed = QuotesParser(response).parse()
+        retry = response.replace(
+            request=PlaywrightMixin._to_playwright_request(scrapy.http.Request(response.url, callback))
+        )
+        reused = QuotesParser(retry).parse()
+
+        check.is_false(parsed.cache_hit)
+        check.is_true(reused.cache_hit)
+        check.equal(reused.page_type, "quotes_nojs")
+        check.equal(reused.items, parsed.items)
+        check.is_not(reused.items[0], parsed.items[0])
+        check.is_instance(reused.items[0], QuoteItem)
+        check.equal([request.url for request in reused.requests], [request.url for request in parsed.requests])
+        check.is_true(all(request.callback is callback for request in reused.requests))
+        check.is_true(all(PlaywrightMixin._is_playwright_request(request) for request in reused.requests))
+        # The result of Scrapy items is not reused for compact items.
+        check.is_false(QuotesParser(response, compact_items=True).parse().cache_hit)
+
+        crawler.signals.send_catch_log(scrapy.signals.spider_closed, spider=crawler.spider, reason="finished")
+        check.is_false(QuotesParser._parse_cache.is_open)
+        check.is_none(QuotesParser(response).parse().cache_hit)
+        check.equal(crawler.stats.get_value("parse_cache/hits"), 1)
+        check.equal(crawler.stats.get_value("parse_cache/misses"), 2)
+        check.equal(crawler.stats.get_value("parse_cache/stored"), 2)
+        check.equal(crawler.stats.get_value("parse_cache/entries"), 2)
+        check.equal(crawler.stats.get_value("parse_cache/disk_entries"), 2)
+
+        # The next crawl finds the results left in the folder, but only fits one in memory.
+        QuotesParser._parse_cache.open(1, str(tmp_path), 1024 * 1024)
+        with contextlib.closing(QuotesParser._parse_cache):
+            check.is_true(QuotesParser(retry).parse().cache_hit)
+            check.equal(QuotesParser._parse_cache.stats["disk_hits"], 1)
+            check.equal(len(QuotesParser._parse_cache), 0)
+
+    @pytest.mark.parametrize("crawler", [{"PARSE_CACHE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            ParseCacheExtension.from_crawler(crawler)
+
+
+class TestBackpressureExtension:
+    """A collection of tests for the backpressure extension."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [
+            {
+                "BACKPRESSURE_ENABLED": True,
+                "BACKPRESSURE_INTERVAL": 3600,
+                "BACKPRESSURE_LOW_ITEMS": 2,
+                "BACKPRESSURE_HIGH_ITEMS": 5,
+                "BACKPRESSURE_LOW_LATENCY": 1.0,
+                "BACKPRESSURE_HIGH_LATENCY": 60.0,
+                "BACKPRESSURE_MIN_CONCURRENT_ITEMS": 2,
+                "CONCURRENT_ITEMS": 8,
+            }
+        ],
+        indirect=True,
+    )
+    def test_backpressure(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests items are throttled over the low watermarks, the engine is paused over the high watermarks and both
+        are restored once back under the low watermarks, and the state is stored in the stats.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker, to stand in for the engine."""
+        crawler.engine = engine = mocker.MagicMock(paused=False)
+        engine.pause.side_effect = lambda: setattr(engine, "paused", True)
+        engine.unpause.side_effect = lambda: setattr(engine, "paused", False)
+        engine.scraper.concurrent_items = 8
+        extension = BackpressureExtension.from_crawler(crawler)
+        crawler.signals.send_catch_log(scrapy.signals.spider_opened, spider=crawler.spider)
+
+        states = []
+        for in_flight in (0, 3, 6, 4):
+            engine.scraper.slot.itemproc_size = in_flight
+            states.append((extension.check(), engine.scraper.concurrent_items))
+        # Items that entered the pipelines as soon as their page was parsed, however long ago the last item finished.
+        request = scrapy.http.Request("https://quotes.toscrape.com/")
+        request.meta["instrumentation"] = {"parse_end": time.perf_counter()}
+        crawler.signals.send_catch_log(ITEMS_PARSED, request=request, count=2)
+        engine.scraper.slot.itemproc_size = 2
+        states.append((extension.check(), engine.scraper.concurrent_items))
+        # The items waiting for two seconds, over the low watermark even with few items in flight.
+        request.meta["instrumentation"]["parse_end"] -= 2.0
+        states.append((extension.check(), engine.scraper.concurrent_items))
+        response = scrapy.http.HtmlResponse(request.url, request=request)
+        for _ in range(2):
+            crawler.signals.send_catch_log(
+                scrapy.signals.item_scraped, item={}, response=response, spider=crawler.spider
+            )
+        engine.scraper.slot.itemproc_size = 0
+        for _ in range(3):
+            states.append((extension.check(), engine.scraper.concurrent_items))
+        crawler.signals.send_catch_log(scrapy.signals.spider_closed, spider=crawler.spider, reason="finished")
+
+        check.equal(
+            states,
+            [("normal", 8), ("throttled", 4), ("paused", 2), ("paused", 2), ("throttled", 4), ("throttled", 2)]
+            + [("throttled", 2), ("throttled", 4), ("normal", 8)],
+        )
+        check.equal(engine.pause.call_count, 1)
+        check.equal(engine.unpause.call_count, 1)
+        stats = crawler.stats.get_stats()
+        check.equal(stats["backpressure/state"], "normal")
+        check.equal(stats["backpressure/pauses"], 1)
+        check.greater(stats["backpressure/paused_time"], 0)
+        check.equal(stats["backpressure/items_in_flight_max"], 6)
+        check.greater_equal(stats["backpressure/item_latency_max"], 2.0)
+
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"BACKPRESSURE_ENABLED": True, "BACKPRESSURE_LOW_ITEMS": 10, "BACKPRESSURE_HIGH_ITEMS": 5}],
+        indirect=True,
+    )
+    def test_invalid_watermarks(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the low watermarks can not be over the high watermarks.
+
+        :param crawler: The crawler."""
+        with pytest.raises(ValueError):
+            BackpressureExtension.from_crawler(crawler)
+
+    @pytest.mark.parametrize("crawler", [{"BACKPRESSURE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the extension is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            BackpressureExtension.from_crawler(crawler)
@@ -0,0 +1,325 @@
+"""Tests for the frontiers of sharded crawls."""
+
+import os
+import time
+import uuid
+
+import pytest
+import pytest_check as check
+import pytest_mock
+import scrapy
+import scrapy.exceptions
+import scrapy.http
+import scrapy.signals
+import scrapy.utils.test
+import twisted.python.failure
+
+from scrapy_tor_playwright_demo.defs import PlaywrightMixin
+from scrapy_tor_playwright_demo.frontier.defs import (
+    FrontierBase,
+    RedisFrontierSettings,
+    get_shard,
+    request_from_record,
+    request_to_record,
+)
+from scrapy_tor_playwright_demo.frontier.frontier import FrontierScheduler, RedisFrontier, SQLiteFrontier, merge_stats
+from tests.standins import MemoryRedis
+
+
+class _Spider(scrapy.Spider):
+    """A spider with a callback and an errback."""
+
+    name = "quotes"
+
+    def parse(self, response: scrapy.http.Response, **kwargs) -> None:
+        """A callback.
+
+        :param response: The response.
+        :param kwargs: Remaining Scrapy keyword arguments."""
+
+    def on_error(self, failure: object) -> None:
+        """An errback.
+
+        :param failure: The failure."""
+
+
+class TestFrontier:
+    """A collection of tests for the frontiers and the scheduler of sharded crawls."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+    @staticmethod
+    def __create_scheduler(settings: dict, shard: int, shards: int) -> tuple[FrontierScheduler, scrapy.Spider]:
+        """Creates and opens the scheduler of a worker.
+
+        :param settings: The settings of the frontier.
+        :param shard: The shard of the worker.
+        :param shards: The number of shards.
+        :return: The scheduler and its spider."""
+        crawler = scrapy.utils.test.get_crawler(
+            _Spider, {"EXTENSIONS_BASE": {}, "SHARD_INDEX": shard, "SHARD_COUNT": shards, **settings}
+        )
+        spider = crawler.spider = _Spider.from_crawler(crawler)
+        scheduler = FrontierScheduler.from_crawler(crawler)
+        scheduler.open(spider)
+
+        return scheduler, spider
+
+    @staticmethod
+    def __get_settings(backend: str, tmp_path: os.PathLike, mocker: pytest_mock.MockerFixture) -> dict:
+        """Returns the settings of a frontier shared by the workers of a test, the Redis server is a stand-in.
+
+        :param backend: The backend of the frontier, ``sqlite`` or ``redis``.
+        :param tmp_path: A temporary folder for the database.
+        :param mocker: The mocker, to connect to the stand-in of the Redis server.
+        :return: The settings."""
+        if backend == "sqlite":
+            return {"FRONTIER_PATH": os.path.join(tmp_path, "frontier.sqlite3")}
+        mocker.patch("redis.Redis.from_url", MemoryRedis.from_url)
+
+        return {"FRONTIER_URL": f"redis://{uuid.uuid4().hex}:6379/0"}
+
+    @staticmethod
+    def __is_kept_open(spider: scrapy.Spider) -> bool:
+        """Sends the signal of the spider being idle, as the engine does.
+
+        :param spider: The spider of a worker.
+        :return: Whether the spider is kept open."""
+        results = spider.crawler.signals.send_catch_log(scrapy.signals.spider_idle, spider=spider)
+
+        return any(
+            isinstance(result, twisted.python.failure.Failure)
+            and isinstance(result.value, scrapy.exceptions.DontCloseSpider)
+            for _, result in results
+        )
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def test_record(self) -> None:
+        """Tests requests are serialized without the metadata of the worker, and Playwright requests are converted
+        again when deserialized."""
+        spider = _Spider()
+        request = PlaywrightMixin._to_playwright_request(  # pylint: disable=protected-access
+            scrapy.http.Request(
+                "https://quotes.toscrape.com/page/2/",
+                callback=spider.parse,
+                priority=5,
+                meta={"page_type": "page", "depth": 1, "proxy": "http://127.0.0.1:8118", "socket": object()},
+            )
+        )
+
+        loaded = request_from_record(request_to_record(request), spider)
+        check.equal(loaded.url, request.url)
+        check.equal(loaded.callback, spider.parse)
+        check.equal(loaded.priority, 5)
+        check.equal(loaded.meta["page_type"], "page")
+        check.equal(loaded.meta["depth"], 1)
+        check.is_not_in("proxy", loaded.meta)
+        check.is_not_in("socket", loaded.meta)
+        check.is_true(loaded.meta["playwright"])
+        check.not_equal(loaded.meta["playwright_context"], request.meta["playwright_context"])
+
+        plain = request_from_record(
+            request_to_record(scrapy.http.Request("https://quotes.toscrape.com/", errback=spider.on_error)), spider
+        )
+        check.equal(plain.errback, spider.on_error)
+        check.is_not_in("playwright", plain.meta)
+        with pytest.raises(ValueError):
+            request_to_record(scrapy.http.Request("https://quotes.toscrape.com/", callback=lambda response: None))
+
+    def test_sqlite_frontier(self, tmp_path: os.PathLike) -> None:
+        """Tests requests are deduplicated, claimed by priority once, and pending again if not completed.
+
+        :param tmp_path: A temporary folder for the database."""
+        path = os.path.join(tmp_path, "frontier.sqlite3")
+        frontier, other = SQLiteFrontier(path), SQLiteFrontier(path)
+        frontier.open(0)
+        other.open(1)
+
+        check.is_true(frontier.push(b"a", 0, 0, b"first"))
+        check.is_false(other.push(b"a", 1, 0, b"duplicate"))
+        check.is_true(other.push(b"b", 0, 10, b"urgent"))
+        check.is_true(other.push(b"c", 1, 0, b"other"))
+        check.equal(frontier.pending(0), 2)
+        check.equal(frontier.pop(0, 10), [b"urgent", b"first"])
+        check.equal(frontier.pop(0, 10), [])
+        check.is_true(frontier.is_active())
+
+        # A new worker of the shard claims again what was not completed.
+        frontier.close()
+        frontier.open(0)
+        check.equal(frontier.pop(0, 1), [b"urgent"])
+        check.equal(frontier.complete(0), 1)
+        check.equal(other.pop(1, 10), [b"other"])
+        check.equal(other.complete(1), 1)
+        check.is_true(frontier.is_active())
+        frontier.pop(0, 10)
+        frontier.complete(0)
+        check.is_false(other.is_active())
+        frontier.close()
+        other.close()
+
+    def test_redis_frontier(self) -> None:
+        """Tests requests are deduplicated, claimed by priority in batches once, and completed per worker."""
+        client = MemoryRedis()
+        frontier = RedisFrontier(client, RedisFrontierSettings("test", worker="a"))
+        other = RedisFrontier(client, RedisFrontierSettings("test", worker="b"))
+        frontier.open(0)
+        other.open(0)
+
+        check.is_true(frontier.push(b"a", 0, 0, b"first"))
+        check.is_false(other.push(b"a", 1, 0, b"duplicate"))
+        check.is_true(other.push(b"b", 0, 10, b"urgent"))
+        check.is_true(other.push(b"c", 0, 0, b"second"))
+        check.is_true(other.push(b"d", 1, 0, b"other"))
+        check.equal(frontier.pending(0), 3)
+        check.equal(frontier.pop(0, 2), [b"urgent", b"first"])
+        check.equal(other.pop(0, 10), [b"second"])
+        check.equal(frontier.pop(0, 10), [])
+        check.equal(frontier.pending(1), 1)
+
+        check.equal(frontier.complete(0), 2)
+        check.is_true(frontier.is_active())
+        check.equal(other.complete(0), 1)
+        check.is_true(frontier.is_active())
+        check.equal(other.pop(1, 10), [b"other"])
+        check.equal(other.complete(1), 1)
+        check.is_false(frontier.is_active())
+        frontier.close()
+        other.close()
+
+    def test_redis_redelivery(self) -> None:
+        """Tests the requests claimed and not completed are pending again when the worker is closed, or its lease
+        expires."""
+        client = MemoryRedis()
+        frontier = RedisFrontier(client, RedisFrontierSettings("test", worker="a"))
+        other = RedisFrontier(client, RedisFrontierSettings("test", worker="b"))
+        frontier.open(0)
+        other.open(0)
+        for key in (b"a", b"b", b"c"):
+            frontier.push(key, 0, 0, key)
+
+        check.equal(frontier.pop(0, 2), [b"a", b"b"])
+        frontier.close()
+        check.equal(frontier.pending(0), 3)
+
+        # The worker is gone without closing the frontier, once its lease expires.
+        frontier.open(0)
+        check.equal(frontier.pop(0, 2), [b"a", b"b"])
+        check.equal(other.pop(0, 10), [b"c"])
+        check.is_true(other.is_active())
+        check.equal(other.pending(0), 0)
+        client.delete("test:worker:a")
+        check.is_true(other.is_active())
+        check.equal(other.pending(0), 2)
+        check.equal(other.pop(0, 10), [b"a", b"b"])
+        check.equal(other.complete(0), 3)
+        check.is_false(other.is_active())
+        other.close()
+
+    @pytest.mark.parametrize("backend", ["sqlite", "redis"])
+    def test_politeness(self, backend: str, tmp_path: os.PathLike) -> None:
+        """Tests the slot of a domain is acquired by one worker per interval.
+
+        :param backend: The backend of the frontier.
+        :param tmp_path: A temporary folder for the database."""
+        if backend == "sqlite":
+            path = os.path.join(tmp_path, "frontier.sqlite3")
+            frontiers: list[FrontierBase] = [SQLiteFrontier(path), SQLiteFrontier(path)]
+        else:
+            client = MemoryRedis()
+            frontiers = [RedisFrontier(client, RedisFrontierSettings("test")) for _ in range(2)]
+        for shard, frontier in enumerate(frontiers):
+            frontier.open(shard)
+
+        check.equal(frontiers[0].acquire("quotes.toscrape.com", 0.2), 0.0)
+        wait = frontiers[1].acquire("quotes.toscrape.com", 0.2)
+        check.greater(wait, 0.0)
+        check.less_equal(wait, 0.2)
+        check.equal(frontiers[1].acquire("toscrape.com", 0.2), 0.0)
+        time.sleep(0.25)
+        check.equal(frontiers[1].acquire("quotes.toscrape.com", 0.2), 0.0)
+        for frontier in frontiers:
+            frontier.close()
+
+    @pytest.mark.parametrize("backend", ["sqlite", "redis"])
+    def test_scheduler(self, backend: str, tmp_path: os.PathLike, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the workers schedule only the requests of their shard, and are kept open until all are completed.
+
+        :param backend: The backend of the frontier.
+        :param tmp_path: A temporary folder for the database.
+        :param mocker: The mocker."""
+        settings = self.__get_settings(backend, tmp_path, mocker)
+        workers = [self.__create_scheduler(settings, shard, 2) for shard in range(2)]
+        (first, spider), (second, _) = workers
+
+        urls = [f"https://quotes.toscrape.com/page/{page}/" for page in range(1, 11)]
+        for url in urls:
+            check.is_true(first.enqueue_request(scrapy.http.Request(url, callback=spider.parse)))
+        check.is_false(second.enqueue_request(scrapy.http.Request(urls[0], callback=spider.parse)))
+        check.equal(len(first) + len(second), len(urls))
+
+        scheduled = {shard: [] for shard in range(2)}
+        for shard, (scheduler, _) in enumerate(workers):
+            scheduled[shard].extend(request.url for request in iter(scheduler.next_request, None))
+        check.equal(sorted(scheduled[0] + scheduled[1]), sorted(urls))
+        fingerprinter = spider.crawler.request_fingerprinter
+        for url in urls:
+            check.is_in(url, scheduled[get_shard(fingerprinter.fingerprint(scrapy.http.Request(url)), 2)])
+
+        # The first worker is idle, but the second worker has not completed its requests.
+        check.is_true(self.__is_kept_open(workers[0][1]))
+        check.is_false(self.__is_kept_open(workers[1][1]))
+        check.is_false(self.__is_kept_open(workers[0][1]))
+        for scheduler, _ in workers:
+            scheduler.close("finished")
+
+    @pytest.mark.parametrize("backend", ["sqlite", "redis"])
+    def test_scheduler_politeness(self, backend: str, tmp_path: os.PathLike, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the workers wait for the delay between downloads from a domain, shared among them.
+
+        :param backend: The backend of the frontier.
+        :param tmp_path: A temporary folder for the database.
+        :param mocker: The mocker."""
+        settings = {
+            **self.__get_settings(backend, tmp_path, mocker),
+            "FRONTIER_DOMAIN_DELAY": 60,
+            "FRONTIER_BATCH_SIZE": 1,
+        }
+        (first, spider), (second, other_spider) = [self.__create_scheduler(settings, 0, 1) for _ in range(2)]
+        for url in ("https://quotes.toscrape.com/page/1/", "https://quotes.toscrape.com/page/2/"):
+            first.enqueue_request(scrapy.http.Request(url, callback=spider.parse))
+
+        check.is_not_none(first.next_request())
+        check.is_true(second.has_pending_requests())
+        check.is_none(second.next_request())
+        check.equal(other_spider.crawler.stats.get_value("frontier/delayed"), 1)
+        first.close("finished")
+        second.close("finished")
+
+    def test_redis_url(self) -> None:
+        """Tests the frontier in a Redis server requires the URL of a Redis server."""
+        with pytest.raises(ValueError, match="redis://"):
+            RedisFrontier.from_url("memory://crawl", RedisFrontierSettings("test"))
+
+    def test_merge_stats(self) -> None:
+        """Tests counts are added, and maximums, times and other values are merged."""
+        merged = merge_stats(
+            [
+                {"item_scraped_count": 10, "memusage/max": 100, "start_time": "2024-01-01T00:00:01", "reason": "a"},
+                {"item_scraped_count": 5, "memusage/max": 300, "start_time": "2024-01-01T00:00:00", "reason": "a"},
+                {"item_scraped_count": 1, "finish_reason": "shutdown"},
+            ]
+        )
+        check.equal(
+            merged,
+            {
+                "finish_reason": "shutdown",
+                "item_scraped_count": 16,
+                "memusage/max": 300,
+                "reason": "a",
+                "start_time": "2024-01-01T00:00:00",
+            },
+        )
@@ -0,0 +1,30 @@
+"""Benchmarks for the compact items against the Scrapy items, the full benchmark at a million quotes is run with
+``python -m tests.benchmarks.items``."""
+
+import pytest
+import pytest_check as check
+
+from tests.benchmarks.items import run
+
+#: The number of quotes measured, reduced so that the test suite remains fast.
+QUOTES = 20_000
+
+
+@pytest.mark.benchmark
+class TestItemBenchmarks:
+    """A collection of benchmarks for the items."""
+
+    # pylint: disable=no-self-use,too-few-public-methods
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def test_compact_quote_items(self) -> None:
+        """Benchmarks the compact quote items, which must retain at most half the memory of Scrapy quote items and
+        serialize faster."""
+        results = run(QUOTES)
+
+        check.less(results["CompactQuoteItem"].bytes_per_item, results["QuoteItem"].bytes_per_item / 2)
+        check.greater(results["CompactQuoteItem"].serialized_per_second, results["QuoteItem"].serialized_per_second)
@@ -0,0 +1,593 @@
+"""Tests for the middlewares."""
+
+import asyncio
+import contextlib
+import dataclasses
+import hashlib
+import os
+import pathlib
+import time
+
+import pytest
+import pytest_check as check
+import pytest_mock
+import scrapy
+import scrapy.crawler
+import scrapy.exceptions
+import scrapy.http
+import twisted.internet.defer
+import twisted.internet.task
+from rotating_proxies.middlewares import RotatingProxyMiddleware
+from twisted.internet import reactor
+
+from scrapy_tor_playwright_demo.defs import PlaywrightMixin, PlaywrightStores
+from scrapy_tor_playwright_demo.extensions.defs import PAGE_NOT_MODIFIED
+from scrapy_tor_playwright_demo.middlewares import middlewares
+from scrapy_tor_playwright_demo.middlewares.defs import LatencyWindow, RecrawlBanDetectionPolicy, TorController
+from scrapy_tor_playwright_demo.middlewares.middlewares import (
+    HedgingMiddleware,
+    PlaywrightMiddleware,
+    RecrawlMiddleware,
+    SessionMiddleware,
+    SpoolMiddleware,
+)
+from scrapy_tor_playwright_demo.spiders.spiders import QuotesSpider
+from scrapy_tor_playwright_demo.stores.recrawl import RecrawlStore
+from tests.benchmarks.site import StandInTorControl
+
+#: The settings of the crawler for the hedging middleware.
+HEDGING_SETTINGS = {
+    "HEDGING_ENABLED": True,
+    "HEDGING_QUANTILE": 0.9,
+    "HEDGING_MIN_SAMPLES": 10,
+    "HEDGING_BUDGET": 0.5,
+    "ROTATING_PROXY_LIST": ["http://proxy-zero:8888", "http://proxy-one:8888"],
+}
+#: The settings of the crawler for the session middleware, with proxies on the host of the stand-in control port.
+SESSION_SETTINGS = {
+    "SESSION_ENABLED": True,
+    "SESSION_MAX_AGE": 15,
+    "SESSION_RENEWAL_COOLDOWN": 10,
+    "SESSION_TOR_CONTROL_PORT": 9051,
+    "ROTATING_PROXY_LIST": ["http://127.0.0.1:8888", "http://localhost:8889"],
+}
+
+
+class TestPlaywrightMiddleware:
+    """A collection of tests for the Playwright middleware."""
+
+    # pylint: disable=no-self-use,too-few-public-methods
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _to_request(url: str, proxy: str, **meta) -> scrapy.http.Request:
+        """Creates a Playwright request through a proxy.
+
+        :param url: The URL of the request.
+        :param proxy: The proxy of the request.
+        :param meta: Additional metadata of the request.
+        :return: The request."""
+        request = scrapy.http.Request(url, meta={"proxy": proxy, "download_timeout": 180, **meta})
+        return PlaywrightMixin._to_playwright_request(request)  # pylint: disable=protected-access
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"ADAPTIVE_TIMEOUT_ENABLED": True, "ADAPTIVE_TIMEOUT_FACTOR": 10.0, "ADAPTIVE_TIMEOUT_MIN_SAMPLES": 10}],
+        indirect=True,
+    )
+    def test_adaptive_timeouts(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the timeouts are derived from the latencies of the proxy and page type, falling back to those of the
+        page type and then to the ceiling, and that timeouts set explicitly in the requests are kept.
+
+        :param crawler: The crawler."""
+        middleware, spider = PlaywrightMiddleware.from_crawler(crawler), scrapy.Spider("quotes")
+        for i in range(10):
+            request = self._to_request(f"https://quotes.toscrape.com/page/{i}/", "http://proxy-zero:8888")
+            request.meta["instrumentation"] = {"proxy_end": time.perf_counter() - 2.0}
+            middleware.process_response(request, scrapy.http.Response(request.url), spider)
+
+        same_proxy = self._to_request("https://quotes.toscrape.com/page/11/", "http://proxy-zero:8888")
+        other_proxy = self._to_request("https://quotes.toscrape.com/page/12/", "http://proxy-one:8888")
+        other_page_type = self._to_request("https://quotes.toscrape.com/author/Albert/", "http://proxy-zero:8888")
+        explicit = self._to_request(
+            "https://quotes.toscrape.com/page/13/", "http://proxy-zero:8888", download_timeout=5
+        )
+        for request in (same_proxy, other_proxy, other_page_type, explicit):
+            middleware.process_request(request, spider)
+
+        check.between(same_proxy.meta["download_timeout"], 20.0, 21.0)
+        check.equal(
+            same_proxy.meta["playwright_page_goto_kwargs"]["timeout"], same_proxy.meta["download_timeout"] * 1000
+        )
+        check.equal(other_proxy.meta["download_timeout"], same_proxy.meta["download_timeout"])
+        check.equal(other_page_type.meta["download_timeout"], 180.0)
+        check.equal(explicit.meta["download_timeout"], 5)
+        check.equal(
+            crawler.stats.get_value("adaptive_timeout/http://proxy-zero:8888/page"), same_proxy.meta["download_timeout"]
+        )
+
+
+class TestHedgingMiddleware:
+    """A collection of tests for the hedging middleware."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _setup(
+        crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture
+    ) -> tuple[HedgingMiddleware, list, twisted.internet.task.Clock]:
+        """Creates the middleware with a download handler whose downloads of the hedges are fired by the test, a fake
+        clock, and the latencies of ten requests to quote pages of one second each.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker.
+        :return: The middleware, the list where the requests and deferreds of the hedges are appended, and the clock."""
+        downloads = []
+
+        def download_request(request: scrapy.http.Request, spider: scrapy.Spider) -> twisted.internet.defer.Deferred:
+            """Starts a fake download.
+
+            :param request: The request.
+            :param spider: The spider.
+            :return: The deferred of the download."""
+            # pylint: disable=unused-argument
+            downloads.append((request, deferred := twisted.internet.defer.Deferred()))
+            return deferred
+
+        crawler.engine = mocker.MagicMock()
+        crawler.engine.downloader.handlers.download_request.side_effect = download_request
+        clock = twisted.internet.task.Clock()
+        mocker.patch.object(reactor, "callLater", clock.callLater)
+
+        middleware = HedgingMiddleware.from_crawler(crawler)
+        spider = scrapy.Spider("quotes")
+        for i in range(10):
+            request = scrapy.http.Request(f"https://quotes.toscrape.com/page/{i}/")
+            middleware.process_request(request, spider)
+            request.meta["hedging_start"] = time.monotonic() - 1.0
+            middleware.process_response(request, scrapy.http.Response(request.url), spider)
+
+        return middleware, downloads, clock
+
+    @staticmethod
+    def _to_request(mocker: pytest_mock.MockerFixture) -> scrapy.http.Request:
+        """Creates a Playwright request through the first proxy, with a stand-in page as if it was downloading.
+
+        :param mocker: The mocker.
+        :return: The request."""
+        request = scrapy.http.Request("https://quotes.toscrape.com/page/11/", meta={"proxy": "http://proxy-zero:8888"})
+        request = PlaywrightMixin._to_playwright_request(request)  # pylint: disable=protected-access
+        page = mocker.MagicMock()
+        page.close, page.context.close = mocker.AsyncMock(), mocker.AsyncMock()
+        request.meta["playwright_page"] = page
+
+        return request
+
+    ## Public API ######################################################################################################
+    def test_latency_window(self) -> None:
+        """Tests the quantiles of the latency window only consider the latest latencies."""
+        window = LatencyWindow(size=100)
+        for latency in range(1, 201):
+            window.observe(float(latency))
+
+        check.equal(len(window), 100)
+        check.equal(window.quantile(0.5), 150.0)
+        check.equal(window.quantile(0.99), 199.0)
+        check.equal(window.quantile(1.0), 200.0)
+        check.is_none(LatencyWindow().quantile(0.5))
+
+    @pytest.mark.parametrize("crawler", [HEDGING_SETTINGS], indirect=True)
+    def test_hedge_wins(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests a slow request is left to the downloader and hedged through another proxy, and that the request is
+        cancelled and the response of the hedge used when first.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        middleware, downloads, clock = self._setup(crawler, mocker)
+        request, spider = self._to_request(mocker), scrapy.Spider("quotes")
+
+        check.is_none(middleware.process_request(request, spider))
+        check.equal(len(downloads), 0)
+        clock.advance(2.0)
+        check.equal(len(downloads), 1)
+        (hedge, hedge_deferred) = downloads[0]
+        check.equal(hedge.meta["proxy"], "http://proxy-one:8888")
+        hedge_deferred.callback(scrapy.http.Response(hedge.url, body=b"hedge"))
+        check.equal(request.meta["playwright_page"].close.await_count, 1)
+        result = twisted.internet.defer.ensureDeferred(middleware.process_exception(request, Exception(), spider))
+
+        check.equal(result.result.body, b"hedge")
+        check.equal(request.meta["proxy"], "http://proxy-one:8888")
+        check.equal(crawler.stats.get_value("hedging/sent"), 1)
+        check.equal(crawler.stats.get_value("hedging/won"), 1)
+
+    @pytest.mark.parametrize("crawler", [HEDGING_SETTINGS], indirect=True)
+    def test_primary_wins(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the hedge is cancelled when the original request responds first.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        middleware, downloads, clock = self._setup(crawler, mocker)
+        request, spider = self._to_request(mocker), scrapy.Spider("quotes")
+
+        middleware.process_request(request, spider)
+        clock.advance(2.0)
+        (_, hedge_deferred) = downloads[0]
+        response = middleware.process_response(request, scrapy.http.Response(request.url, body=b"primary"), spider)
+
+        check.equal(response.body, b"primary")
+        check.is_true(hedge_deferred.called)
+        check.equal(request.meta["proxy"], "http://proxy-zero:8888")
+        check.equal(crawler.stats.get_value("hedging/lost"), 1)
+        check.is_none(crawler.stats.get_value("hedging/won"))
+
+    @pytest.mark.parametrize("crawler", [HEDGING_SETTINGS], indirect=True)
+    def test_primary_fails(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the context of the original request is closed when it fails while the hedge is downloading, and that
+        the response of the hedge is used once it comes.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        middleware, downloads, clock = self._setup(crawler, mocker)
+        request, spider = self._to_request(mocker), scrapy.Spider("quotes")
+
+        middleware.process_request(request, spider)
+        clock.advance(2.0)
+        result = twisted.internet.defer.ensureDeferred(middleware.process_exception(request, Exception(), spider))
+        check.is_false(result.called)
+        check.equal(request.meta["playwright_page"].context.close.await_count, 1)
+        (hedge, hedge_deferred) = downloads[0]
+        hedge_deferred.callback(scrapy.http.Response(hedge.url, body=b"hedge"))
+
+        check.equal(result.result.body, b"hedge")
+        check.equal(crawler.stats.get_value("hedging/won"), 1)
+
+    @pytest.mark.parametrize("crawler", [{**HEDGING_SETTINGS, "HEDGING_MIN_SAMPLES": 100}], indirect=True)
+    def test_not_enough_samples(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests requests are not hedged until there are enough latencies for their page type.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        middleware, downloads, clock = self._setup(crawler, mocker)
+        request = self._to_request(mocker)
+
+        check.is_none(middleware.process_request(request, scrapy.Spider("quotes")))
+        clock.advance(2.0)
+
+        check.equal(len(downloads), 0)
+
+
+class TestSessionMiddleware:
+    """A collection of tests for the sticky sessions middleware."""
+
+    # pylint: disable=no-self-use,protected-access
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _to_request(url: str, proxy: str, mocker: pytest_mock.MockerFixture, **meta) -> scrapy.http.Request:
+        """Creates a Playwright request through a proxy, with a stand-in page as if it was downloaded.
+
+        :param url: The URL of the request.
+        :param proxy: The proxy of the request, as assigned by ``scrapy-rotating-proxies``.
+        :param mocker: The mocker.
+        :param meta: Additional metadata of the request.
+        :return: The request."""
+        request = scrapy.http.Request(url, meta={"proxy": proxy, "_rotating_proxy": True, **meta})
+        request = PlaywrightMixin._to_playwright_request(request)
+        page = mocker.MagicMock()
+        page.close, page.context.close = mocker.AsyncMock(), mocker.AsyncMock()
+        request.meta["playwright_page"] = page
+
+        return request
+
+    ## Public API ######################################################################################################
+    def test_tor_controller(self) -> None:
+        """Tests a new circuit is requested from the control port, and that failed authentications raise."""
+        with StandInTorControl(password='pass"word') as control:
+            TorController("127.0.0.1", control.port, password='pass"word').signal()
+            with pytest.raises(RuntimeError, match="515"):
+                TorController("127.0.0.1", control.port, password="wrong").signal()
+            with pytest.raises(RuntimeError, match="515"):
+                TorController("127.0.0.1", control.port).signal()
+
+        check.equal(control.signals, ["NEWNYM"])
+
+    @pytest.mark.parametrize("crawler", [{**SESSION_SETTINGS, "SESSION_TOR_CONTROL_PORT": None}], indirect=True)
+    def test_sticky_sessions(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the requests of a session are sent through the proxy and context of its first response, which is
+        kept open for them, until the session expires.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        middleware, spider = SessionMiddleware.from_crawler(crawler), scrapy.Spider("quotes")
+        stores = PlaywrightStores.from_crawler(crawler)
+        first = self._to_request("https://quotes.toscrape.com/", "http://127.0.0.1:8888", mocker, session="a")
+        middleware.process_request(first, spider)
+        middleware.process_response(first, scrapy.http.Response(first.url), spider)
+        asyncio.run(PlaywrightMixin._close_playwright_context(first, stores))
+
+        second = self._to_request("https://quotes.toscrape.com/page/2/", "http://localhost:8889", mocker, session="a")
+        other = self._to_request("https://quotes.toscrape.com/page/3/", "http://localhost:8889", mocker, session="b")
+        for request in (second, other):
+            middleware.process_request(request, spider)
+            PlaywrightMixin._add_playwright_proxy(request, stores)
+
+        check.is_true(first.meta["playwright_page"].close.called)
+        check.is_false(first.meta["playwright_page"].context.close.called)
+        check.equal(second.meta["proxy"], "http://127.0.0.1:8888")
+        check.equal(second.meta["download_slot"], "127.0.0.1")
+        check.equal(second.meta["playwright_context"], first.meta["playwright_context"])
+        check.equal(other.meta["proxy"], "http://localhost:8889")
+        check.not_equal(other.meta["playwright_context"], first.meta["playwright_context"])
+        check.equal(crawler.stats.get_value("sessions/pinned"), 1)
+        check.equal(crawler.stats.get_value("sessions/reused"), 1)
+
+        mocker.patch.object(time, "monotonic", return_value=time.monotonic() + 20)
+        expired = self._to_request("https://quotes.toscrape.com/page/4/", "http://localhost:8889", mocker, session="a")
+        middleware.process_request(expired, spider)
+
+        check.equal(expired.meta["proxy"], "http://localhost:8889")
+        check.equal(len(stores.sessions), 0)
+        check.equal(crawler.stats.get_value("sessions/ended"), 1)
+
+    @pytest.mark.parametrize("crawler", [SESSION_SETTINGS], indirect=True)
+    def test_renewal_on_ban(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests a ban ends the sessions of the proxy and renews its circuit once within the cooldown, reviving the
+        proxy in ``scrapy-rotating-proxies`` instead of waiting out its backoff.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        rotating, stores = RotatingProxyMiddleware.from_crawler(crawler), PlaywrightStores.from_crawler(crawler)
+        crawler.engine = mocker.MagicMock()
+        crawler.engine.downloader.middleware.middlewares = (rotating,)
+        # Run the renewals synchronously, as the reactor is not running.
+        mocker.patch.object(middlewares.twisted.internet.threads, "deferToThread", twisted.internet.defer.maybeDeferred)
+        middleware, spider = SessionMiddleware.from_crawler(crawler), scrapy.Spider("quotes")
+
+        proxy = "http://127.0.0.1:8888"
+        with StandInTorControl() as control:
+            mocker.patch.object(
+                middlewares, "TorController", lambda host, _, *args: TorController(host, control.port, *args)
+            )
+            pinned = self._to_request("https://quotes.toscrape.com/", proxy, mocker, session="a")
+            middleware.process_response(pinned, scrapy.http.Response(pinned.url), spider)
+            context = pinned.meta["playwright_context"]
+            stores.contexts.register(pinned, pinned.meta["playwright_page"])
+            banned = [
+                self._to_request(f"https://quotes.toscrape.com/page/{i}/", proxy, mocker, _ban=True) for i in range(2)
+            ]
+            for request in banned:
+                request.meta["playwright_context"] = context
+                middleware.process_response(request, scrapy.http.Response(request.url, status=403), spider)
+                rotating.proxies.mark_dead(proxy)
+
+        check.equal(control.signals, ["NEWNYM"])
+        check.is_none(stores.sessions.get("a", 15))
+        check.equal(stores.sessions.epoch(proxy), 2)
+        check.not_equal(banned[0].meta["playwright_context"], context)
+        check.is_true(pinned.meta["playwright_page"].context.close.called)
+        stores.contexts.unregister(context)
+        check.equal(crawler.stats.get_value("sessions/renewals"), 1)
+        check.equal(crawler.stats.get_value("sessions/ended"), 1)
+        # The second ban is within the cooldown, so the proxy is left to the backoff.
+        check.is_in(proxy, rotating.proxies.dead)
+        middleware._SessionMiddleware__renewed_circuit(proxy)
+        check.is_in(proxy, rotating.proxies.unchecked)
+
+    @pytest.mark.parametrize("crawler", [{"SESSION_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the middleware is not created unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            SessionMiddleware.from_crawler(crawler)
+
+
+class TestRecrawlMiddleware:
+    """A collection of tests for the conditional recrawl middleware."""
+
+    # pylint: disable=no-self-use,protected-access
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _visit(
+        middleware: RecrawlMiddleware, url: str, body: bytes, status: int = 200, **headers
+    ) -> tuple[scrapy.http.Request, scrapy.http.Response]:
+        """Sends a request through the middleware, and the response of the origin if it is downloaded.
+
+        :param middleware: The middleware.
+        :param url: The URL of the page.
+        :param body: The body of the page.
+        :param status: The status of the response of the origin.
+        :param headers: The headers of the response of the origin.
+        :return: The request and the response that reaches the spider."""
+        spider, request = scrapy.Spider("quotes"), scrapy.http.Request(url)
+        if (response := middleware.process_request(request, spider)) is None:
+            response = scrapy.http.HtmlResponse(url, status=status, headers=headers, body=body, request=request)
+
+        return request, middleware.process_response(request, response, spider)
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize("crawler", [{"RECRAWL_ENABLED": True, "RECRAWL_MIN_INTERVAL": 3600}], indirect=True)
+    def test_recrawl(
+        self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture, tmp_path: pathlib.Path
+    ) -> None:
+        """Tests pages are requested conditionally and compared by digest, and that the visits of a page are slowed
+        down while it does not change.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker.
+        :param tmp_path: A temporary folder for the store."""
+        middleware, store = RecrawlMiddleware.from_crawler(crawler), RecrawlStore.from_crawler(crawler)
+        url = "http://quotes.bench/page/2/"
+        store.open(str(tmp_path / "recrawl.sqlite3"), 3600, 4 * 3600)
+        with contextlib.closing(store):
+            first, _ = self._visit(middleware, url, b"<p>A quote.</p>", ETag="v1")
+            store.set_links(url, ["http://quotes.bench/page/3/"])
+            second, response = self._visit(middleware, url, b"", status=304)
+            third, not_due = self._visit(middleware, url, b"")
+            # Two hours later, and three more hours later.
+            mocker.patch.object(time, "time", return_value=time.time() + 2 * 3600)
+            fourth, _ = self._visit(middleware, url, b"<p>A   quote.</p>\n")
+            mocker.patch.object(time, "time", return_value=time.time() + 3 * 3600)
+            fifth, _ = self._visit(middleware, url, b"<p>Another quote.</p>")
+            record = store.get(url)
+
+        check.equal(first.meta["recrawl"], "changed")
+        check.equal(second.headers["If-None-Match"], b"v1")
+        check.is_in(304, second.meta["handle_httpstatus_list"])
+        check.equal(second.meta["recrawl"], "not_modified")
+        check.equal(second.meta["recrawl_links"], ("http://quotes.bench/page/3/",))
+        check.equal(response.status, 304)
+        check.equal(third.meta["recrawl"], "not_due")
+        check.equal((not_due.status, not_due.body), (304, b""))
+        check.equal(fourth.meta["recrawl"], "unchanged")
+        check.equal(fifth.meta["recrawl"], "changed")
+        check.equal((record.interval, record.unchanged, record.validators.etag), (0.0, 0, None))
+        check.equal(
+            {
+                key: crawler.stats.get_value(f"recrawl/{key}")
+                for key in ("changed", "not_modified", "not_due", "unchanged")
+            },
+            {"changed": 2, "not_modified": 1, "not_due": 1, "unchanged": 1},
+        )
+
+    def test_ban_detection_policy(self) -> None:
+        """Tests the responses of the pages that were not modified are not bans, unlike other ``304`` responses."""
+        policy, url = RecrawlBanDetectionPolicy(), "http://quotes.bench/"
+        conditional = scrapy.http.Request(url, meta={"recrawl_conditional": True})
+        not_due = scrapy.http.Request(url, meta={"recrawl": "not_due"})
+
+        check.is_false(policy.response_is_ban(conditional, scrapy.http.Response(url, status=304)))
+        check.is_none(policy.response_is_ban(not_due, scrapy.http.Response(url, status=304)))
+        check.is_true(policy.response_is_ban(scrapy.http.Request(url), scrapy.http.Response(url, status=304)))
+        check.is_true(policy.response_is_ban(conditional, scrapy.http.Response(url, status=403)))
+
+    @pytest.mark.parametrize("crawler", [{}], indirect=True)
+    def test_spider_follows_links(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the spider only follows the links of a page that did not change, sending the signal instead of
+        parsing it.
+
+        :param crawler: The crawler."""
+        signals = []
+
+        def page_not_modified(url: str, reason: str) -> None:
+            """Records the signal.
+
+            :param url: The URL of the page.
+            :param reason: Why the page was not parsed."""
+            signals.append((url, reason))
+
+        crawler.signals.connect(page_not_modified, signal=PAGE_NOT_MODIFIED)
+        spider = QuotesSpider.from_crawler(crawler, mode="nojs")
+        request = PlaywrightMixin._to_playwright_request(scrapy.http.Request("https://quotes.toscrape.com/"))
+        request.meta.update(recrawl="unchanged", recrawl_links=("https://quotes.toscrape.com/page/2/",))
+        response = scrapy.http.HtmlResponse(request.url, body=b"<html></html>", request=request)
+
+        async def collect() -> list:
+            """Collects the output of the spider.
+
+            :return: The requests and items."""
+            return [output async for output in spider.aparse(response)]
+
+        outputs = asyncio.run(collect())
+
+        check.equal([output.url for output in outputs], ["https://quotes.toscrape.com/page/2/"])
+        check.is_true(PlaywrightMixin._is_playwright_request(outputs[0]))
+        check.equal(signals, [("https://quotes.toscrape.com/", "unchanged")])
+
+    @pytest.mark.parametrize("crawler", [{"RECRAWL_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the middleware is not created unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            RecrawlMiddleware.from_crawler(crawler)
+
+
+class TestSpoolMiddleware:
+    """A collection of tests for the spool middleware."""
+
+    # pylint: disable=no-self-use,protected-access
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _process(
+        middleware: SpoolMiddleware, response: scrapy.http.Response, **meta
+    ) -> tuple[scrapy.http.Request, scrapy.http.Response]:
+        """Sends a response through the middleware, waiting for its body to be spooled.
+
+        :param middleware: The middleware.
+        :param response: The response of the origin, without request.
+        :param meta: The metadata of the request.
+        :return: The request and the response that reaches the spider."""
+        request = scrapy.http.Request(response.url, callback=lambda _: None, meta=meta)
+        results = []
+        outcome = middleware.process_response(request, response.replace(request=request), scrapy.Spider("quotes"))
+        twisted.internet.defer.maybeDeferred(lambda: outcome).addCallback(results.append)
+
+        return request, results[0]
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize("crawler", [{"SPOOL_ENABLED": True, "SPOOL_THRESHOLD": 64}], indirect=True)
+    def test_spool(self, crawler: scrapy.crawler.Crawler, mocker: pytest_mock.MockerFixture) -> None:
+        """Tests the bodies of large and non HTML responses are spooled to a file, and the response reaches the spider
+        without body but with the encoding of the body, unlike small HTML responses and failed responses.
+
+        :param crawler: The crawler.
+        :param mocker: The mocker."""
+        # Write the bodies synchronously, as the reactor is not running.
+        mocker.patch.object(middlewares.twisted.internet.threads, "deferToThread", twisted.internet.defer.maybeDeferred)
+        middleware = SpoolMiddleware.from_crawler(crawler)
+        middleware._SpoolMiddleware__spider_opened()
+        large = b"<html><head><meta charset='cp1252'></head><body>" + "Café".encode("cp1252") * 64 + b"</body></html>"
+        url = "https://quotes.toscrape.com/page/1/"
+
+        request, response = self._process(middleware, scrapy.http.HtmlResponse(url, body=large))
+        spooled = request.meta["spool"]
+        check.equal((response.body, response.encoding, response.flags), (b"", "cp1252", ["spooled"]))
+        check.is_instance(response, scrapy.http.HtmlResponse)
+        check.equal((spooled.size, spooled.encoding), (len(large), "cp1252"))
+        check.equal(spooled.digest, hashlib.sha256(large).digest())
+        with open(spooled.path, "rb") as stream:
+            check.equal(stream.read(), large)
+
+        request, response = self._process(middleware, scrapy.http.Response(f"{url}image.png", body=b"\x89PNG"))
+        check.equal((response.body, request.meta["spool"].encoding), (b"", None))
+
+        # Small HTML responses, failed responses and responses whose previous attempt was spooled are left as is.
+        stale = dataclasses.replace(spooled)
+        for response, meta in (
+            (scrapy.http.HtmlResponse(url, body=b"<html></html>"), {"spool": stale}),
+            (scrapy.http.HtmlResponse(url, status=500, body=large), {}),
+            (scrapy.http.HtmlResponse(url, body=large), {"dont_spool": True}),
+        ):
+            request, processed = self._process(middleware, response, **meta)
+            check.equal(processed.body, response.body)
+            check.is_not_in("spool", request.meta)
+
+        check.equal(crawler.stats.get_value("spool/responses"), 2)
+        check.equal(crawler.stats.get_value("spool/bytes"), len(large) + 4)
+        # The files not moved by the pipelines are deleted with the folder.
+        middleware._SpoolMiddleware__spider_closed()
+        check.is_false(os.path.exists(os.path.dirname(spooled.path)))
+
+    @pytest.mark.parametrize("crawler", [{"SPOOL_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the middleware is not created unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            SpoolMiddleware.from_crawler(crawler)
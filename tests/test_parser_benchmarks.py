@@ -0,0 +1,88 @@
+"""Micro-benchmarks for the quotes parser, they fail when throughput or memory regress against the baselines."""
+
+import logging
+
+import pytest
+import scrapy.http
+
+from scrapy_tor_playwright_demo.items import QuotesParser
+from tests.benchmarks.parser import ParserBenchmark
+from tests.benchmarks.site import SyntheticQuotesSite
+
+#: A synthetic website with a single page of one thousand quotes per version.
+LARGE_SITE = SyntheticQuotesSite(pages=1, authors=100, quotes_per_page=1000)
+
+
+@pytest.mark.benchmark
+class TestQuotesParserBenchmarks:
+    """A collection of micro-benchmarks for the quotes parser."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+    @staticmethod
+    def _require_baseline(parser_benchmark: ParserBenchmark, name: str) -> None:
+        """Skips the benchmark of a page type without baseline, unless the baselines are being updated, as it would
+        have nothing to be compared against.
+
+        :param parser_benchmark: The parser benchmark.
+        :param name: The name of the page type."""
+        if not parser_benchmark.update and parser_benchmark.baseline(name) is None:
+            pytest.skip(f"No baseline for '{name}', record the baselines with '--benchmark-update'.")
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        ("name", "response"),
+        [
+            ("first_page_nojs", {"url": "https://quotes.toscrape.com/page/1/", "path": "quotes/first_page_nojs.html"}),
+            (
+                "second_page_nojs",
+                {"url": "https://quotes.toscrape.com/page/2/", "path": "quotes/second_page_nojs.html"},
+            ),
+            ("last_page_nojs", {"url": "https://quotes.toscrape.com/page/10/", "path": "quotes/last_page_nojs.html"}),
+            (
+                "author_page_nojs",
+                {"url": "https://quotes.toscrape.com/author/Thomas-A-Edison/", "path": "quotes/author_page_nojs.html"},
+            ),
+            ("first_page_js", {"url": "https://quotes.toscrape.com/js/page/1/", "path": "quotes/first_page_js.html"}),
+            ("second_page_js", {"url": "https://quotes.toscrape.com/js/page/2/", "path": "quotes/second_page_js.html"}),
+            ("last_page_js", {"url": "https://quotes.toscrape.com/js/page/10/", "path": "quotes/last_page_js.html"}),
+        ],
+        indirect=["response"],
+    )
+    def test_parse_assets(self, parser_benchmark: ParserBenchmark, name: str, response: scrapy.http.Response) -> None:
+        """Benchmarks the parsing of the pages in the assets.
+
+        :param parser_benchmark: The parser benchmark.
+        :param name: The name of the page type.
+        :param response: The response to parse."""
+        self._require_baseline(parser_benchmark, name)
+        regressions = parser_benchmark.measure(name, lambda logger: QuotesParser(response, logger), iterations=20)
+
+        if regressions:
+            pytest.fail(" ".join(regressions))
+
+    @pytest.mark.parametrize(("name", "path"), [("large_page_nojs", "/page/1/"), ("large_page_js", "/js/page/1/")])
+    def test_parse_large_pages(self, parser_benchmark: ParserBenchmark, name: str, path: str) -> None:
+        """Benchmarks the parsing of synthetic pages with one thousand quotes.
+
+        :param parser_benchmark: The parser benchmark.
+        :param name: The name of the page type.
+        :param path: The path of the page in the synthetic website."""
+        self._require_baseline(parser_benchmark, name)
+        url = f"https://quotes.toscrape.com{path}"
+        response = scrapy.http.HtmlResponse(
+            request=scrapy.http.Request(url), url=url, body=LARGE_SITE.documents[path], status=200
+        )
+
+        def factory(logger: logging.Logger) -> QuotesParser:
+            """Creates the parser.
+
+            :param logger: The logger for the parser.
+            :return: The parser."""
+            return QuotesParser(response, logger)
+
+        if regressions := parser_benchmark.measure(name, factory, iterations=1):
+            pytest.fail(" ".join(regressions))
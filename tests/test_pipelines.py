@@ -0,0 +1,447 @@
+"""Tests for the pipelines."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import pytest
+import pytest_check as check
+import scrapy
+import scrapy.crawler
+import scrapy.exceptions
+
+from scrapy_tor_playwright_demo.items import AuthorItem, CompactHTMLItem, CompactQuoteItem, HTMLItem, QuoteItem
+from scrapy_tor_playwright_demo.pipelines.pipelines import (
+    DedupPipeline,
+    FileSystemPipeline,
+    ParquetPipeline,
+    SQLitePipeline,
+)
+
+
+class TestFileSystemPipeline:
+    """A collection of tests for the filesystem pipeline."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+    @staticmethod
+    def __run(pipeline: FileSystemPipeline, spider: scrapy.Spider, items: list) -> None:
+        """Runs the pipeline as in a crawl, waiting for the deletion of the old generations.
+
+        :param pipeline: The pipeline.
+        :param spider: The spider.
+        :param items: The items to store."""
+        pipeline.open_spider(spider)
+        for item in items:
+            check.is_(pipeline.process_item(item, spider), item)
+        for thread in threading.enumerate():
+            if thread.name == "fs-pipeline-gc":
+                thread.join()
+        check.is_none(pipeline.close_spider(spider))
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"FS_PIPELINE_FOLDER": "fs", "FS_PIPELINE_INCREMENTAL": True, "FS_PIPELINE_KEEP_GENERATIONS": 2}],
+        indirect=True,
+    )
+    def test_incremental(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests each run writes a new generation recorded in the manifest, and the generations not kept and those of
+        runs that never finished are deleted.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the items.
+        :param monkeypatch: The monkeypatch, to store the items in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        spider = scrapy.Spider("quotes")
+        generations_path = os.path.join(tmp_path, "fs", "quotes", "generations")
+        quote = QuoteItem(text="It is our choices.", author="J.K. Rowling", tags=["choices"])
+
+        names = []
+        for run in range(3):
+            if run == 1:
+                # A run that never finished, older than the next ones.
+                os.makedirs(os.path.join(generations_path, "00000000T000000-unfinished"))
+            html = HTMLItem(body="<html>Café</html>".encode("latin-1"), encoding="cp1252")
+            self.__run(FileSystemPipeline.from_crawler(crawler), spider, [quote, html])
+            with open(os.path.join(tmp_path, "fs", "quotes", "LATEST"), "r", encoding="utf8") as stream:
+                names.append(stream.read())
+
+        check.equal(sorted(os.listdir(generations_path)), names[1:])
+        with open(os.path.join(tmp_path, "fs", "quotes", "manifest.jsonl"), "r", encoding="utf8") as stream:
+            records = [json.loads(line) for line in stream]
+        check.equal([record["generation"] for record in records], names[1:])
+        check.equal([record["items"] for record in records], [2, 2])
+        with open(os.path.join(generations_path, names[-1], "items.jsonl"), "r", encoding="utf8") as stream:
+            entries = [json.loads(line) for line in stream]
+        check.equal([entry["type"] for entry in entries], ["quote", "html"])
+        for entry in entries:
+            check.is_true(os.path.isfile(os.path.join(generations_path, names[-1], entry["file"])))
+        # The HTML document is written with the bytes as received, and its encoding is recorded.
+        check.equal(entries[1]["encoding"], "cp1252")
+        with open(os.path.join(generations_path, names[-1], entries[1]["file"]), "rb") as stream:
+            check.equal(stream.read(), b"<html>Caf\xe9</html>")
+
+    @pytest.mark.parametrize(
+        "crawler", [{"FS_PIPELINE_FOLDER": "fs", "FS_PIPELINE_INCREMENTAL": False}], indirect=True
+    )
+    def test_replace(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests each run replaces the items of the previous run when not in incremental mode.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the items.
+        :param monkeypatch: The monkeypatch, to store the items in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        spider = scrapy.Spider("quotes")
+        for _ in range(2):
+            pipeline = FileSystemPipeline.from_crawler(crawler)
+            pipeline.open_spider(spider)
+            pipeline.process_item(QuoteItem(text="It is our choices.", author="J.K. Rowling", tags=[]), spider)
+            check.is_none(pipeline.close_spider(spider))
+
+        check.equal(len(os.listdir(os.path.join(tmp_path, "fs", "quotes"))), 1)
+
+    @pytest.mark.parametrize(
+        "crawler", [{"FS_PIPELINE_FOLDER": "fs", "FS_PIPELINE_INCREMENTAL": True}], indirect=True
+    )
+    def test_spooled(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests the documents spooled to a file are moved into the generation, with their items pointing to the moved
+        file, and hashed from the file unless their digest was computed while spooling them.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the items.
+        :param monkeypatch: The monkeypatch, to store the items in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        spooled = {"html": b"<html>" + b"Quotes." * 1000 + b"</html>", "image": b"\x89PNG\r\n"}
+        for name, body in spooled.items():
+            with open(os.path.join(tmp_path, f"{name}.body"), "wb") as stream:
+                stream.write(body)
+        html = HTMLItem(body=None, encoding="utf-8", path=os.path.join(tmp_path, "html.body"))
+        # The digest computed while spooling is trusted, so it is not the one of the file.
+        image = CompactHTMLItem(
+            body=None, encoding=None, path=os.path.join(tmp_path, "image.body"), digest=hashlib.sha256(b"").digest()
+        )
+
+        self.__run(FileSystemPipeline.from_crawler(crawler), scrapy.Spider("quotes"), [html, image])
+
+        for name, item in zip(spooled, [html, image]):
+            check.is_false(os.path.exists(os.path.join(tmp_path, f"{name}.body")))
+            with open(item["path"] if isinstance(item, HTMLItem) else item.path, "rb") as stream:
+                check.equal(stream.read(), spooled[name])
+        check.is_true(html["path"].endswith(".html"))
+        check.is_true(image.path.endswith(".bin"))
+        with open(os.path.join(os.path.dirname(html["path"]), "items.jsonl"), "r", encoding="utf8") as stream:
+            entries = [json.loads(line) for line in stream]
+        check.equal(
+            [(entry["file"], entry["hash"], entry["encoding"]) for entry in entries],
+            [
+                (os.path.basename(html["path"]), hashlib.sha256(spooled["html"]).hexdigest(), "utf-8"),
+                (os.path.basename(image.path), hashlib.sha256(b"").hexdigest(), None),
+            ],
+        )
+        check.equal(html["digest"], hashlib.sha256(spooled["html"]).digest())
+
+
+class TestDedupPipeline:
+    """A collection of tests for the deduplication pipeline."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler", [{"DEDUP_PIPELINE_ENABLED": True, "DEDUP_PIPELINE_MAX_ENTRIES": 2}], indirect=True
+    )
+    def test_dedup(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests repeats are dropped and counted per type of item, and the least recently seen are evicted when full.
+
+        :param crawler: The crawler."""
+        pipeline, spider = DedupPipeline.from_crawler(crawler), scrapy.Spider("quotes")
+        quote = QuoteItem(text="It is our choices.", author="J.K. Rowling", tags=["choices"])
+
+        pipeline.open_spider(spider)
+        check.is_(pipeline.process_item(quote, spider), quote)
+        # The same quote in another page, with different whitespace and tags and as a compact item.
+        with pytest.raises(scrapy.exceptions.DropItem):
+            pipeline.process_item(CompactQuoteItem(text="It is our  choices.", author="J.K. Rowling", tags=[]), spider)
+        pipeline.process_item(AuthorItem(name="J.K. Rowling", description="Born in Yate."), spider)
+        with pytest.raises(scrapy.exceptions.DropItem):
+            pipeline.process_item(AuthorItem(name="J.K. Rowling", description=""), spider)
+        # Evicts the quote, which is the least recently seen.
+        pipeline.process_item(HTMLItem(body=b"<html></html>", encoding="utf-8"), spider)
+        check.is_(pipeline.process_item(quote, spider), quote)
+        pipeline.close_spider(spider)
+
+        stats = crawler.stats.get_stats()
+        check.equal(stats.get("dedup/unique/quote"), 2)
+        check.equal(stats.get("dedup/dropped/quote"), 1)
+        check.equal(stats.get("dedup/unique/author"), 1)
+        check.equal(stats.get("dedup/dropped/author"), 1)
+        check.equal(stats.get("dedup/unique/html"), 1)
+
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"DEDUP_PIPELINE_ENABLED": True, "DEDUP_PIPELINE_MAX_ENTRIES": 1, "DEDUP_PIPELINE_PATH": "seen.sqlite3"}],
+        indirect=True,
+    )
+    def test_persistent(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests repeats are dropped across runs and after being evicted from memory when persistent.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the database.
+        :param monkeypatch: The monkeypatch, to create the database in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        spider = scrapy.Spider("quotes")
+        quotes = [QuoteItem(text=f"Quote {i}.", author="Albert Einstein", tags=[]) for i in range(3)]
+
+        pipeline = DedupPipeline.from_crawler(crawler)
+        pipeline.open_spider(spider)
+        for quote in quotes:
+            pipeline.process_item(quote, spider)
+        with pytest.raises(scrapy.exceptions.DropItem):
+            pipeline.process_item(quotes[0], spider)
+        pipeline.close_spider(spider)
+
+        pipeline = DedupPipeline.from_crawler(crawler)
+        pipeline.open_spider(spider)
+        for quote in quotes:
+            with pytest.raises(scrapy.exceptions.DropItem):
+                pipeline.process_item(quote, spider)
+        check.is_(pipeline.process_item(item := QuoteItem(text="New.", author="", tags=[]), spider), item)
+        pipeline.close_spider(spider)
+
+    @pytest.mark.parametrize(
+        "crawler",
+        [
+            {
+                "DEDUP_PIPELINE_ENABLED": True,
+                "DEDUP_PIPELINE_PATH": "seen.sqlite3",
+                "ITEM_PIPELINES": {"scrapy_tor_playwright_demo.pipelines.pipelines.FileSystemPipeline": 300},
+            }
+        ],
+        indirect=True,
+    )
+    def test_persistent_requires_incremental(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the hashes are not kept across runs if the file system pipeline replaces the items of the previous
+        run, as the items seen in it would be lost.
+
+        :param crawler: The crawler."""
+        with pytest.raises(ValueError):
+            DedupPipeline.from_crawler(crawler)
+
+        crawler.settings.frozen = False
+        crawler.settings.set("FS_PIPELINE_INCREMENTAL", True)
+        check.is_instance(DedupPipeline.from_crawler(crawler), DedupPipeline)
+
+    @pytest.mark.parametrize("crawler", [{"DEDUP_PIPELINE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the pipeline is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            DedupPipeline.from_crawler(crawler)
+
+
+class TestSQLitePipeline:
+    """A collection of tests for the SQLite pipeline."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"SQLITE_PIPELINE_ENABLED": True, "SQLITE_PIPELINE_PATH": "quotes.sqlite3", "SQLITE_PIPELINE_BATCH_SIZE": 2}],
+        indirect=True,
+    )
+    def test_store(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests quotes, authors, tags and documents are stored normalized and deduplicated, and can be queried by
+        author and by tag.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the database.
+        :param monkeypatch: The monkeypatch, to create the database in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        pipeline, spider = SQLitePipeline.from_crawler(crawler), scrapy.Spider("quotes")
+        items = [
+            QuoteItem(text="The world as we have created it.", author="Albert Einstein", tags=["change", "world"]),
+            # The same quote found in another page, with different whitespace and as a compact item.
+            CompactQuoteItem(text="The world as we have created it.", author="Albert  Einstein", tags=["world"]),
+            QuoteItem(text="It is our choices.", author="J.K. Rowling", tags=["choices"]),
+            QuoteItem(text="Try not to become a man of success.", author="Albert Einstein", tags=["success"]),
+            AuthorItem(name="Albert Einstein", description="Born in Ulm."),
+            HTMLItem(body=b"<html></html>", encoding="utf-8"),
+            HTMLItem(body=b"<html></html>", encoding="utf-8"),
+        ]
+
+        pipeline.open_spider(spider)
+        for item in items:
+            check.is_(pipeline.process_item(item, spider), item)
+        pipeline.close_spider(spider)
+        for thread in threading.enumerate():
+            if thread.name == "sqlite-pipeline-writer":
+                thread.join()
+
+        with sqlite3.connect(os.path.join(tmp_path, "quotes.sqlite3")) as connection:
+            counts = {
+                table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("quotes", "authors", "tags", "documents")
+            }
+            check.equal(counts, {"quotes": 3, "authors": 2, "tags": 4, "documents": 1})
+            check.equal(
+                connection.execute(
+                    "SELECT quotes.text FROM quotes JOIN authors ON authors.id = quotes.author_id "
+                    "WHERE authors.name = ? ORDER BY quotes.id",
+                    ("Albert Einstein",),
+                ).fetchall(),
+                [("The world as we have created it.",), ("Try not to become a man of success.",)],
+            )
+            check.equal(
+                connection.execute(
+                    "SELECT quotes.text FROM quotes JOIN quote_tags ON quote_tags.quote_id = quotes.id "
+                    "JOIN tags ON tags.id = quote_tags.tag_id WHERE tags.name = ?",
+                    ("choices",),
+                ).fetchall(),
+                [("It is our choices.",)],
+            )
+            check.equal(
+                connection.execute("SELECT description FROM authors WHERE name = ?", ("Albert Einstein",)).fetchone(),
+                ("Born in Ulm.",),
+            )
+            body, encoding = connection.execute("SELECT body, encoding FROM documents").fetchone()
+            check.equal(zlib.decompress(body), b"<html></html>")
+            check.equal(encoding, "utf-8")
+            check.equal(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            check.is_true({"authors_name", "quotes_author_id", "quote_tags_tag_id"} <= indexes)
+
+    @pytest.mark.parametrize(
+        "crawler", [{"SQLITE_PIPELINE_ENABLED": True, "SQLITE_PIPELINE_PATH": "quotes.sqlite3"}], indirect=True
+    )
+    def test_spooled(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests the documents spooled to a file are compressed from the file, deduplicated with the same documents
+        not spooled, and that bodies that are not text are not stored.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the database.
+        :param monkeypatch: The monkeypatch, to create the database in the temporary folder."""
+        monkeypatch.chdir(tmp_path)
+        pipeline, spider = SQLitePipeline.from_crawler(crawler), scrapy.Spider("quotes")
+        body = b"<html>" + b"Quotes." * 1000 + b"</html>"
+        with open(os.path.join(tmp_path, "html.body"), "wb") as stream:
+            stream.write(body)
+
+        pipeline.open_spider(spider)
+        pipeline.process_item(HTMLItem(body=None, encoding="utf-8", path=os.path.join(tmp_path, "html.body")), spider)
+        pipeline.process_item(HTMLItem(body=body, encoding="utf-8"), spider)
+        image = CompactHTMLItem(body=None, encoding=None, path=os.path.join(tmp_path, "html.body"))
+        pipeline.process_item(image, spider)
+        pipeline.close_spider(spider)
+        for thread in threading.enumerate():
+            if thread.name == "sqlite-pipeline-writer":
+                thread.join()
+
+        with sqlite3.connect(os.path.join(tmp_path, "quotes.sqlite3")) as connection:
+            rows = connection.execute("SELECT body, encoding FROM documents").fetchall()
+        check.equal([(zlib.decompress(compressed), encoding) for compressed, encoding in rows], [(body, "utf-8")])
+
+    @pytest.mark.parametrize("crawler", [{"SQLITE_PIPELINE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the pipeline is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            SQLitePipeline.from_crawler(crawler)
+
+
+class TestParquetPipeline:
+    """A collection of tests for the Parquet pipeline."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    @pytest.mark.parametrize(
+        "crawler",
+        [{"PARQUET_PIPELINE_ENABLED": True, "PARQUET_PIPELINE_FOLDER": "parquet", "PARQUET_PIPELINE_BATCH_SIZE": 2}],
+        indirect=True,
+    )
+    def test_export(
+        self, crawler: scrapy.crawler.Crawler, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tests quotes and authors are written in row groups of a batch, with dictionary encoded authors and tags, and
+        the buffered rows are written when the spider is closed.
+
+        :param crawler: The crawler.
+        :param tmp_path: A temporary folder for the files.
+        :param monkeypatch: The monkeypatch, to create the files in the temporary folder."""
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.chdir(tmp_path)
+        pipeline, spider = ParquetPipeline.from_crawler(crawler), scrapy.Spider("quotes")
+        quotes = [
+            QuoteItem(text="The world as we have created it.", author="Albert Einstein", tags=["change", "world"]),
+            CompactQuoteItem(text="Try not to become a man of success.", author="Albert Einstein", tags=["success"]),
+            QuoteItem(text="It is our choices.", author="J.K. Rowling", tags=[]),
+        ]
+
+        pipeline.open_spider(spider)
+        author = AuthorItem(name="Albert Einstein", description="Born in Ulm.")
+        for item in (*quotes, author, HTMLItem(body=b"", encoding="utf-8")):
+            check.is_(pipeline.process_item(item, spider), item)
+        check.equal(len(os.listdir(os.path.join(tmp_path, "parquet"))), 1)
+        pipeline.close_spider(spider)
+
+        files = sorted(os.listdir(os.path.join(tmp_path, "parquet")))
+        check.equal([name.split("-")[0] for name in files], ["author", "quote"])
+        check.is_true(all(name.endswith(".parquet") for name in files))
+        quotes_file = pyarrow_parquet.ParquetFile(os.path.join(tmp_path, "parquet", files[1]))
+        check.equal(quotes_file.metadata.num_row_groups, 2)
+        table = quotes_file.read()
+        check.equal(str(table.schema.field("author").type), "dictionary<values=string, indices=int32, ordered=0>")
+        check.equal(
+            table.to_pylist(),
+            [
+                {"text": "The world as we have created it.", "author": "Albert Einstein", "tags": ["change", "world"]},
+                {"text": "Try not to become a man of success.", "author": "Albert Einstein", "tags": ["success"]},
+                {"text": "It is our choices.", "author": "J.K. Rowling", "tags": []},
+            ],
+        )
+        authors = pyarrow_parquet.read_table(os.path.join(tmp_path, "parquet", files[0])).to_pylist()
+        check.equal(authors, [{"name": "Albert Einstein", "description": "Born in Ulm."}])
+        check.equal(crawler.stats.get_value("parquet/rows/quote"), 3)
+        check.equal(crawler.stats.get_value("parquet/files"), 2)
+
+    @pytest.mark.parametrize("crawler", [{"PARQUET_PIPELINE_ENABLED": False}], indirect=True)
+    def test_disabled(self, crawler: scrapy.crawler.Crawler) -> None:
+        """Tests the pipeline is not configured unless enabled.
+
+        :param crawler: The crawler."""
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            ParquetPipeline.from_crawler(crawler)
@@ -1,12 +1,22 @@
 """Tests for the Quotes spider and related functionality."""
 
+import json
 import logging
+import os
+import sys
 
+import itemadapter
 import pytest
 import pytest_check as check
+import pytest_mock
 import scrapy.http
 
-from scrapy_tor_playwright_demo.items import QuotesParser
+from scrapy_tor_playwright_demo.defs import SpooledBody
+from scrapy_tor_playwright_demo.items import CompactHTMLItem, CompactItemBase, HTMLItem, QuotesParser
+from scrapy_tor_playwright_demo.items.defs import RouteRegistry
+
+#: Path to the HTML files of the quotes website.
+ASSETS_PATH = os.path.join(os.path.dirname(__file__), "assets", "quotes")
 
 
 class TestQuotesParser:
@@ -116,3 +126,127 @@ class TestQuotesParser:
 
         check.equal(len(parser.requests), 0)
         check.equal(len(parser.items), 10)
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            {"url": "https://quotes.toscrape.com/page/1/", "path": "quotes/first_page_nojs.html"},
+            {"url": "https://quotes.toscrape.com/author/Thomas-A-Edison/", "path": "quotes/author_page_nojs.html"},
+        ],
+        indirect=True,
+    )
+    def test_parse_compact_items(self, response: scrapy.http.Response) -> None:
+        """Tests the compact items hold the same data as the Scrapy items, intern the repeated strings and serialize
+        to the same JSON.
+
+        :param response: The response to parse."""
+        items = QuotesParser(response, logger=logging.getLogger()).parse().items
+        compact_items = QuotesParser(response, logger=logging.getLogger(), compact_items=True).parse().items
+
+        check.equal(len(compact_items), len(items))
+        for item, compact_item in zip(items, compact_items):
+            expected = json.dumps(dict(item), indent=2)
+            check.is_instance(compact_item, CompactItemBase)
+            check.is_false(hasattr(compact_item, "__dict__"))
+            check.equal(compact_item.to_bytes().decode("utf8"), expected)
+            check.equal(json.dumps(itemadapter.ItemAdapter(compact_item).asdict(), indent=2), expected)
+            for name in getattr(compact_item, "_interned"):
+                value = getattr(compact_item, name)
+                for string in (value,) if isinstance(value, str) else value:
+                    check.is_(string, sys.intern(string))
+
+    @pytest.mark.parametrize("compact_items", [False, True])
+    def test_parse_fallback(self, mocker: pytest_mock.MockerFixture, compact_items: bool) -> None:
+        """Tests pages without the markers of any known type are told apart from their bytes, without building a tree,
+        and stored with the body as received, unless their encoding is not compatible with ASCII.
+
+        :param mocker: The mocker, to spy on the creation of trees.
+        :param compact_items: Whether to parse compact items instead of Scrapy items."""
+        as_bs4_obj = mocker.spy(QuotesParser, "_as_bs4_obj")
+        body = "<html><head><meta charset='cp1252'></head><body>Vérification</body></html>".encode("cp1252")
+        response = scrapy.http.HtmlResponse(url="https://quotes.toscrape.com/page/1/", body=body)
+
+        parser = QuotesParser(response, logger=logging.getLogger(), compact_items=compact_items).parse()
+
+        check.equal(parser.page_type, "html")
+        check.equal(as_bs4_obj.call_count, 0)
+        check.equal(len(parser.items), 1)
+        check.is_instance(parser.items[0], CompactHTMLItem if compact_items else HTMLItem)
+        item = itemadapter.ItemAdapter(parser.items[0])
+        check.is_(item["body"], response.body)
+        check.equal(item["encoding"], "cp1252")
+
+        # The markers can not be searched in the bytes of UTF-16, so the tree is built.
+        response = scrapy.http.HtmlResponse(
+            url="https://quotes.toscrape.com/page/1/", body=body.decode("cp1252").encode("utf-16"), encoding="utf-16"
+        )
+        check.equal(QuotesParser(response, logger=logging.getLogger()).parse().page_type, "html")
+        check.equal(as_bs4_obj.call_count, 1)
+
+    @pytest.mark.parametrize("compact_items", [False, True])
+    def test_parse_spooled(self, mocker: pytest_mock.MockerFixture, compact_items: bool) -> None:
+        """Tests pages whose body was spooled to a file are stored as an item that points to the file, even on the
+        route of a known type, without decoding the body nor building a tree.
+
+        :param mocker: The mocker, to spy on the creation of trees.
+        :param compact_items: Whether to parse compact items instead of Scrapy items."""
+        as_bs4_obj = mocker.spy(QuotesParser, "_as_bs4_obj")
+        spooled = SpooledBody(
+            path="/tmp/spool-test/page.body", size=64 * 1024 * 1024, encoding="cp1252", digest=bytes(32)
+        )
+        request = scrapy.http.Request("https://quotes.toscrape.com/page/1/", meta={"spool": spooled})
+        response = scrapy.http.HtmlResponse(url=request.url, body=b"", encoding="cp1252", request=request)
+
+        parser = QuotesParser.for_response(response, logger=logging.getLogger(), compact_items=compact_items).parse()
+
+        check.equal(parser.page_type, "html")
+        check.equal(as_bs4_obj.call_count, 0)
+        check.equal(len(parser.items), 1)
+        check.is_instance(parser.items[0], CompactHTMLItem if compact_items else HTMLItem)
+        item = itemadapter.ItemAdapter(parser.items[0])
+        check.equal((item["body"], item["encoding"], item["path"]), (None, "cp1252", spooled.path))
+        check.equal(item["digest"], spooled.digest)
+        with pytest.raises(RuntimeError):
+            _ = parser._html  # pylint: disable=protected-access
+
+    def test_route_registry(self) -> None:
+        """Tests the routes match whole paths with placeholders for segments, and the latest registered take
+        precedence."""
+        registry, other = RouteRegistry(), type("OtherParser", (), {})
+        check.is_none(registry.match("https://quotes.toscrape.com/page/1/"))
+        registry.register(QuotesParser, {"/page/<n>/": "quotes_nojs", "/author/<slug>/": "author"})
+        registry.register(other, {"/author/<slug>/": "other"})
+
+        check.equal(len(registry), 3)
+        check.equal(registry.match("https://quotes.toscrape.com/page/2/?q=1"), (QuotesParser, "quotes_nojs"))
+        check.equal(registry.match("https://quotes.toscrape.com/author/Albert-Einstein/"), (other, "other"))
+        check.is_none(registry.match("https://quotes.toscrape.com/page/2/extra/"))
+        check.is_none(registry.match("https://quotes.toscrape.com/page/"))
+        with pytest.raises(ValueError):
+            registry.register(QuotesParser, {"page/<n>/": "quotes_nojs"})
+
+    @pytest.mark.parametrize(
+        "response",
+        [{"url": "https://quotes.toscrape.com/author/Thomas-A-Edison/", "path": "quotes/author_page_nojs.html"}],
+        indirect=True,
+    )
+    def test_parse_routed(self, mocker: pytest_mock.MockerFixture, response: scrapy.http.Response) -> None:
+        """Tests the parser and the type of page are found from the URL, without inspecting the tree, unless the page
+        does not have the marker of the type of its route.
+
+        :param mocker: The mocker, to spy on the creation of trees.
+        :param response: The response to parse."""
+        as_bs4_obj = mocker.spy(QuotesParser, "_as_bs4_obj")
+
+        parser = QuotesParser.for_response(response, logger=logging.getLogger()).parse()
+
+        check.is_instance(parser, QuotesParser)
+        check.equal(parser.page_type, "author")
+        check.equal(len(parser.items), 1)
+        # Only the tree with the fixed HTML of the author page is built.
+        check.equal(as_bs4_obj.call_count, 1)
+
+        # A page of quotes served at the route of an author.
+        with open(os.path.join(ASSETS_PATH, "first_page_nojs.html"), "rb") as stream:
+            response = response.replace(body=stream.read())
+        check.equal(QuotesParser.for_response(response).parse().page_type, "quotes_nojs")
@@ -0,0 +1,50 @@
+"""Benchmarks for the cold start of the project, the full benchmark is run with
+``python -m tests.benchmarks.startup``."""
+
+import pytest
+import pytest_check as check
+
+from tests.benchmarks.startup import HEAVY_MODULES, StartupMeasurement, parse_importtime
+
+
+@pytest.mark.benchmark
+class TestStartupBenchmarks:
+    """A collection of benchmarks for the cold start."""
+
+    # pylint: disable=no-self-use
+
+    ## Private API #####################################################################################################
+
+    ## Protected API ###################################################################################################
+
+    ## Public API ######################################################################################################
+    def test_parse_importtime(self) -> None:
+        """Tests the output of ``-X importtime`` is parsed, counting only the top level imports in the total."""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   _io\n"
+            "import time:       200 |        300 | io\n"
+            "import time:       500 |        500 | json\n"
+        )
+        total, modules = parse_importtime(output)
+
+        check.almost_equal(total, 0.0008)
+        check.equal(modules, {"_io": 0.0001, "io": 0.0003, "json": 0.0005})
+
+    @pytest.mark.parametrize("name", ["import_items", "scrapy_crawl"])
+    def test_heavy_modules_are_lazy(self, startup: dict[str, StartupMeasurement], name: str) -> None:
+        """Tests the browser and parsing stacks are not imported until they are used.
+
+        :param startup: The cold start measurements.
+        :param name: The name of the command."""
+        measurement = startup[name]
+
+        check.is_in("scrapy_tor_playwright_demo.items", measurement.modules)
+        for module in HEAVY_MODULES:
+            check.is_not_in(module, measurement.modules)
+
+    def test_import_items_is_cheaper_than_crawl(self, startup: dict[str, StartupMeasurement]) -> None:
+        """Tests importing the items takes less than starting a crawl, which also imports them.
+
+        :param startup: The cold start measurements."""
+        check.less(startup["import_items"].import_time, startup["scrapy_crawl"].import_time)